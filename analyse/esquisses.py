@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Structures probabilistes à mémoire bornée (sketches)
+====================================================
+
+Utilisées par les outils d'analyse qui parcourent des fichiers de plusieurs Go
+en une seule passe. Chaque structure est fusionnable : un traitement parallèle
+par blocs produit des états partiels que l'on combine ensuite.
+"""
+
+import hashlib
+import math
+from array import array
+
+def hachage_64(valeur) -> int:
+    """Hachage 64 bits stable entre processus (contrairement à hash())"""
+    if not isinstance(valeur, bytes):
+        valeur = str(valeur).encode("utf-8", errors="replace")
+    return int.from_bytes(hashlib.blake2b(valeur, digest_size=8).digest(), "big")
+
+class HyperLogLog:
+    """
+    Estimation du nombre de valeurs distinctes avec 2^precision registres d'un octet.
+    Erreur relative typique : 1.04 / sqrt(2^precision) (~0.8 % pour precision=14).
+    """
+
+    def __init__(self, precision=14):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision doit être comprise entre 4 et 18")
+        self.precision = precision
+        self.nb_registres = 1 << precision
+        self.registres = bytearray(self.nb_registres)
+
+    def ajouter(self, valeur):
+        h = hachage_64(valeur)
+        indice = h >> (64 - self.precision)
+        reste = h & ((1 << (64 - self.precision)) - 1)
+        rang = (64 - self.precision) - reste.bit_length() + 1
+        if rang > self.registres[indice]:
+            self.registres[indice] = rang
+
+    def fusionner(self, autre: "HyperLogLog"):
+        if autre.precision != self.precision:
+            raise ValueError("Impossible de fusionner des HyperLogLog de précisions différentes")
+        self.registres = bytearray(max(a, b) for a, b in zip(self.registres, autre.registres))
+        return self
+
+    @property
+    def erreur_relative(self) -> float:
+        return 1.04 / math.sqrt(self.nb_registres)
+
+    def estimer(self) -> int:
+        m = self.nb_registres
+        alpha = 0.7213 / (1 + 1.079 / m) if m >= 128 else {16: 0.673, 32: 0.697, 64: 0.709}[m]
+        somme = 0.0
+        registres_vides = 0
+        for r in self.registres:
+            somme += 2.0 ** -r
+            if r == 0:
+                registres_vides += 1
+        estimation = alpha * m * m / somme
+        # Correction petite portée : comptage linéaire
+        if estimation <= 2.5 * m and registres_vides:
+            estimation = m * math.log(m / registres_vides)
+        return int(round(estimation))
+
+    def etat(self):
+        """État sérialisable (pour l'échange entre processus ou un rapport JSON)"""
+        return {"precision": self.precision, "registres": bytes(self.registres)}
+
+    @classmethod
+    def depuis_etat(cls, etat):
+        hll = cls(etat["precision"])
+        hll.registres = bytearray(etat["registres"])
+        return hll
+
+class MisraGries:
+    """
+    Éléments fréquents avec au plus k compteurs.
+    Chaque compteur sous-estime la fréquence réelle d'au plus total / (k + 1).
+    """
+
+    def __init__(self, k=100):
+        if k < 1:
+            raise ValueError("k doit être strictement positif")
+        self.k = k
+        self.compteurs = {}
+        self.total = 0
+
+    def ajouter(self, valeur, quantite=1):
+        self.total += quantite
+        compteurs = self.compteurs
+        if valeur in compteurs:
+            compteurs[valeur] += quantite
+            return
+        while quantite > 0 and len(compteurs) >= self.k:
+            # Décrémenter tous les compteurs du plus petit d'entre eux (ou de la quantité restante)
+            decrement = min(quantite, min(compteurs.values()))
+            quantite -= decrement
+            for cle in list(compteurs):
+                compteurs[cle] -= decrement
+                if compteurs[cle] <= 0:
+                    del compteurs[cle]
+        if quantite > 0:
+            compteurs[valeur] = quantite
+
+    @property
+    def borne_erreur(self) -> float:
+        return self.total / (self.k + 1)
+
+    def fusionner(self, autre: "MisraGries"):
+        """Fusion conservant la borne total / (k + 1) (résumés fusionnables)"""
+        for valeur, compte in autre.compteurs.items():
+            self.compteurs[valeur] = self.compteurs.get(valeur, 0) + compte
+        self.total += autre.total
+        if len(self.compteurs) > self.k:
+            seuil = sorted(self.compteurs.values(), reverse=True)[self.k]
+            self.compteurs = {v: c - seuil for v, c in self.compteurs.items() if c > seuil}
+        return self
+
+    def plus_frequents(self, n=None):
+        return sorted(self.compteurs.items(), key=lambda x: x[1], reverse=True)[:n]
+
+class CountMinSketch:
+    """
+    Fréquences approximées dans une matrice profondeur x largeur.
+    Surestimation d'au plus epsilon * total avec une probabilité 1 - delta.
+    """
+
+    def __init__(self, epsilon=0.0005, delta=0.001):
+        if not (0 < epsilon < 1 and 0 < delta < 1):
+            raise ValueError("epsilon et delta doivent être compris entre 0 et 1")
+        self.epsilon = epsilon
+        self.delta = delta
+        self.largeur = math.ceil(math.e / epsilon)
+        self.profondeur = math.ceil(math.log(1 / delta))
+        self.tables = [array("Q", bytes(8 * self.largeur)) for _ in range(self.profondeur)]
+        self.total = 0
+
+    def _indices(self, valeur):
+        # Double hachage : une seule empreinte 64 bits pour toutes les lignes
+        h = hachage_64(valeur)
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [(h1 + i * h2) % self.largeur for i in range(self.profondeur)]
+
+    def ajouter(self, valeur, quantite=1):
+        self.total += quantite
+        for table, indice in zip(self.tables, self._indices(valeur)):
+            table[indice] += quantite
+
+    def estimer(self, valeur) -> int:
+        return min(table[indice] for table, indice in zip(self.tables, self._indices(valeur)))
+
+    @property
+    def borne_erreur(self) -> float:
+        return self.epsilon * self.total
+
+    def fusionner(self, autre: "CountMinSketch"):
+        if (autre.largeur, autre.profondeur) != (self.largeur, self.profondeur):
+            raise ValueError("Impossible de fusionner des Count-Min de dimensions différentes")
+        for table, table_autre in zip(self.tables, autre.tables):
+            for i, valeur in enumerate(table_autre):
+                if valeur:
+                    table[i] += valeur
+        self.total += autre.total
+        return self
+
+def frequents_avec_bornes(misra_gries: MisraGries, count_min: CountMinSketch, n=20):
+    """
+    Top-n combinant les deux esquisses : Misra-Gries fournit les candidats et une
+    borne basse, Count-Min une borne haute. La fréquence réelle est dans l'intervalle.
+    """
+    resultats = []
+    for valeur, compte in misra_gries.plus_frequents():
+        estimation = count_min.estimer(valeur)
+        borne_sup = min(estimation, compte + misra_gries.borne_erreur)
+        resultats.append({
+            "valeur": valeur,
+            "estimation": estimation,
+            "borne_inf": compte,
+            "borne_sup": int(borne_sup),
+        })
+    resultats.sort(key=lambda r: (r["estimation"], r["borne_inf"]), reverse=True)
+    return resultats[:n]
+
+class TDigest:
+    """
+    Quantiles approximés par centroïdes (t-digest fusionnant, fonction d'échelle k1).
+    Les centroïdes sont petits aux extrémités : précision relative meilleure
+    sur les quantiles extrêmes que sur la médiane.
+    """
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.centroides = []  # [(moyenne, poids)] triés par moyenne
+        self.tampon = []
+        self.taille_tampon = 5 * compression
+        self.total = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def ajouter(self, valeur, poids=1):
+        self.tampon.append((valeur, poids))
+        self.total += poids
+        if valeur < self.min:
+            self.min = valeur
+        if valeur > self.max:
+            self.max = valeur
+        if len(self.tampon) >= self.taille_tampon:
+            self._compresser()
+
+    def _echelle(self, q):
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _echelle_inverse(self, k):
+        return (math.sin(k * 2 * math.pi / self.compression) + 1) / 2
+
+    def _compresser(self):
+        if not self.tampon:
+            return
+        points = sorted(self.centroides + self.tampon)
+        self.tampon = []
+        total = sum(poids for _, poids in points)
+
+        nouveaux = []
+        cumul = 0
+        moyenne, poids = points[0]
+        q_limite = self._echelle_inverse(self._echelle(0) + 1)
+        for valeur, poids_point in points[1:]:
+            if (cumul + poids + poids_point) / total <= q_limite:
+                poids += poids_point
+                moyenne += (valeur - moyenne) * poids_point / poids
+            else:
+                nouveaux.append((moyenne, poids))
+                cumul += poids
+                q_limite = self._echelle_inverse(self._echelle(min(cumul / total, 1.0)) + 1)
+                moyenne, poids = valeur, poids_point
+        nouveaux.append((moyenne, poids))
+        self.centroides = nouveaux
+
+    def _localiser(self, q):
+        """Indice du centroïde couvrant le rang q * total et rang cumulé avant lui"""
+        cible = q * self.total
+        cumul = 0
+        for i, (_, poids) in enumerate(self.centroides):
+            if cumul + poids >= cible:
+                return i, cumul
+            cumul += poids
+        return len(self.centroides) - 1, cumul - self.centroides[-1][1]
+
+    def quantile(self, q):
+        self._compresser()
+        if not self.centroides:
+            return None
+        if len(self.centroides) == 1:
+            return self.centroides[0][0]
+
+        cible = q * self.total
+        # Interpolation linéaire entre centres de centroïdes (min / max aux bords)
+        precedent_position, precedent_valeur = 0, self.min
+        cumul = 0
+        for moyenne, poids in self.centroides:
+            centre = cumul + poids / 2
+            if cible <= centre:
+                if centre == precedent_position:
+                    return moyenne
+                fraction = (cible - precedent_position) / (centre - precedent_position)
+                return precedent_valeur + fraction * (moyenne - precedent_valeur)
+            precedent_position, precedent_valeur = centre, moyenne
+            cumul += poids
+        if self.total == precedent_position:
+            return self.max
+        fraction = (cible - precedent_position) / (self.total - precedent_position)
+        return precedent_valeur + fraction * (self.max - precedent_valeur)
+
+    def incertitude_rang(self, q) -> float:
+        """Borne sur l'erreur de rang au quantile q : demi-poids du centroïde couvrant ce rang"""
+        self._compresser()
+        if not self.centroides:
+            return 0.0
+        i, _ = self._localiser(q)
+        return self.centroides[i][1] / 2 / self.total
+
+    def fusionner(self, autre: "TDigest"):
+        autre._compresser()
+        self.tampon.extend(autre.centroides)
+        self.total += autre.total
+        self.min = min(self.min, autre.min)
+        self.max = max(self.max, autre.max)
+        self._compresser()
+        return self
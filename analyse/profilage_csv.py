@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Profilage parallèle de gros fichiers CSV (extractions de plusieurs Go)
+=====================================================================
+
+Contrairement à diagnostic_csv.py, le fichier n'est jamais chargé en entier :
+- l'encodage et le dialecte (séparateur, guillemets, en-tête) sont déduits
+  d'un échantillon d'octets ;
+- le fichier est découpé en blocs alignés sur les fins de ligne, profilés en
+  parallèle (une seule passe), puis les résultats partiels sont fusionnés.
+
+Par colonne : taux de valeurs nulles, inférence de type, cardinalité estimée
+(HyperLogLog), histogramme des longueurs, min/max numériques.
+
+Utilisation :
+    python profilage_csv.py fichier.csv [--workers 4] [--bloc-mo 64] [--sortie rapport.json]
+"""
+
+import csv
+import io
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from esquisses import HyperLogLog
+
+try:
+    import chardet
+    CHARDET_DISPONIBLE = True
+except ImportError:
+    CHARDET_DISPONIBLE = False
+
+VALEURS_NULLES = {"", "null", "none", "nan", "n/a", "na", "\\n"}
+
+BOMS = [
+    (b"\xef\xbb\xbf", "utf-8-sig"),
+    (b"\xff\xfe", "utf-16"),
+    (b"\xfe\xff", "utf-16"),
+]
+
+MOTIF_ENTIER = re.compile(r"^[+-]?\d+$")
+MOTIF_DECIMAL = re.compile(r"^[+-]?(\d+[.,]\d*|[.,]\d+)([eE][+-]?\d+)?$")
+MOTIF_DATE = re.compile(r"^(\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2})?)?|\d{1,2}/\d{1,2}/\d{2,4})$")
+BOOLEENS = {"true", "false", "vrai", "faux", "oui", "non", "yes", "no"}
+
+# --- Détection à partir d'un échantillon ---
+
+def detecter_encodage(echantillon: bytes):
+    """Déduire l'encodage d'un échantillon d'octets (BOM, UTF-8 strict, puis chardet)"""
+    for bom, encodage in BOMS:
+        if echantillon.startswith(bom):
+            return encodage, 1.0
+
+    # Ignorer un éventuel caractère multi-octets coupé en fin d'échantillon
+    for coupe in range(0, 4):
+        try:
+            echantillon[:len(echantillon) - coupe].decode("utf-8")
+            return "utf-8", 1.0
+        except UnicodeDecodeError:
+            continue
+
+    if CHARDET_DISPONIBLE:
+        resultat = chardet.detect(echantillon)
+        if resultat.get("encoding"):
+            return resultat["encoding"], resultat.get("confidence") or 0.0
+
+    return "cp1252", 0.5
+
+def detecter_dialecte(texte: str):
+    """Déduire le séparateur, le caractère de citation et la présence d'un en-tête"""
+    lignes = texte.splitlines()
+    # La dernière ligne de l'échantillon est probablement tronquée
+    extrait = "\n".join(lignes[:-1] if len(lignes) > 1 else lignes)
+
+    # csv.Sniffer repose sur des expressions régulières quadratiques : 16 Ko suffisent
+    extrait_sniffer = extrait[:16 * 1024]
+
+    try:
+        dialecte = csv.Sniffer().sniff(extrait_sniffer, delimiters=",;\t|")
+        separateur = dialecte.delimiter
+        guillemet = dialecte.quotechar or '"'
+    except csv.Error:
+        # Repli : séparateur dont le nombre d'occurrences est le plus stable
+        separateur, meilleur = ",", -1
+        for candidat in [",", ";", "\t", "|"]:
+            comptes = [ligne.count(candidat) for ligne in lignes[:50] if ligne]
+            if comptes and min(comptes) > 0:
+                score = Counter(comptes).most_common(1)[0][1]
+                if score > meilleur:
+                    separateur, meilleur = candidat, score
+        guillemet = '"'
+
+    try:
+        en_tete = csv.Sniffer().has_header(extrait_sniffer)
+    except csv.Error:
+        en_tete = True
+
+    # Des retours à la ligne à l'intérieur de champs cités empêchent le découpage par lignes
+    multilignes = any(
+        "\n" in champ or "\r" in champ
+        for ligne in csv.reader(io.StringIO(extrait, newline=""), delimiter=separateur, quotechar=guillemet)
+        for champ in ligne
+    )
+
+    return {"separateur": separateur, "guillemet": guillemet, "en_tete": en_tete, "multilignes": multilignes}
+
+def sniffer_fichier(chemin, taille_echantillon=1 << 20):
+    """Encodage + dialecte + noms de colonnes à partir des premiers octets du fichier"""
+    with open(chemin, "rb") as f:
+        echantillon = f.read(taille_echantillon)
+
+    encodage, confiance = detecter_encodage(echantillon)
+    texte = echantillon.decode(encodage, errors="replace")
+    dialecte = detecter_dialecte(texte)
+
+    premiere_ligne = next(csv.reader(texte.splitlines()[:1], delimiter=dialecte["separateur"],
+                                     quotechar=dialecte["guillemet"]), [])
+    if dialecte["en_tete"]:
+        colonnes = [c.strip() or f"colonne_{i + 1}" for i, c in enumerate(premiere_ligne)]
+    else:
+        colonnes = [f"colonne_{i + 1}" for i in range(len(premiere_ligne))]
+
+    return {"encodage": encodage, "confiance_encodage": round(confiance, 3), "colonnes": colonnes, **dialecte}
+
+# --- Découpage en blocs ---
+
+def decouper_en_blocs(chemin, taille_bloc):
+    """Bornes [début, fin) alignées sur les fins de ligne"""
+    taille = os.path.getsize(chemin)
+    bornes = []
+    with open(chemin, "rb") as f:
+        debut = 0
+        while debut < taille:
+            fin = min(debut + taille_bloc, taille)
+            if fin < taille:
+                f.seek(fin)
+                f.readline()
+                fin = f.tell()
+            bornes.append((debut, fin))
+            debut = fin
+    return bornes
+
+# --- Profil d'une colonne ---
+
+def inferer_type(valeur: str) -> str:
+    if MOTIF_ENTIER.match(valeur):
+        return "entier"
+    if MOTIF_DECIMAL.match(valeur):
+        return "decimal"
+    if valeur.lower() in BOOLEENS:
+        return "booleen"
+    if MOTIF_DATE.match(valeur):
+        return "date"
+    return "texte"
+
+def tranche_longueur(longueur: int) -> str:
+    """Tranches de longueur en puissances de 2 : 0, 1, 2-3, 4-7, 8-15, ..."""
+    if longueur <= 1:
+        return str(longueur)
+    bas = 1 << (longueur.bit_length() - 1)
+    return f"{bas}-{2 * bas - 1}"
+
+class ProfilColonne:
+    """Statistiques fusionnables d'une colonne"""
+
+    def __init__(self, precision_hll=14):
+        self.total = 0
+        self.nulles = 0
+        self.types = Counter()
+        self.longueurs = Counter()
+        self.longueur_min = None
+        self.longueur_max = 0
+        self.numerique_min = None
+        self.numerique_max = None
+        self.distincts = HyperLogLog(precision_hll)
+
+    def ajouter(self, valeur: str):
+        self.total += 1
+        valeur = valeur.strip()
+        if valeur.lower() in VALEURS_NULLES:
+            self.nulles += 1
+            return
+
+        type_valeur = inferer_type(valeur)
+        self.types[type_valeur] += 1
+        if type_valeur in ("entier", "decimal"):
+            try:
+                nombre = float(valeur.replace(",", "."))
+                if self.numerique_min is None or nombre < self.numerique_min:
+                    self.numerique_min = nombre
+                if self.numerique_max is None or nombre > self.numerique_max:
+                    self.numerique_max = nombre
+            except ValueError:
+                pass
+
+        longueur = len(valeur)
+        self.longueurs[tranche_longueur(longueur)] += 1
+        if self.longueur_min is None or longueur < self.longueur_min:
+            self.longueur_min = longueur
+        if longueur > self.longueur_max:
+            self.longueur_max = longueur
+        self.distincts.ajouter(valeur)
+
+    def fusionner(self, autre: "ProfilColonne"):
+        self.total += autre.total
+        self.nulles += autre.nulles
+        self.types.update(autre.types)
+        self.longueurs.update(autre.longueurs)
+        if autre.longueur_min is not None:
+            self.longueur_min = autre.longueur_min if self.longueur_min is None else min(self.longueur_min, autre.longueur_min)
+        self.longueur_max = max(self.longueur_max, autre.longueur_max)
+        for attribut, choisir in (("numerique_min", min), ("numerique_max", max)):
+            valeur = getattr(autre, attribut)
+            if valeur is not None:
+                actuelle = getattr(self, attribut)
+                setattr(self, attribut, valeur if actuelle is None else choisir(actuelle, valeur))
+        self.distincts.fusionner(autre.distincts)
+        return self
+
+    def type_dominant(self) -> str:
+        non_nulles = self.total - self.nulles
+        if not non_nulles:
+            return "vide"
+        if set(self.types) <= {"entier", "decimal"}:
+            return "decimal" if self.types["decimal"] else "entier"
+        type_principal, nombre = self.types.most_common(1)[0]
+        return type_principal if nombre / non_nulles >= 0.95 else "mixte"
+
+    def rapport(self):
+        non_nulles = self.total - self.nulles
+        cardinalite = min(self.distincts.estimer(), non_nulles)
+        return {
+            "taux_nulles": round(self.nulles / self.total, 4) if self.total else None,
+            "valeurs_non_nulles": non_nulles,
+            "type_infere": self.type_dominant(),
+            "repartition_types": dict(self.types.most_common()),
+            "cardinalite_estimee": cardinalite,
+            "erreur_relative_cardinalite": round(self.distincts.erreur_relative, 4),
+            "longueur_min": self.longueur_min,
+            "longueur_max": self.longueur_max,
+            "histogramme_longueurs": dict(sorted(self.longueurs.items(), key=lambda x: int(x[0].split("-")[0]))),
+            "min_numerique": self.numerique_min,
+            "max_numerique": self.numerique_max,
+        }
+
+# --- Traitement d'un bloc (exécuté dans un processus fils) ---
+
+def profiler_bloc(chemin, debut, fin, sniff, ignorer_en_tete, precision_hll=14):
+    """Profiler les octets [debut, fin) ; fin=None lit tout le fichier en flux"""
+    nb_colonnes = len(sniff["colonnes"])
+    profils = [ProfilColonne(precision_hll) for _ in range(nb_colonnes)]
+    lignes = 0
+    lignes_malformees = 0
+
+    if fin is None:
+        source = open(chemin, "r", encoding=sniff["encodage"], errors="replace", newline="")
+    else:
+        with open(chemin, "rb") as f:
+            f.seek(debut)
+            donnees = f.read(fin - debut)
+        source = io.StringIO(donnees.decode(sniff["encodage"], errors="replace"), newline="")
+
+    with source:
+        lecteur = csv.reader(source, delimiter=sniff["separateur"], quotechar=sniff["guillemet"])
+        lignes, lignes_malformees = _parcourir(lecteur, profils, nb_colonnes, ignorer_en_tete)
+
+    return {"lignes": lignes, "lignes_malformees": lignes_malformees, "profils": profils}
+
+def _parcourir(lecteur, profils, nb_colonnes, ignorer_en_tete):
+    lignes = 0
+    lignes_malformees = 0
+    for numero, ligne in enumerate(lecteur):
+        if numero == 0 and ignorer_en_tete:
+            continue
+        if not ligne:
+            continue
+        lignes += 1
+        if len(ligne) != nb_colonnes:
+            lignes_malformees += 1
+        for profil, valeur in zip(profils, ligne):
+            profil.ajouter(valeur)
+        # Colonnes absentes d'une ligne courte : comptées comme nulles
+        for profil in profils[len(ligne):]:
+            profil.ajouter("")
+
+    return lignes, lignes_malformees
+
+# --- Orchestration ---
+
+def profiler_csv(chemin, nb_workers=None, taille_bloc_mo=64, precision_hll=14):
+    """Profiler un CSV en une passe parallèle ; retourne le rapport (dict)"""
+    debut_chrono = time.perf_counter()
+    sniff = sniffer_fichier(chemin)
+
+    if sniff["multilignes"] or sniff["encodage"].lower().startswith("utf-16"):
+        # Champs multi-lignes (ou UTF-16) : un découpage par lignes casserait les enregistrements
+        bornes = [(0, None)]
+    else:
+        bornes = decouper_en_blocs(chemin, taille_bloc_mo * 1024 * 1024)
+
+    nb_workers = nb_workers or min(len(bornes), os.cpu_count() or 1)
+    taches = [
+        (chemin, debut, fin, sniff, debut == 0 and sniff["en_tete"], precision_hll)
+        for debut, fin in bornes
+    ]
+
+    if nb_workers > 1 and len(taches) > 1:
+        with ProcessPoolExecutor(max_workers=nb_workers) as executeur:
+            resultats = list(executeur.map(profiler_bloc, *zip(*taches)))
+    else:
+        resultats = [profiler_bloc(*tache) for tache in taches]
+
+    # Fichier vide : aucun bloc, profils vides pour les colonnes de l'en-tête éventuel
+    profils = resultats[0]["profils"] if resultats else [ProfilColonne(precision_hll) for _ in sniff["colonnes"]]
+    for resultat in resultats[1:]:
+        for profil, partiel in zip(profils, resultat["profils"]):
+            profil.fusionner(partiel)
+
+    duree = time.perf_counter() - debut_chrono
+    taille = os.path.getsize(chemin)
+    return {
+        "fichier": os.path.abspath(chemin),
+        "taille_octets": taille,
+        "encodage": sniff["encodage"],
+        "confiance_encodage": sniff["confiance_encodage"],
+        "dialecte": {
+            "separateur": sniff["separateur"],
+            "guillemet": sniff["guillemet"],
+            "en_tete": sniff["en_tete"],
+            "champs_multilignes": sniff["multilignes"],
+        },
+        "lignes": sum(r["lignes"] for r in resultats),
+        "lignes_malformees": sum(r["lignes_malformees"] for r in resultats),
+        "nb_colonnes": len(sniff["colonnes"]),
+        "colonnes": {nom: profil.rapport() for nom, profil in zip(sniff["colonnes"], profils)},
+        "execution": {
+            "blocs": len(bornes),
+            "workers": nb_workers,
+            "duree_s": round(duree, 2),
+            "debit_mo_s": round(taille / (1024 * 1024) / duree, 1) if duree else None,
+        },
+    }
+
+def main():
+    arguments = sys.argv[1:]
+    if not arguments:
+        print("Usage : python profilage_csv.py fichier.csv [--workers 4] [--bloc-mo 64] [--sortie rapport.json]")
+        return
+
+    fichier = arguments[0]
+    options = {"--workers": None, "--bloc-mo": "64", "--sortie": None}
+    for i in range(1, len(arguments) - 1, 2):
+        options[arguments[i]] = arguments[i + 1]
+
+    print("PROFILAGE CSV")
+    print("=" * 50)
+    rapport = profiler_csv(
+        fichier,
+        nb_workers=int(options["--workers"]) if options["--workers"] else None,
+        taille_bloc_mo=int(options["--bloc-mo"])
+    )
+
+    sortie = options["--sortie"] or os.path.splitext(fichier)[0] + "_profil.json"
+    with open(sortie, "w", encoding="utf-8") as f:
+        json.dump(rapport, f, ensure_ascii=False, indent=2)
+
+    print(f"    Encodage : {rapport['encodage']} | séparateur : {rapport['dialecte']['separateur']!r}")
+    print(f"    Lignes : {rapport['lignes']} ({rapport['lignes_malformees']} malformées) | "
+          f"colonnes : {rapport['nb_colonnes']}")
+    for nom, colonne in rapport["colonnes"].items():
+        # taux_nulles vaut None pour une colonne sans aucune ligne (fichier réduit à l'en-tête)
+        taux_nulles = f"{colonne['taux_nulles']:.1%}" if colonne["taux_nulles"] is not None else "N/A"
+        print(f"      {nom[:30]:30s} {colonne['type_infere']:8s} nulles={taux_nulles} "
+              f"distinctes≈{colonne['cardinalite_estimee']}")
+    print(f"    Durée : {rapport['execution']['duree_s']} s ({rapport['execution']['debit_mo_s']} Mo/s)")
+    print(f"    Rapport JSON : {sortie}")
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,20 @@
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from fastapi.security.api_key import APIKeyHeader
 
 from database.database import get_db
-from database.crud import user_crud
+from database.crud import user_crud, pwd_context
 from models.models import TokenData
 from config.config import settings
+from auth.cache_tokens import cache_tokens, UtilisateurAuthentifie
+from auth.revocation import registre_revocations
 
-# Configuration pour l'authentification
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Configuration pour l'authentification (pwd_context partagé avec database.crud)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token", auto_error=False)  # auto_error=False pour auth optionnelle
 
 # Configuration pour la clé API
@@ -36,15 +37,18 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.access_token_expire_minutes)
     
-    to_encode.update({"exp": expire})
+    # jti : identifiant unique permettant la révocation côté serveur
+    to_encode.update({"exp": expire, "iat": datetime.now(timezone.utc), "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
-async def get_current_user_optional(token: Optional[str] = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """Récupérer l'utilisateur actuel à partir du token (optionnel - ne lève pas d'erreur si pas de token)"""
-    if token is None:
-        return None
-        
+def _utilisateur_depuis_token(token: str, db: Session) -> Optional[UtilisateurAuthentifie]:
+    """Token -> instantané utilisateur, via le cache puis (en cas d'absence) JWT + base"""
+    en_cache = cache_tokens.obtenir(token)
+    if en_cache is not None:
+        utilisateur, jti = en_cache
+        return None if registre_revocations.est_revoque(jti) else utilisateur
+    
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         email: str = payload.get("sub")
@@ -54,8 +58,21 @@ async def get_current_user_optional(token: Optional[str] = Depends(oauth2_scheme
     except JWTError:
         return None
     
+    if registre_revocations.est_revoque(payload.get("jti")):
+        return None
+    
     user = user_crud.get_user_by_email(db, email=token_data.email)
-    return user
+    if user is None:
+        return None
+    utilisateur = UtilisateurAuthentifie.depuis_db(user)
+    cache_tokens.ajouter(token, utilisateur, expiration_token=payload.get("exp"), jti=payload.get("jti"))
+    return utilisateur
+
+async def get_current_user_optional(token: Optional[str] = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """Récupérer l'utilisateur actuel à partir du token (optionnel - ne lève pas d'erreur si pas de token)"""
+    if token is None:
+        return None
+    return _utilisateur_depuis_token(token, db)
 
 async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     """Récupérer l'utilisateur actuel à partir du token (obligatoire)"""
@@ -68,16 +85,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     if token is None:
         raise credentials_exception
     
-    try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        token_data = TokenData(email=email)
-    except JWTError:
-        raise credentials_exception
-    
-    user = user_crud.get_user_by_email(db, email=token_data.email)
+    user = _utilisateur_depuis_token(token, db)
     if user is None:
         raise credentials_exception
     return user
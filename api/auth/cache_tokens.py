@@ -0,0 +1,129 @@
+"""
+Cache des tokens JWT vérifiés
+=============================
+
+Évite une requête test.users par appel authentifié : un token déjà vérifié est
+associé à un instantané de l'utilisateur, pendant une durée bornée par le TTL
+du cache et par l'expiration (exp) du token lui-même.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+
+from config.config import settings
+
+@dataclass(frozen=True)
+class UtilisateurAuthentifie:
+    """Instantané immuable de l'utilisateur (jamais le hash du mot de passe)"""
+    id: int
+    email: str
+    first_name: str
+    last_name: str
+    is_active: bool
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    @classmethod
+    def depuis_db(cls, user) -> "UtilisateurAuthentifie":
+        return cls(
+            id=user.id,
+            email=user.email,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            is_active=bool(user.is_active),
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
+class CacheTokens:
+    """LRU borné token -> (utilisateur, échéance, jti), avec index par email pour l'éviction"""
+
+    def __init__(self, taille_max: int = 10000, ttl: float = 60.0):
+        self.taille_max = taille_max
+        self.ttl = ttl
+        self._entrees: "OrderedDict[str, tuple]" = OrderedDict()
+        self._tokens_par_email: Dict[str, Set[str]] = {}
+        # Les dépendances FastAPI synchrones tournent dans un pool de threads
+        self._verrou = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def obtenir(self, token: str) -> Optional[Tuple[UtilisateurAuthentifie, Optional[str]]]:
+        """(utilisateur, jti) si le token est en cache et encore valide"""
+        with self._verrou:
+            entree = self._entrees.get(token)
+            if entree is None:
+                self.misses += 1
+                return None
+            utilisateur, echeance, jti = entree
+            if time.time() >= echeance:
+                self._retirer(token)
+                self.misses += 1
+                return None
+            self._entrees.move_to_end(token)
+            self.hits += 1
+            return utilisateur, jti
+
+    def ajouter(self, token: str, utilisateur: UtilisateurAuthentifie, expiration_token: Optional[float] = None,
+                jti: Optional[str] = None):
+        """Mémoriser un token vérifié ; l'entrée ne survit jamais à l'exp du token"""
+        echeance = time.time() + self.ttl
+        if expiration_token is not None:
+            echeance = min(echeance, expiration_token)
+        with self._verrou:
+            if token in self._entrees:
+                self._retirer(token)
+            self._entrees[token] = (utilisateur, echeance, jti)
+            self._tokens_par_email.setdefault(utilisateur.email, set()).add(token)
+            while len(self._entrees) > self.taille_max:
+                ancien, _ = next(iter(self._entrees.items()))
+                self._retirer(ancien)
+                self.evictions += 1
+
+    def invalider_utilisateur(self, email: str):
+        """Éviction explicite (mise à jour, désactivation ou suppression de l'utilisateur)"""
+        with self._verrou:
+            for token in list(self._tokens_par_email.get(email, ())):
+                self._retirer(token)
+                self.invalidations += 1
+
+    def invalider_token(self, token: str):
+        with self._verrou:
+            if token in self._entrees:
+                self._retirer(token)
+                self.invalidations += 1
+
+    def vider(self):
+        with self._verrou:
+            self._entrees.clear()
+            self._tokens_par_email.clear()
+
+    def _retirer(self, token: str):
+        utilisateur, _, _ = self._entrees.pop(token)
+        tokens = self._tokens_par_email.get(utilisateur.email)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_par_email[utilisateur.email]
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "entrees": len(self._entrees),
+            "taille_max": self.taille_max,
+            "ttl_secondes": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "taux_hit": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+# Instance globale partagée par les dépendances d'authentification
+cache_tokens = CacheTokens(settings.token_cache_max_size, settings.token_cache_ttl)
@@ -0,0 +1,97 @@
+"""
+Hachage des mots de passe hors de la boucle asyncio
+====================================================
+
+bcrypt coûte 100 à 300 ms de CPU par appel : exécuté directement dans un
+handler async, il gèle toutes les autres requêtes du worker. Les calculs sont
+confiés à un pool de threads borné (bcrypt libère le GIL), avec une file
+d'attente plafonnée et des métriques.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from database.crud import pwd_context
+from config.config import settings
+
+class PoolHachage:
+    """Pool borné pour bcrypt : max_workers calculs simultanés, max_en_attente demandes au total"""
+
+    def __init__(self, max_workers: int = 2, max_en_attente: int = 64):
+        self.max_workers = max_workers
+        self.max_en_attente = max_en_attente
+        self._executeur = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._verrou = threading.Lock()
+        self.en_attente = 0
+        self.en_cours = 0
+        self.termines = 0
+        self.rejetes = 0
+        self.attente_totale = 0.0
+        self.calcul_total = 0.0
+        self.attente_max = 0.0
+
+    def _executer(self, fonction, soumis_a, *args):
+        debut = time.perf_counter()
+        with self._verrou:
+            self.en_attente -= 1
+            self.en_cours += 1
+            attente = debut - soumis_a
+            self.attente_totale += attente
+            self.attente_max = max(self.attente_max, attente)
+        try:
+            return fonction(*args)
+        finally:
+            with self._verrou:
+                self.en_cours -= 1
+                self.termines += 1
+                self.calcul_total += time.perf_counter() - debut
+
+    async def soumettre(self, fonction, *args):
+        with self._verrou:
+            if self.en_attente + self.en_cours >= self.max_en_attente:
+                self.rejetes += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Trop de demandes d'authentification simultanées, réessayez",
+                    headers={"Retry-After": "1"},
+                )
+            self.en_attente += 1
+        boucle = asyncio.get_running_loop()
+        return await boucle.run_in_executor(self._executeur, self._executer, fonction, time.perf_counter(), *args)
+
+    def stats(self) -> Dict:
+        termines = self.termines or 1
+        return {
+            "workers": self.max_workers,
+            "max_en_attente": self.max_en_attente,
+            "en_attente": self.en_attente,
+            "en_cours": self.en_cours,
+            "termines": self.termines,
+            "rejetes": self.rejetes,
+            "attente_moyenne_ms": round(self.attente_totale / termines * 1000, 2),
+            "attente_max_ms": round(self.attente_max * 1000, 2),
+            "calcul_moyen_ms": round(self.calcul_total / termines * 1000, 2),
+            "bcrypt_rounds": settings.bcrypt_rounds,
+        }
+
+# Instance globale partagée par les routes d'authentification
+pool_hachage = PoolHachage(settings.password_hash_workers, settings.password_hash_max_pending)
+
+async def hacher_mot_de_passe(password: str) -> str:
+    """Hacher un mot de passe dans le pool (coût bcrypt_rounds)"""
+    return await pool_hachage.soumettre(pwd_context.hash, password)
+
+async def verifier_mot_de_passe(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Vérifier un mot de passe dans le pool
+
+    Returns:
+        (valide, nouveau_hash) : nouveau_hash est fourni quand le hash stocké
+        utilise un autre coût que bcrypt_rounds et doit être remplacé
+    """
+    return await pool_hachage.soumettre(pwd_context.verify_and_update, plain_password, hashed_password)
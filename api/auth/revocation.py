@@ -0,0 +1,176 @@
+"""
+Révocation des tokens JWT côté serveur
+======================================
+
+Chaque token porte un identifiant unique (jti). Un token révoqué (logout,
+refresh) est gardé en mémoire jusqu'à son expiration : la vérification dans
+get_current_user est une simple recherche dans un dict (quelques µs), précédée
+d'un filtre de Bloom optionnel. La table test.tokens_revoques rend la
+révocation durable et partagée : chaque worker la recharge au démarrage puis
+périodiquement.
+"""
+
+import asyncio
+import hashlib
+import heapq
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from database.database import SessionLocal, TokenRevoqueDB
+from config.config import settings
+
+class FiltreBloom:
+    """Filtre de Bloom minimal (double hachage sur une empreinte blake2b)"""
+
+    def __init__(self, capacite: int = 100000, taux_faux_positifs: float = 0.001):
+        self.nb_bits = max(8, int(-capacite * math.log(taux_faux_positifs) / (math.log(2) ** 2)))
+        self.nb_hachages = max(1, round(self.nb_bits / capacite * math.log(2)))
+        self.bits = bytearray((self.nb_bits + 7) // 8)
+
+    def _positions(self, valeur: str):
+        empreinte = hashlib.blake2b(valeur.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(empreinte[:8], "big")
+        h2 = int.from_bytes(empreinte[8:], "big") | 1
+        return [(h1 + i * h2) % self.nb_bits for i in range(self.nb_hachages)]
+
+    def ajouter(self, valeur: str):
+        for position in self._positions(valeur):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def contient(self, valeur: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(valeur))
+
+def _vers_datetime(timestamp: float) -> datetime:
+    """Timestamp -> datetime UTC naïf (colonnes DateTime de la base)"""
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+class RegistreRevocations:
+    """jti révoqués -> expiration du token, purgés dès que le token aurait expiré de toute façon"""
+
+    def __init__(self, utiliser_bloom: bool = False, capacite_bloom: int = 100000):
+        self._expirations: Dict[str, float] = {}
+        self._tas = []  # (expiration, jti) pour la purge
+        self.utiliser_bloom = utiliser_bloom
+        self.capacite_bloom = capacite_bloom
+        self._bloom = FiltreBloom(capacite_bloom) if utiliser_bloom else None
+        self._verrou = threading.Lock()
+        self._tache_synchronisation: Optional[asyncio.Task] = None
+        self.derniere_synchronisation: Optional[datetime] = None
+        self.verifications = 0
+        self.rejets = 0
+
+    def est_revoque(self, jti: Optional[str]) -> bool:
+        """Vérification du chemin chaud : aucune E/S, aucun verrou"""
+        if jti is None:
+            return False
+        self.verifications += 1
+        if self._bloom is not None and not self._bloom.contient(jti):
+            return False
+        expiration = self._expirations.get(jti)
+        if expiration is not None and expiration > time.time():
+            self.rejets += 1
+            return True
+        return False
+
+    def _ajouter_en_memoire(self, jti: str, expiration: float):
+        with self._verrou:
+            if jti in self._expirations:
+                return
+            # Bloom d'abord : une lecture concurrente ne doit jamais le voir en retard sur le dict
+            if self._bloom is not None:
+                self._bloom.ajouter(jti)
+            self._expirations[jti] = expiration
+            heapq.heappush(self._tas, (expiration, jti))
+
+    def purger(self):
+        """Oublier les révocations de tokens expirés (reconstruit le filtre de Bloom si besoin)"""
+        maintenant = time.time()
+        with self._verrou:
+            retires = 0
+            while self._tas and self._tas[0][0] <= maintenant:
+                _, jti = heapq.heappop(self._tas)
+                self._expirations.pop(jti, None)
+                retires += 1
+            if retires and self._bloom is not None:
+                bloom = FiltreBloom(self.capacite_bloom)
+                for jti in self._expirations:
+                    bloom.ajouter(jti)
+                self._bloom = bloom
+
+    def revoquer(self, db: Session, jti: str, expiration: float, email: Optional[str] = None):
+        """Révoquer un token : effet immédiat dans ce worker, durable en base pour les autres"""
+        if expiration <= time.time():
+            return
+        self._ajouter_en_memoire(jti, expiration)
+        db.merge(TokenRevoqueDB(
+            jti=jti,
+            email=email,
+            expire_le=_vers_datetime(expiration),
+            revoque_le=datetime.utcnow(),
+        ))
+        db.commit()
+
+    def charger(self, db: Session) -> int:
+        """Recharger depuis la base les révocations encore actives et supprimer les expirées"""
+        maintenant = datetime.utcnow()
+        lignes = db.query(TokenRevoqueDB.jti, TokenRevoqueDB.expire_le).filter(
+            TokenRevoqueDB.expire_le > maintenant
+        ).all()
+        for jti, expire_le in lignes:
+            self._ajouter_en_memoire(jti, expire_le.replace(tzinfo=timezone.utc).timestamp())
+        db.query(TokenRevoqueDB).filter(TokenRevoqueDB.expire_le <= maintenant).delete(synchronize_session=False)
+        db.commit()
+        self.purger()
+        self.derniere_synchronisation = maintenant
+        return len(lignes)
+
+    def _synchroniser(self):
+        db = SessionLocal()
+        try:
+            return self.charger(db)
+        finally:
+            db.close()
+
+    async def _boucle_synchronisation(self):
+        while True:
+            await asyncio.sleep(settings.token_revocation_sync_interval)
+            try:
+                await asyncio.to_thread(self._synchroniser)
+            except Exception as e:
+                print(f"⚠️ Synchronisation des révocations impossible: {e}")
+
+    async def demarrer_synchronisation(self):
+        """Chargement initial puis resynchronisation périodique (révocations des autres workers)"""
+        try:
+            nombre = await asyncio.to_thread(self._synchroniser)
+            print(f"🔒 {nombre} token(s) révoqué(s) chargé(s)")
+        except Exception as e:
+            print(f"⚠️ Chargement des révocations impossible: {e}")
+        if self._tache_synchronisation is None or self._tache_synchronisation.done():
+            self._tache_synchronisation = asyncio.get_running_loop().create_task(self._boucle_synchronisation())
+
+    async def arreter_synchronisation(self):
+        if self._tache_synchronisation is not None:
+            self._tache_synchronisation.cancel()
+            try:
+                await self._tache_synchronisation
+            except asyncio.CancelledError:
+                pass
+            self._tache_synchronisation = None
+
+    def stats(self) -> Dict:
+        return {
+            "revocations_actives": len(self._expirations),
+            "bloom": self.utiliser_bloom,
+            "verifications": self.verifications,
+            "rejets": self.rejets,
+            "derniere_synchronisation": self.derniere_synchronisation,
+        }
+
+# Instance globale partagée par les dépendances d'authentification
+registre_revocations = RegistreRevocations(settings.token_revocation_bloom, settings.token_revocation_bloom_capacity)
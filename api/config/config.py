@@ -21,6 +21,15 @@ class Settings(BaseSettings):
     def get_database_url(self) -> str:
         return f"postgresql://{self.postgres_user}:{self.postgres_password}@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}?options=-csearch_path%3Dtest"
     
+    # Pool de connexions PostgreSQL : connexions permanentes, débordement, attente max (s), recyclage (s), préchauffage
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    db_pool_timeout: float = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+    db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    db_pool_warmup: int = int(os.getenv("DB_POOL_WARMUP", "5"))
+    # Sous-requêtes d'un même appel exécutées en même temps (connexions du pool prises à la fois)
+    db_parallel_queries: int = int(os.getenv("DB_PARALLEL_QUERIES", "3"))
+    
     # MongoDB
     mongodb_host: str = os.getenv("MONGODB_HOST", "localhost")
     mongodb_port: int = int(os.getenv("MONGODB_PORT", "27017"))
@@ -29,6 +38,43 @@ class Settings(BaseSettings):
     def get_mongodb_url(self) -> str:
         return f"mongodb://{self.mongodb_host}:{self.mongodb_port}"
     
+    # Pool de connexions MongoDB (Motor et client synchrone partagé) ; socket timeout 0 = sans limite
+    mongodb_max_pool_size: int = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+    mongodb_min_pool_size: int = int(os.getenv("MONGODB_MIN_POOL_SIZE", "5"))
+    mongodb_max_idle_time_ms: int = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "300000"))
+    mongodb_wait_queue_timeout_ms: int = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+    mongodb_connect_timeout_ms: int = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "5000"))
+    mongodb_socket_timeout_ms: int = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "0"))
+    mongodb_pool_warmup: int = int(os.getenv("MONGODB_POOL_WARMUP", "5"))
+    
+    # Nombre maximal d'identifiants par requête de lot (/livres/batch)
+    batch_max_ids: int = int(os.getenv("BATCH_MAX_IDS", "100"))
+    
+    # Exports en flux (/livres/export) : documents lus et envoyés par lot
+    export_batch_size: int = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+    
+    # Snapshot du dashboard (/dashboard/snapshot) : dossier des versions, période de rafraîchissement
+    dashboard_snapshot_dir: str = os.getenv("DASHBOARD_SNAPSHOT_DIR", "snapshots")
+    dashboard_snapshot_interval: float = float(os.getenv("DASHBOARD_SNAPSHOT_INTERVAL", "600"))
+    dashboard_snapshot_versions: int = int(os.getenv("DASHBOARD_SNAPSHOT_VERSIONS", "5"))
+    
+    # Métriques Prometheus (/metrics) : middleware HTTP, requêtes SQL, commandes MongoDB
+    metrics_enabled: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    
+    # Journal des requêtes lentes (SQL et MongoDB) : seuil, taille du tampon, part des SELECT expliqués
+    slow_query_enabled: bool = os.getenv("SLOW_QUERY_ENABLED", "true").lower() == "true"
+    slow_query_threshold_ms: float = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+    slow_query_buffer_size: int = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "200"))
+    slow_query_explain_sample_rate: float = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", "0"))
+    slow_query_log_file: str = os.getenv("SLOW_QUERY_LOG_FILE", "")
+    
+    # Santé MongoDB (heartbeat + disjoncteur)
+    mongodb_server_selection_timeout_ms: int = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "2000"))
+    mongodb_heartbeat_interval: float = float(os.getenv("MONGODB_HEARTBEAT_INTERVAL", "5"))
+    mongodb_health_ttl: float = float(os.getenv("MONGODB_HEALTH_TTL", "15"))
+    mongodb_circuit_failure_threshold: int = int(os.getenv("MONGODB_CIRCUIT_FAILURE_THRESHOLD", "3"))
+    mongodb_circuit_reset_timeout: float = float(os.getenv("MONGODB_CIRCUIT_RESET_TIMEOUT", "10"))
+    
     # Configuration de l'application
     app_name: str = os.getenv("APP_NAME", "DataBook API")
     app_version: str = os.getenv("APP_VERSION", "1.0.0")
@@ -42,6 +88,20 @@ class Settings(BaseSettings):
     algorithm: str = os.getenv("ALGORITHM", "HS256")
     access_token_expire_minutes: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
     
+    # Cache des tokens vérifiés (évite une requête test.users par appel authentifié)
+    token_cache_max_size: int = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "10000"))
+    token_cache_ttl: float = float(os.getenv("TOKEN_CACHE_TTL", "60"))
+    
+    # Hachage des mots de passe (bcrypt hors boucle asyncio)
+    bcrypt_rounds: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    password_hash_workers: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    password_hash_max_pending: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+    
+    # Révocation des tokens (jti) : filtre de Bloom optionnel, resynchronisation entre workers
+    token_revocation_bloom: bool = os.getenv("TOKEN_REVOCATION_BLOOM", "false").lower() == "true"
+    token_revocation_bloom_capacity: int = int(os.getenv("TOKEN_REVOCATION_BLOOM_CAPACITY", "100000"))
+    token_revocation_sync_interval: float = float(os.getenv("TOKEN_REVOCATION_SYNC_INTERVAL", "30"))
+    
     # Configuration email (optionnel)
     smtp_host: str = os.getenv("SMTP_HOST", "smtp.gmail.com")
     smtp_port: int = int(os.getenv("SMTP_PORT", "587"))
@@ -6,9 +6,11 @@ from datetime import datetime
 
 from .database import UserDB, ItemDB
 from models.models import UserCreate, UserUpdate, ItemCreate, ItemUpdate
+from config.config import settings
 
 # Configuration pour le hachage des mots de passe
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Un hash d'un autre coût que bcrypt_rounds est signalé par needs_update / verify_and_update
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
 
 def hash_password(password: str) -> str:
     """Hacher un mot de passe"""
@@ -18,11 +20,18 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Vérifier un mot de passe"""
     return pwd_context.verify(plain_password, hashed_password)
 
+def _invalider_cache_auth(email: str):
+    """Retirer du cache d'authentification les tokens d'un utilisateur modifié"""
+    # Import différé : le module auth dépend lui-même de ce module
+    from auth.cache_tokens import cache_tokens
+    cache_tokens.invalider_utilisateur(email)
+
 # CRUD pour les utilisateurs
 class UserCRUD:
-    def create_user(self, db: Session, user: UserCreate) -> UserDB:
-        """Créer un nouvel utilisateur"""
-        hashed_password = hash_password(user.password)
+    def create_user(self, db: Session, user: UserCreate, hashed_password: Optional[str] = None) -> UserDB:
+        """Créer un nouvel utilisateur (hashed_password : hash déjà calculé hors de la boucle asyncio)"""
+        if hashed_password is None:
+            hashed_password = hash_password(user.password)
         db_user = UserDB(
             email=user.email,
             first_name=user.first_name,
@@ -54,6 +63,7 @@ class UserCRUD:
             return None
         
         update_data = user_update.dict(exclude_unset=True)
+        ancien_email = db_user.email
         
         # Hacher le nouveau mot de passe s'il est fourni
         if "password" in update_data:
@@ -66,6 +76,13 @@ class UserCRUD:
         db_user.updated_at = datetime.now()
         db.commit()
         db.refresh(db_user)
+        _invalider_cache_auth(ancien_email)
+        return db_user
+    
+    def set_password_hash(self, db: Session, db_user: UserDB, hashed_password: str) -> UserDB:
+        """Remplacer le hash du mot de passe (rehash après changement de coût bcrypt)"""
+        db_user.hashed_password = hashed_password
+        db.commit()
         return db_user
     
     def delete_user(self, db: Session, user_id: int) -> bool:
@@ -74,8 +91,10 @@ class UserCRUD:
         if not db_user:
             return False
         
+        email = db_user.email
         db.delete(db_user)
         db.commit()
+        _invalider_cache_auth(email)
         return True
     
     def authenticate_user(self, db: Session, email: str, password: str) -> Optional[UserDB]:
@@ -5,18 +5,37 @@ from sqlalchemy.sql import func
 from datetime import datetime
 import os
 from config.config import settings
+from utils.metriques import instrumenter_sqlalchemy
+from database.requetes_lentes import journal_requetes_lentes
 
 # Configuration de la base de données principale
 DATABASE_URL = settings.get_database_url()
 
+# Pool de connexions dimensionné par la configuration (SQLite garde le pool par défaut)
+OPTIONS_POOL = {} if "sqlite" in DATABASE_URL else {
+    "pool_size": settings.db_pool_size,
+    "max_overflow": settings.db_max_overflow,
+    "pool_timeout": settings.db_pool_timeout,
+    "pool_recycle": settings.db_pool_recycle,
+}
+
 # Création du moteur de base de données
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
     pool_pre_ping=True,  # Vérification de la connexion
-    echo=settings.debug  # Log des requêtes SQL en mode debug
+    echo=settings.debug,  # Log des requêtes SQL en mode debug
+    **OPTIONS_POOL
 )
 
+# Durée des requêtes et attente de connexion exposées sur /metrics
+if settings.metrics_enabled:
+    instrumenter_sqlalchemy(engine)
+
+# Requêtes au-delà du seuil : tampon /admin/requetes-lentes, journal JSON, EXPLAIN échantillonné
+if settings.slow_query_enabled:
+    journal_requetes_lentes.instrumenter_sqlalchemy(engine)
+
 # Configuration de la session
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -66,6 +85,16 @@ class BookDB(Base):
 # Alias pour maintenir la compatibilité
 ItemDB = BookDB
 
+class TokenRevoqueDB(Base):
+    """Tokens JWT révoqués (logout, refresh), conservés jusqu'à leur expiration"""
+    __tablename__ = "tokens_revoques"
+    __table_args__ = {'schema': 'test'}  # 🎯 Forcer le schéma test
+    
+    jti = Column(String(64), primary_key=True)
+    email = Column(String(255), index=True)
+    expire_le = Column(DateTime, nullable=False, index=True)
+    revoque_le = Column(DateTime, nullable=False)
+
 # Fonction pour obtenir une session de base de données
 def get_db():
     db = SessionLocal()
@@ -121,15 +150,47 @@ def check_db_connection():
         print(f"❌ Erreur de connexion à la base de données: {e}")
         return False
 
+# État du pool PostgreSQL (/health?deep=true)
+def stats_pool_postgres():
+    """Connexions du pool SQLAlchemy : configuration et occupation en direct"""
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {"type": type(pool).__name__}
+    return {
+        "type": type(pool).__name__,
+        "taille": pool.size(),
+        "debordement_max": getattr(pool, "_max_overflow", None),
+        "attente_max_s": pool.timeout(),
+        "recyclage_s": pool._recycle,
+        "utilisees": pool.checkedout(),
+        "disponibles": pool.checkedin(),
+        "debordement": max(pool.overflow(), 0),
+    }
+
+# Préchauffage du pool PostgreSQL au démarrage
+def prechauffer_pool_postgres(nombre: int = None) -> int:
+    """
+    Ouvrir `nombre` connexions en même temps puis les rendre au pool : les
+    premières requêtes n'attendent pas l'établissement des connexions
+    """
+    nombre = min(settings.db_pool_warmup if nombre is None else nombre, settings.db_pool_size)
+    connexions = []
+    try:
+        for _ in range(max(nombre, 0)):
+            connexions.append(engine.connect())
+    finally:
+        for connexion in connexions:
+            connexion.close()
+    return len(connexions)
+
 # Configuration MongoDB (optionnel)
 try:
     from pymongo import MongoClient
     
     def get_mongodb():
-        """Obtenir une connexion MongoDB"""
-        client = MongoClient(settings.get_mongodb_url())
-        db = client[settings.mongodb_database]
-        return db
+        """Base MongoDB sur le client synchrone partagé (un seul pool de connexions)"""
+        from database.mongo_crud import mongodb_service
+        return mongodb_service.client_synchrone()[settings.mongodb_database]
         
     def check_mongodb_connection():
         """Vérifier la connexion MongoDB"""
@@ -0,0 +1,76 @@
+"""
+Histogrammes calculés en base
+=============================
+
+Les endpoints de distribution (notes des critiques MongoDB, colonnes numériques
+PostgreSQL) laissent la base compter les valeurs par classe ($bucket,
+$bucketAuto, width_bucket) : seul le résultat compact transite. Ce module
+porte la partie commune : bornes des classes, classes vides et quantiles.
+"""
+
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+QUANTILES_DEFAUT = "0.1,0.25,0.5,0.75,0.9"
+
+def lire_quantiles(quantiles: str) -> List[float]:
+    """Paramètre `quantiles` ("0.25,0.5,0.75") -> liste triée de probabilités dans [0, 1]"""
+    try:
+        valeurs = sorted({float(q) for q in quantiles.split(",") if q.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Quantiles invalides: {quantiles}")
+    if not valeurs or any(q < 0 or q > 1 for q in valeurs):
+        raise HTTPException(status_code=400, detail="Les quantiles doivent être compris entre 0 et 1")
+    return valeurs
+
+def bornes_classes(borne_min: float, borne_max: float, nb_classes: int) -> List[float]:
+    """nb_classes + 1 bornes de classes de même largeur"""
+    if borne_max <= borne_min:
+        return [borne_min, borne_min]
+    largeur = (borne_max - borne_min) / nb_classes
+    return [borne_min + i * largeur for i in range(nb_classes)] + [borne_max]
+
+def completer_histogramme(bornes: List[float], comptes: Dict[int, int]) -> List[Dict]:
+    """
+    Classes de l'histogramme, classes vides comprises
+
+    Args:
+        bornes: bornes des classes (voir bornes_classes)
+        comptes: numéro de classe (0 à len(bornes) - 2) -> nombre de valeurs
+    """
+    return [
+        {
+            "borne_inf": round(bornes[i], 6),
+            "borne_sup": round(bornes[i + 1], 6),
+            "nombre": int(comptes.get(i, 0)),
+        }
+        for i in range(len(bornes) - 1)
+    ]
+
+def rangs_quantiles(nombre: int, probabilites: List[float]) -> List[int]:
+    """Rangs (0 = plus petite valeur) à lire pour interpoler les quantiles de `nombre` valeurs triées"""
+    rangs = set()
+    for probabilite in probabilites:
+        rang = probabilite * (nombre - 1)
+        rangs.add(int(rang))
+        if rang > int(rang):
+            rangs.add(int(rang) + 1)
+    return sorted(rangs)
+
+def interpoler_quantiles(nombre: int, probabilites: List[float], valeurs_par_rang: Dict[int, float]) -> Dict[str, Optional[float]]:
+    """Quantiles interpolés entre les deux valeurs encadrantes (comme percentile_cont), depuis les rangs lus"""
+    quantiles = {}
+    for probabilite in probabilites:
+        rang = probabilite * (nombre - 1)
+        k = int(rang)
+        basse = valeurs_par_rang.get(k)
+        if basse is None:
+            quantiles[str(probabilite)] = None
+            continue
+        haute = valeurs_par_rang.get(k + 1, basse) if rang > k else basse
+        quantiles[str(probabilite)] = arrondir(basse + (rang - k) * (haute - basse))
+    return quantiles
+
+def arrondir(valeur: Optional[float], decimales: int = 3) -> Optional[float]:
+    return round(float(valeur), decimales) if valeur is not None else None
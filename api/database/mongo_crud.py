@@ -3,8 +3,13 @@ from pymongo import MongoClient
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import asyncio
+import threading
+import time
 from bson import ObjectId
 
+from utils.metriques import EcouteurCommandesMongo, EcouteurPoolMongo
+from database.requetes_lentes import EcouteurCommandesLentesMongo
+
 try:
     from config.config import settings
     CONFIG_AVAILABLE = True
@@ -14,9 +19,27 @@ except ImportError:
     class Settings:
         mongodb_url = "mongodb://localhost:27017"
         mongodb_database = "databook"
+        mongodb_server_selection_timeout_ms = 2000
+        mongodb_heartbeat_interval = 5.0
+        mongodb_health_ttl = 15.0
+        mongodb_circuit_failure_threshold = 3
+        mongodb_circuit_reset_timeout = 10.0
+        mongodb_max_pool_size = 100
+        mongodb_min_pool_size = 5
+        mongodb_max_idle_time_ms = 300000
+        mongodb_wait_queue_timeout_ms = 5000
+        mongodb_connect_timeout_ms = 5000
+        mongodb_socket_timeout_ms = 0
+        mongodb_pool_warmup = 5
+        
+        def get_mongodb_url(self) -> str:
+            return self.mongodb_url
     settings = Settings()
 from models.models_mongo import BookMongo, BookMongoCreate, BookMongoUpdate, BookAnalytics
 
+class MongoDBIndisponible(Exception):
+    """MongoDB injoignable ou disjoncteur ouvert"""
+
 class MongoDBService:
     def __init__(self):
         self.client: Optional[MongoClient] = None
@@ -24,11 +47,52 @@ class MongoDBService:
         self.database: Optional[AsyncIOMotorDatabase] = None
         self.sync_db = None
         
+        # État de santé mis en cache (rafraîchi par le heartbeat)
+        self.disponible = False
+        self.derniere_verification = 0.0
+        self.derniere_erreur: Optional[str] = None
+        self.echecs_consecutifs = 0
+        self.circuit_ouvert_jusqu_a = 0.0
+        self._verrou_sonde: Optional[asyncio.Lock] = None
+        self._tache_heartbeat: Optional[asyncio.Task] = None
+        
+        # Occupation des pools (un écouteur par client), lue par /health?deep=true
+        self.ecouteur_pool_async = EcouteurPoolMongo("async")
+        self.ecouteur_pool_sync = EcouteurPoolMongo("sync")
+        self._verrou_client_sync = threading.Lock()
+        
+    def options_client(self, asynchrone: bool = True) -> Dict[str, Any]:
+        """Dimensionnement du pool, délais et écouteurs communs aux clients Motor et pymongo"""
+        options = {
+            "serverSelectionTimeoutMS": settings.mongodb_server_selection_timeout_ms,
+            "maxPoolSize": settings.mongodb_max_pool_size,
+            "maxIdleTimeMS": settings.mongodb_max_idle_time_ms,
+            "waitQueueTimeoutMS": settings.mongodb_wait_queue_timeout_ms,
+            "connectTimeoutMS": settings.mongodb_connect_timeout_ms,
+            "event_listeners": self._ecouteurs_commandes() + [
+                self.ecouteur_pool_async if asynchrone else self.ecouteur_pool_sync
+            ],
+        }
+        if settings.mongodb_socket_timeout_ms > 0:
+            options["socketTimeoutMS"] = settings.mongodb_socket_timeout_ms
+        # Connexions maintenues au repos : seulement pour le client des routes
+        if asynchrone:
+            options["minPoolSize"] = min(settings.mongodb_min_pool_size, settings.mongodb_max_pool_size)
+        return options
+    
+    def client_synchrone(self) -> MongoClient:
+        """Client pymongo partagé (scripts, vérifications) : créé une fois, thread-safe"""
+        if self.client is None:
+            with self._verrou_client_sync:
+                if self.client is None:
+                    self.client = MongoClient(settings.get_mongodb_url(), **self.options_client(asynchrone=False))
+                    self.sync_db = self.client[settings.mongodb_database]
+        return self.client
+    
     def connect(self):
         """Connexion synchrone à MongoDB"""
         try:
-            self.client = MongoClient(settings.get_mongodb_url())
-            self.sync_db = self.client[settings.mongodb_database]
+            self.client_synchrone()
             print(f"✅ Connexion MongoDB synchrone réussie: {settings.get_mongodb_url()}")
         except Exception as e:
             print(f"❌ Erreur de connexion MongoDB synchrone: {e}")
@@ -37,19 +101,146 @@ class MongoDBService:
     async def connect_async(self):
         """Connexion asynchrone à MongoDB"""
         try:
-            self.async_client = AsyncIOMotorClient(settings.get_mongodb_url())
-            self.database = self.async_client[settings.mongodb_database]
+            self._creer_client_async()
             # Test de connexion
             await self.database.list_collection_names()
+            self._enregistrer_succes()
             print(f"✅ Connexion MongoDB asynchrone réussie: {settings.get_mongodb_url()}")
         except Exception as e:
+            self._enregistrer_echec(e)
             print(f"❌ Erreur de connexion MongoDB asynchrone: {e}")
             raise
     
+    def _ecouteurs_commandes(self):
+        """Écouteurs pymongo : métriques de latence et journal des commandes lentes"""
+        ecouteurs = []
+        if getattr(settings, "metrics_enabled", False):
+            ecouteurs.append(EcouteurCommandesMongo())
+        if getattr(settings, "slow_query_enabled", False):
+            ecouteurs.append(EcouteurCommandesLentesMongo())
+        return ecouteurs
+    
+    def _creer_client_async(self):
+        """Client Motor paresseux : aucune connexion n'est ouverte avant la première requête"""
+        if self.async_client is None:
+            self.async_client = AsyncIOMotorClient(settings.get_mongodb_url(), **self.options_client())
+            self.database = self.async_client[settings.mongodb_database]
+    
+    async def prechauffer_pool(self, nombre: Optional[int] = None) -> int:
+        """
+        Ouvrir les connexions du pool Motor avant les premières requêtes : des
+        pings simultanés obligent le pool à établir autant de connexions
+        """
+        nombre = min(settings.mongodb_pool_warmup if nombre is None else nombre, settings.mongodb_max_pool_size)
+        if nombre <= 0:
+            return 0
+        self._creer_client_async()
+        await asyncio.gather(*(self.async_client.admin.command("ping") for _ in range(nombre)))
+        return self.ecouteur_pool_async.stats()["ouvertes"]
+    
+    def stats_pools(self) -> Dict[str, Any]:
+        """Configuration et occupation en direct des pools Motor et pymongo"""
+        return {
+            "configuration": {
+                "max": settings.mongodb_max_pool_size,
+                "min": settings.mongodb_min_pool_size,
+                "attente_max_ms": settings.mongodb_wait_queue_timeout_ms,
+                "inactivite_max_ms": settings.mongodb_max_idle_time_ms,
+            },
+            "async": self.ecouteur_pool_async.stats() if self.async_client is not None else None,
+            "sync": self.ecouteur_pool_sync.stats() if self.client is not None else None,
+        }
+    
+    # Santé de la connexion
+    def _enregistrer_succes(self):
+        if not self.disponible and self.echecs_consecutifs:
+            print("✅ MongoDB de nouveau disponible")
+        self.disponible = True
+        self.derniere_verification = time.monotonic()
+        self.derniere_erreur = None
+        self.echecs_consecutifs = 0
+        self.circuit_ouvert_jusqu_a = 0.0
+    
+    def _enregistrer_echec(self, erreur: Exception):
+        self.disponible = False
+        self.derniere_verification = time.monotonic()
+        self.derniere_erreur = str(erreur)
+        self.echecs_consecutifs += 1
+        if self.echecs_consecutifs >= settings.mongodb_circuit_failure_threshold:
+            if not self.circuit_ouvert:
+                print(f"⚠️ Disjoncteur MongoDB ouvert après {self.echecs_consecutifs} échecs: {erreur}")
+            self.circuit_ouvert_jusqu_a = time.monotonic() + settings.mongodb_circuit_reset_timeout
+    
+    @property
+    def circuit_ouvert(self) -> bool:
+        return time.monotonic() < self.circuit_ouvert_jusqu_a
+    
+    async def verifier_sante(self) -> bool:
+        """Sonde (ping) MongoDB et met à jour l'état en cache"""
+        if self._verrou_sonde is None:
+            self._verrou_sonde = asyncio.Lock()
+        debut_attente = time.monotonic()
+        async with self._verrou_sonde:
+            # Une sonde concurrente vient de conclure : réutiliser son résultat
+            if self.derniere_verification > debut_attente:
+                return self.disponible
+            try:
+                self._creer_client_async()
+                await self.async_client.admin.command("ping")
+                self._enregistrer_succes()
+            except Exception as e:
+                self._enregistrer_echec(e)
+            return self.disponible
+    
+    async def assurer_disponible(self):
+        """
+        Garde des routes MongoDB : aucun aller-retour tant que l'état en cache est
+        frais. Échoue immédiatement pendant une panne (disjoncteur ouvert) ; une
+        seule sonde est tentée à l'expiration du délai (demi-ouverture).
+        """
+        if self.disponible and time.monotonic() - self.derniere_verification < settings.mongodb_health_ttl:
+            return
+        if self.circuit_ouvert:
+            raise MongoDBIndisponible(f"MongoDB indisponible: {self.derniere_erreur}")
+        if not await self.verifier_sante():
+            raise MongoDBIndisponible(f"Impossible de se connecter à MongoDB: {self.derniere_erreur}")
+    
+    async def _boucle_heartbeat(self):
+        while True:
+            await self.verifier_sante()
+            await asyncio.sleep(settings.mongodb_heartbeat_interval)
+    
+    def demarrer_heartbeat(self):
+        """Lancer la sonde périodique en arrière-plan (rétablissement automatique)"""
+        if self._tache_heartbeat is None or self._tache_heartbeat.done():
+            self._tache_heartbeat = asyncio.get_running_loop().create_task(self._boucle_heartbeat())
+    
+    async def arreter_heartbeat(self):
+        if self._tache_heartbeat is not None:
+            self._tache_heartbeat.cancel()
+            try:
+                await self._tache_heartbeat
+            except asyncio.CancelledError:
+                pass
+            self._tache_heartbeat = None
+    
+    def etat_sante(self) -> Dict[str, Any]:
+        """État en cache, sans aller-retour vers le serveur"""
+        age = time.monotonic() - self.derniere_verification if self.derniere_verification else None
+        return {
+            "disponible": self.disponible,
+            "circuit_ouvert": self.circuit_ouvert,
+            "echecs_consecutifs": self.echecs_consecutifs,
+            "derniere_verification_il_y_a_s": round(age, 1) if age is not None else None,
+            "derniere_erreur": self.derniere_erreur,
+        }
+    
     def disconnect(self):
         """Fermer les connexions"""
         if self.client:
             self.client.close()
+            self.client = None
+            self.sync_db = None
         if self.async_client:
             self.async_client.close()
     
@@ -0,0 +1,45 @@
+"""
+Projections MongoDB pour les listes de livres
+=============================================
+
+Le paramètre `fields` des routes de liste et de recherche accepte un preset
+nommé ou une liste de champs séparés par des virgules. La projection est
+transmise à Motor (find(..., projection)) : seuls les champs utiles quittent
+le serveur MongoDB.
+"""
+
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+
+# Presets nommés (None : document complet)
+PRESETS_PROJECTION: Dict[str, Optional[list]] = {
+    # Vue liste : titre, auteurs, note et genres
+    "card": ["titre", "auteurs", "note", "tous_les_genres", "langue"],
+    # Fiche livre : sans les tableaux imbriqués ni les champs d'import
+    "detail": ["titre", "auteurs", "note", "tous_les_genres", "langue", "resume", "editeur", "isbn", "isbn_10", "isbn_13", "date_publication"],
+    "full": None,
+}
+
+DESCRIPTION_FIELDS = "Champs retournés : preset (card, detail, full) ou liste séparée par des virgules"
+
+def projection_mongo(fields: Optional[str]) -> Optional[Dict[str, int]]:
+    """
+    Projection Motor correspondant au paramètre `fields`
+
+    Returns:
+        dict champ -> 1 (le _id est toujours inclus), ou None pour le document complet
+    """
+    if not fields:
+        return None
+    fields = fields.strip()
+    if fields in PRESETS_PROJECTION:
+        champs = PRESETS_PROJECTION[fields]
+    else:
+        champs = [champ.strip() for champ in fields.split(",") if champ.strip()]
+        invalides = [champ for champ in champs if champ.startswith("$") or ".." in champ or champ.endswith(".")]
+        if invalides:
+            raise HTTPException(status_code=400, detail=f"Champs invalides: {', '.join(invalides)}")
+    if champs is None:
+        return None
+    return {champ: 1 for champ in champs}
@@ -0,0 +1,339 @@
+"""
+Journal des requêtes lentes (PostgreSQL et MongoDB)
+===================================================
+
+Toute requête SQL émise par le moteur SQLAlchemy et toute commande MongoDB
+envoyée par Motor dont la durée dépasse le seuil est enregistrée avec :
+le texte de la requête, ses paramètres (valeurs sensibles masquées), sa durée
+et la route HTTP qui l'a déclenchée.
+
+Les entrées sont conservées dans un tampon circulaire (GET /admin/requetes-lentes)
+et écrites en JSON, une ligne par entrée. En option (SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+désactivé par défaut), le plan d'exécution d'une fraction des SELECT lents est
+capturé avec EXPLAIN (ANALYZE, BUFFERS), dans un thread séparé et sur une autre
+connexion : la requête d'origine n'est pas ralentie. Les requêtes aux paramètres
+sensibles ne sont jamais expliquées (le plan affiche les valeurs liées), ni
+celles qui modifient des données (CTE avec INSERT/UPDATE/DELETE, verrous FOR UPDATE).
+"""
+
+import contextvars
+import hashlib
+import json
+import logging
+import random
+import re
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config.config import settings
+from utils.metriques import gabarit_route
+
+try:
+    from pymongo import monitoring
+    PYMONGO_AVAILABLE = True
+except ImportError:
+    PYMONGO_AVAILABLE = False
+
+# Scope ASGI de la requête HTTP en cours (posé par MiddlewareContexteRequete)
+scope_requete: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("scope_requete", default=None)
+
+ROUTE_HORS_REQUETE = "tâche de fond"
+
+# Paramètres dont la valeur n'est jamais journalisée
+MOTIF_SENSIBLE = re.compile(r"pass|mot_de_passe|token|secret|hash|email|api_key|cle", re.IGNORECASE)
+# Requêtes jamais ré-exécutées par EXPLAIN ANALYZE (écritures dans une CTE, verrous)
+MOTIF_ECRITURE = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE)\b|\bFOR\s+(NO\s+KEY\s+UPDATE|KEY\s+SHARE|SHARE)\b", re.IGNORECASE)
+LONGUEUR_MAX_VALEUR = 64
+LONGUEUR_MAX_REQUETE = 4000
+# Une même requête n'est pas ré-expliquée avant ce délai (secondes)
+DELAI_ENTRE_EXPLAIN = 300
+# Champs de protocole retirés des commandes MongoDB journalisées
+CHAMPS_PROTOCOLE_MONGO = {"lsid", "$clusterTime", "$db", "$readPreference", "txnNumber", "signature"}
+
+def route_courante() -> str:
+    """Méthode et gabarit de la route HTTP en cours, ou tâche de fond"""
+    scope = scope_requete.get()
+    if scope is None:
+        return ROUTE_HORS_REQUETE
+    return f"{scope.get('method', '')} {gabarit_route(scope)}"
+
+def _valeur_masquee(valeur: Any) -> Any:
+    if isinstance(valeur, str):
+        return valeur if len(valeur) <= LONGUEUR_MAX_VALEUR else valeur[:LONGUEUR_MAX_VALEUR] + "…"
+    if isinstance(valeur, (bytes, bytearray, memoryview)):
+        return f"<{len(valeur)} octets>"
+    if isinstance(valeur, (list, tuple)):
+        elements = [_valeur_masquee(v) for v in valeur[:10]]
+        if len(valeur) > 10:
+            elements.append(f"… (+{len(valeur) - 10})")
+        return elements
+    if valeur is None or isinstance(valeur, (int, float, bool)):
+        return valeur
+    return str(valeur)[:LONGUEUR_MAX_VALEUR]
+
+def masquer_parametres(parametres: Any, noms: Optional[List[str]] = None) -> Any:
+    """
+    Paramètres liés journalisables : clés sensibles masquées, valeurs tronquées
+
+    Args:
+        noms: noms des paramètres positionnels (dans l'ordre), pour les masquer aussi
+    """
+    if noms and isinstance(parametres, (list, tuple)) and len(noms) == len(parametres):
+        parametres = dict(zip(noms, parametres))
+    if isinstance(parametres, dict):
+        return {
+            cle: "***" if MOTIF_SENSIBLE.search(str(cle)) else _valeur_masquee(valeur)
+            for cle, valeur in parametres.items()
+        }
+    if isinstance(parametres, (list, tuple)):
+        # executemany : une liste de jeux de paramètres
+        if parametres and isinstance(parametres[0], (dict, list, tuple)):
+            return {"lots": len(parametres), "premier": masquer_parametres(parametres[0])}
+        return [_valeur_masquee(v) for v in parametres[:20]]
+    return parametres
+
+def forme_commande_mongo(valeur: Any, profondeur: int = 0) -> Any:
+    """Commande MongoDB dont les valeurs sont remplacées par "?" (la structure reste lisible)"""
+    if profondeur > 6:
+        return "…"
+    if isinstance(valeur, dict):
+        return {
+            cle: forme_commande_mongo(v, profondeur + 1)
+            for cle, v in valeur.items() if cle not in CHAMPS_PROTOCOLE_MONGO
+        }
+    if isinstance(valeur, (list, tuple)):
+        elements = [forme_commande_mongo(v, profondeur + 1) for v in valeur[:10]]
+        if len(valeur) > 10:
+            elements.append(f"… (+{len(valeur) - 10})")
+        return elements
+    return "?"
+
+def empreinte(texte: str) -> str:
+    """Identifiant court d'une requête (espaces normalisés)"""
+    return hashlib.sha1(" ".join(texte.split()).encode("utf-8")).hexdigest()[:12]
+
+def _operation_sql(instruction: str) -> str:
+    return instruction.lstrip().split(None, 1)[0].upper() if instruction.strip() else ""
+
+def _noms_positionnels(context) -> Optional[List[str]]:
+    """Noms des paramètres d'une requête compilée pour un pilote à paramètres positionnels"""
+    compiled = getattr(context, "compiled", None)
+    noms = getattr(compiled, "positiontup", None)
+    return list(noms) if noms else None
+
+def _parametres_sensibles(parametres: Any, noms: Optional[List[str]]) -> bool:
+    """
+    Vrai si une valeur liée risque d'apparaître dans le plan (Index Cond, Filter) :
+    paramètre au nom sensible, ou paramètres positionnels dont on ignore les noms
+    """
+    if not parametres:
+        return False
+    if isinstance(parametres, dict):
+        noms = list(parametres)
+    if not noms:
+        return True
+    return any(MOTIF_SENSIBLE.search(str(nom)) for nom in noms)
+
+class JournalRequetesLentes:
+    """Tampon circulaire des requêtes lentes et écriture du journal JSON"""
+
+    def __init__(self, seuil_ms: float = 200, taille: int = 200, taux_explain: float = 0.0,
+                 fichier: str = "", timeout_explain_ms: int = 10000):
+        self.seuil_ms = seuil_ms
+        self.taux_explain = taux_explain
+        self.timeout_explain_ms = timeout_explain_ms
+        self._entrees: deque = deque(maxlen=taille)
+        self._verrou = threading.Lock()
+        self._derniers_explain: Dict[str, float] = {}
+        self._executeur_explain = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+        self.total_enregistrees = 0
+        self.total_plans = 0
+
+        self._logger = logging.getLogger("databook.requetes_lentes")
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        if not self._logger.handlers:
+            handler = logging.FileHandler(fichier, encoding="utf-8") if fichier else logging.StreamHandler(sys.stdout)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger.addHandler(handler)
+
+    def _journaliser(self, entree: Dict):
+        try:
+            self._logger.info(json.dumps(entree, ensure_ascii=False, default=str))
+        except Exception:
+            pass
+
+    def enregistrer(self, entree: Dict, journaliser: bool = True) -> Dict:
+        entree.setdefault("horodatage", datetime.now().isoformat())
+        entree.setdefault("route", route_courante())
+        with self._verrou:
+            self._entrees.append(entree)
+            self.total_enregistrees += 1
+        if journaliser:
+            self._journaliser(entree)
+        return entree
+
+    def entrees(self, source: Optional[str] = None, limite: int = 50) -> List[Dict]:
+        """Entrées les plus récentes d'abord"""
+        with self._verrou:
+            entrees = list(self._entrees)
+        if source:
+            entrees = [e for e in entrees if e.get("source") == source]
+        return entrees[::-1][:limite]
+
+    def vider(self):
+        with self._verrou:
+            self._entrees.clear()
+
+    def stats(self) -> Dict:
+        with self._verrou:
+            en_tampon = len(self._entrees)
+        return {
+            "seuil_ms": self.seuil_ms,
+            "taux_explain": self.taux_explain,
+            "en_tampon": en_tampon,
+            "capacite": self._entrees.maxlen,
+            "total_enregistrees": self.total_enregistrees,
+            "total_plans": self.total_plans,
+        }
+
+    # PostgreSQL
+    def _explain_souhaite(self, entree: Dict, instruction: str, parametres, noms: Optional[List[str]]) -> bool:
+        if self.taux_explain <= 0 or entree["operation"] not in ("SELECT", "WITH"):
+            return False
+        if MOTIF_ECRITURE.search(instruction) or _parametres_sensibles(parametres, noms):
+            return False
+        if random.random() >= self.taux_explain:
+            return False
+        maintenant = time.monotonic()
+        with self._verrou:
+            dernier = self._derniers_explain.get(entree["empreinte"])
+            if dernier is not None and maintenant - dernier < DELAI_ENTRE_EXPLAIN:
+                return False
+            self._derniers_explain[entree["empreinte"]] = maintenant
+        return True
+
+    def _capturer_plan(self, engine, entree: Dict, instruction: str, parametres):
+        """EXPLAIN (ANALYZE, BUFFERS) sur une connexion dédiée, dans une transaction annulée"""
+        try:
+            with engine.connect() as conn:
+                conn.info["explain_en_cours"] = True
+                conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(self.timeout_explain_ms)}")
+                resultat = conn.exec_driver_sql(
+                    "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + instruction,
+                    parametres if parametres else ()
+                )
+                plan = resultat.scalar()
+                conn.rollback()
+            entree["plan"] = json.loads(plan) if isinstance(plan, str) else plan
+            self.total_plans += 1
+        except Exception as e:
+            entree["plan_erreur"] = str(e).splitlines()[0] if str(e) else type(e).__name__
+        self._journaliser(entree)
+
+    def instrumenter_sqlalchemy(self, engine):
+        """Chronométrer les requêtes du moteur et enregistrer celles au-delà du seuil"""
+        from sqlalchemy import event
+
+        explain_possible = engine.dialect.name == "postgresql"
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _avant(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("debuts_requetes_lentes", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _apres(conn, cursor, statement, parameters, context, executemany):
+            duree_ms = (time.perf_counter() - conn.info["debuts_requetes_lentes"].pop()) * 1000
+            if duree_ms < self.seuil_ms or conn.info.get("explain_en_cours"):
+                return
+            noms = _noms_positionnels(context)
+            entree = {
+                "source": "postgresql",
+                "operation": _operation_sql(statement),
+                "duree_ms": round(duree_ms, 2),
+                "requete": statement[:LONGUEUR_MAX_REQUETE],
+                "parametres": masquer_parametres(parameters, noms),
+                "empreinte": empreinte(statement),
+                "lignes": cursor.rowcount if cursor.rowcount >= 0 else None,
+            }
+            if explain_possible and not executemany and self._explain_souhaite(entree, statement, parameters, noms):
+                # Journalisée une fois le plan obtenu
+                self.enregistrer(entree, journaliser=False)
+                self._executeur_explain.submit(self._capturer_plan, engine, entree, statement, parameters)
+            else:
+                self.enregistrer(entree)
+
+        @event.listens_for(engine, "handle_error")
+        def _erreur(contexte):
+            conn = contexte.connection
+            if conn is not None and conn.info.get("debuts_requetes_lentes"):
+                conn.info["debuts_requetes_lentes"].pop()
+
+journal_requetes_lentes = JournalRequetesLentes(
+    seuil_ms=settings.slow_query_threshold_ms,
+    taille=settings.slow_query_buffer_size,
+    taux_explain=settings.slow_query_explain_sample_rate,
+    fichier=settings.slow_query_log_file
+)
+
+if PYMONGO_AVAILABLE:
+    class EcouteurCommandesLentesMongo(monitoring.CommandListener):
+        """Commandes MongoDB au-delà du seuil (équivalent du profiler, côté client)"""
+
+        def __init__(self, journal: JournalRequetesLentes = journal_requetes_lentes):
+            self.journal = journal
+            # (connexion, request_id) -> commande, le temps de recevoir la réponse
+            self._en_cours: Dict = {}
+
+        def started(self, event):
+            if len(self._en_cours) > 1000:
+                self._en_cours.clear()
+            self._en_cours[(event.connection_id, event.request_id)] = (event.command, event.database_name)
+
+        def _terminer(self, event, erreur: Optional[str] = None):
+            commande, base = self._en_cours.pop((event.connection_id, event.request_id), (None, None))
+            duree_ms = event.duration_micros / 1000
+            if commande is None or duree_ms < self.journal.seuil_ms:
+                return
+            collection = commande.get(event.command_name)
+            forme = forme_commande_mongo(commande)
+            if isinstance(collection, str):
+                forme[event.command_name] = collection
+            entree = {
+                "source": "mongodb",
+                "operation": event.command_name,
+                "collection": f"{base}.{collection}" if isinstance(collection, str) else base,
+                "duree_ms": round(duree_ms, 2),
+                "requete": forme,
+                "empreinte": empreinte(json.dumps(forme, sort_keys=True, default=str)),
+            }
+            if erreur:
+                entree["erreur"] = erreur
+            self.journal.enregistrer(entree)
+
+        def succeeded(self, event):
+            self._terminer(event)
+
+        def failed(self, event):
+            self._terminer(event, str(event.failure.get("errmsg", "")) if isinstance(event.failure, dict) else "échec")
+
+class MiddlewareContexteRequete:
+    """Middleware ASGI : rend le scope de la requête en cours visible des écouteurs SQL et MongoDB"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        jeton = scope_requete.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            scope_requete.reset(jeton)
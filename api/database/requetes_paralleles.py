@@ -0,0 +1,94 @@
+"""
+Exécution concurrente de requêtes indépendantes
+================================================
+
+Les endpoints d'analytics enchaînent plusieurs agrégations sans dépendance entre
+elles : les lancer en parallèle ramène la latence à celle de la plus lente.
+Côté SQL, le nombre de sous-requêtes simultanées est borné (DB_PARALLEL_QUERIES) :
+chacune prend une connexion du pool, et quelques appels concurrents ne doivent
+pas l'épuiser.
+Chaque fonction renvoie aussi la durée de chaque sous-requête (mode debug).
+"""
+
+import asyncio
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from config.config import settings
+from database.database import SessionLocal
+
+_ABSENT = object()
+
+# Exécuteur dédié : le pool par défaut d'asyncio (cpu + 4 threads) sérialiserait
+# les requêtes d'un même endpoint sur une petite machine
+_executeur_sql = ThreadPoolExecutor(max_workers=16, thread_name_prefix="requetes-sql")
+
+async def _chronometrer(nom: str, requete: Awaitable, timings: Dict[str, float], defaut=_ABSENT):
+    debut = time.perf_counter()
+    try:
+        return await requete
+    except Exception:
+        if defaut is _ABSENT:
+            raise
+        return defaut
+    finally:
+        timings[nom] = round((time.perf_counter() - debut) * 1000, 2)
+
+async def executer_en_parallele(requetes: Dict[str, Awaitable],
+                                defauts: Dict[str, Any] = None) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Lancer des coroutines (Motor, ...) avec asyncio.gather
+
+    Args:
+        requetes: nom -> coroutine
+        defauts: nom -> valeur renvoyée si la requête échoue (sinon l'erreur est propagée)
+
+    Returns:
+        (résultats par nom, durées en ms par nom)
+    """
+    defauts = defauts or {}
+    timings: Dict[str, float] = {}
+    resultats = await asyncio.gather(*[
+        _chronometrer(nom, requete, timings, defauts.get(nom, _ABSENT))
+        for nom, requete in requetes.items()
+    ])
+    return dict(zip(requetes.keys(), resultats)), timings
+
+async def executer_sql_en_parallele(requetes: Dict[str, Callable[[Session], Any]],
+                                    defauts: Dict[str, Any] = None,
+                                    limite: Optional[asyncio.Semaphore] = None) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Exécuter des requêtes SQLAlchemy synchrones en parallèle
+
+    Chaque requête reçoit sa propre session (donc sa propre connexion du pool)
+    et s'exécute dans un thread : la boucle asyncio n'est jamais bloquée.
+
+    Args:
+        requetes: nom -> fonction(session) renvoyant le résultat matérialisé
+        defauts: nom -> valeur renvoyée si la requête échoue
+        limite: sémaphore partagé entre plusieurs appels (par défaut, DB_PARALLEL_QUERIES
+            requêtes simultanées pour cet appel)
+    """
+    def executer(fonction):
+        db = SessionLocal()
+        try:
+            return fonction(db)
+        finally:
+            db.close()
+
+    limite = limite or asyncio.Semaphore(max(1, settings.db_parallel_queries))
+    boucle = asyncio.get_running_loop()
+
+    async def executer_limite(fonction):
+        async with limite:
+            # Contexte copié : la requête HTTP d'origine reste connue des threads (journal des requêtes lentes)
+            return await boucle.run_in_executor(_executeur_sql, contextvars.copy_context().run, executer, fonction)
+
+    return await executer_en_parallele(
+        {nom: executer_limite(fonction) for nom, fonction in requetes.items()},
+        defauts
+    )
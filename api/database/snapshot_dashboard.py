@@ -0,0 +1,202 @@
+"""
+Snapshots précalculés du dashboard
+==================================
+
+Les onglets d'accueil et d'analytics de l'interface appellent les agrégations
+les plus lourdes de l'API. Ce service les calcule en arrière-plan (au
+démarrage, périodiquement et à la demande après un import), conserve le
+résultat encodé en mémoire et l'écrit sur disque en fichiers versionnés
+compressés : servir le dashboard devient une simple lecture.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.json_mongo import dumps_mongo
+from config.config import settings
+
+PREFIXE_FICHIER = "dashboard_v"
+
+class ServiceSnapshotDashboard:
+    """Sections nommées recalculées ensemble, servies depuis le dernier snapshot"""
+
+    def __init__(self, dossier: str = "snapshots", intervalle: float = 600, versions_conservees: int = 5):
+        self.dossier = Path(dossier)
+        self.intervalle = intervalle
+        self.versions_conservees = versions_conservees
+        self._sections: Dict[str, Callable[[], Awaitable[Any]]] = {}
+        self.version: Optional[int] = None
+        self.genere_le: Optional[datetime] = None
+        self.duree_calcul_ms: Optional[float] = None
+        self.erreurs: Dict[str, str] = {}
+        self.contenu: Optional[bytes] = None
+        self.contenu_gzip: Optional[bytes] = None
+        self._donnees: Dict[str, Any] = {}
+        self._verrou: Optional[asyncio.Lock] = None
+        self._demande: Optional[asyncio.Event] = None
+        self._tache: Optional[asyncio.Task] = None
+
+    def enregistrer_section(self, nom: str, fournisseur: Callable[[], Awaitable[Any]]):
+        """Déclarer une section : fournisseur() renvoie son contenu (dict JSON-serializable)"""
+        self._sections[nom] = fournisseur
+
+    async def _calculer_section(self, nom: str, fournisseur, timings: Dict[str, float]):
+        debut = time.perf_counter()
+        try:
+            return await fournisseur(), None
+        except Exception as e:
+            return None, str(getattr(e, "detail", e))
+        finally:
+            timings[nom] = round((time.perf_counter() - debut) * 1000, 2)
+
+    async def rafraichir(self) -> int:
+        """Recalculer toutes les sections en parallèle et publier une nouvelle version"""
+        if self._verrou is None:
+            self._verrou = asyncio.Lock()
+        async with self._verrou:
+            debut = time.perf_counter()
+            timings: Dict[str, float] = {}
+            noms = list(self._sections)
+            resultats = await asyncio.gather(*[
+                self._calculer_section(nom, self._sections[nom], timings) for nom in noms
+            ])
+            donnees, erreurs = {}, {}
+            for nom, (contenu, erreur) in zip(noms, resultats):
+                if erreur is None:
+                    donnees[nom] = contenu
+                else:
+                    erreurs[nom] = erreur
+                    # Une section en échec garde sa dernière valeur connue
+                    if nom in self._donnees:
+                        donnees[nom] = self._donnees[nom]
+            # Horodatage en ms, strictement croissant
+            version = max(time.time_ns() // 1_000_000, (self.version or 0) + 1)
+            genere_le = datetime.now()
+            duree_ms = round((time.perf_counter() - debut) * 1000, 2)
+            contenu = dumps_mongo({
+                "success": True,
+                "version": version,
+                "genere_le": genere_le,
+                "duree_calcul_ms": duree_ms,
+                "timings_ms": timings,
+                "erreurs": erreurs,
+                "sections": donnees,
+            })
+            contenu_gzip = gzip.compress(contenu, compresslevel=6)
+            try:
+                await asyncio.to_thread(self._ecrire, version, contenu_gzip)
+            except OSError as e:
+                print(f"⚠️ Écriture du snapshot dashboard impossible: {e}")
+            self._donnees, self.erreurs = donnees, erreurs
+            self.version, self.genere_le, self.duree_calcul_ms = version, genere_le, duree_ms
+            self.contenu, self.contenu_gzip = contenu, contenu_gzip
+            return version
+
+    def _ecrire(self, version: int, contenu_gzip: bytes):
+        """Écriture atomique du fichier versionné, puis purge des plus anciens"""
+        self.dossier.mkdir(parents=True, exist_ok=True)
+        chemin = self.dossier / f"{PREFIXE_FICHIER}{version}.json.gz"
+        temporaire = chemin.with_suffix(".tmp")
+        temporaire.write_bytes(contenu_gzip)
+        os.replace(temporaire, chemin)
+        for ancien in self._fichiers()[:-self.versions_conservees]:
+            ancien.unlink(missing_ok=True)
+
+    def _fichiers(self):
+        """Fichiers de snapshot triés de la plus ancienne à la plus récente version"""
+        if not self.dossier.is_dir():
+            return []
+        fichiers = [f for f in self.dossier.glob(f"{PREFIXE_FICHIER}*.json.gz") if f.name[len(PREFIXE_FICHIER):-8].isdigit()]
+        return sorted(fichiers, key=lambda f: int(f.name[len(PREFIXE_FICHIER):-8]))
+
+    def charger_dernier(self) -> bool:
+        """Reprendre le snapshot le plus récent écrit sur disque (redémarrage)"""
+        fichiers = self._fichiers()
+        if not fichiers:
+            return False
+        contenu_gzip = fichiers[-1].read_bytes()
+        contenu = gzip.decompress(contenu_gzip)
+        snapshot = json.loads(contenu)
+        self._donnees = snapshot.get("sections", {})
+        self.erreurs = snapshot.get("erreurs", {})
+        self.version = snapshot.get("version")
+        self.genere_le = datetime.fromisoformat(snapshot["genere_le"]) if snapshot.get("genere_le") else None
+        self.duree_calcul_ms = snapshot.get("duree_calcul_ms")
+        self.contenu, self.contenu_gzip = contenu, contenu_gzip
+        return True
+
+    def age_secondes(self) -> Optional[float]:
+        if self.genere_le is None:
+            return None
+        return (datetime.now() - self.genere_le).total_seconds()
+
+    def demander_rafraichissement(self):
+        """Rafraîchir sans attendre la prochaine échéance (après un import)"""
+        if self._demande is not None:
+            self._demande.set()
+
+    async def _boucle(self):
+        while True:
+            age = self.age_secondes()
+            if age is None or age >= self.intervalle:
+                try:
+                    version = await self.rafraichir()
+                    print(f"🗂️ Snapshot dashboard v{version} généré en {self.duree_calcul_ms} ms")
+                except Exception as e:
+                    print(f"⚠️ Rafraîchissement du snapshot dashboard impossible: {e}")
+                attente = self.intervalle
+            else:
+                attente = self.intervalle - age
+            try:
+                await asyncio.wait_for(self._demande.wait(), timeout=attente)
+                self._demande.clear()
+                # Forcer le recalcul au prochain tour
+                self.genere_le = None
+            except asyncio.TimeoutError:
+                pass
+
+    async def demarrer(self):
+        """Reprendre le dernier snapshot disque puis lancer le rafraîchissement périodique"""
+        try:
+            if await asyncio.to_thread(self.charger_dernier):
+                print(f"🗂️ Snapshot dashboard v{self.version} chargé depuis {self.dossier}")
+        except Exception as e:
+            print(f"⚠️ Lecture du snapshot dashboard impossible: {e}")
+        self._verrou = asyncio.Lock()
+        self._demande = asyncio.Event()
+        if self._tache is None or self._tache.done():
+            self._tache = asyncio.get_running_loop().create_task(self._boucle())
+
+    async def arreter(self):
+        if self._tache is not None:
+            self._tache.cancel()
+            try:
+                await self._tache
+            except asyncio.CancelledError:
+                pass
+            self._tache = None
+
+    def stats(self) -> Dict:
+        return {
+            "version": self.version,
+            "genere_le": self.genere_le,
+            "age_secondes": round(self.age_secondes(), 1) if self.genere_le else None,
+            "duree_calcul_ms": self.duree_calcul_ms,
+            "sections": sorted(self._sections),
+            "erreurs": self.erreurs,
+            "taille_octets": len(self.contenu) if self.contenu else 0,
+            "taille_gzip_octets": len(self.contenu_gzip) if self.contenu_gzip else 0,
+        }
+
+# Instance globale, alimentée par routes_dashboard
+snapshot_dashboard = ServiceSnapshotDashboard(
+    settings.dashboard_snapshot_dir,
+    settings.dashboard_snapshot_interval,
+    settings.dashboard_snapshot_versions
+)
@@ -1,15 +1,21 @@
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from typing import List, Optional
 import uvicorn
 from datetime import datetime
 from contextlib import asynccontextmanager
 
 from models.models import User, UserCreate, UserUpdate, Item, ItemCreate, ItemUpdate
-from database.database import get_db, init_db, check_db_connection
+from database.database import get_db, init_db, check_db_connection, stats_pool_postgres, prechauffer_pool_postgres
 from database.crud import user_crud, item_crud
 from auth.auth import require_jwt, optional_jwt
+from auth.cache_tokens import cache_tokens
+from auth.hachage import pool_hachage
+from auth.revocation import registre_revocations
 from config.config import settings
+from utils.metriques import MiddlewareMetriques, registre_metriques, TYPE_CONTENU_EXPOSITION
+from database.requetes_lentes import MiddlewareContexteRequete
 
 # 🚀 Import des routers optimisés
 from routes.routes_postgres_livres import postgres_livres_router  # PostgreSQL - Livres réels
@@ -17,6 +23,9 @@ from routes.routes_postgres_extras import postgres_extras_router  # PostgreSQL -
 from routes.routes_mongo_livres import mongo_livres_router  # MongoDB - Livres & Critiques
 from routes.routes_mongo_extras import mongo_extras_router  # MongoDB - Analytics
 from routes.auth_routes import auth_router  # Authentification JWT
+from routes.routes_dashboard import dashboard_router  # Dashboard - snapshot précalculé
+from routes.routes_admin import admin_router  # Administration - requêtes lentes
+from database.snapshot_dashboard import snapshot_dashboard
 
 # ❌ Imports supprimés pour simplification :
 # - routes_postgres (legacy)
@@ -41,23 +50,40 @@ async def lifespan(app: FastAPI):
     print("📊 Initialisation de PostgreSQL...")
     init_db()
     check_db_connection()
+    # Connexions ouvertes d'avance : les premières requêtes ne paient pas l'établissement
+    try:
+        print(f"🔥 Pool PostgreSQL préchauffé: {prechauffer_pool_postgres()} connexion(s)")
+    except Exception as e:
+        print(f"⚠️ Préchauffage du pool PostgreSQL impossible - {e}")
+    
+    # Révocations de tokens : chargement initial puis synchronisation entre workers
+    await registre_revocations.demarrer_synchronisation()
     
     # Initialisation MongoDB
     if MONGODB_AVAILABLE and mongodb_service:
         print("🍃 Initialisation de MongoDB...")
         try:
             await mongodb_service.connect_async()
+            print(f"🔥 Pool MongoDB préchauffé: {await mongodb_service.prechauffer_pool()} connexion(s)")
         except Exception as e:
             print(f"⚠️ Avertissement: MongoDB non disponible - {e}")
+        # Heartbeat : état de santé en cache et rétablissement automatique
+        mongodb_service.demarrer_heartbeat()
     else:
         print("⚠️ MongoDB non configuré")
     
+    # Snapshot du dashboard : dernière version sur disque puis rafraîchissement en arrière-plan
+    await snapshot_dashboard.demarrer()
+    
     print("✅ Application prête!")
     yield
     
     # Shutdown
     print("🛑 Arrêt de l'application...")
+    await snapshot_dashboard.arreter()
+    await registre_revocations.arreter_synchronisation()
     if MONGODB_AVAILABLE and mongodb_service:
+        await mongodb_service.arreter_heartbeat()
         mongodb_service.disconnect()
 
 # Initialisation de l'application FastAPI
@@ -95,12 +121,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Métriques HTTP (latence et statut par route) pour /metrics
+if settings.metrics_enabled:
+    app.add_middleware(MiddlewareMetriques)
+
+# Route appelante attachée aux requêtes lentes
+if settings.slow_query_enabled:
+    app.add_middleware(MiddlewareContexteRequete)
+
 # 🚀 Inclusion des routers optimisés
 app.include_router(auth_router)  # Authentification JWT
 app.include_router(postgres_livres_router)  # PostgreSQL - Livres réels
 app.include_router(postgres_extras_router)  # PostgreSQL - Analytics
 app.include_router(mongo_livres_router)  # MongoDB - Livres & Critiques
 app.include_router(mongo_extras_router)  # MongoDB - Analytics
+app.include_router(dashboard_router)  # Dashboard - snapshot précalculé
+app.include_router(admin_router)  # Administration - requêtes lentes
 
 # ❌ Routers supprimés pour simplification :
 # - postgres_router (legacy users - remplacé par auth_router)
@@ -148,8 +184,13 @@ async def root():
 
 # Route de santé (publique)
 @app.get("/health")
-async def health_check():
-    """Vérification de l'état de santé de l'API et des bases de données"""
+async def health_check(deep: bool = False):
+    """
+    Vérification de l'état de santé de l'API et des bases de données
+    
+    `?deep=true` ajoute l'occupation en direct des pools de connexions
+    PostgreSQL et MongoDB et une sonde MongoDB immédiate (hors cache).
+    """
     status = {
         "api": "OK",
         "timestamp": datetime.now(),
@@ -165,19 +206,41 @@ async def health_check():
     
     # Test MongoDB
     if MONGODB_AVAILABLE and mongodb_service:
-        try:
-            if mongodb_service.async_client is not None:
-                await mongodb_service.database.list_collection_names()
-                status["databases"]["mongodb"] = "connected"
-            else:
-                status["databases"]["mongodb"] = "not initialized"
-        except Exception as e:
-            status["databases"]["mongodb"] = f"error: {str(e)}"
+        # État maintenu par le heartbeat : pas d'aller-retour supplémentaire (sauf sonde profonde)
+        if deep:
+            debut_sonde = datetime.now()
+            await mongodb_service.verifier_sante()
+            status["databases"]["mongodb_sonde_ms"] = round((datetime.now() - debut_sonde).total_seconds() * 1000, 1)
+        etat_mongo = mongodb_service.etat_sante()
+        if etat_mongo["disponible"]:
+            status["databases"]["mongodb"] = "connected"
+        elif mongodb_service.async_client is None:
+            status["databases"]["mongodb"] = "not initialized"
+        else:
+            status["databases"]["mongodb"] = f"error: {etat_mongo['derniere_erreur']}"
+        status["databases"]["mongodb_sante"] = etat_mongo
     else:
         status["databases"]["mongodb"] = "not configured"
     
+    status["cache_tokens"] = cache_tokens.stats()
+    status["hachage_mots_de_passe"] = pool_hachage.stats()
+    status["revocations"] = registre_revocations.stats()
+    status["snapshot_dashboard"] = snapshot_dashboard.stats()
+    if deep:
+        status["pools"] = {
+            "postgresql": stats_pool_postgres(),
+            "mongodb": mongodb_service.stats_pools() if MONGODB_AVAILABLE and mongodb_service else None,
+        }
     return status
 
+# Route de métriques (publique, format Prometheus)
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métriques HTTP, PostgreSQL et MongoDB au format d'exposition Prometheus"""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Métriques désactivées")
+    return Response(content=registre_metriques.exposition(), media_type=TYPE_CONTENU_EXPOSITION)
+
 # Route de résumé rapide (publique)
 @app.get("/summary")
 async def summary():
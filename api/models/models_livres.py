@@ -1,7 +1,9 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime, date
 
+from config.config import settings
+
 # Modèles pour la vraie structure de base de données
 
 class Auteur(BaseModel):
@@ -67,6 +69,37 @@ class Livre(BaseModel):
     class Config:
         from_attributes = True
 
+# Relations d'un livre (listes agrégées par la requête de détail)
+
+class AuteurLivre(BaseModel):
+    """Auteur d'un livre, dans l'ordre de la table livre_auteur"""
+    id_auteur: int
+    nom: Optional[str] = None
+    prenom: Optional[str] = None
+    nom_complet: Optional[str] = None
+    biographie: Optional[str] = None
+    role: Optional[str] = None
+
+class EditeurLivre(BaseModel):
+    """Éditeur d'un livre"""
+    id_editeur: int
+    nom_editeur: Optional[str] = None
+    pays: Optional[str] = None
+    annee_creation: Optional[int] = None
+
+class LangueLivre(BaseModel):
+    """Langue d'un livre (la langue principale en premier)"""
+    id_langue: int
+    code_langue: Optional[str] = None
+    nom_langue: Optional[str] = None
+    langue_principale: Optional[bool] = None
+
+class SujetLivre(BaseModel):
+    """Sujet d'un livre (par pertinence décroissante)"""
+    id_sujet: int
+    nom_sujet: Optional[str] = None
+    categorie: Optional[str] = None
+
 class LivreComplet(BaseModel):
     """Modèle pour un livre avec toutes ses relations"""
     # Informations du livre
@@ -102,6 +135,12 @@ class LivreComplet(BaseModel):
     sujet_nom: Optional[str] = None
     sujet_categorie: Optional[str] = None
     
+    # Toutes les relations (les champs ci-dessus reprennent le premier élément)
+    auteurs: List[AuteurLivre] = []
+    editeurs: List[EditeurLivre] = []
+    langues: List[LangueLivre] = []
+    sujets: List[SujetLivre] = []
+    
     # Métadonnées
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
@@ -155,4 +194,14 @@ class LivreResponse(BaseModel):
     """Réponse pour un livre unique"""
     data: LivreComplet
     success: bool = True
-    message: str = "Livre récupéré avec succès" 
\ No newline at end of file
+    message: str = "Livre récupéré avec succès"
+
+class LivresBatchRequest(BaseModel):
+    """Lot d'identifiants de livres à récupérer en une requête"""
+    ids: List[int] = Field(..., min_length=1, max_length=settings.batch_max_ids)
+
+class LivresBatchResponse(BaseModel):
+    """Livres trouvés dans l'ordre de la demande, et identifiants introuvables"""
+    data: List[LivreComplet]
+    manquants: List[int] = []
+    total: int = 0 
\ No newline at end of file
@@ -2,6 +2,8 @@ from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
+from config.config import settings
+
 # Modèles simplifiés pour MongoDB (compatibles Pydantic v2)
 class BookMongo(BaseModel):
     model_config = ConfigDict(
@@ -111,4 +113,9 @@ class BookInventory(BaseModel):
     supplier_info: Dict[str, Any] = Field(default_factory=dict)
     last_restock_date: Optional[datetime] = None
     created_at: Optional[datetime] = None
-    updated_at: Optional[datetime] = None 
\ No newline at end of file
+    updated_at: Optional[datetime] = None 
+
+class LivresMongoBatchRequest(BaseModel):
+    """Lot d'identifiants (ObjectId ou chaîne) de la collection livres"""
+    ids: List[str] = Field(..., min_length=1, max_length=settings.batch_max_ids)
+    inclure_critiques: bool = False
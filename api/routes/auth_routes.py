@@ -1,4 +1,5 @@
 from datetime import timedelta
+from jose import jwt
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
@@ -8,16 +9,28 @@ from database.database import get_db
 from database.crud import user_crud
 from models.models import User, UserCreate, Token
 from auth.auth import (
-    verify_password, 
     create_access_token, 
     get_current_active_user,
-    get_password_hash
+    oauth2_scheme
 )
+from auth.hachage import hacher_mot_de_passe, verifier_mot_de_passe
+from auth.cache_tokens import cache_tokens
+from auth.revocation import registre_revocations
 from config.config import settings
 
 # Router d'authentification
 auth_router = APIRouter(prefix="/auth", tags=["Authentification"])
 
+def revoquer_token(db: Session, token: str) -> bool:
+    """Révoquer un token déjà validé par get_current_active_user (False si sans jti)"""
+    claims = jwt.get_unverified_claims(token)
+    jti, expiration = claims.get("jti"), claims.get("exp")
+    cache_tokens.invalider_token(token)
+    if not jti or expiration is None:
+        return False
+    registre_revocations.revoquer(db, jti, float(expiration), email=claims.get("sub"))
+    return True
+
 @auth_router.post("/register", response_model=User)
 async def register(user: UserCreate, db: Session = Depends(get_db)):
     """Inscription d'un nouvel utilisateur"""
@@ -29,8 +42,9 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
             detail="Un utilisateur avec cet email existe déjà"
         )
     
-    # Créer l'utilisateur
-    return user_crud.create_user(db=db, user=user)
+    # Créer l'utilisateur (bcrypt calculé dans le pool dédié)
+    hashed_password = await hacher_mot_de_passe(user.password)
+    return user_crud.create_user(db=db, user=user, hashed_password=hashed_password)
 
 # ❌ Endpoint /auth/token supprimé pour simplification
 # Utilisez /auth/login qui accepte JSON ET form-data OAuth2
@@ -53,12 +67,20 @@ async def login_unified(
     # Authentifier l'utilisateur
     user = user_crud.get_user_by_email(db, email=email)
     
-    if not user or not verify_password(password, user.hashed_password):
+    mot_de_passe_valide, nouveau_hash = False, None
+    if user:
+        mot_de_passe_valide, nouveau_hash = await verifier_mot_de_passe(password, user.hashed_password)
+    
+    if not mot_de_passe_valide:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou mot de passe incorrect"
         )
     
+    # Coût bcrypt modifié depuis le hachage : remplacer le hash de façon transparente
+    if nouveau_hash:
+        user_crud.set_password_hash(db, user, nouveau_hash)
+    
     # Créer le token d'accès
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
@@ -82,12 +104,17 @@ async def read_users_me(current_user: User = Depends(get_current_active_user)):
     return current_user
 
 @auth_router.post("/refresh")
-async def refresh_token(current_user: User = Depends(get_current_active_user)):
-    """Rafraîchir le token JWT"""
+async def refresh_token(
+    current_user: User = Depends(get_current_active_user),
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+):
+    """Rafraîchir le token JWT (l'ancien token est révoqué)"""
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
         data={"sub": current_user.email}, expires_delta=access_token_expires
     )
+    revoquer_token(db, token)
     
     return {
         "access_token": access_token, 
@@ -101,11 +128,16 @@ async def refresh_token(current_user: User = Depends(get_current_active_user)):
     }
 
 @auth_router.post("/logout")
-async def logout(current_user: User = Depends(get_current_active_user)):
-    """Déconnexion (côté client, invalidation du token)"""
+async def logout(
+    current_user: User = Depends(get_current_active_user),
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+):
+    """Déconnexion : le token est révoqué côté serveur jusqu'à son expiration"""
+    revoque = revoquer_token(db, token)
     return {
         "message": "Déconnexion réussie",
-        "detail": "Supprimez le token côté client"
+        "detail": "Token révoqué" if revoque else "Token sans identifiant (jti) : supprimez-le côté client"
     }
 
 # ❌ Route protégée d'exemple supprimée pour simplification
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+
+from database.requetes_lentes import journal_requetes_lentes
+from database.snapshot_dashboard import snapshot_dashboard
+from auth.auth import require_api_key
+
+# Router d'administration (clé API requise : en-tête X-API-Key)
+admin_router = APIRouter(prefix="/admin", tags=["Administration"], dependencies=[Depends(require_api_key)])
+
+@admin_router.get("/requetes-lentes")
+async def lister_requetes_lentes(
+    source: Optional[str] = Query(None, pattern="^(postgresql|mongodb)$", description="Filtrer par base"),
+    limit: int = Query(50, ge=1, le=1000)
+):
+    """
+    🐢 Requêtes SQL et commandes MongoDB ayant dépassé le seuil de lenteur
+
+    Les plus récentes d'abord, avec la route appelante, les paramètres masqués
+    et, pour une partie des SELECT, le plan EXPLAIN (ANALYZE, BUFFERS).
+    """
+    return {
+        "success": True,
+        "journal": journal_requetes_lentes.stats(),
+        "data": journal_requetes_lentes.entrees(source, limit)
+    }
+
+@admin_router.delete("/requetes-lentes")
+async def vider_requetes_lentes():
+    """🧹 Vider le tampon des requêtes lentes"""
+    journal_requetes_lentes.vider()
+    return {"success": True, "message": "Tampon des requêtes lentes vidé"}
+
+@admin_router.post("/dashboard/snapshot/refresh", status_code=202)
+async def rafraichir_snapshot_admin():
+    """🔄 Recalcul du snapshot du dashboard, appelé par les scripts d'import de bdd/"""
+    snapshot_dashboard.demander_rafraichissement()
+    return {
+        "success": True,
+        "message": "Rafraîchissement du snapshot demandé",
+        "version_actuelle": snapshot_dashboard.version
+    }
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import weakref
+
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+
+from config.config import settings
+from database.requetes_paralleles import executer_sql_en_parallele
+from database.snapshot_dashboard import snapshot_dashboard
+from auth.auth import require_jwt
+from routes.routes_postgres_livres import calculer_statistiques_generales
+from routes.routes_postgres_extras import (
+    calculer_analytics_postgres, calculer_top_auteurs, calculer_top_editeurs,
+    calculer_stats_annees, calculer_stats_langues, calculer_stats_pages, calculer_stats_formats
+)
+from routes.routes_mongo_extras import analytics_avances, check_mongodb
+
+try:
+    from database.mongo_crud import mongodb_service
+    MONGODB_AVAILABLE = True
+except ImportError:
+    MONGODB_AVAILABLE = False
+    mongodb_service = None
+
+# Router du dashboard : une seule lecture pour l'accueil et les analytics
+dashboard_router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+def _contenu(resultat):
+    """Contenu JSON d'un handler (dict ou Response déjà encodée)"""
+    if isinstance(resultat, Response):
+        return json.loads(resultat.body)
+    return resultat
+
+_limites_snapshot = weakref.WeakKeyDictionary()
+
+def _limite_snapshot() -> asyncio.Semaphore:
+    """
+    Connexions PostgreSQL prises en même temps par tout le recalcul du snapshot
+
+    Les sections sont calculées simultanément : sans budget commun, chacune
+    prendrait ses propres connexions du pool. Un sémaphore par boucle asyncio.
+    """
+    boucle = asyncio.get_running_loop()
+    if boucle not in _limites_snapshot:
+        _limites_snapshot[boucle] = asyncio.Semaphore(max(1, settings.db_parallel_queries))
+    return _limites_snapshot[boucle]
+
+def _section_postgres(fonction, **parametres):
+    """Requêtes synchrones d'un endpoint PostgreSQL, dans un thread avec leur propre session"""
+    async def fournisseur():
+        resultats, _ = await executer_sql_en_parallele(
+            {"section": lambda db: fonction(db, **parametres)},
+            limite=_limite_snapshot()
+        )
+        return resultats["section"]
+    return fournisseur
+
+async def _analytics_postgres():
+    return await calculer_analytics_postgres(limite=_limite_snapshot())
+
+async def _analytics_mongo():
+    await check_mongodb()
+    return _contenu(await analytics_avances())
+
+async def _resume_mongo():
+    await check_mongodb()
+    # Comptes estimés depuis les métadonnées des collections : pas de parcours
+    livres, critiques = await asyncio.gather(
+        mongodb_service.database.livres.estimated_document_count(),
+        mongodb_service.database.critiques_livres.estimated_document_count()
+    )
+    # Même forme que /summary
+    return {"success": True, "data": {"livres_mongodb": livres, "critiques_babelio": critiques}}
+
+snapshot_dashboard.enregistrer_section("postgres_stats_generales", _section_postgres(calculer_statistiques_generales))
+snapshot_dashboard.enregistrer_section("postgres_analytics", _analytics_postgres)
+snapshot_dashboard.enregistrer_section("postgres_top_auteurs", _section_postgres(calculer_top_auteurs, limit=20))
+snapshot_dashboard.enregistrer_section("postgres_top_editeurs", _section_postgres(calculer_top_editeurs, limit=20))
+snapshot_dashboard.enregistrer_section("postgres_annees", _section_postgres(calculer_stats_annees))
+snapshot_dashboard.enregistrer_section("postgres_langues", _section_postgres(calculer_stats_langues))
+snapshot_dashboard.enregistrer_section("postgres_pages", _section_postgres(calculer_stats_pages))
+snapshot_dashboard.enregistrer_section("postgres_formats", _section_postgres(calculer_stats_formats))
+if MONGODB_AVAILABLE:
+    snapshot_dashboard.enregistrer_section("mongo_analytics", _analytics_mongo)
+    snapshot_dashboard.enregistrer_section("mongo_resume", _resume_mongo)
+
+@dashboard_router.get("/snapshot")
+async def obtenir_snapshot(
+    request: Request,
+    current_user = Depends(require_jwt)
+):
+    """
+    🗂️ Données précalculées du dashboard (analytics, tops, distributions)
+
+    Servies telles quelles depuis le dernier snapshot : pas de requête en base.
+    L'en-tête ETag porte la version ; If-None-Match renvoie 304 si elle n'a pas changé.
+    """
+    if snapshot_dashboard.contenu is None:
+        raise HTTPException(status_code=503, detail="Snapshot du dashboard en cours de génération", headers={"Retry-After": "5"})
+
+    etag = f'"{snapshot_dashboard.version}"'
+    entetes = {"ETag": etag, "Cache-Control": "private, no-cache", "X-Snapshot-Version": str(snapshot_dashboard.version)}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=entetes)
+
+    # Version compressée servie directement si le client l'accepte
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        entetes["Content-Encoding"] = "gzip"
+        entetes["Vary"] = "Accept-Encoding"
+        return Response(content=snapshot_dashboard.contenu_gzip, media_type="application/json", headers=entetes)
+    return Response(content=snapshot_dashboard.contenu, media_type="application/json", headers=entetes)
+
+@dashboard_router.get("/snapshot/info")
+async def info_snapshot(current_user = Depends(require_jwt)):
+    """ℹ️ Version, âge, durée de calcul et erreurs du snapshot courant"""
+    return {"success": True, "snapshot": snapshot_dashboard.stats()}
+
+@dashboard_router.post("/snapshot/refresh", status_code=202)
+async def rafraichir_snapshot(current_user = Depends(require_jwt)):
+    """🔄 Demander un recalcul du snapshot (à appeler après un import de données)"""
+    snapshot_dashboard.demander_rafraichissement()
+    return {
+        "success": True,
+        "message": "Rafraîchissement du snapshot demandé",
+        "version_actuelle": snapshot_dashboard.version
+    }
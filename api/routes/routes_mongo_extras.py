@@ -1,57 +1,31 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-from bson import ObjectId
 
 try:
-    from database.mongo_crud import mongodb_service
+    from database.mongo_crud import mongodb_service, MongoDBIndisponible
     MONGODB_AVAILABLE = True
 except ImportError:
     MONGODB_AVAILABLE = False
     mongodb_service = None
 
-# Router pour les fonctionnalités avancées MongoDB
-mongo_extras_router = APIRouter(prefix="/mongo-extras", tags=["MongoDB - Fonctionnalités avancées"])
+from database.requetes_paralleles import executer_en_parallele
+from utils.json_mongo import ReponseMongoJSON
+from database.projections_mongo import projection_mongo, DESCRIPTION_FIELDS
+from database.histogrammes import QUANTILES_DEFAUT, lire_quantiles, bornes_classes, completer_histogramme, rangs_quantiles, interpoler_quantiles, arrondir
+from config.config import settings
 
 async def check_mongodb():
-    """Vérifier la disponibilité de MongoDB"""
-    if not MONGODB_AVAILABLE:
+    """Vérifier la disponibilité de MongoDB (état en cache, sans aller-retour serveur)"""
+    if not MONGODB_AVAILABLE or mongodb_service is None:
         raise HTTPException(status_code=503, detail="MongoDB non disponible")
-    if mongodb_service is None:
-        raise HTTPException(status_code=503, detail="MongoDB service non disponible")
-    # S'assurer que la connexion async est établie
-    if mongodb_service.database is None:
-        try:
-            await mongodb_service.connect_async()
-        except Exception as e:
-            raise HTTPException(status_code=503, detail=f"Impossible de se connecter à MongoDB: {str(e)}")
-    
-    # Vérifier que la base est accessible
     try:
-        await mongodb_service.database.list_collection_names()
-    except Exception as e:
-        raise HTTPException(status_code=503, detail=f"MongoDB erreur: {str(e)}")
+        await mongodb_service.assurer_disponible()
+    except MongoDBIndisponible as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
-def serialize_mongo_doc(doc):
-    """Convertir un document MongoDB en dict JSON-serializable"""
-    if doc is None:
-        return None
-    
-    # Créer une copie pour éviter de modifier l'original
-    doc_copy = dict(doc)
-    
-    # Convertir ObjectId en string
-    if '_id' in doc_copy:
-        doc_copy['_id'] = str(doc_copy['_id'])
-    
-    # Convertir les dates en ISO string
-    for key, value in doc_copy.items():
-        if isinstance(value, datetime):
-            doc_copy[key] = value.isoformat()
-        elif isinstance(value, ObjectId):
-            doc_copy[key] = str(value)
-    
-    return doc_copy
+# Router pour les fonctionnalités avancées MongoDB
+mongo_extras_router = APIRouter(prefix="/mongo-extras", tags=["MongoDB - Fonctionnalités avancées"], dependencies=[Depends(check_mongodb)], default_response_class=ReponseMongoJSON)
 
 # ❌ Page d'accueil supprimée - info incluse dans GET / principal
 
@@ -59,8 +33,6 @@ def serialize_mongo_doc(doc):
 async def lister_genres():
     """📑 Lister tous les genres disponibles avec leur nombre de livres"""
     try:
-        await check_mongodb()
-        
         pipeline = [
             {"$unwind": "$tous_les_genres"},
             {"$group": {"_id": "$tous_les_genres", "count": {"$sum": 1}}},
@@ -69,11 +41,11 @@ async def lister_genres():
         
         genres = await mongodb_service.database.livres.aggregate(pipeline).to_list(length=None)
         
-        return {
+        return ReponseMongoJSON({
             "success": True,
             "data": genres,
             "total_genres": len(genres)
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -81,8 +53,6 @@ async def lister_genres():
 async def lister_auteurs():
     """✍️ Lister tous les auteurs avec leur nombre de livres"""
     try:
-        await check_mongodb()
-        
         pipeline = [
             {"$unwind": "$auteurs"},
             {"$group": {"_id": "$auteurs", "count": {"$sum": 1}}},
@@ -91,63 +61,63 @@ async def lister_auteurs():
         
         auteurs = await mongodb_service.database.livres.aggregate(pipeline).to_list(length=None)
         
-        return {
+        return ReponseMongoJSON({
             "success": True,
             "data": auteurs,
             "total_auteurs": len(auteurs)
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @mongo_extras_router.get("/livres/genre/{genre}")
 async def livres_par_genre(
     genre: str,
-    limit: int = Query(20, le=100)
+    limit: int = Query(20, le=100),
+    fields: Optional[str] = Query(None, description=DESCRIPTION_FIELDS)
 ):
     """📚 Récupérer les livres d'un genre spécifique"""
+    projection = projection_mongo(fields)
     try:
-        await check_mongodb()
-        
         cursor = mongodb_service.database.livres.find({
             "tous_les_genres": genre
-        }).limit(limit)
+        }, projection).limit(limit)
         
         livres = await cursor.to_list(length=limit)
         total = await mongodb_service.database.livres.count_documents({"tous_les_genres": genre})
         
-        return {
+        return ReponseMongoJSON({
             "success": True,
             "genre": genre,
-            "data": [serialize_mongo_doc(livre) for livre in livres],
+            "data": livres,
             "total_genre": total,
             "returned": len(livres)
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @mongo_extras_router.get("/livres/auteur/{auteur}")
 async def livres_par_auteur(
     auteur: str,
-    limit: int = Query(20, le=100)
+    limit: int = Query(20, le=100),
+    fields: Optional[str] = Query(None, description=DESCRIPTION_FIELDS)
 ):
     """📖 Récupérer les livres d'un auteur spécifique"""
+    projection = projection_mongo(fields)
     try:
-        await check_mongodb()
-        
         cursor = mongodb_service.database.livres.find({
             "auteurs": auteur
-        }).limit(limit)
+        }, projection).limit(limit)
         
         livres = await cursor.to_list(length=limit)
         total = await mongodb_service.database.livres.count_documents({"auteurs": auteur})
         
-        return {
+        return ReponseMongoJSON({
             "success": True,
             "auteur": auteur,
-            "data": [serialize_mongo_doc(livre) for livre in livres],
+            "data": livres,
             "total_auteur": total,
             "returned": len(livres)
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -155,19 +125,17 @@ async def livres_par_auteur(
 async def livres_mieux_notes(limit: int = Query(10, le=50)):
     """⭐ Récupérer les livres les mieux notés"""
     try:
-        await check_mongodb()
-        
         cursor = mongodb_service.database.livres.find({
             "note": {"$type": "number", "$gte": 1}
         }).sort("note", -1).limit(limit)
         
         livres = await cursor.to_list(length=limit)
         
-        return {
+        return ReponseMongoJSON({
             "success": True,
-            "data": [serialize_mongo_doc(livre) for livre in livres],
+            "data": livres,
             "total": len(livres)
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -175,19 +143,17 @@ async def livres_mieux_notes(limit: int = Query(10, le=50)):
 async def critiques_mieux_notees(limit: int = Query(10, le=50)):
     """⭐ Récupérer les critiques avec les meilleures notes Babelio"""
     try:
-        await check_mongodb()
-        
         cursor = mongodb_service.database.critiques_livres.find({
             "note_babelio": {"$type": "number", "$gte": 1}
         }).sort("note_babelio", -1).limit(limit)
         
         critiques = await cursor.to_list(length=limit)
         
-        return {
+        return ReponseMongoJSON({
             "success": True,
-            "data": [serialize_mongo_doc(critique) for critique in critiques],
+            "data": critiques,
             "total": len(critiques)
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -195,14 +161,11 @@ async def critiques_mieux_notees(limit: int = Query(10, le=50)):
 async def analytics_avances():
     """📊 Analytics avancés de vos données MongoDB"""
     try:
-        await check_mongodb()
-        
         # Répartition par langue
         pipeline_langues = [
             {"$group": {"_id": "$langue", "count": {"$sum": 1}}},
             {"$sort": {"count": -1}}
         ]
-        langues = await mongodb_service.database.livres.aggregate(pipeline_langues).to_list(length=None)
         
         # Répartition des notes des livres
         pipeline_notes_livres = [
@@ -210,7 +173,6 @@ async def analytics_avances():
             {"$group": {"_id": "$note", "count": {"$sum": 1}}},
             {"$sort": {"_id": 1}}
         ]
-        notes_livres = await mongodb_service.database.livres.aggregate(pipeline_notes_livres).to_list(length=None)
         
         # Statistiques des critiques Babelio
         pipeline_stats_critiques = [
@@ -223,7 +185,6 @@ async def analytics_avances():
                 "total_votes": {"$sum": "$nombre_votes_babelio"}
             }}
         ]
-        stats_critiques = await mongodb_service.database.critiques_livres.aggregate(pipeline_stats_critiques).to_list(length=1)
         
         # Top genres par nombre de livres
         pipeline_top_genres = [
@@ -232,27 +193,35 @@ async def analytics_avances():
             {"$sort": {"count": -1}},
             {"$limit": 10}
         ]
-        top_genres = await mongodb_service.database.livres.aggregate(pipeline_top_genres).to_list(length=10)
         
         # Livres récents (par date d'import)
-        livres_recents = []
-        try:
-            cursor = mongodb_service.database.livres.find({}).sort("_import_date", -1).limit(5)
-            livres_recents = await cursor.to_list(length=5)
-        except:
-            pass
+        cursor_recents = mongodb_service.database.livres.find({}).sort("_import_date", -1).limit(5)
         
-        return {
+        # Agrégations indépendantes : lancées simultanément
+        livres = mongodb_service.database.livres
+        resultats, timings = await executer_en_parallele({
+            "langues": livres.aggregate(pipeline_langues).to_list(length=None),
+            "notes_livres": livres.aggregate(pipeline_notes_livres).to_list(length=None),
+            "stats_critiques": mongodb_service.database.critiques_livres.aggregate(pipeline_stats_critiques).to_list(length=1),
+            "top_genres": livres.aggregate(pipeline_top_genres).to_list(length=10),
+            "livres_recents": cursor_recents.to_list(length=5),
+        }, defauts={"livres_recents": []})
+        stats_critiques = resultats["stats_critiques"]
+        
+        reponse = {
             "success": True,
             "timestamp": datetime.now(),
             "analytics": {
-                "repartition_langues": langues,
-                "repartition_notes_livres": notes_livres,
+                "repartition_langues": resultats["langues"],
+                "repartition_notes_livres": resultats["notes_livres"],
                 "stats_critiques_babelio": stats_critiques[0] if stats_critiques else {},
-                "top_genres": top_genres,
-                "livres_recents": [serialize_mongo_doc(livre) for livre in livres_recents]
+                "top_genres": resultats["top_genres"],
+                "livres_recents": resultats["livres_recents"]
             }
         }
+        if settings.debug:
+            reponse["timings_ms"] = timings
+        return ReponseMongoJSON(reponse)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -264,12 +233,12 @@ async def recherche_avancee(
     langue: Optional[str] = Query(None),
     note_min: Optional[float] = Query(None, ge=0, le=5),
     note_max: Optional[float] = Query(None, ge=0, le=5),
-    limit: int = Query(20, le=100)
+    limit: int = Query(20, le=100),
+    fields: Optional[str] = Query(None, description=DESCRIPTION_FIELDS)
 ):
     """🔍 Recherche avancée avec filtres multiples"""
+    projection = projection_mongo(fields)
     try:
-        await check_mongodb()
-        
         # Construire la requête
         query = {}
         
@@ -290,16 +259,108 @@ async def recherche_avancee(
             query["note"] = note_query
         
         # Exécuter la recherche
-        cursor = mongodb_service.database.livres.find(query).limit(limit)
+        cursor = mongodb_service.database.livres.find(query, projection).limit(limit)
         livres = await cursor.to_list(length=limit)
         total = await mongodb_service.database.livres.count_documents(query)
         
-        return {
+        return ReponseMongoJSON({
             "success": True,
             "filtres_appliques": query,
-            "data": [serialize_mongo_doc(livre) for livre in livres],
+            "data": livres,
             "total_correspondant": total,
             "returned": len(livres)
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) 
+@mongo_extras_router.get("/critiques/distribution")
+async def distribution_notes_critiques(
+    bins: int = Query(10, ge=1, le=100, description="Nombre de classes"),
+    mode: str = Query("fixe", pattern="^(fixe|auto)$", description="fixe : classes de même largeur ($bucket), auto : effectifs équilibrés ($bucketAuto)"),
+    note_min: float = Query(0, ge=0, le=5, description="Borne basse de l'histogramme"),
+    note_max: float = Query(5, ge=0, le=5, description="Borne haute de l'histogramme"),
+    titre: Optional[str] = Query(None, description="Filtrer par titre de livre"),
+    votes_min: Optional[int] = Query(None, ge=0, description="Nombre minimal de votes Babelio"),
+    quantiles: str = Query(QUANTILES_DEFAUT, description="Quantiles à calculer, séparés par des virgules")
+):
+    """📊 Distribution des notes Babelio des critiques (histogramme et quantiles calculés par MongoDB)"""
+    if note_max <= note_min:
+        raise HTTPException(status_code=400, detail="note_max doit être supérieure à note_min")
+    probabilites = lire_quantiles(quantiles)
+    try:
+        filtre = {"note_babelio": {"$type": "number", "$gte": note_min, "$lte": note_max}}
+        if titre:
+            filtre["titre"] = {"$regex": titre, "$options": "i"}
+        if votes_min is not None:
+            filtre["nombre_votes_babelio"] = {"$gte": votes_min}
+        
+        critiques = mongodb_service.database.critiques_livres
+        bornes = bornes_classes(note_min, note_max, bins)
+        if mode == "auto":
+            etape_classes = {"$bucketAuto": {"groupBy": "$note_babelio", "buckets": bins}}
+        else:
+            # $bucket exclut la borne supérieure : la dernière est décalée pour inclure note_max
+            limites = bornes[:-1] + [note_max + 1e-9]
+            etape_classes = {"$bucket": {"groupBy": "$note_babelio", "boundaries": limites, "default": "hors_bornes"}}
+        pipeline_stats = [
+            {"$match": filtre},
+            {"$group": {
+                "_id": None,
+                "nombre": {"$sum": 1},
+                "min_note": {"$min": "$note_babelio"},
+                "max_note": {"$max": "$note_babelio"},
+                "avg_note": {"$avg": "$note_babelio"}
+            }}
+        ]
+        
+        resultats, timings = await executer_en_parallele({
+            "classes": critiques.aggregate([{"$match": filtre}, etape_classes]).to_list(length=None),
+            "stats": critiques.aggregate(pipeline_stats).to_list(length=1),
+        })
+        stats = resultats["stats"][0] if resultats["stats"] else {"nombre": 0}
+        nombre = stats["nombre"]
+        
+        if mode == "auto":
+            classes = [
+                {"borne_inf": classe["_id"]["min"], "borne_sup": classe["_id"]["max"], "nombre": classe["count"]}
+                for classe in resultats["classes"]
+            ]
+        else:
+            index_classes = {limite: i for i, limite in enumerate(limites[:-1])}
+            classes = completer_histogramme(bornes, {
+                index_classes[classe["_id"]]: classe["count"]
+                for classe in resultats["classes"] if classe["_id"] in index_classes
+            })
+        
+        async def note_au_rang(rang: int):
+            # Parcours trié sur l'index note_babelio : un seul document renvoyé par rang
+            documents = await critiques.find(filtre, {"note_babelio": 1, "_id": 0}) \
+                .sort("note_babelio", 1).skip(rang).limit(1).to_list(length=1)
+            return documents[0]["note_babelio"] if documents else None
+        
+        valeurs_quantiles = {}
+        if nombre:
+            # Rangs encadrant chaque quantile, dédoublonnés : au plus deux lectures par quantile
+            valeurs_par_rang, timings_rangs = await executer_en_parallele({
+                rang: note_au_rang(rang) for rang in rangs_quantiles(nombre, probabilites)
+            })
+            timings.update({f"rang_{rang}": duree for rang, duree in timings_rangs.items()})
+            valeurs_quantiles = interpoler_quantiles(nombre, probabilites, valeurs_par_rang)
+        
+        reponse = {
+            "success": True,
+            "champ": "note_babelio",
+            "mode": mode,
+            "statistiques": {
+                "nombre": nombre,
+                "min_note": stats.get("min_note"),
+                "max_note": stats.get("max_note"),
+                "avg_note": arrondir(stats.get("avg_note"))
+            },
+            "classes": classes,
+            "quantiles": valeurs_quantiles
         }
+        if settings.debug:
+            reponse["timings_ms"] = timings
+        return ReponseMongoJSON(reponse)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
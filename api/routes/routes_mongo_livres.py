@@ -1,61 +1,35 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from bson import ObjectId
-import json
 
 try:
-    from database.mongo_crud import mongodb_service
+    from database.mongo_crud import mongodb_service, MongoDBIndisponible
     MONGODB_AVAILABLE = True
 except ImportError:
     MONGODB_AVAILABLE = False
     mongodb_service = None
 
 from auth.auth import require_jwt, optional_jwt
-
-# Router spécifique pour les livres MongoDB
-mongo_livres_router = APIRouter(prefix="/mongo-livres", tags=["MongoDB - Livres & Critiques"])
+from models.models_mongo import LivresMongoBatchRequest
+from database.requetes_paralleles import executer_en_parallele
+from utils.export import FORMATS_EXPORT, choisir_champs, entete_export, serialiser_lot, entetes_telechargement
+from utils.json_mongo import ReponseMongoJSON
+from database.projections_mongo import projection_mongo, DESCRIPTION_FIELDS
+from config.config import settings
 
 async def check_mongodb():
-    """Vérifier la disponibilité de MongoDB"""
-    if not MONGODB_AVAILABLE:
+    """Vérifier la disponibilité de MongoDB (état en cache, sans aller-retour serveur)"""
+    if not MONGODB_AVAILABLE or mongodb_service is None:
         raise HTTPException(status_code=503, detail="MongoDB non disponible")
-    if mongodb_service is None:
-        raise HTTPException(status_code=503, detail="MongoDB service non disponible")
-    
-    # S'assurer que la connexion async est établie
-    if mongodb_service.database is None:
-        try:
-            await mongodb_service.connect_async()
-        except Exception as e:
-            raise HTTPException(status_code=503, detail=f"Impossible de se connecter à MongoDB: {str(e)}")
-    
-    # Vérifier que la base est accessible
     try:
-        await mongodb_service.database.list_collection_names()
-    except Exception as e:
-        raise HTTPException(status_code=503, detail=f"MongoDB erreur: {str(e)}")
+        await mongodb_service.assurer_disponible()
+    except MongoDBIndisponible as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
-def serialize_mongo_doc(doc):
-    """Convertir un document MongoDB en dict JSON-serializable"""
-    if doc is None:
-        return None
-    
-    # Créer une copie pour éviter de modifier l'original
-    doc_copy = dict(doc)
-    
-    # Convertir ObjectId en string
-    if '_id' in doc_copy:
-        doc_copy['_id'] = str(doc_copy['_id'])
-    
-    # Convertir les dates en ISO string
-    for key, value in doc_copy.items():
-        if isinstance(value, datetime):
-            doc_copy[key] = value.isoformat()
-        elif isinstance(value, ObjectId):
-            doc_copy[key] = str(value)
-    
-    return doc_copy
+# Router spécifique pour les livres MongoDB
+mongo_livres_router = APIRouter(prefix="/mongo-livres", tags=["MongoDB - Livres & Critiques"], dependencies=[Depends(check_mongodb)], default_response_class=ReponseMongoJSON)
 
 # ❌ Page d'accueil supprimée - info incluse dans GET / principal
 
@@ -66,12 +40,12 @@ async def lister_livres_mongo(
     skip: int = Query(0, ge=0, description="Nombre d'éléments à ignorer"),
     limit: int = Query(20, le=100, description="Nombre d'éléments à retourner"),
     titre: Optional[str] = Query(None, description="Filtrer par titre"),
-    auteur: Optional[str] = Query(None, description="Filtrer par auteur")
+    auteur: Optional[str] = Query(None, description="Filtrer par auteur"),
+    fields: Optional[str] = Query(None, description=DESCRIPTION_FIELDS)
 ):
     """📚 Lister les livres de la collection MongoDB"""
+    projection = projection_mongo(fields)
     try:
-        await check_mongodb()
-        
         # Construire les filtres
         filters = {}
         if titre:
@@ -80,35 +54,124 @@ async def lister_livres_mongo(
             filters["auteurs"] = {"$regex": auteur, "$options": "i"}
         
         # Récupérer les livres
-        cursor = mongodb_service.database.livres.find(filters).skip(skip).limit(limit)
+        cursor = mongodb_service.database.livres.find(filters, projection).skip(skip).limit(limit)
         livres = await cursor.to_list(length=limit)
         
         # Compter le total
         total = await mongodb_service.database.livres.count_documents(filters)
         
-        # Sérialiser
-        livres_serialized = [serialize_mongo_doc(livre) for livre in livres]
-        
-        return {
+        return ReponseMongoJSON({
             "success": True,
-            "data": livres_serialized,
+            "data": livres,
             "pagination": {
                 "skip": skip,
                 "limit": limit,
                 "total": total,
-                "returned": len(livres_serialized)
+                "returned": len(livres)
             },
             "filters_applied": filters
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur: {str(e)}")
 
+# Champs exportés par défaut (les documents n'ont pas de schéma fixe : en NDJSON,
+# sans paramètre champs, les documents sont exportés complets)
+CHAMPS_EXPORT_DEFAUT = ["_id", "titre", "auteurs", "note", "tous_les_genres"]
+
+@mongo_livres_router.get("/livres/export")
+async def export_livres_mongo(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Format du flux : ndjson ou csv"),
+    champs: Optional[str] = Query(None, description="Champs à exporter, séparés par des virgules"),
+    titre: Optional[str] = Query(None, description="Filtrer par titre"),
+    auteur: Optional[str] = Query(None, description="Filtrer par auteur"),
+    note_min: Optional[float] = Query(None, description="Note minimale"),
+    limit: Optional[int] = Query(None, ge=1, description="Nombre maximal de livres exportés"),
+    current_user = Depends(require_jwt)
+):
+    """
+    📤 Exporter la collection livres en flux NDJSON ou CSV
+    
+    Le curseur Motor est lu par lots de batch_size documents, chaque lot étant
+    envoyé dès réception : la mémoire reste constante.
+    """
+    if champs is None and format == "ndjson":
+        champs_export = None
+    else:
+        champs_export = choisir_champs(champs, None, CHAMPS_EXPORT_DEFAUT)
+    
+    filters = {}
+    if titre:
+        filters["titre"] = {"$regex": titre, "$options": "i"}
+    if auteur:
+        filters["auteurs"] = {"$regex": auteur, "$options": "i"}
+    if note_min is not None:
+        filters["note"] = {"$gte": note_min}
+    
+    projection = {champ: 1 for champ in champs_export} if champs_export else None
+    if projection is not None and "_id" not in projection:
+        projection["_id"] = 0
+    
+    taille_lot = settings.export_batch_size
+    cursor = mongodb_service.database.livres.find(filters, projection).sort("_id", 1).batch_size(taille_lot)
+    if limit:
+        cursor = cursor.limit(limit)
+    
+    async def generer():
+        try:
+            yield entete_export(champs_export, format)
+            while True:
+                lot = await cursor.to_list(length=taille_lot)
+                if not lot:
+                    break
+                yield serialiser_lot(lot, champs_export, format)
+        finally:
+            await cursor.close()
+    
+    return StreamingResponse(
+        generer(),
+        media_type=FORMATS_EXPORT[format],
+        headers=entetes_telechargement("livres_mongo", format)
+    )
+
+# Déclarée avant /livres/{livre_id}, sinon "search" serait pris pour un identifiant
+@mongo_livres_router.get("/livres/search")
+async def rechercher_livres_mongo(
+    q: str = Query(..., min_length=2, description="Terme de recherche"),
+    limit: int = Query(20, le=50, description="Nombre de résultats"),
+    fields: Optional[str] = Query(None, description=DESCRIPTION_FIELDS)
+):
+    """🔍 Rechercher des livres dans MongoDB"""
+    projection = projection_mongo(fields)
+    try:
+        # Recherche dans plusieurs champs (adaptée à la vraie structure)
+        search_query = {
+            "$or": [
+                {"titre": {"$regex": q, "$options": "i"}},
+                {"auteurs": {"$regex": q, "$options": "i"}},
+                {"resume": {"$regex": q, "$options": "i"}},
+                {"tous_les_genres": {"$regex": q, "$options": "i"}},
+                {"isbn_10": {"$regex": q, "$options": "i"}},
+                {"isbn_13": {"$regex": q, "$options": "i"}},
+                {"langue": {"$regex": q, "$options": "i"}}
+            ]
+        }
+        
+        cursor = mongodb_service.database.livres.find(search_query, projection).limit(limit)
+        livres = await cursor.to_list(length=limit)
+        
+        return ReponseMongoJSON({
+            "success": True,
+            "query": q,
+            "data": livres,
+            "total": len(livres)
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @mongo_livres_router.get("/livres/{livre_id}")
 async def detail_livre_mongo(livre_id: str):
     """📖 Détail d'un livre MongoDB"""
     try:
-        await check_mongodb()
-        
         # Essayer de convertir en ObjectId
         try:
             object_id = ObjectId(livre_id)
@@ -136,50 +199,81 @@ async def detail_livre_mongo(livre_id: str):
         except Exception as e:
             print(f"Erreur récupération critiques: {e}")
         
-        return {
+        return ReponseMongoJSON({
             "success": True,
-            "livre": serialize_mongo_doc(livre),
-            "critiques": [serialize_mongo_doc(critique) for critique in critiques],
+            "livre": livre,
+            "critiques": critiques,
             "nb_critiques": len(critiques)
-        }
+        })
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@mongo_livres_router.get("/livres/search")
-async def rechercher_livres_mongo(
-    q: str = Query(..., min_length=2, description="Terme de recherche"),
-    limit: int = Query(20, le=50, description="Nombre de résultats")
-):
-    """🔍 Rechercher des livres dans MongoDB"""
+@mongo_livres_router.post("/livres/batch")
+async def lot_livres_mongo(demande: LivresMongoBatchRequest):
+    """
+    📚 Récupérer plusieurs livres MongoDB en une seule requête
+    
+    Un unique `$in` sur _id (ObjectId et chaîne, comme le détail d'un livre)
+    remplace un appel par livre ; l'ordre de la demande est conservé et les
+    identifiants introuvables sont listés dans `manquants`.
+    """
     try:
-        await check_mongodb()
+        # Dédoublonner en conservant l'ordre de la demande
+        ids = list(dict.fromkeys(demande.ids))
+        cles = []
+        for livre_id in ids:
+            cles.append(livre_id)
+            if ObjectId.is_valid(livre_id):
+                cles.append(ObjectId(livre_id))
         
-        # Recherche dans plusieurs champs (adaptée à la vraie structure)
-        search_query = {
-            "$or": [
-                {"titre": {"$regex": q, "$options": "i"}},
-                {"auteurs": {"$regex": q, "$options": "i"}},
-                {"resume": {"$regex": q, "$options": "i"}},
-                {"tous_les_genres": {"$regex": q, "$options": "i"}},
-                {"isbn_10": {"$regex": q, "$options": "i"}},
-                {"isbn_13": {"$regex": q, "$options": "i"}},
-                {"langue": {"$regex": q, "$options": "i"}}
-            ]
-        }
+        livres = await mongodb_service.database.livres.find({"_id": {"$in": cles}}).to_list(length=len(cles))
+        par_id = {str(livre["_id"]): livre for livre in livres}
         
-        cursor = mongodb_service.database.livres.find(search_query).limit(limit)
-        livres = await cursor.to_list(length=limit)
+        critiques_par_livre: Dict[str, list] = {livre_id: [] for livre_id in par_id}
+        if demande.inclure_critiques and par_id:
+            # Une seule requête pour toutes les critiques du lot, réparties ensuite par livre
+            titres = {livre.get("titre"): livre_id for livre_id, livre in par_id.items() if livre.get("titre")}
+            try:
+                critiques = await mongodb_service.database.critiques_livres.find({
+                    "$or": [
+                        {"livre_id": {"$in": cles}},
+                        {"book_id": {"$in": ids}},
+                        {"titre": {"$in": list(titres)}}
+                    ]
+                }).to_list(length=None)
+            except Exception as e:
+                print(f"Erreur récupération critiques: {e}")
+                critiques = []
+            for critique in critiques:
+                for cle in (critique.get("livre_id"), critique.get("book_id")):
+                    if cle is not None and str(cle) in critiques_par_livre:
+                        livre_id = str(cle)
+                        break
+                else:
+                    livre_id = titres.get(critique.get("titre"))
+                if livre_id is not None and len(critiques_par_livre[livre_id]) < 10:
+                    critiques_par_livre[livre_id].append(critique)
+        
+        data = []
+        for livre_id in ids:
+            livre = par_id.get(livre_id)
+            if livre is None:
+                continue
+            if demande.inclure_critiques:
+                livre["critiques"] = critiques_par_livre[livre_id]
+                livre["nb_critiques"] = len(critiques_par_livre[livre_id])
+            data.append(livre)
         
-        return {
+        return ReponseMongoJSON({
             "success": True,
-            "query": q,
-            "data": [serialize_mongo_doc(livre) for livre in livres],
-            "total": len(livres)
-        }
+            "data": data,
+            "manquants": [livre_id for livre_id in ids if livre_id not in par_id],
+            "total": len(data)
+        })
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=f"Erreur: {str(e)}")
 
 # === ROUTES CRITIQUES ===
 
@@ -192,8 +286,6 @@ async def lister_critiques_mongo(
 ):
     """💬 Lister les critiques de livres"""
     try:
-        await check_mongodb()
-        
         # Construire les filtres (utiliser note_babelio pour les critiques)
         filters = {}
         if note_min is not None:
@@ -209,9 +301,9 @@ async def lister_critiques_mongo(
         
         total = await mongodb_service.database.critiques_livres.count_documents(filters)
         
-        return {
+        return ReponseMongoJSON({
             "success": True,
-            "data": [serialize_mongo_doc(critique) for critique in critiques],
+            "data": critiques,
             "pagination": {
                 "skip": skip,
                 "limit": limit,
@@ -219,7 +311,7 @@ async def lister_critiques_mongo(
                 "returned": len(critiques)
             },
             "filters_applied": filters
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -227,8 +319,6 @@ async def lister_critiques_mongo(
 async def detail_critique_mongo(critique_id: str):
     """💭 Détail d'une critique"""
     try:
-        await check_mongodb()
-        
         try:
             object_id = ObjectId(critique_id)
             critique = await mongodb_service.database.critiques_livres.find_one({"_id": object_id})
@@ -238,10 +328,10 @@ async def detail_critique_mongo(critique_id: str):
         if critique is None:
             raise HTTPException(status_code=404, detail="Critique non trouvée")
         
-        return {
+        return ReponseMongoJSON({
             "success": True,
-            "data": serialize_mongo_doc(critique)
-        }
+            "data": critique
+        })
     except HTTPException:
         raise
     except Exception as e:
@@ -251,79 +341,73 @@ async def detail_critique_mongo(critique_id: str):
 async def statistiques_mongo_livres():
     """📊 Statistiques des livres et critiques MongoDB"""
     try:
-        await check_mongodb()
-        
-        # Statistiques livres
-        nb_livres = await mongodb_service.database.livres.count_documents({})
-        nb_critiques = await mongodb_service.database.critiques_livres.count_documents({})
+        livres = mongodb_service.database.livres
+        critiques = mongodb_service.database.critiques_livres
         
         # Top auteurs (structure réelle : auteurs est un array)
-        top_auteurs = []
-        try:
-            pipeline_auteurs = [
-                {"$unwind": "$auteurs"},
-                {"$group": {"_id": "$auteurs", "count": {"$sum": 1}}},
-                {"$sort": {"count": -1}},
-                {"$limit": 10}
-            ]
-            top_auteurs = await mongodb_service.database.livres.aggregate(pipeline_auteurs).to_list(length=10)
-        except:
-            pass
+        pipeline_auteurs = [
+            {"$unwind": "$auteurs"},
+            {"$group": {"_id": "$auteurs", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1}},
+            {"$limit": 10}
+        ]
         
         # Top genres
-        top_genres = []
-        try:
-            pipeline_genres = [
-                {"$unwind": "$tous_les_genres"},
-                {"$group": {"_id": "$tous_les_genres", "count": {"$sum": 1}}},
-                {"$sort": {"count": -1}},
-                {"$limit": 10}
-            ]
-            top_genres = await mongodb_service.database.livres.aggregate(pipeline_genres).to_list(length=10)
-        except:
-            pass
+        pipeline_genres = [
+            {"$unwind": "$tous_les_genres"},
+            {"$group": {"_id": "$tous_les_genres", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1}},
+            {"$limit": 10}
+        ]
         
         # Moyenne des notes des critiques (utiliser note_babelio)
-        moyenne_notes_critiques = 0
-        try:
-            pipeline_notes = [
-                {"$group": {"_id": None, "moyenne": {"$avg": "$note_babelio"}}}
-            ]
-            result = await mongodb_service.database.critiques_livres.aggregate(pipeline_notes).to_list(length=1)
-            if result:
-                moyenne_notes_critiques = round(result[0]["moyenne"], 2)
-        except:
-            pass
+        pipeline_notes = [
+            {"$group": {"_id": None, "moyenne": {"$avg": "$note_babelio"}}}
+        ]
         
         # Moyenne des notes des livres
+        pipeline_notes_livres = [
+            {"$match": {"note": {"$type": "number"}}},
+            {"$group": {"_id": None, "moyenne": {"$avg": "$note"}}}
+        ]
+        
+        # Requêtes indépendantes : latence de la plus lente au lieu de la somme
+        resultats, timings = await executer_en_parallele({
+            "nb_livres": livres.count_documents({}),
+            "nb_critiques": critiques.count_documents({}),
+            "top_auteurs": livres.aggregate(pipeline_auteurs).to_list(length=10),
+            "top_genres": livres.aggregate(pipeline_genres).to_list(length=10),
+            "notes_critiques": critiques.aggregate(pipeline_notes).to_list(length=1),
+            "notes_livres": livres.aggregate(pipeline_notes_livres).to_list(length=1),
+        }, defauts={"top_auteurs": [], "top_genres": [], "notes_critiques": [], "notes_livres": []})
+        
+        moyenne_notes_critiques = 0
+        if resultats["notes_critiques"] and resultats["notes_critiques"][0]["moyenne"] is not None:
+            moyenne_notes_critiques = round(resultats["notes_critiques"][0]["moyenne"], 2)
+        
         moyenne_notes_livres = 0
-        try:
-            pipeline_notes_livres = [
-                {"$match": {"note": {"$type": "number"}}},
-                {"$group": {"_id": None, "moyenne": {"$avg": "$note"}}}
-            ]
-            result = await mongodb_service.database.livres.aggregate(pipeline_notes_livres).to_list(length=1)
-            if result:
-                moyenne_notes_livres = round(result[0]["moyenne"], 2)
-        except:
-            pass
+        if resultats["notes_livres"] and resultats["notes_livres"][0]["moyenne"] is not None:
+            moyenne_notes_livres = round(resultats["notes_livres"][0]["moyenne"], 2)
         
-        return {
+        reponse = {
             "success": True,
             "timestamp": datetime.now(),
             "statistiques": {
                 "livres": {
-                    "total": nb_livres,
-                    "top_auteurs": top_auteurs[:5],
-                    "top_genres": top_genres[:5],
+                    "total": resultats["nb_livres"],
+                    "top_auteurs": resultats["top_auteurs"][:5],
+                    "top_genres": resultats["top_genres"][:5],
                     "note_moyenne": moyenne_notes_livres
                 },
                 "critiques": {
-                    "total": nb_critiques,
+                    "total": resultats["nb_critiques"],
                     "note_moyenne_babelio": moyenne_notes_critiques
                 }
             }
         }
+        if settings.debug:
+            reponse["timings_ms"] = timings
+        return ReponseMongoJSON(reponse)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -331,8 +415,6 @@ async def statistiques_mongo_livres():
 async def echantillon_donnees():
     """🔬 Échantillon de données pour comprendre la structure"""
     try:
-        await check_mongodb()
-        
         # Échantillon de livres
         livres_sample = []
         try:
@@ -360,18 +442,18 @@ async def echantillon_donnees():
         for critique in critiques_sample:
             critiques_keys.update(critique.keys())
         
-        return {
+        return ReponseMongoJSON({
             "success": True,
             "echantillons": {
                 "livres": {
-                    "sample": [serialize_mongo_doc(livre) for livre in livres_sample],
+                    "sample": livres_sample,
                     "champs_disponibles": sorted(list(livres_keys))
                 },
                 "critiques": {
-                    "sample": [serialize_mongo_doc(critique) for critique in critiques_sample],
+                    "sample": critiques_sample,
                     "champs_disponibles": sorted(list(critiques_keys))
                 }
             }
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
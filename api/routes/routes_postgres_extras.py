@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import text
@@ -5,168 +7,228 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime
 
 from database.database import get_db
+from database.requetes_paralleles import executer_sql_en_parallele
+from database.histogrammes import QUANTILES_DEFAUT, lire_quantiles, bornes_classes, completer_histogramme, arrondir
 from auth.auth import require_jwt, optional_jwt
+from config.config import settings
 
 # Router pour les endpoints PostgreSQL d'analytics/visualisation
 postgres_extras_router = APIRouter(prefix="/postgres-extras", tags=["PostgreSQL - Analytics & Visualisation"])
 
 # ❌ Page d'accueil supprimée - info incluse dans GET / principal
 
+async def calculer_analytics_postgres(limite: Optional[asyncio.Semaphore] = None) -> Dict[str, Any]:
+    """
+    Analytics PostgreSQL (route /analytics et snapshot du dashboard)
+
+    Args:
+        limite: sémaphore borné partagé avec d'autres appels (voir executer_sql_en_parallele)
+    """
+    # Statistiques générales
+    stats_query = text("""
+        SELECT 
+            (SELECT COUNT(*) FROM livre) as total_livres,
+            (SELECT COUNT(DISTINCT id_auteur) FROM auteur) as total_auteurs,
+            (SELECT COUNT(DISTINCT id_editeur) FROM editeur) as total_editeurs,
+            (SELECT COUNT(DISTINCT id_langue) FROM langue) as total_langues,
+            (SELECT COUNT(DISTINCT id_sujet) FROM sujet) as total_sujets
+    """)
+    
+    # Top 10 auteurs par nombre de livres
+    top_auteurs_query = text("""
+        SELECT a.nom_complet, COUNT(la.id_livre) as nb_livres
+        FROM auteur a
+        JOIN livre_auteur la ON a.id_auteur = la.id_auteur
+        GROUP BY a.id_auteur, a.nom_complet
+        ORDER BY nb_livres DESC
+        LIMIT 10
+    """)
+    
+    # Top 10 éditeurs par nombre de livres
+    top_editeurs_query = text("""
+        SELECT e.nom_editeur, e.pays, COUNT(le.id_livre) as nb_livres
+        FROM editeur e
+        JOIN livre_editeur le ON e.id_editeur = le.id_editeur
+        GROUP BY e.id_editeur, e.nom_editeur, e.pays
+        ORDER BY nb_livres DESC
+        LIMIT 10
+    """)
+    
+    # Répartition par langues
+    repartition_langues_query = text("""
+        SELECT lg.nom_langue, lg.code_langue, COUNT(ll.id_livre) as nb_livres
+        FROM langue lg
+        JOIN livre_langue ll ON lg.id_langue = ll.id_langue
+        GROUP BY lg.id_langue, lg.nom_langue, lg.code_langue
+        ORDER BY nb_livres DESC
+    """)
+    
+    # Répartition par années de publication
+    repartition_annees_query = text("""
+        SELECT annee_publication, COUNT(*) as nb_livres
+        FROM livre 
+        WHERE annee_publication IS NOT NULL
+        GROUP BY annee_publication
+        ORDER BY annee_publication DESC
+        LIMIT 20
+    """)
+    
+    # Statistiques des pages
+    stats_pages_query = text("""
+        SELECT 
+            MIN(nombre_pages) as min_pages,
+            MAX(nombre_pages) as max_pages,
+            AVG(nombre_pages) as avg_pages,
+            COUNT(*) as total_avec_pages
+        FROM livre 
+        WHERE nombre_pages IS NOT NULL AND nombre_pages > 0
+    """)
+    
+    # Répartition par formats physiques
+    repartition_formats_query = text("""
+        SELECT format_physique, COUNT(*) as nb_livres
+        FROM livre 
+        WHERE format_physique IS NOT NULL AND format_physique != ''
+        GROUP BY format_physique
+        ORDER BY nb_livres DESC
+        LIMIT 15
+    """)
+    
+    # Top sujets/genres
+    top_sujets_query = text("""
+        SELECT s.nom_sujet, s.categorie, COUNT(ls.id_livre) as nb_livres
+        FROM sujet s
+        JOIN livre_sujet ls ON s.id_sujet = ls.id_sujet
+        GROUP BY s.id_sujet, s.nom_sujet, s.categorie
+        ORDER BY nb_livres DESC
+        LIMIT 15
+    """)
+    
+    # Requêtes indépendantes : une connexion du pool chacune, exécutées en parallèle
+    resultats, timings = await executer_sql_en_parallele({
+        "statistiques_generales": lambda db: db.execute(stats_query).fetchone(),
+        "top_auteurs": lambda db: db.execute(top_auteurs_query).fetchall(),
+        "top_editeurs": lambda db: db.execute(top_editeurs_query).fetchall(),
+        "repartition_langues": lambda db: db.execute(repartition_langues_query).fetchall(),
+        "repartition_annees": lambda db: db.execute(repartition_annees_query).fetchall(),
+        "statistiques_pages": lambda db: db.execute(stats_pages_query).fetchone(),
+        "repartition_formats": lambda db: db.execute(repartition_formats_query).fetchall(),
+        "top_sujets": lambda db: db.execute(top_sujets_query).fetchall(),
+    }, limite=limite)
+    stats_result = resultats["statistiques_generales"]
+    top_auteurs = resultats["top_auteurs"]
+    top_editeurs = resultats["top_editeurs"]
+    repartition_langues = resultats["repartition_langues"]
+    repartition_annees = resultats["repartition_annees"]
+    stats_pages = resultats["statistiques_pages"]
+    repartition_formats = resultats["repartition_formats"]
+    top_sujets = resultats["top_sujets"]
+    
+    reponse = {
+        "success": True,
+        "timestamp": datetime.now(),
+        "database": "PostgreSQL (schéma test)",
+        "analytics": {
+            "statistiques_generales": {
+                "total_livres": stats_result.total_livres,
+                "total_auteurs": stats_result.total_auteurs,
+                "total_editeurs": stats_result.total_editeurs,
+                "total_langues": stats_result.total_langues,
+                "total_sujets": stats_result.total_sujets
+            },
+            "top_auteurs": [
+                {"auteur": row.nom_complet, "nb_livres": row.nb_livres} 
+                for row in top_auteurs
+            ],
+            "top_editeurs": [
+                {
+                    "editeur": row.nom_editeur, 
+                    "pays": row.pays,
+                    "nb_livres": row.nb_livres
+                } 
+                for row in top_editeurs
+            ],
+            "repartition_langues": [
+                {
+                    "langue": row.nom_langue,
+                    "code": row.code_langue,
+                    "nb_livres": row.nb_livres
+                } 
+                for row in repartition_langues
+            ],
+            "repartition_annees": [
+                {"annee": row.annee_publication, "nb_livres": row.nb_livres} 
+                for row in repartition_annees
+            ],
+            "statistiques_pages": {
+                "min_pages": stats_pages.min_pages if stats_pages else None,
+                "max_pages": stats_pages.max_pages if stats_pages else None,
+                "avg_pages": round(stats_pages.avg_pages, 1) if stats_pages and stats_pages.avg_pages else None,
+                "total_avec_pages": stats_pages.total_avec_pages if stats_pages else 0
+            },
+            "repartition_formats": [
+                {"format": row.format_physique, "nb_livres": row.nb_livres} 
+                for row in repartition_formats
+            ],
+            "top_sujets": [
+                {
+                    "sujet": row.nom_sujet,
+                    "categorie": row.categorie,
+                    "nb_livres": row.nb_livres
+                } 
+                for row in top_sujets
+            ]
+        }
+    }
+    if settings.debug:
+        reponse["timings_ms"] = timings
+    return reponse
+
 @postgres_extras_router.get("/analytics")
 async def analytics_avances_postgres(
-    db: Session = Depends(get_db),
     current_user = Depends(require_jwt)
 ):
     """📊 Analytics avancés PostgreSQL - Équivalent MongoDB pour graphiques"""
     try:
-        # Statistiques générales
-        stats_query = text("""
-            SELECT 
-                (SELECT COUNT(*) FROM livre) as total_livres,
-                (SELECT COUNT(DISTINCT id_auteur) FROM auteur) as total_auteurs,
-                (SELECT COUNT(DISTINCT id_editeur) FROM editeur) as total_editeurs,
-                (SELECT COUNT(DISTINCT id_langue) FROM langue) as total_langues,
-                (SELECT COUNT(DISTINCT id_sujet) FROM sujet) as total_sujets
-        """)
-        stats_result = db.execute(stats_query).fetchone()
-        
-        # Top 10 auteurs par nombre de livres
-        top_auteurs_query = text("""
-            SELECT a.nom_complet, COUNT(la.id_livre) as nb_livres
-            FROM auteur a
-            JOIN livre_auteur la ON a.id_auteur = la.id_auteur
-            GROUP BY a.id_auteur, a.nom_complet
-            ORDER BY nb_livres DESC
-            LIMIT 10
-        """)
-        top_auteurs = db.execute(top_auteurs_query).fetchall()
-        
-        # Top 10 éditeurs par nombre de livres
-        top_editeurs_query = text("""
-            SELECT e.nom_editeur, e.pays, COUNT(le.id_livre) as nb_livres
-            FROM editeur e
-            JOIN livre_editeur le ON e.id_editeur = le.id_editeur
-            GROUP BY e.id_editeur, e.nom_editeur, e.pays
-            ORDER BY nb_livres DESC
-            LIMIT 10
-        """)
-        top_editeurs = db.execute(top_editeurs_query).fetchall()
-        
-        # Répartition par langues
-        repartition_langues_query = text("""
-            SELECT lg.nom_langue, lg.code_langue, COUNT(ll.id_livre) as nb_livres
-            FROM langue lg
-            JOIN livre_langue ll ON lg.id_langue = ll.id_langue
-            GROUP BY lg.id_langue, lg.nom_langue, lg.code_langue
-            ORDER BY nb_livres DESC
-        """)
-        repartition_langues = db.execute(repartition_langues_query).fetchall()
-        
-        # Répartition par années de publication
-        repartition_annees_query = text("""
-            SELECT annee_publication, COUNT(*) as nb_livres
-            FROM livre 
-            WHERE annee_publication IS NOT NULL
-            GROUP BY annee_publication
-            ORDER BY annee_publication DESC
-            LIMIT 20
-        """)
-        repartition_annees = db.execute(repartition_annees_query).fetchall()
-        
-        # Statistiques des pages
-        stats_pages_query = text("""
-            SELECT 
-                MIN(nombre_pages) as min_pages,
-                MAX(nombre_pages) as max_pages,
-                AVG(nombre_pages) as avg_pages,
-                COUNT(*) as total_avec_pages
-            FROM livre 
-            WHERE nombre_pages IS NOT NULL AND nombre_pages > 0
-        """)
-        stats_pages = db.execute(stats_pages_query).fetchone()
-        
-        # Répartition par formats physiques
-        repartition_formats_query = text("""
-            SELECT format_physique, COUNT(*) as nb_livres
-            FROM livre 
-            WHERE format_physique IS NOT NULL AND format_physique != ''
-            GROUP BY format_physique
-            ORDER BY nb_livres DESC
-            LIMIT 15
-        """)
-        repartition_formats = db.execute(repartition_formats_query).fetchall()
-        
-        # Top sujets/genres
-        top_sujets_query = text("""
-            SELECT s.nom_sujet, s.categorie, COUNT(ls.id_livre) as nb_livres
-            FROM sujet s
-            JOIN livre_sujet ls ON s.id_sujet = ls.id_sujet
-            GROUP BY s.id_sujet, s.nom_sujet, s.categorie
-            ORDER BY nb_livres DESC
-            LIMIT 15
-        """)
-        top_sujets = db.execute(top_sujets_query).fetchall()
-        
-        return {
-            "success": True,
-            "timestamp": datetime.now(),
-            "database": "PostgreSQL (schéma test)",
-            "analytics": {
-                "statistiques_generales": {
-                    "total_livres": stats_result.total_livres,
-                    "total_auteurs": stats_result.total_auteurs,
-                    "total_editeurs": stats_result.total_editeurs,
-                    "total_langues": stats_result.total_langues,
-                    "total_sujets": stats_result.total_sujets
-                },
-                "top_auteurs": [
-                    {"auteur": row.nom_complet, "nb_livres": row.nb_livres} 
-                    for row in top_auteurs
-                ],
-                "top_editeurs": [
-                    {
-                        "editeur": row.nom_editeur, 
-                        "pays": row.pays,
-                        "nb_livres": row.nb_livres
-                    } 
-                    for row in top_editeurs
-                ],
-                "repartition_langues": [
-                    {
-                        "langue": row.nom_langue,
-                        "code": row.code_langue,
-                        "nb_livres": row.nb_livres
-                    } 
-                    for row in repartition_langues
-                ],
-                "repartition_annees": [
-                    {"annee": row.annee_publication, "nb_livres": row.nb_livres} 
-                    for row in repartition_annees
-                ],
-                "statistiques_pages": {
-                    "min_pages": stats_pages.min_pages if stats_pages else None,
-                    "max_pages": stats_pages.max_pages if stats_pages else None,
-                    "avg_pages": round(stats_pages.avg_pages, 1) if stats_pages and stats_pages.avg_pages else None,
-                    "total_avec_pages": stats_pages.total_avec_pages if stats_pages else 0
-                },
-                "repartition_formats": [
-                    {"format": row.format_physique, "nb_livres": row.nb_livres} 
-                    for row in repartition_formats
-                ],
-                "top_sujets": [
-                    {
-                        "sujet": row.nom_sujet,
-                        "categorie": row.categorie,
-                        "nb_livres": row.nb_livres
-                    } 
-                    for row in top_sujets
-                ]
-            }
-        }
-        
+        return await calculer_analytics_postgres()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'analytics PostgreSQL: {str(e)}")
 
+# Les requêtes des endpoints ci-dessous sont des fonctions synchrones (session
+# en paramètre) : le snapshot du dashboard les appelle directement, dans un thread
+def calculer_top_auteurs(db: Session, limit: int) -> Dict[str, Any]:
+    """Top des auteurs par nombre de livres"""
+    query = text("""
+        SELECT 
+            a.nom_complet,
+            a.nom,
+            a.prenom,
+            a.biographie,
+            COUNT(la.id_livre) as nb_livres
+        FROM auteur a
+        JOIN livre_auteur la ON a.id_auteur = la.id_auteur
+        GROUP BY a.id_auteur, a.nom_complet, a.nom, a.prenom, a.biographie
+        ORDER BY nb_livres DESC
+        LIMIT :limit
+    """)
+    
+    result = db.execute(query, {"limit": limit}).fetchall()
+    
+    return {
+        "success": True,
+        "data": [
+            {
+                "nom_complet": row.nom_complet,
+                "nom": row.nom,
+                "prenom": row.prenom,
+                "biographie": row.biographie,
+                "nb_livres": row.nb_livres
+            }
+            for row in result
+        ],
+        "total": len(result)
+    }
+
 @postgres_extras_router.get("/auteurs/top")
 async def top_auteurs_postgres(
     limit: int = Query(20, le=50),
@@ -175,39 +237,41 @@ async def top_auteurs_postgres(
 ):
     """✍️ Top des auteurs PostgreSQL par nombre de livres"""
     try:
-        query = text("""
-            SELECT 
-                a.nom_complet,
-                a.nom,
-                a.prenom,
-                a.biographie,
-                COUNT(la.id_livre) as nb_livres
-            FROM auteur a
-            JOIN livre_auteur la ON a.id_auteur = la.id_auteur
-            GROUP BY a.id_auteur, a.nom_complet, a.nom, a.prenom, a.biographie
-            ORDER BY nb_livres DESC
-            LIMIT :limit
-        """)
-        
-        result = db.execute(query, {"limit": limit}).fetchall()
-        
-        return {
-            "success": True,
-            "data": [
-                {
-                    "nom_complet": row.nom_complet,
-                    "nom": row.nom,
-                    "prenom": row.prenom,
-                    "biographie": row.biographie,
-                    "nb_livres": row.nb_livres
-                }
-                for row in result
-            ],
-            "total": len(result)
-        }
+        return calculer_top_auteurs(db, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def calculer_top_editeurs(db: Session, limit: int) -> Dict[str, Any]:
+    """Top des éditeurs par nombre de livres"""
+    query = text("""
+        SELECT 
+            e.nom_editeur,
+            e.pays,
+            e.annee_creation,
+            COUNT(le.id_livre) as nb_livres
+        FROM editeur e
+        JOIN livre_editeur le ON e.id_editeur = le.id_editeur
+        GROUP BY e.id_editeur, e.nom_editeur, e.pays, e.annee_creation
+        ORDER BY nb_livres DESC
+        LIMIT :limit
+    """)
+    
+    result = db.execute(query, {"limit": limit}).fetchall()
+    
+    return {
+        "success": True,
+        "data": [
+            {
+                "nom_editeur": row.nom_editeur,
+                "pays": row.pays,
+                "annee_creation": row.annee_creation,
+                "nb_livres": row.nb_livres
+            }
+            for row in result
+        ],
+        "total": len(result)
+    }
+
 @postgres_extras_router.get("/editeurs/top")
 async def top_editeurs_postgres(
     limit: int = Query(20, le=50),
@@ -216,37 +280,52 @@ async def top_editeurs_postgres(
 ):
     """🏢 Top des éditeurs PostgreSQL par nombre de livres"""
     try:
-        query = text("""
-            SELECT 
-                e.nom_editeur,
-                e.pays,
-                e.annee_creation,
-                COUNT(le.id_livre) as nb_livres
-            FROM editeur e
-            JOIN livre_editeur le ON e.id_editeur = le.id_editeur
-            GROUP BY e.id_editeur, e.nom_editeur, e.pays, e.annee_creation
-            ORDER BY nb_livres DESC
-            LIMIT :limit
-        """)
-        
-        result = db.execute(query, {"limit": limit}).fetchall()
-        
-        return {
-            "success": True,
-            "data": [
-                {
-                    "nom_editeur": row.nom_editeur,
-                    "pays": row.pays,
-                    "annee_creation": row.annee_creation,
-                    "nb_livres": row.nb_livres
-                }
-                for row in result
-            ],
-            "total": len(result)
-        }
+        return calculer_top_editeurs(db, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def calculer_stats_annees(db: Session) -> Dict[str, Any]:
+    """Répartition par années de publication"""
+    # Répartition détaillée par années
+    query = text("""
+        SELECT 
+            annee_publication,
+            COUNT(*) as nb_livres
+        FROM livre 
+        WHERE annee_publication IS NOT NULL
+        GROUP BY annee_publication
+        ORDER BY annee_publication DESC
+    """)
+    
+    result = db.execute(query).fetchall()
+    
+    # Statistiques sur les années
+    stats_query = text("""
+        SELECT 
+            MIN(annee_publication) as min_annee,
+            MAX(annee_publication) as max_annee,
+            COUNT(DISTINCT annee_publication) as nb_annees_distinctes,
+            COUNT(*) as total_livres_avec_annee
+        FROM livre 
+        WHERE annee_publication IS NOT NULL
+    """)
+    
+    stats = db.execute(stats_query).fetchone()
+    
+    return {
+        "success": True,
+        "data": [
+            {"annee": row.annee_publication, "nb_livres": row.nb_livres}
+            for row in result
+        ],
+        "statistiques": {
+            "annee_min": stats.min_annee,
+            "annee_max": stats.max_annee,
+            "nb_annees_distinctes": stats.nb_annees_distinctes,
+            "total_livres_avec_annee": stats.total_livres_avec_annee
+        }
+    }
+
 @postgres_extras_router.get("/livres/stats-annees")
 async def stats_annees_postgres(
     db: Session = Depends(get_db),
@@ -254,48 +333,38 @@ async def stats_annees_postgres(
 ):
     """📅 Statistiques de répartition par années de publication"""
     try:
-        # Répartition détaillée par années
-        query = text("""
-            SELECT 
-                annee_publication,
-                COUNT(*) as nb_livres
-            FROM livre 
-            WHERE annee_publication IS NOT NULL
-            GROUP BY annee_publication
-            ORDER BY annee_publication DESC
-        """)
-        
-        result = db.execute(query).fetchall()
-        
-        # Statistiques sur les années
-        stats_query = text("""
-            SELECT 
-                MIN(annee_publication) as min_annee,
-                MAX(annee_publication) as max_annee,
-                COUNT(DISTINCT annee_publication) as nb_annees_distinctes,
-                COUNT(*) as total_livres_avec_annee
-            FROM livre 
-            WHERE annee_publication IS NOT NULL
-        """)
-        
-        stats = db.execute(stats_query).fetchone()
-        
-        return {
-            "success": True,
-            "data": [
-                {"annee": row.annee_publication, "nb_livres": row.nb_livres}
-                for row in result
-            ],
-            "statistiques": {
-                "annee_min": stats.min_annee,
-                "annee_max": stats.max_annee,
-                "nb_annees_distinctes": stats.nb_annees_distinctes,
-                "total_livres_avec_annee": stats.total_livres_avec_annee
-            }
-        }
+        return calculer_stats_annees(db)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def calculer_stats_langues(db: Session) -> Dict[str, Any]:
+    """Répartition par langues"""
+    query = text("""
+        SELECT 
+            lg.nom_langue,
+            lg.code_langue,
+            COUNT(ll.id_livre) as nb_livres
+        FROM langue lg
+        JOIN livre_langue ll ON lg.id_langue = ll.id_langue
+        GROUP BY lg.id_langue, lg.nom_langue, lg.code_langue
+        ORDER BY nb_livres DESC
+    """)
+    
+    result = db.execute(query).fetchall()
+    
+    return {
+        "success": True,
+        "data": [
+            {
+                "langue": row.nom_langue,
+                "code": row.code_langue,
+                "nb_livres": row.nb_livres
+            }
+            for row in result
+        ],
+        "total": len(result)
+    }
+
 @postgres_extras_router.get("/livres/stats-langues")
 async def stats_langues_postgres(
     db: Session = Depends(get_db),
@@ -303,34 +372,69 @@ async def stats_langues_postgres(
 ):
     """🌍 Statistiques de répartition par langues"""
     try:
-        query = text("""
-            SELECT 
-                lg.nom_langue,
-                lg.code_langue,
-                COUNT(ll.id_livre) as nb_livres
-            FROM langue lg
-            JOIN livre_langue ll ON lg.id_langue = ll.id_langue
-            GROUP BY lg.id_langue, lg.nom_langue, lg.code_langue
-            ORDER BY nb_livres DESC
-        """)
-        
-        result = db.execute(query).fetchall()
-        
-        return {
-            "success": True,
-            "data": [
-                {
-                    "langue": row.nom_langue,
-                    "code": row.code_langue,
-                    "nb_livres": row.nb_livres
-                }
-                for row in result
-            ],
-            "total": len(result)
-        }
+        return calculer_stats_langues(db)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def calculer_stats_pages(db: Session) -> Dict[str, Any]:
+    """Statistiques et tranches du nombre de pages"""
+    # Statistiques générales
+    stats_query = text("""
+        SELECT 
+            MIN(nombre_pages) as min_pages,
+            MAX(nombre_pages) as max_pages,
+            AVG(nombre_pages) as avg_pages,
+            COUNT(*) as total_avec_pages,
+            PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY nombre_pages) as median_pages
+        FROM livre 
+        WHERE nombre_pages IS NOT NULL AND nombre_pages > 0
+    """)
+    
+    stats = db.execute(stats_query).fetchone()
+    
+    # Distribution par tranches de pages
+    distribution_query = text("""
+        SELECT 
+            CASE 
+                WHEN nombre_pages < 100 THEN '< 100 pages'
+                WHEN nombre_pages < 200 THEN '100-199 pages'
+                WHEN nombre_pages < 300 THEN '200-299 pages'
+                WHEN nombre_pages < 400 THEN '300-399 pages'
+                WHEN nombre_pages < 500 THEN '400-499 pages'
+                ELSE '500+ pages'
+            END as tranche_pages,
+            COUNT(*) as nb_livres
+        FROM livre 
+        WHERE nombre_pages IS NOT NULL AND nombre_pages > 0
+        GROUP BY 
+            CASE 
+                WHEN nombre_pages < 100 THEN '< 100 pages'
+                WHEN nombre_pages < 200 THEN '100-199 pages'
+                WHEN nombre_pages < 300 THEN '200-299 pages'
+                WHEN nombre_pages < 400 THEN '300-399 pages'
+                WHEN nombre_pages < 500 THEN '400-499 pages'
+                ELSE '500+ pages'
+            END
+        ORDER BY MIN(nombre_pages)
+    """)
+    
+    distribution = db.execute(distribution_query).fetchall()
+    
+    return {
+        "success": True,
+        "statistiques": {
+            "min_pages": stats.min_pages,
+            "max_pages": stats.max_pages,
+            "avg_pages": round(stats.avg_pages, 1) if stats.avg_pages else None,
+            "median_pages": round(stats.median_pages, 1) if stats.median_pages else None,
+            "total_avec_pages": stats.total_avec_pages
+        },
+        "distribution": [
+            {"tranche": row.tranche_pages, "nb_livres": row.nb_livres}
+            for row in distribution
+        ]
+    }
+
 @postgres_extras_router.get("/livres/stats-pages")
 async def stats_pages_postgres(
     db: Session = Depends(get_db),
@@ -338,65 +442,33 @@ async def stats_pages_postgres(
 ):
     """📄 Statistiques détaillées sur le nombre de pages"""
     try:
-        # Statistiques générales
-        stats_query = text("""
-            SELECT 
-                MIN(nombre_pages) as min_pages,
-                MAX(nombre_pages) as max_pages,
-                AVG(nombre_pages) as avg_pages,
-                COUNT(*) as total_avec_pages,
-                PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY nombre_pages) as median_pages
-            FROM livre 
-            WHERE nombre_pages IS NOT NULL AND nombre_pages > 0
-        """)
-        
-        stats = db.execute(stats_query).fetchone()
-        
-        # Distribution par tranches de pages
-        distribution_query = text("""
-            SELECT 
-                CASE 
-                    WHEN nombre_pages < 100 THEN '< 100 pages'
-                    WHEN nombre_pages < 200 THEN '100-199 pages'
-                    WHEN nombre_pages < 300 THEN '200-299 pages'
-                    WHEN nombre_pages < 400 THEN '300-399 pages'
-                    WHEN nombre_pages < 500 THEN '400-499 pages'
-                    ELSE '500+ pages'
-                END as tranche_pages,
-                COUNT(*) as nb_livres
-            FROM livre 
-            WHERE nombre_pages IS NOT NULL AND nombre_pages > 0
-            GROUP BY 
-                CASE 
-                    WHEN nombre_pages < 100 THEN '< 100 pages'
-                    WHEN nombre_pages < 200 THEN '100-199 pages'
-                    WHEN nombre_pages < 300 THEN '200-299 pages'
-                    WHEN nombre_pages < 400 THEN '300-399 pages'
-                    WHEN nombre_pages < 500 THEN '400-499 pages'
-                    ELSE '500+ pages'
-                END
-            ORDER BY MIN(nombre_pages)
-        """)
-        
-        distribution = db.execute(distribution_query).fetchall()
-        
-        return {
-            "success": True,
-            "statistiques": {
-                "min_pages": stats.min_pages,
-                "max_pages": stats.max_pages,
-                "avg_pages": round(stats.avg_pages, 1) if stats.avg_pages else None,
-                "median_pages": round(stats.median_pages, 1) if stats.median_pages else None,
-                "total_avec_pages": stats.total_avec_pages
-            },
-            "distribution": [
-                {"tranche": row.tranche_pages, "nb_livres": row.nb_livres}
-                for row in distribution
-            ]
-        }
+        return calculer_stats_pages(db)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def calculer_stats_formats(db: Session) -> Dict[str, Any]:
+    """Répartition par formats physiques"""
+    query = text("""
+        SELECT 
+            format_physique,
+            COUNT(*) as nb_livres
+        FROM livre 
+        WHERE format_physique IS NOT NULL AND format_physique != ''
+        GROUP BY format_physique
+        ORDER BY nb_livres DESC
+    """)
+    
+    result = db.execute(query).fetchall()
+    
+    return {
+        "success": True,
+        "data": [
+            {"format": row.format_physique, "nb_livres": row.nb_livres}
+            for row in result
+        ],
+        "total": len(result)
+    }
+
 @postgres_extras_router.get("/livres/stats-formats")
 async def stats_formats_postgres(
     db: Session = Depends(get_db),
@@ -404,25 +476,102 @@ async def stats_formats_postgres(
 ):
     """📖 Statistiques sur les formats physiques des livres"""
     try:
-        query = text("""
+        return calculer_stats_formats(db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+# Colonnes numériques de livre dont la distribution peut être demandée
+COLONNES_DISTRIBUTION = {"nombre_pages", "annee_publication"}
+
+@postgres_extras_router.get("/livres/distribution")
+async def distribution_livres_postgres(
+    champ: str = Query("nombre_pages", description="Colonne : nombre_pages ou annee_publication"),
+    bins: int = Query(10, ge=1, le=100, description="Nombre de classes"),
+    borne_min: Optional[float] = Query(None, description="Borne basse (défaut : minimum observé)"),
+    borne_max: Optional[float] = Query(None, description="Borne haute (défaut : maximum observé)"),
+    langue: Optional[str] = Query(None, description="Filtrer par code langue"),
+    annee_min: Optional[int] = Query(None, description="Année de publication minimale"),
+    annee_max: Optional[int] = Query(None, description="Année de publication maximale"),
+    quantiles: str = Query(QUANTILES_DEFAUT, description="Quantiles à calculer, séparés par des virgules"),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_jwt)
+):
+    """📊 Distribution d'une colonne numérique (histogramme width_bucket et quantiles percentile_cont)"""
+    if champ not in COLONNES_DISTRIBUTION:
+        raise HTTPException(status_code=400, detail=f"Champ non supporté: {champ} (disponibles: {', '.join(sorted(COLONNES_DISTRIBUTION))})")
+    probabilites = lire_quantiles(quantiles)
+    try:
+        conditions = [f"l.{champ} IS NOT NULL"]
+        params: Dict[str, Any] = {}
+        if champ == "nombre_pages":
+            conditions.append("l.nombre_pages > 0")
+        if langue:
+            conditions.append("""EXISTS (
+                SELECT 1 FROM livre_langue ll JOIN langue lg ON ll.id_langue = lg.id_langue
+                WHERE ll.id_livre = l.id_livre AND lg.code_langue = :langue
+            )""")
+            params["langue"] = langue
+        if annee_min is not None:
+            conditions.append("l.annee_publication >= :annee_min")
+            params["annee_min"] = annee_min
+        if annee_max is not None:
+            conditions.append("l.annee_publication <= :annee_max")
+            params["annee_max"] = annee_max
+        if borne_min is not None:
+            conditions.append(f"l.{champ} >= :borne_min")
+            params["borne_min"] = borne_min
+        if borne_max is not None:
+            conditions.append(f"l.{champ} <= :borne_max")
+            params["borne_max"] = borne_max
+        where = " AND ".join(conditions)
+        
+        # Statistiques et quantiles en un seul parcours
+        stats_query = text(f"""
             SELECT 
-                format_physique,
-                COUNT(*) as nb_livres
-            FROM livre 
-            WHERE format_physique IS NOT NULL AND format_physique != ''
-            GROUP BY format_physique
-            ORDER BY nb_livres DESC
+                COUNT(*) AS nombre,
+                MIN(l.{champ}) AS min_valeur,
+                MAX(l.{champ}) AS max_valeur,
+                AVG(l.{champ}) AS moyenne,
+                PERCENTILE_CONT(CAST(:probabilites AS double precision[])) WITHIN GROUP (ORDER BY l.{champ}) AS quantiles
+            FROM livre l
+            WHERE {where}
         """)
+        stats = db.execute(stats_query, {**params, "probabilites": probabilites}).fetchone()
         
-        result = db.execute(query).fetchall()
+        classes = []
+        if stats.nombre:
+            bmin = borne_min if borne_min is not None else float(stats.min_valeur)
+            bmax = borne_max if borne_max is not None else float(stats.max_valeur)
+            bornes = bornes_classes(bmin, bmax, bins)
+            if bmax > bmin:
+                # width_bucket renvoie bins + 1 pour la borne haute : ramenée dans la dernière classe
+                histogramme_query = text(f"""
+                    SELECT 
+                        LEAST(width_bucket(l.{champ}, :bmin, :bmax, :bins), :bins) - 1 AS classe,
+                        COUNT(*) AS nombre
+                    FROM livre l
+                    WHERE {where} AND l.{champ} BETWEEN :bmin AND :bmax
+                    GROUP BY 1
+                    ORDER BY 1
+                """)
+                lignes = db.execute(histogramme_query, {**params, "bmin": bmin, "bmax": bmax, "bins": bins}).fetchall()
+                classes = completer_histogramme(bornes, {row.classe: row.nombre for row in lignes})
+            else:
+                classes = completer_histogramme(bornes, {0: stats.nombre})
         
         return {
             "success": True,
-            "data": [
-                {"format": row.format_physique, "nb_livres": row.nb_livres}
-                for row in result
-            ],
-            "total": len(result)
+            "champ": champ,
+            "statistiques": {
+                "nombre": stats.nombre,
+                "min": stats.min_valeur,
+                "max": stats.max_valeur,
+                "moyenne": arrondir(stats.moyenne, 2)
+            },
+            "classes": classes,
+            "quantiles": {
+                str(probabilite): arrondir(valeur, 2)
+                for probabilite, valeur in zip(probabilites, stats.quantiles or [])
+            }
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
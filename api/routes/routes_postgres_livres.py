@@ -1,16 +1,50 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
-from models.models_livres import LivreComplet, LivresResponse, LivreResponse
-from database.database import get_db
+from models.models_livres import LivreComplet, LivresResponse, LivreResponse, LivresBatchRequest, LivresBatchResponse
+from database.database import get_db, SessionLocal
 from auth.auth import require_jwt, optional_jwt
+from utils.export import FORMATS_EXPORT, choisir_champs, entete_export, serialiser_lot, entetes_telechargement
+from config.config import settings
 
 # Router pour les livres PostgreSQL du schéma test
 postgres_livres_router = APIRouter(prefix="/postgres", tags=["PostgreSQL - Livres Réels"])
 
+def calculer_statistiques_generales(db: Session) -> Dict[str, Any]:
+    """Comptes des livres, auteurs, éditeurs et langues (route et snapshot du dashboard)"""
+    # Compter le total de livres
+    count_query = text("SELECT COUNT(*) as total FROM livre")
+    total_result = db.execute(count_query)
+    total_livres = total_result.fetchone().total
+    
+    # Compter les auteurs
+    auteurs_query = text("SELECT COUNT(DISTINCT id_auteur) as total FROM auteur")
+    auteurs_result = db.execute(auteurs_query)
+    total_auteurs = auteurs_result.fetchone().total
+    
+    # Compter les éditeurs
+    editeurs_query = text("SELECT COUNT(DISTINCT id_editeur) as total FROM editeur")
+    editeurs_result = db.execute(editeurs_query)
+    total_editeurs = editeurs_result.fetchone().total
+    
+    # Compter les langues
+    langues_query = text("SELECT COUNT(DISTINCT id_langue) as total FROM langue")
+    langues_result = db.execute(langues_query)
+    total_langues = langues_result.fetchone().total
+    
+    return {
+        "total_livres": total_livres,
+        "total_auteurs": total_auteurs,
+        "total_editeurs": total_editeurs,
+        "total_langues": total_langues,
+        "database": "PostgreSQL (schéma test)",
+        "timestamp": datetime.now()
+    }
+
 @postgres_livres_router.get("/livres/stats/general")
 async def get_livres_statistics(
     db: Session = Depends(get_db),
@@ -19,40 +53,248 @@ async def get_livres_statistics(
     """Statistiques générales des livres PostgreSQL"""
     
     try:
-        # Compter le total de livres
-        count_query = text("SELECT COUNT(*) as total FROM livre")
-        total_result = db.execute(count_query)
-        total_livres = total_result.fetchone().total
-        
-        # Compter les auteurs
-        auteurs_query = text("SELECT COUNT(DISTINCT id_auteur) as total FROM auteur")
-        auteurs_result = db.execute(auteurs_query)
-        total_auteurs = auteurs_result.fetchone().total
-        
-        # Compter les éditeurs
-        editeurs_query = text("SELECT COUNT(DISTINCT id_editeur) as total FROM editeur")
-        editeurs_result = db.execute(editeurs_query)
-        total_editeurs = editeurs_result.fetchone().total
-        
-        # Compter les langues
-        langues_query = text("SELECT COUNT(DISTINCT id_langue) as total FROM langue")
-        langues_result = db.execute(langues_query)
-        total_langues = langues_result.fetchone().total
-        
-        return {
-            "total_livres": total_livres,
-            "total_auteurs": total_auteurs,
-            "total_editeurs": total_editeurs,
-            "total_langues": total_langues,
-            "database": "PostgreSQL (schéma test)",
-            "timestamp": datetime.now()
-        }
+        return calculer_statistiques_generales(db)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors du calcul des statistiques: {str(e)}")
 
 # ❌ Endpoint debug supprimé pour simplification
 
+# Une ligne par livre : chaque relation est agrégée dans sa propre sous-requête
+# latérale, le volume suit donc la somme des relations et non leur produit.
+# Partagée par le détail d'un livre et la récupération par lot ({filtre}).
+REQUETE_LIVRE_COMPLET = """
+    SELECT 
+        l.id_livre,
+        l.ol_id,
+        l.titre,
+        l.sous_titre,
+        l.isbn_10,
+        l.isbn_13,
+        l.date_publication,
+        l.annee_publication,
+        l.nombre_pages,
+        l.format_physique,
+        l.description,
+        l.couverture_url,
+        l.created_at,
+        l.updated_at,
+        COALESCE(aut.auteurs, '[]'::json) AS auteurs,
+        COALESCE(edi.editeurs, '[]'::json) AS editeurs,
+        COALESCE(lan.langues, '[]'::json) AS langues,
+        COALESCE(suj.sujets, '[]'::json) AS sujets
+        
+    FROM livre l
+    LEFT JOIN LATERAL (
+        SELECT json_agg(json_build_object(
+            'id_auteur', a.id_auteur,
+            'nom', a.nom,
+            'prenom', a.prenom,
+            'nom_complet', a.nom_complet,
+            'biographie', a.biographie,
+            'role', la.role
+        ) ORDER BY la.ordre NULLS LAST, a.id_auteur) AS auteurs
+        FROM livre_auteur la
+        JOIN auteur a ON la.id_auteur = a.id_auteur
+        WHERE la.id_livre = l.id_livre
+    ) aut ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT json_agg(json_build_object(
+            'id_editeur', e.id_editeur,
+            'nom_editeur', e.nom_editeur,
+            'pays', e.pays,
+            'annee_creation', e.annee_creation
+        ) ORDER BY le.ordre NULLS LAST, e.id_editeur) AS editeurs
+        FROM livre_editeur le
+        JOIN editeur e ON le.id_editeur = e.id_editeur
+        WHERE le.id_livre = l.id_livre
+    ) edi ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT json_agg(json_build_object(
+            'id_langue', lg.id_langue,
+            'code_langue', lg.code_langue,
+            'nom_langue', lg.nom_langue,
+            'langue_principale', ll.langue_principale
+        ) ORDER BY ll.langue_principale DESC NULLS LAST, lg.id_langue) AS langues
+        FROM livre_langue ll
+        JOIN langue lg ON ll.id_langue = lg.id_langue
+        WHERE ll.id_livre = l.id_livre
+    ) lan ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT json_agg(json_build_object(
+            'id_sujet', s.id_sujet,
+            'nom_sujet', s.nom_sujet,
+            'categorie', s.categorie
+        ) ORDER BY ls.pertinence DESC NULLS LAST, s.id_sujet) AS sujets
+        FROM livre_sujet ls
+        JOIN sujet s ON ls.id_sujet = s.id_sujet
+        WHERE ls.id_livre = l.id_livre
+    ) suj ON TRUE
+    
+    WHERE {filtre}
+"""
+
+def _livre_complet_depuis_ligne(row) -> LivreComplet:
+    """Construire un LivreComplet depuis une ligne de REQUETE_LIVRE_COMPLET"""
+    # psycopg2 décode déjà les colonnes json en listes Python
+    auteurs, editeurs, langues, sujets = row.auteurs, row.editeurs, row.langues, row.sujets
+    premier_auteur = auteurs[0] if auteurs else {}
+    premier_editeur = editeurs[0] if editeurs else {}
+    premiere_langue = langues[0] if langues else {}
+    premier_sujet = sujets[0] if sujets else {}
+    
+    return LivreComplet(**{
+        "id_livre": row.id_livre,
+        "ol_id": row.ol_id,
+        "titre": row.titre,
+        "sous_titre": row.sous_titre,
+        "isbn_10": row.isbn_10,
+        "isbn_13": row.isbn_13,
+        "date_publication": row.date_publication,
+        "annee_publication": row.annee_publication,
+        "nombre_pages": row.nombre_pages,
+        "format_physique": row.format_physique,
+        "description": row.description,
+        "couverture_url": row.couverture_url,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+        # Champs à plat conservés pour les clients existants (premier élément)
+        "auteur_nom": premier_auteur.get("nom"),
+        "auteur_prenom": premier_auteur.get("prenom"),
+        "auteur_nom_complet": premier_auteur.get("nom_complet"),
+        "auteur_biographie": premier_auteur.get("biographie"),
+        "editeur_nom": premier_editeur.get("nom_editeur"),
+        "editeur_pays": premier_editeur.get("pays"),
+        "editeur_annee_creation": premier_editeur.get("annee_creation"),
+        "langue_code": premiere_langue.get("code_langue"),
+        "langue_nom": premiere_langue.get("nom_langue"),
+        "sujet_nom": premier_sujet.get("nom_sujet"),
+        "sujet_categorie": premier_sujet.get("categorie"),
+        "auteurs": auteurs,
+        "editeurs": editeurs,
+        "langues": langues,
+        "sujets": sujets
+    })
+
+# Champs exportables : colonnes de livre, plus les relations agrégées en une chaîne
+COLONNES_EXPORT = [
+    "id_livre", "ol_id", "titre", "sous_titre", "isbn_10", "isbn_13", "date_publication",
+    "annee_publication", "nombre_pages", "format_physique", "description", "couverture_url",
+    "created_at", "updated_at"
+]
+RELATIONS_EXPORT = {
+    "auteurs": """
+        LEFT JOIN LATERAL (
+            SELECT string_agg(a.nom_complet, '; ' ORDER BY la.ordre NULLS LAST, a.id_auteur) AS auteurs
+            FROM livre_auteur la
+            JOIN auteur a ON la.id_auteur = a.id_auteur
+            WHERE la.id_livre = l.id_livre
+        ) aut ON TRUE""",
+    "editeurs": """
+        LEFT JOIN LATERAL (
+            SELECT string_agg(e.nom_editeur, '; ' ORDER BY le.ordre NULLS LAST, e.id_editeur) AS editeurs
+            FROM livre_editeur le
+            JOIN editeur e ON le.id_editeur = e.id_editeur
+            WHERE le.id_livre = l.id_livre
+        ) edi ON TRUE""",
+    "langues": """
+        LEFT JOIN LATERAL (
+            SELECT string_agg(lg.code_langue, '; ' ORDER BY ll.langue_principale DESC NULLS LAST, lg.id_langue) AS langues
+            FROM livre_langue ll
+            JOIN langue lg ON ll.id_langue = lg.id_langue
+            WHERE ll.id_livre = l.id_livre
+        ) lan ON TRUE""",
+    "sujets": """
+        LEFT JOIN LATERAL (
+            SELECT string_agg(s.nom_sujet, '; ' ORDER BY ls.pertinence DESC NULLS LAST, s.id_sujet) AS sujets
+            FROM livre_sujet ls
+            JOIN sujet s ON ls.id_sujet = s.id_sujet
+            WHERE ls.id_livre = l.id_livre
+        ) suj ON TRUE""",
+}
+ALIAS_RELATIONS_EXPORT = {"auteurs": "aut", "editeurs": "edi", "langues": "lan", "sujets": "suj"}
+CHAMPS_EXPORT_DEFAUT = ["id_livre", "ol_id", "titre", "isbn_13", "annee_publication", "nombre_pages", "auteurs"]
+
+@postgres_livres_router.get("/livres/export")
+async def export_livres_postgres(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Format du flux : ndjson ou csv"),
+    champs: Optional[str] = Query(None, description="Champs à exporter, séparés par des virgules"),
+    titre: Optional[str] = Query(None, description="Filtrer par titre"),
+    auteur: Optional[str] = Query(None, description="Filtrer par auteur"),
+    langue: Optional[str] = Query(None, description="Filtrer par code langue"),
+    annee_min: Optional[int] = Query(None, description="Année de publication minimale"),
+    annee_max: Optional[int] = Query(None, description="Année de publication maximale"),
+    limit: Optional[int] = Query(None, ge=1, description="Nombre maximal de livres exportés"),
+    current_user = Depends(require_jwt)
+):
+    """
+    Exporter le catalogue en flux NDJSON ou CSV
+    
+    Les lignes sont lues par un curseur serveur (yield_per) et envoyées lot par
+    lot : la mémoire reste constante, sans la limite de 100 lignes de /livres.
+    """
+    
+    champs_export = choisir_champs(champs, COLONNES_EXPORT + list(RELATIONS_EXPORT), CHAMPS_EXPORT_DEFAUT)
+    
+    colonnes = [
+        f"{ALIAS_RELATIONS_EXPORT[champ]}.{champ}" if champ in RELATIONS_EXPORT else f"l.{champ}"
+        for champ in champs_export
+    ]
+    jointures = "".join(RELATIONS_EXPORT[champ] for champ in champs_export if champ in RELATIONS_EXPORT)
+    
+    conditions = []
+    params: Dict[str, Any] = {}
+    if titre:
+        conditions.append("l.titre ILIKE :titre")
+        params["titre"] = f"%{titre}%"
+    if auteur:
+        conditions.append("""EXISTS (
+            SELECT 1 FROM livre_auteur fa JOIN auteur fau ON fa.id_auteur = fau.id_auteur
+            WHERE fa.id_livre = l.id_livre AND fau.nom_complet ILIKE :auteur
+        )""")
+        params["auteur"] = f"%{auteur}%"
+    if langue:
+        conditions.append("""EXISTS (
+            SELECT 1 FROM livre_langue fl JOIN langue flg ON fl.id_langue = flg.id_langue
+            WHERE fl.id_livre = l.id_livre AND flg.code_langue = :langue
+        )""")
+        params["langue"] = langue
+    if annee_min is not None:
+        conditions.append("l.annee_publication >= :annee_min")
+        params["annee_min"] = annee_min
+    if annee_max is not None:
+        conditions.append("l.annee_publication <= :annee_max")
+        params["annee_max"] = annee_max
+    
+    query = text(f"""
+        SELECT {", ".join(colonnes)}
+        FROM livre l{jointures}
+        WHERE {" AND ".join(conditions) or "1=1"}
+        ORDER BY l.id_livre
+        {"LIMIT :limit" if limit else ""}
+    """)
+    if limit:
+        params["limit"] = limit
+    
+    def generer():
+        # Session propre au flux : celle de get_db est fermée avant la fin de la réponse
+        db = SessionLocal()
+        try:
+            yield entete_export(champs_export, format)
+            # stream_results : curseur côté serveur (psycopg2), les lignes arrivent par lots
+            taille_lot = settings.export_batch_size
+            result = db.execute(query.execution_options(stream_results=True, yield_per=taille_lot), params)
+            for lot in result.mappings().partitions(taille_lot):
+                yield serialiser_lot(lot, champs_export, format)
+        finally:
+            db.close()
+    
+    return StreamingResponse(
+        generer(),
+        media_type=FORMATS_EXPORT[format],
+        headers=entetes_telechargement("livres_postgres", format)
+    )
+
 @postgres_livres_router.get("/livres/{livre_id}", response_model=LivreComplet)
 async def get_livre_by_id(
     livre_id: int,
@@ -60,50 +302,7 @@ async def get_livre_by_id(
 ):
     """Récupérer un livre par son ID avec toutes ses relations"""
     
-    query = text("""
-        SELECT 
-            l.id_livre,
-            l.ol_id,
-            l.titre,
-            l.sous_titre,
-            l.isbn_10,
-            l.isbn_13,
-            l.date_publication,
-            l.annee_publication,
-            l.nombre_pages,
-            l.format_physique,
-            l.description,
-            l.couverture_url,
-            l.created_at,
-            l.updated_at,
-            
-            a.nom as auteur_nom,
-            a.prenom as auteur_prenom,
-            a.nom_complet as auteur_nom_complet,
-            a.biographie as auteur_biographie,
-            
-            e.nom_editeur as editeur_nom,
-            e.pays as editeur_pays,
-            e.annee_creation as editeur_annee_creation,
-            
-            lg.code_langue as langue_code,
-            lg.nom_langue as langue_nom,
-            
-            s.nom_sujet as sujet_nom,
-            s.categorie as sujet_categorie
-            
-        FROM livre l
-        LEFT JOIN livre_auteur la ON l.id_livre = la.id_livre
-        LEFT JOIN auteur a ON la.id_auteur = a.id_auteur
-        LEFT JOIN livre_editeur le ON l.id_livre = le.id_livre
-        LEFT JOIN editeur e ON le.id_editeur = e.id_editeur
-        LEFT JOIN livre_langue ll ON l.id_livre = ll.id_livre
-        LEFT JOIN langue lg ON ll.id_langue = lg.id_langue
-        LEFT JOIN livre_sujet ls ON l.id_livre = ls.id_livre
-        LEFT JOIN sujet s ON ls.id_sujet = s.id_sujet
-        
-        WHERE l.id_livre = :livre_id
-    """)
+    query = text(REQUETE_LIVRE_COMPLET.format(filtre="l.id_livre = :livre_id"))
     
     try:
         result = db.execute(query, {"livre_id": livre_id})
@@ -112,41 +311,42 @@ async def get_livre_by_id(
         if not row:
             raise HTTPException(status_code=404, detail=f"Livre avec l'ID {livre_id} non trouvé")
         
-        livre_dict = {
-            "id_livre": row.id_livre,
-            "ol_id": row.ol_id,
-            "titre": row.titre,
-            "sous_titre": row.sous_titre,
-            "isbn_10": row.isbn_10,
-            "isbn_13": row.isbn_13,
-            "date_publication": row.date_publication,
-            "annee_publication": row.annee_publication,
-            "nombre_pages": row.nombre_pages,
-            "format_physique": row.format_physique,
-            "description": row.description,
-            "couverture_url": row.couverture_url,
-            "created_at": row.created_at,
-            "updated_at": row.updated_at,
-            "auteur_nom": row.auteur_nom,
-            "auteur_prenom": row.auteur_prenom,
-            "auteur_nom_complet": row.auteur_nom_complet,
-            "auteur_biographie": row.auteur_biographie,
-            "editeur_nom": row.editeur_nom,
-            "editeur_pays": row.editeur_pays,
-            "editeur_annee_creation": row.editeur_annee_creation,
-            "langue_code": row.langue_code,
-            "langue_nom": row.langue_nom,
-            "sujet_nom": row.sujet_nom,
-            "sujet_categorie": row.sujet_categorie
-        }
-        
-        return LivreComplet(**livre_dict)
+        return _livre_complet_depuis_ligne(row)
         
     except Exception as e:
         if "404" in str(e):
             raise e
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération du livre: {str(e)}")
 
+@postgres_livres_router.post("/livres/batch", response_model=LivresBatchResponse)
+async def get_livres_batch(
+    demande: LivresBatchRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Récupérer plusieurs livres complets en une seule requête
+    
+    Les identifiants sont résolus par un unique `= ANY(:ids)` au lieu d'un appel
+    par livre ; les livres sont renvoyés dans l'ordre de la demande et les
+    identifiants introuvables sont listés dans `manquants`.
+    """
+    
+    # Dédoublonner en conservant l'ordre de la demande
+    ids = list(dict.fromkeys(demande.ids))
+    query = text(REQUETE_LIVRE_COMPLET.format(filtre="l.id_livre = ANY(:ids)"))
+    
+    try:
+        rows = db.execute(query, {"ids": ids}).fetchall()
+        par_id = {row.id_livre: _livre_complet_depuis_ligne(row) for row in rows}
+        
+        livres = [par_id[livre_id] for livre_id in ids if livre_id in par_id]
+        manquants = [livre_id for livre_id in ids if livre_id not in par_id]
+        
+        return LivresBatchResponse(data=livres, manquants=manquants, total=len(livres))
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération du lot de livres: {str(e)}")
+
 @postgres_livres_router.get("/livres", response_model=List[LivreComplet])
 async def get_livres_postgres(
     search: Optional[str] = Query(None, description="Recherche dans le titre ou auteur"),
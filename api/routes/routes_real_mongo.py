@@ -12,9 +12,10 @@ except ImportError:
     mongodb_service = None
 
 from auth.auth import require_jwt, optional_jwt
+from utils.json_mongo import ReponseMongoJSON
 
 # Router pour les vraies données MongoDB
-real_mongo_router = APIRouter(prefix="/mongodb", tags=["Real MongoDB Data"])
+real_mongo_router = APIRouter(prefix="/mongodb", tags=["Real MongoDB Data"], default_response_class=ReponseMongoJSON)
 
 async def check_mongodb():
     """Vérifier la disponibilité de MongoDB"""
@@ -36,22 +37,6 @@ async def check_mongodb():
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"MongoDB erreur: {str(e)}")
 
-def serialize_mongo_doc(doc):
-    """Convertir un document MongoDB en dict JSON-serializable"""
-    if doc is None:
-        return None
-    
-    # Convertir ObjectId en string
-    if '_id' in doc:
-        doc['_id'] = str(doc['_id'])
-    
-    # Convertir les dates en ISO string
-    for key, value in doc.items():
-        if isinstance(value, datetime):
-            doc[key] = value.isoformat()
-    
-    return doc
-
 @real_mongo_router.get("/health")
 async def health_check_mongo():
     """Vérifier l'état de MongoDB"""
@@ -67,12 +52,12 @@ async def health_check_mongo():
             count = await mongodb_service.database[collection_name].count_documents({})
             stats[collection_name] = count
         
-        return {
+        return ReponseMongoJSON({
             "status": "✅ OK",
             "timestamp": datetime.now(),
             "collections": collections,
             "documents_count": stats
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur MongoDB: {str(e)}")
 
@@ -91,11 +76,11 @@ async def list_collections():
                 "document_count": count
             })
         
-        return {
+        return ReponseMongoJSON({
             "success": True,
             "data": collections_info,
             "total": len(collections_info)
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -115,20 +100,17 @@ async def get_collection_data(
         cursor = collection.find({}).skip(skip).limit(limit)
         documents = await cursor.to_list(length=limit)
         
-        # Sérialiser les documents
-        serialized_docs = [serialize_mongo_doc(doc) for doc in documents]
-        
         # Compter le total
         total_count = await collection.count_documents({})
         
-        return {
+        return ReponseMongoJSON({
             "success": True,
             "collection": collection_name,
-            "data": serialized_docs,
+            "data": documents,
             "total_in_collection": total_count,
-            "returned_count": len(serialized_docs),
+            "returned_count": len(documents),
             "pagination": {"skip": skip, "limit": limit}
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -168,17 +150,14 @@ async def search_in_collection(
         cursor = collection.find(search_query).limit(limit)
         documents = await cursor.to_list(length=limit)
         
-        # Sérialiser les documents
-        serialized_docs = [serialize_mongo_doc(doc) for doc in documents]
-        
-        return {
+        return ReponseMongoJSON({
             "success": True,
             "collection": collection_name,
             "query": q,
             "field": field,
-            "data": serialized_docs,
-            "total": len(serialized_docs)
-        }
+            "data": documents,
+            "total": len(documents)
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -201,11 +180,11 @@ async def get_document(collection_name: str, document_id: str):
         if not document:
             raise HTTPException(status_code=404, detail="Document non trouvé")
         
-        return {
+        return ReponseMongoJSON({
             "success": True,
             "collection": collection_name,
-            "data": serialize_mongo_doc(document)
-        }
+            "data": document
+        })
     except HTTPException:
         raise
     except Exception as e:
@@ -230,12 +209,12 @@ async def get_mongo_real_statistics(current_user = Depends(require_jwt)):
             stats["collections_details"][collection_name] = count
             stats["total_documents"] += count
         
-        return {
+        return ReponseMongoJSON({
             "success": True,
             "data": stats,
             "timestamp": datetime.now(),
             "database": "MongoDB"
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -255,20 +234,17 @@ async def get_collection_sample(
         cursor = collection.aggregate(pipeline)
         documents = await cursor.to_list(length=count)
         
-        # Sérialiser les documents
-        serialized_docs = [serialize_mongo_doc(doc) for doc in documents]
-        
         # Analyser la structure (récupérer les clés)
         all_keys = set()
-        for doc in serialized_docs:
+        for doc in documents:
             all_keys.update(doc.keys())
         
-        return {
+        return ReponseMongoJSON({
             "success": True,
             "collection": collection_name,
-            "sample_data": serialized_docs,
+            "sample_data": documents,
             "structure_keys": sorted(list(all_keys)),
-            "sample_size": len(serialized_docs)
-        }
+            "sample_size": len(documents)
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+Sérialisation des exports en flux (NDJSON / CSV)
+================================================
+
+Les routes d'export lisent la base par lots (curseur serveur) et envoient
+chaque lot dès qu'il est prêt : la mémoire reste constante quelle que soit la
+taille du catalogue. Ce module transforme un lot de documents en octets.
+Les valeurs sont converties comme dans les autres réponses MongoDB
+(utils/json_mongo.py) : Decimal128 en nombre, NaN en null (champ vide en CSV).
+"""
+
+import csv
+import io
+from typing import Dict, Iterable, List, Optional
+
+from fastapi import HTTPException
+
+from utils.json_mongo import dumps_mongo, _convertir, _sans_nan
+
+FORMATS_EXPORT = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Séparateur des valeurs multiples (listes) dans une cellule CSV
+SEPARATEUR_CSV = "; "
+
+def _valeur_csv(valeur):
+    valeur = _sans_nan(valeur)
+    if valeur is None:
+        return ""
+    if isinstance(valeur, (list, tuple)):
+        return SEPARATEUR_CSV.join(str(_valeur_csv(element)) for element in valeur)
+    if isinstance(valeur, dict):
+        return dumps_mongo(valeur).decode("utf-8")
+    if isinstance(valeur, (str, int, float, bool)):
+        return valeur
+    # Dates, ObjectId, Decimal, Decimal128 : même conversion que les réponses JSON
+    valeur = _convertir(valeur)
+    return "" if valeur is None else valeur
+
+def choisir_champs(demandes: Optional[str], disponibles: Optional[Iterable[str]], defaut: List[str]) -> List[str]:
+    """
+    Liste des champs à exporter depuis le paramètre `champs` (séparés par des virgules)
+
+    Args:
+        demandes: valeur brute du paramètre, None pour les champs par défaut
+        disponibles: champs autorisés (None : tout champ est accepté)
+        defaut: champs exportés quand rien n'est demandé
+    """
+    if not demandes:
+        return list(defaut)
+    champs = list(dict.fromkeys(champ.strip() for champ in demandes.split(",") if champ.strip()))
+    if not champs:
+        return list(defaut)
+    if disponibles is not None:
+        inconnus = [champ for champ in champs if champ not in disponibles]
+        if inconnus:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Champs inconnus: {', '.join(inconnus)} (disponibles: {', '.join(disponibles)})"
+            )
+    return champs
+
+def entete_export(champs: Optional[List[str]], format: str) -> bytes:
+    """Première ligne du flux (en-tête CSV, rien en NDJSON)"""
+    if format != "csv":
+        return b""
+    tampon = io.StringIO()
+    csv.writer(tampon).writerow(champs)
+    return tampon.getvalue().encode("utf-8")
+
+def serialiser_lot(lot: Iterable[Dict], champs: Optional[List[str]], format: str) -> bytes:
+    """
+    Sérialiser un lot de documents en un seul bloc d'octets
+
+    En NDJSON, champs=None exporte les documents complets.
+    """
+    if format == "csv":
+        tampon = io.StringIO()
+        ecrivain = csv.writer(tampon)
+        ecrivain.writerows([_valeur_csv(document.get(champ)) for champ in champs] for document in lot)
+        return tampon.getvalue().encode("utf-8")
+
+    if champs is None:
+        lignes = [dumps_mongo(dict(document)) for document in lot]
+    else:
+        lignes = [dumps_mongo({champ: document.get(champ) for champ in champs}) for document in lot]
+    return b"\n".join(lignes) + b"\n" if lignes else b""
+
+def entetes_telechargement(nom: str, format: str) -> Dict[str, str]:
+    """En-têtes HTTP d'un export (nom de fichier, pas de mise en tampon par un proxy)"""
+    return {
+        "Content-Disposition": f'attachment; filename="{nom}.{format}"',
+        "X-Accel-Buffering": "no",
+    }
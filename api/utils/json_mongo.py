@@ -0,0 +1,64 @@
+"""
+Réponses JSON pour les documents MongoDB
+========================================
+
+Les documents Motor contiennent des ObjectId, datetime et Decimal128, à toute
+profondeur (sous-documents, listes). ReponseMongoJSON les encode directement
+avec orjson (repli sur json de la bibliothèque standard) : les routes renvoient
+les documents bruts, sans copie préalable ni passage par jsonable_encoder.
+Les NaN et infinis (champs vides des imports pandas) deviennent null dans les
+deux cas : NaN n'est pas du JSON valide.
+"""
+
+import json
+import math
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def _convertir(valeur: Any):
+    """Types BSON (et dates pour le repli json) vers leur équivalent JSON"""
+    if isinstance(valeur, ObjectId):
+        return str(valeur)
+    if isinstance(valeur, (datetime, date)):
+        return valeur.isoformat()
+    if isinstance(valeur, Decimal128):
+        valeur = valeur.to_decimal()
+    if isinstance(valeur, Decimal):
+        return float(valeur) if valeur.is_finite() else None
+    if isinstance(valeur, (set, frozenset)):
+        return list(valeur)
+    raise TypeError(f"Type non sérialisable en JSON: {type(valeur).__name__}")
+
+def _sans_nan(valeur: Any):
+    """NaN et infinis remplacés par None à toute profondeur (repli json, comme orjson)"""
+    if isinstance(valeur, float):
+        return valeur if math.isfinite(valeur) else None
+    if isinstance(valeur, dict):
+        return {cle: _sans_nan(v) for cle, v in valeur.items()}
+    if isinstance(valeur, (list, tuple)):
+        return [_sans_nan(v) for v in valeur]
+    return valeur
+
+def dumps_mongo(contenu: Any) -> bytes:
+    """Encoder en JSON (octets UTF-8) un contenu contenant des types BSON"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(contenu, default=_convertir, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(_sans_nan(contenu), default=_convertir, ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+class ReponseMongoJSON(JSONResponse):
+    """JSONResponse acceptant directement les documents MongoDB"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_mongo(content)
@@ -0,0 +1,409 @@
+"""
+Métriques au format d'exposition Prometheus
+===========================================
+
+Registre en mémoire (compteurs, jauges, histogrammes à labels) alimenté par :
+
+* un middleware ASGI : latence et statut par route (gabarit de chemin, pas
+  l'URL brute, pour garder un nombre de séries borné) ;
+* les événements du moteur SQLAlchemy : durée des requêtes, attente de
+  connexion dans le pool, occupation du pool ;
+* un écouteur de commandes pymongo (Motor) : durée des opérations MongoDB ;
+* un écouteur du pool de connexions pymongo : connexions ouvertes et
+  utilisées, attente d'une connexion libre.
+
+Chaque observation coûte une recherche de classe (bisect) et un verrou :
+l'instrumentation peut rester active en production. GET /metrics renvoie
+le registre au format texte 0.0.4.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from pymongo import monitoring
+    PYMONGO_AVAILABLE = True
+except ImportError:
+    PYMONGO_AVAILABLE = False
+
+# Starlette complète avec "; charset=utf-8"
+TYPE_CONTENU_EXPOSITION = "text/plain; version=0.0.4"
+
+# Classes de latence (secondes) : de la lecture en cache à la requête lente
+BORNES_LATENCE = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _echapper(valeur: str) -> str:
+    return str(valeur).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(noms: Sequence[str], valeurs: Sequence[str], extra: str = "") -> str:
+    paires = [f'{nom}="{_echapper(valeur)}"' for nom, valeur in zip(noms, valeurs)]
+    if extra:
+        paires.append(extra)
+    return "{" + ",".join(paires) + "}" if paires else ""
+
+def _format_nombre(valeur: float) -> str:
+    if valeur == float("inf"):
+        return "+Inf"
+    if float(valeur).is_integer():
+        return str(int(valeur))
+    return repr(float(valeur))
+
+class _Metrique:
+    type_metrique = ""
+
+    def __init__(self, nom: str, aide: str, labels: Sequence[str] = ()):
+        self.nom = nom
+        self.aide = aide
+        self.labels = tuple(labels)
+        self._verrou = threading.Lock()
+
+    def _entete(self) -> List[str]:
+        return [f"# HELP {self.nom} {self.aide}", f"# TYPE {self.nom} {self.type_metrique}"]
+
+class Compteur(_Metrique):
+    """Valeur cumulée, par combinaison de labels"""
+    type_metrique = "counter"
+
+    def __init__(self, nom, aide, labels=()):
+        super().__init__(nom, aide, labels)
+        self._valeurs: Dict[Tuple, float] = {}
+
+    def inc(self, *valeurs_labels, valeur: float = 1):
+        with self._verrou:
+            self._valeurs[valeurs_labels] = self._valeurs.get(valeurs_labels, 0) + valeur
+
+    def exposer(self) -> List[str]:
+        with self._verrou:
+            valeurs = list(self._valeurs.items())
+        return self._entete() + [
+            f"{self.nom}{_format_labels(self.labels, cle)} {_format_nombre(v)}" for cle, v in valeurs
+        ]
+
+class Jauge(_Metrique):
+    """Valeur instantanée, fixée directement ou lue à l'exposition (fonction)"""
+    type_metrique = "gauge"
+
+    def __init__(self, nom, aide, labels=(), fonction: Optional[Callable[[], Dict[Tuple, float]]] = None):
+        super().__init__(nom, aide, labels)
+        self._valeurs: Dict[Tuple, float] = {}
+        self.fonction = fonction
+
+    def inc(self, *valeurs_labels, valeur: float = 1):
+        with self._verrou:
+            self._valeurs[valeurs_labels] = self._valeurs.get(valeurs_labels, 0) + valeur
+
+    def dec(self, *valeurs_labels, valeur: float = 1):
+        self.inc(*valeurs_labels, valeur=-valeur)
+
+    def exposer(self) -> List[str]:
+        if self.fonction is not None:
+            try:
+                valeurs = list(self.fonction().items())
+            except Exception:
+                valeurs = []
+        else:
+            with self._verrou:
+                valeurs = list(self._valeurs.items())
+        return self._entete() + [
+            f"{self.nom}{_format_labels(self.labels, cle)} {_format_nombre(v)}" for cle, v in valeurs
+        ]
+
+class Histogramme(_Metrique):
+    """Répartition des observations par classes (exposées cumulées), somme et nombre"""
+    type_metrique = "histogram"
+
+    def __init__(self, nom, aide, labels=(), bornes: Sequence[float] = BORNES_LATENCE):
+        super().__init__(nom, aide, labels)
+        self.bornes = tuple(sorted(bornes))
+        # cle -> [comptes par classe (+Inf en dernier), somme, nombre]
+        self._series: Dict[Tuple, list] = {}
+
+    def observer(self, valeur: float, *valeurs_labels):
+        indice = bisect_left(self.bornes, valeur)
+        with self._verrou:
+            serie = self._series.get(valeurs_labels)
+            if serie is None:
+                serie = self._series[valeurs_labels] = [[0] * (len(self.bornes) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valeur
+            serie[2] += 1
+
+    def exposer(self) -> List[str]:
+        with self._verrou:
+            series = [(cle, list(serie[0]), serie[1], serie[2]) for cle, serie in self._series.items()]
+        lignes = self._entete()
+        for cle, comptes, somme, nombre in series:
+            cumul = 0
+            for borne, compte in zip(self.bornes + (float("inf"),), comptes):
+                cumul += compte
+                classe = 'le="' + _format_nombre(borne) + '"'
+                lignes.append(f"{self.nom}_bucket{_format_labels(self.labels, cle, classe)} {cumul}")
+            lignes.append(f"{self.nom}_sum{_format_labels(self.labels, cle)} {_format_nombre(somme)}")
+            lignes.append(f"{self.nom}_count{_format_labels(self.labels, cle)} {nombre}")
+        return lignes
+
+class RegistreMetriques:
+    """Ensemble des métriques exposées par /metrics"""
+
+    def __init__(self):
+        self._metriques: List[_Metrique] = []
+
+    def enregistrer(self, metrique: _Metrique) -> _Metrique:
+        self._metriques.append(metrique)
+        return metrique
+
+    def exposition(self) -> str:
+        lignes = []
+        for metrique in self._metriques:
+            lignes.extend(metrique.exposer())
+        return "\n".join(lignes) + "\n"
+
+registre_metriques = RegistreMetriques()
+
+# HTTP
+http_requetes = registre_metriques.enregistrer(Compteur(
+    "http_requests_total", "Requêtes HTTP traitées", ("method", "route", "status")))
+http_duree = registre_metriques.enregistrer(Histogramme(
+    "http_request_duration_seconds", "Durée de traitement des requêtes HTTP", ("method", "route")))
+http_en_cours = registre_metriques.enregistrer(Jauge(
+    "http_requests_in_progress", "Requêtes HTTP en cours de traitement"))
+
+# PostgreSQL (SQLAlchemy)
+sql_duree = registre_metriques.enregistrer(Histogramme(
+    "db_query_duration_seconds", "Durée d'exécution des requêtes SQL", ("operation",)))
+sql_erreurs = registre_metriques.enregistrer(Compteur(
+    "db_query_errors_total", "Requêtes SQL en erreur", ("operation",)))
+sql_attente_pool = registre_metriques.enregistrer(Histogramme(
+    "db_pool_checkout_wait_seconds", "Attente d'une connexion du pool SQLAlchemy"))
+
+# MongoDB (Motor / pymongo)
+mongo_duree = registre_metriques.enregistrer(Histogramme(
+    "mongo_command_duration_seconds", "Durée des commandes MongoDB", ("command", "status")))
+mongo_attente_pool = registre_metriques.enregistrer(Histogramme(
+    "mongo_pool_checkout_wait_seconds", "Attente d'une connexion du pool MongoDB", ("client",)))
+
+ROUTE_INCONNUE = "inconnue"
+
+# Endpoint -> gabarit de chemin, construit au premier appel
+_routes_par_endpoint: Dict[Callable, str] = {}
+
+def gabarit_route(scope) -> str:
+    """
+    Gabarit déclaré de la route (/postgres/livres/{livre_id}) d'une requête
+
+    Disponible une fois le routage fait : Starlette place l'endpoint choisi dans le scope.
+    """
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return ROUTE_INCONNUE
+    if endpoint not in _routes_par_endpoint:
+        # Table (re)construite si une route est inconnue (ajoutée après coup)
+        for route in getattr(scope.get("app"), "routes", []):
+            _routes_par_endpoint[getattr(route, "endpoint", None)] = getattr(route, "path", ROUTE_INCONNUE)
+        _routes_par_endpoint.setdefault(endpoint, ROUTE_INCONNUE)
+    return _routes_par_endpoint[endpoint]
+
+class MiddlewareMetriques:
+    """
+    Middleware ASGI : compteur et histogramme de latence par route
+
+    Le label `route` est le gabarit déclaré (voir gabarit_route) : le nombre
+    de séries reste borné quelle que soit l'URL appelée.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        statut = [500]
+
+        async def envoyer(message):
+            if message["type"] == "http.response.start":
+                statut[0] = message["status"]
+            await send(message)
+
+        debut = time.perf_counter()
+        http_en_cours.inc()
+        try:
+            await self.app(scope, receive, envoyer)
+        finally:
+            duree = time.perf_counter() - debut
+            http_en_cours.dec()
+            methode = scope.get("method", "")
+            route = gabarit_route(scope)
+            http_requetes.inc(methode, route, str(statut[0]))
+            http_duree.observer(duree, methode, route)
+
+def _operation_sql(instruction: str) -> str:
+    """Premier mot-clé de la requête (SELECT, INSERT, ...) : label à faible cardinalité"""
+    mot = instruction.lstrip().split(None, 1)[0].upper() if instruction.strip() else ""
+    return mot if mot in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "BEGIN", "COMMIT", "ROLLBACK") else "AUTRE"
+
+def instrumenter_sqlalchemy(engine):
+    """Brancher les métriques SQL et pool sur un moteur SQLAlchemy"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _avant(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("debuts_requetes", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _apres(conn, cursor, statement, parameters, context, executemany):
+        debut = conn.info["debuts_requetes"].pop()
+        sql_duree.observer(time.perf_counter() - debut, _operation_sql(statement))
+
+    @event.listens_for(engine, "handle_error")
+    def _erreur(contexte):
+        debuts = contexte.connection.info.get("debuts_requetes") if contexte.connection is not None else None
+        if debuts:
+            debuts.pop()
+        sql_erreurs.inc(_operation_sql(contexte.statement or ""))
+
+    # Attente de connexion : temps passé dans pool.connect() (file d'attente, pre-ping)
+    pool = engine.pool
+    connecter = pool.connect
+
+    def connect_chronometre():
+        debut = time.perf_counter()
+        try:
+            return connecter()
+        finally:
+            sql_attente_pool.observer(time.perf_counter() - debut)
+
+    pool.connect = connect_chronometre
+
+    def occupation_pool():
+        if not hasattr(pool, "checkedout"):
+            return {}
+        return {
+            ("utilisees",): pool.checkedout(),
+            ("disponibles",): pool.checkedin(),
+            ("debordement",): max(pool.overflow(), 0),
+            ("taille",): pool.size(),
+        }
+
+    registre_metriques.enregistrer(Jauge(
+        "db_pool_connections", "Connexions du pool SQLAlchemy par état", ("state",), fonction=occupation_pool))
+
+if PYMONGO_AVAILABLE:
+    class EcouteurCommandesMongo(monitoring.CommandListener):
+        """Durée de chaque commande MongoDB (find, aggregate, ...) envoyée par Motor"""
+
+        def started(self, event):
+            pass
+
+        def succeeded(self, event):
+            mongo_duree.observer(event.duration_micros / 1_000_000, event.command_name, "ok")
+
+        def failed(self, event):
+            mongo_duree.observer(event.duration_micros / 1_000_000, event.command_name, "erreur")
+
+    class EcouteurPoolMongo(monitoring.ConnectionPoolListener):
+        """
+        Occupation du pool de connexions d'un client pymongo / Motor (événements CMAP)
+
+        pymongo n'expose pas l'état de ses pools : les compteurs sont tenus ici,
+        un écouteur par client (nommé), lus par /health?deep=true et /metrics.
+        """
+
+        def __init__(self, client: str):
+            self.client = client
+            self._verrou = threading.Lock()
+            self._local = threading.local()
+            self.creees = 0
+            self.fermees = 0
+            self.sorties = 0
+            self.rendues = 0
+            self.vidages = 0
+            self.echecs_sortie: Dict[str, int] = {}
+            self.attente_totale = 0.0
+            self.attente_max = 0.0
+            _ecouteurs_pool_mongo.append(self)
+
+        def _fin_attente(self) -> float:
+            # La sortie d'une connexion se fait dans un seul thread (exécuteur Motor)
+            debut = getattr(self._local, "debut", None)
+            self._local.debut = None
+            return time.perf_counter() - debut if debut is not None else 0.0
+
+        def pool_created(self, event):
+            pass
+
+        def pool_ready(self, event):
+            pass
+
+        def pool_cleared(self, event):
+            with self._verrou:
+                self.vidages += 1
+
+        def pool_closed(self, event):
+            pass
+
+        def connection_created(self, event):
+            with self._verrou:
+                self.creees += 1
+
+        def connection_ready(self, event):
+            pass
+
+        def connection_closed(self, event):
+            with self._verrou:
+                self.fermees += 1
+
+        def connection_check_out_started(self, event):
+            self._local.debut = time.perf_counter()
+
+        def connection_check_out_failed(self, event):
+            attente = self._fin_attente()
+            mongo_attente_pool.observer(attente, self.client)
+            with self._verrou:
+                raison = str(event.reason)
+                self.echecs_sortie[raison] = self.echecs_sortie.get(raison, 0) + 1
+
+        def connection_checked_out(self, event):
+            attente = self._fin_attente()
+            mongo_attente_pool.observer(attente, self.client)
+            with self._verrou:
+                self.sorties += 1
+                self.attente_totale += attente
+                self.attente_max = max(self.attente_max, attente)
+
+        def connection_checked_in(self, event):
+            with self._verrou:
+                self.rendues += 1
+
+        def stats(self) -> Dict[str, object]:
+            with self._verrou:
+                ouvertes = self.creees - self.fermees
+                utilisees = self.sorties - self.rendues
+                return {
+                    "ouvertes": ouvertes,
+                    "utilisees": utilisees,
+                    "disponibles": max(ouvertes - utilisees, 0),
+                    "sorties_total": self.sorties,
+                    "echecs_sortie": dict(self.echecs_sortie),
+                    "attente_moyenne_ms": round(self.attente_totale / self.sorties * 1000, 3) if self.sorties else 0.0,
+                    "attente_max_ms": round(self.attente_max * 1000, 3),
+                    "vidages": self.vidages,
+                }
+
+    _ecouteurs_pool_mongo: List["EcouteurPoolMongo"] = []
+
+    def occupation_pools_mongo():
+        valeurs = {}
+        for ecouteur in _ecouteurs_pool_mongo:
+            stats = ecouteur.stats()
+            valeurs[(ecouteur.client, "ouvertes")] = stats["ouvertes"]
+            valeurs[(ecouteur.client, "utilisees")] = stats["utilisees"]
+            valeurs[(ecouteur.client, "disponibles")] = stats["disponibles"]
+        return valeurs
+
+    registre_metriques.enregistrer(Jauge(
+        "mongo_pool_connections", "Connexions des pools MongoDB par client et état", ("client", "state"),
+        fonction=occupation_pools_mongo))
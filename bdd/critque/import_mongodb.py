@@ -8,10 +8,15 @@ Date: Janvier 2025
 
 import json
 import os
+import sys
 from pymongo import MongoClient
 from datetime import datetime
 import logging
 
+# Helper partagé des scripts d'import (bdd/rafraichissement_dashboard.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rafraichissement_dashboard import rafraichir_snapshot_dashboard
+
 # Configuration du logging
 logging.basicConfig(
     level=logging.INFO,
@@ -265,6 +270,7 @@ def main():
                 logger.info(f"  - {auteur['_id']}: {auteur['count']} livre(s)")
         
         logger.info("\n=== IMPORT TERMINÉ AVEC SUCCÈS ===")
+        rafraichir_snapshot_dashboard()
         
     except Exception as e:
         logger.error(f"Erreur générale: {e}")
@@ -7,9 +7,14 @@ Usage: python import_simple.py
 
 import json
 import os
+import sys
 from pymongo import MongoClient
 from datetime import datetime
 
+# Helper partagé des scripts d'import (bdd/rafraichissement_dashboard.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rafraichissement_dashboard import rafraichir_snapshot_dashboard
+
 def importer_critiques_livres():
     """
     Fonction principale pour importer les données de critiques de livres
@@ -125,6 +130,7 @@ def importer_critiques_livres():
         
         # Fermeture de la connexion
         client.close()
+        rafraichir_snapshot_dashboard()
         
     except FileNotFoundError:
         print("❌ Fichier 'livre_critique' introuvable dans le répertoire courant")
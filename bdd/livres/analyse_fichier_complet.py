@@ -9,11 +9,20 @@ le nombre total de livres disponibles et planifier l'extraction.
 
 import gzip
 import os
+import re
+import sys
 import json
 import time
 from collections import defaultdict
 from typing import Dict, Tuple
 
+# Esquisses à mémoire bornée partagées avec les outils d'analyse
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "analyse"))
+from esquisses import HyperLogLog, MisraGries, CountMinSketch, TDigest, frequents_avec_bornes
+
+ANNEE_REGEX = re.compile(rb'\b(19|20)\d{2}\b')
+QUANTILES_RAPPORT = (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+
 def analyser_fichier_openlibrary(fichier_path: str, echantillon_lignes: int = 100000) -> Dict:
     """
     Analyse un fichier OpenLibrary pour obtenir des statistiques
@@ -193,6 +202,221 @@ def analyser_fichier_openlibrary(fichier_path: str, echantillon_lignes: int = 10
         print(f"❌ Erreur lors de l'analyse: {e}")
         return stats
 
+def _cles_auteurs(donnees_json) -> list:
+    """Clés /authors/... d'une édition ({'key': ...}) ou d'une œuvre ({'author': {'key': ...}})"""
+    cles = []
+    for auteur in donnees_json.get('authors') or []:
+        if isinstance(auteur, dict):
+            if isinstance(auteur.get('author'), dict):
+                auteur = auteur['author']
+            if auteur.get('key'):
+                cles.append(auteur['key'])
+    return cles
+
+def _resume_quantiles(digest: TDigest) -> Dict:
+    if not digest.total:
+        return {'nb_valeurs': 0}
+    return {
+        'nb_valeurs': digest.total,
+        'min': digest.min,
+        'max': digest.max,
+        'quantiles': {f"p{int(q * 100)}": round(digest.quantile(q), 1) for q in QUANTILES_RAPPORT},
+        'incertitude_rang_max': round(max(digest.incertitude_rang(q) for q in QUANTILES_RAPPORT), 5),
+        'nb_centroides': len(digest.centroides),
+    }
+
+def analyser_fichier_openlibrary_complet(fichier_path: str, top_k: int = 100, precision_hll: int = 14,
+                                         epsilon: float = 0.0005, delta: float = 0.001,
+                                         compression: int = 100, fichier_rapport: str = None) -> Dict:
+    """
+    Analyse l'intégralité d'un dump OpenLibrary en une passe et en mémoire bornée
+    
+    Les compteurs à faible cardinalité (types, qualité, langues) restent exacts ;
+    sujets et éditeurs passent par Misra-Gries + Count-Min, auteurs et œuvres
+    distincts par HyperLogLog, pages et années par t-digest.
+    
+    Args:
+        fichier_path: Chemin vers le fichier à analyser
+        top_k: Nombre de compteurs Misra-Gries (sujets et éditeurs)
+        precision_hll: Précision des HyperLogLog (2^precision registres)
+        epsilon: Erreur relative maximale des Count-Min (rapportée au total)
+        delta: Probabilité de dépasser cette erreur
+        compression: Paramètre de compression des t-digest
+        fichier_rapport: Chemin optionnel du rapport JSON
+        
+    Returns:
+        Dictionnaire avec les statistiques exactes, approximées et leurs bornes d'erreur
+    """
+    print(f"🔍 ANALYSE COMPLÈTE DU FICHIER OPENLIBRARY (mémoire bornée)")
+    print(f"📁 Fichier: {os.path.basename(fichier_path)}")
+    
+    if not os.path.exists(fichier_path):
+        print(f"❌ Fichier non trouvé: {fichier_path}")
+        return {}
+    
+    taille_octets = os.path.getsize(fichier_path)
+    est_compresse = fichier_path.endswith('.gz')
+    print(f"📊 Taille: {taille_octets / (1024**3):.2f} GB")
+    
+    types_entrees = defaultdict(int)
+    langues = defaultdict(int)
+    qualite = {'avec_titre': 0, 'avec_isbn': 0, 'avec_auteur': 0, 'avec_annee': 0}
+    lignes = 0
+    lignes_invalides = 0
+    
+    sujets_mg, sujets_cms = MisraGries(top_k), CountMinSketch(epsilon, delta)
+    editeurs_mg, editeurs_cms = MisraGries(top_k), CountMinSketch(epsilon, delta)
+    auteurs_hll, works_hll = HyperLogLog(precision_hll), HyperLogLog(precision_hll)
+    pages_digest, annees_digest = TDigest(compression), TDigest(compression)
+    
+    debut = time.time()
+    # Lecture binaire : json.loads accepte les octets, on évite le décodage texte ligne à ligne
+    with open(fichier_path, 'rb') as brut:
+        flux = gzip.GzipFile(fileobj=brut) if est_compresse else brut
+        for ligne in flux:
+            lignes += 1
+            if lignes % 1000000 == 0:
+                progression = brut.tell() / taille_octets * 100
+                debit = brut.tell() / (1024**2) / (time.time() - debut)
+                print(f"   Analysé: {lignes:,} lignes ({progression:.1f}%, {debit:.1f} Mo/s)...")
+            parties = ligne.split(b'\t', 4)
+            if len(parties) < 5:
+                lignes_invalides += 1
+                continue
+            type_entree = parties[0].decode('utf-8', errors='replace')
+            types_entrees[type_entree] += 1
+            
+            if type_entree == '/type/author':
+                auteurs_hll.ajouter(parties[1])
+                continue
+            if type_entree not in ('/type/edition', '/type/work'):
+                continue
+            
+            try:
+                donnees_json = json.loads(parties[4])
+            except ValueError:
+                lignes_invalides += 1
+                continue
+            
+            for cle in _cles_auteurs(donnees_json):
+                auteurs_hll.ajouter(cle)
+            for sujet in donnees_json.get('subjects') or []:
+                if isinstance(sujet, str) and sujet:
+                    sujets_mg.ajouter(sujet)
+                    sujets_cms.ajouter(sujet)
+            
+            if type_entree == '/type/work':
+                works_hll.ajouter(parties[1])
+                continue
+            
+            # Éditions
+            for work in donnees_json.get('works') or []:
+                if isinstance(work, dict) and work.get('key'):
+                    works_hll.ajouter(work['key'])
+            if donnees_json.get('title'):
+                qualite['avec_titre'] += 1
+            if donnees_json.get('isbn_10') or donnees_json.get('isbn_13'):
+                qualite['avec_isbn'] += 1
+            if donnees_json.get('authors'):
+                qualite['avec_auteur'] += 1
+            if donnees_json.get('publish_date'):
+                qualite['avec_annee'] += 1
+                annee_match = ANNEE_REGEX.search(str(donnees_json['publish_date']).encode())
+                if annee_match:
+                    annees_digest.ajouter(int(annee_match.group()))
+            pages = donnees_json.get('number_of_pages')
+            if isinstance(pages, int) and 0 < pages < 100000:
+                pages_digest.ajouter(pages)
+            for editeur in donnees_json.get('publishers') or []:
+                if isinstance(editeur, str) and editeur:
+                    editeurs_mg.ajouter(editeur)
+                    editeurs_cms.ajouter(editeur)
+            for langue in (donnees_json.get('languages') or [])[:3]:
+                if isinstance(langue, dict) and 'key' in langue:
+                    langues[langue['key'].split('/')[-1]] += 1
+    
+    duree = time.time() - debut
+    
+    stats = {
+        'fichier': os.path.basename(fichier_path),
+        'taille_gb': taille_octets / (1024**3),
+        'est_compresse': est_compresse,
+        'mode': 'complet',
+        'duree_secondes': round(duree, 1),
+        'exact': {
+            'lignes_totales': lignes,
+            'lignes_invalides': lignes_invalides,
+            'types_entrees': dict(types_entrees),
+            'qualite_donnees': qualite,
+            'langues_populaires': dict(sorted(langues.items(), key=lambda x: x[1], reverse=True)),
+        },
+        'approximatif': {
+            'auteurs_distincts': {
+                'estimation': auteurs_hll.estimer(),
+                'erreur_relative_typique': round(auteurs_hll.erreur_relative, 4),
+            },
+            'works_distincts': {
+                'estimation': works_hll.estimer(),
+                'erreur_relative_typique': round(works_hll.erreur_relative, 4),
+            },
+            'sujets_populaires': {
+                'occurrences': sujets_mg.total,
+                'borne_sous_estimation_misra_gries': int(sujets_mg.borne_erreur),
+                'borne_surestimation_count_min': int(sujets_cms.borne_erreur),
+                'probabilite_depassement': delta,
+                'top': frequents_avec_bornes(sujets_mg, sujets_cms, n=top_k),
+            },
+            'editeurs_populaires': {
+                'occurrences': editeurs_mg.total,
+                'borne_sous_estimation_misra_gries': int(editeurs_mg.borne_erreur),
+                'borne_surestimation_count_min': int(editeurs_cms.borne_erreur),
+                'probabilite_depassement': delta,
+                'top': frequents_avec_bornes(editeurs_mg, editeurs_cms, n=top_k),
+            },
+            'nombre_pages': _resume_quantiles(pages_digest),
+            'annees_publication': _resume_quantiles(annees_digest),
+        },
+    }
+    # Clés compatibles avec le mode échantillon (ici exactes)
+    stats['lignes_totales_estimees'] = lignes
+    stats['editions_estimees'] = types_entrees.get('/type/edition', 0)
+    stats['works_estimes'] = stats['approximatif']['works_distincts']['estimation']
+    stats['authors_estimes'] = stats['approximatif']['auteurs_distincts']['estimation']
+    
+    print(f"\n📊 RÉSULTATS DE L'ANALYSE COMPLÈTE")
+    print(f"⏱️ Temps d'analyse: {duree:.1f} secondes ({taille_octets / (1024**2) / max(duree, 1e-9):.1f} Mo/s)")
+    print(f"🔢 Lignes analysées: {lignes:,} ({lignes_invalides:,} invalides)")
+    
+    print(f"\n📈 TYPES D'ENTRÉES (exact):")
+    for type_entree, count in sorted(types_entrees.items(), key=lambda x: x[1], reverse=True):
+        print(f"   • {type_entree}: {count:,}")
+    
+    approx = stats['approximatif']
+    print(f"\n👥 DISTINCTS (HyperLogLog, ±{auteurs_hll.erreur_relative:.1%}):")
+    print(f"   • Auteurs: ~{approx['auteurs_distincts']['estimation']:,}")
+    print(f"   • Works: ~{approx['works_distincts']['estimation']:,}")
+    
+    for titre, cle in (("SUJETS", 'sujets_populaires'), ("ÉDITEURS", 'editeurs_populaires')):
+        bloc = approx[cle]
+        if bloc['top']:
+            print(f"\n🏷️ TOP 10 {titre} (fréquence réelle dans [borne_inf, borne_sup]):")
+            for i, entree in enumerate(bloc['top'][:10]):
+                print(f"   {i+1:2d}. {entree['valeur']}: ~{entree['estimation']:,} "
+                      f"[{entree['borne_inf']:,} - {entree['borne_sup']:,}]")
+    
+    for titre, cle in (("NOMBRE DE PAGES", 'nombre_pages'), ("ANNÉES DE PUBLICATION", 'annees_publication')):
+        resume = approx[cle]
+        if resume['nb_valeurs']:
+            quantiles = ", ".join(f"{k}={v}" for k, v in resume['quantiles'].items())
+            print(f"\n📅 {titre} (t-digest, rang ±{resume['incertitude_rang_max']:.2%}): {quantiles}")
+    
+    if fichier_rapport:
+        with open(fichier_rapport, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Rapport sauvegardé: {fichier_rapport}")
+    
+    return stats
+
 def main():
     """Fonction principale"""
     print("🔍 ANALYSEUR DE FICHIER OPENLIBRARY COMPLET")
@@ -240,13 +464,18 @@ def main():
     print(f"   1. Analyse rapide (100,000 lignes)")
     print(f"   2. Analyse moyenne (500,000 lignes)")
     print(f"   3. Analyse approfondie (1,000,000 lignes)")
+    print(f"   4. Analyse complète (tout le fichier, mémoire bornée)")
     
     echantillon_map = {'1': 100000, '2': 500000, '3': 1000000}
-    choix_echantillon = input("Choisissez le niveau d'analyse (1-3): ").strip()
-    echantillon = echantillon_map.get(choix_echantillon, 100000)
+    choix_echantillon = input("Choisissez le niveau d'analyse (1-4): ").strip()
     
     # Lancer l'analyse
-    stats = analyser_fichier_openlibrary(fichier_choisi, echantillon)
+    if choix_echantillon == '4':
+        rapport = os.path.splitext(os.path.basename(fichier_choisi))[0] + "_analyse_complete.json"
+        stats = analyser_fichier_openlibrary_complet(fichier_choisi, fichier_rapport=rapport)
+    else:
+        echantillon = echantillon_map.get(choix_echantillon, 100000)
+        stats = analyser_fichier_openlibrary(fichier_choisi, echantillon)
     
     if stats:
         print(f"\n💡 RECOMMANDATIONS:")
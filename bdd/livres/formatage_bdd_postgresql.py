@@ -11,6 +11,7 @@ import pandas as pd
 import json
 import re
 import os
+import sys
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String, Text, DateTime, Float, Boolean, ForeignKey
@@ -19,6 +20,10 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 
+# Helper partagé des scripts d'import (bdd/rafraichissement_dashboard.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rafraichissement_dashboard import rafraichir_snapshot_dashboard
+
 class FormateurPostgreSQL:
     """Classe pour formater les données vers PostgreSQL"""
     
@@ -728,6 +733,7 @@ def main():
         
         if formateur.tables_creees:
             formateur.traiter_fichier_csv(fichier_csv)
+            rafraichir_snapshot_dashboard()
         
         print(f"\n🎉 FORMATAGE TERMINÉ!")
         print(f"   🗄️ Base PostgreSQL: {database_url}")
@@ -12,11 +12,16 @@ Ce script :
 
 import os
 import json
+import sys
 from typing import Dict, List, Any
 from datetime import datetime
 from pymongo import MongoClient
 from pymongo.errors import BulkWriteError, DuplicateKeyError
 
+# Helper partagé des scripts d'import (bdd/rafraichissement_dashboard.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rafraichissement_dashboard import rafraichir_snapshot_dashboard
+
 class ImportateurMongoDB:
     """Classe pour importer les données JSON dans MongoDB"""
     
@@ -351,6 +356,7 @@ def main():
         # Lancer l'import
         importateur.importer_tous_fichiers()
         print("\n[SUCCESS] Import terminé dans la collection '{}'".format(nom_collection))
+        rafraichir_snapshot_dashboard()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
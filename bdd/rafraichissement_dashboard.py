@@ -0,0 +1,34 @@
+"""
+Rafraîchissement du snapshot du dashboard après un import
+=========================================================
+
+Partagé par les scripts d'import de bdd/ : une fois les données écrites, l'API
+est priée de recalculer le snapshot du dashboard (POST /admin/dashboard/snapshot/refresh,
+clé API requise). Un échec n'interrompt jamais l'import.
+
+Variables d'environnement :
+    DATABOOK_API_URL  URL de l'API (défaut : http://localhost:8000)
+    API_KEY           clé API de l'en-tête X-API-Key ; absente, le rafraîchissement est ignoré
+"""
+
+import os
+import urllib.request
+
+CHEMIN_RAFRAICHISSEMENT = "/admin/dashboard/snapshot/refresh"
+
+def rafraichir_snapshot_dashboard() -> bool:
+    """Demander à l'API de recalculer le snapshot du dashboard ; True si la demande est acceptée"""
+    cle_api = os.getenv("API_KEY")
+    if not cle_api:
+        print(f"⚠️ API_KEY non définie : snapshot du dashboard non rafraîchi (POST {CHEMIN_RAFRAICHISSEMENT} à appeler à la main)")
+        return False
+    url = os.getenv("DATABOOK_API_URL", "http://localhost:8000").rstrip("/") + CHEMIN_RAFRAICHISSEMENT
+    requete = urllib.request.Request(url, method="POST", headers={"X-API-Key": cle_api})
+    try:
+        with urllib.request.urlopen(requete, timeout=5):
+            pass
+    except Exception as e:
+        print(f"⚠️ Snapshot du dashboard non rafraîchi ({e}) : appeler POST {CHEMIN_RAFRAICHISSEMENT} une fois l'API démarrée")
+        return False
+    print("🔄 Snapshot du dashboard : recalcul demandé à l'API")
+    return True
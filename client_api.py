@@ -0,0 +1,239 @@
+"""
+🔌 Client HTTP de l'interface Streamlit pour DataBook API
+Session poolée partagée, cache par endpoint et requêtes parallèles
+
+Streamlit réexécute tout le script à chaque interaction : sans cache, chaque
+clic refait /auth/me, /health et les analytics de l'onglet affiché. Les GET
+sont mis en cache (st.cache_data) par endpoint, paramètres et utilisateur,
+avec une durée de vie adaptée à chaque famille d'endpoints.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+    SCRIPT_RUN_CTX_AVAILABLE = True
+except ImportError:
+    SCRIPT_RUN_CTX_AVAILABLE = False
+
+API_BASE_URL = os.getenv("DATABOOK_API_URL", "http://localhost:8000")
+TIMEOUT_SECONDES = 10
+
+# Durée de vie du cache par préfixe d'endpoint (le plus long préfixe l'emporte)
+TTL_COURT, TTL_MOYEN, TTL_LONG = 15, 60, 300
+TTL_PAR_ENDPOINT = {
+    "/health": TTL_COURT,
+    "/auth/me": TTL_MOYEN,
+    "/summary": TTL_MOYEN,
+    "/dashboard": TTL_MOYEN,
+    "/mongo-extras/analytics": TTL_LONG,
+    "/mongo-extras/auteurs": TTL_LONG,
+    "/mongo-extras/genres": TTL_LONG,
+    "/mongo-extras/critiques/distribution": TTL_LONG,
+    "/postgres-extras": TTL_LONG,
+    "/postgres/livres/stats": TTL_LONG,
+}
+
+# Endpoints jamais mis en cache (debug)
+SANS_CACHE = ("/postgres/livres/debug",)
+
+class _ReponseNonCachee(Exception):
+    """Réponse en erreur : remontée par exception pour que st.cache_data ne la garde pas"""
+
+    def __init__(self, status_code, contenu):
+        super().__init__(status_code)
+        self.status_code = status_code
+        self.contenu = contenu
+
+@st.cache_resource
+def obtenir_session() -> requests.Session:
+    """Session HTTP partagée (keep-alive, pool de connexions, relances sur les GET)"""
+    session = requests.Session()
+    # Pas de relance sur 503 : c'est la réponse immédiate du disjoncteur MongoDB.
+    # raise_on_status=False : après la dernière relance, la réponse d'erreur est
+    # rendue telle quelle (statut et message de l'API) au lieu d'une RetryError.
+    relances = Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 504), allowed_methods=("GET",),
+                     raise_on_status=False)
+    adaptateur = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=relances)
+    session.mount("http://", adaptateur)
+    session.mount("https://", adaptateur)
+    return session
+
+def _decoder(response: requests.Response):
+    if response.headers.get("content-type", "").startswith("application/json"):
+        return response.json()
+    return response.text
+
+def _requete(endpoint, method="GET", headers=None, data=None, params=None) -> Tuple[int, object]:
+    """Requête sans cache sur la session partagée"""
+    try:
+        response = obtenir_session().request(
+            method,
+            f"{API_BASE_URL}{endpoint}",
+            headers=headers,
+            params=params,
+            json=data if method in ("POST", "PUT") else None,
+            timeout=TIMEOUT_SECONDES
+        )
+        return response.status_code, _decoder(response)
+    except Exception as e:
+        return 500, f"Erreur: {str(e)}"
+
+def _get_brut(endpoint, params, autorisation):
+    headers = {"Authorization": autorisation} if autorisation else None
+    status_code, contenu = _requete(endpoint, headers=headers, params=dict(params) if params else None)
+    if status_code != 200:
+        raise _ReponseNonCachee(status_code, contenu)
+    return status_code, contenu
+
+# Une fonction par durée de vie : st.cache_data fixe le TTL par fonction.
+# La clé inclut l'en-tête Authorization : chaque utilisateur a ses propres entrées.
+@st.cache_data(ttl=TTL_COURT, show_spinner=False)
+def _get_cache_court(endpoint, params, autorisation):
+    return _get_brut(endpoint, params, autorisation)
+
+@st.cache_data(ttl=TTL_MOYEN, show_spinner=False)
+def _get_cache_moyen(endpoint, params, autorisation):
+    return _get_brut(endpoint, params, autorisation)
+
+@st.cache_data(ttl=TTL_LONG, show_spinner=False)
+def _get_cache_long(endpoint, params, autorisation):
+    return _get_brut(endpoint, params, autorisation)
+
+_CACHES_PAR_TTL = {TTL_COURT: _get_cache_court, TTL_MOYEN: _get_cache_moyen, TTL_LONG: _get_cache_long}
+
+def ttl_endpoint(endpoint: str) -> int:
+    """Durée de vie du cache pour un endpoint"""
+    prefixes = [prefixe for prefixe in TTL_PAR_ENDPOINT if endpoint.startswith(prefixe)]
+    return TTL_PAR_ENDPOINT[max(prefixes, key=len)] if prefixes else TTL_COURT
+
+def invalider_cache():
+    """Vider le cache des GET (bouton rafraîchir, déconnexion, écriture)"""
+    for fonction in _CACHES_PAR_TTL.values():
+        fonction.clear()
+
+def appel_api(endpoint, method="GET", headers=None, data=None, params=None, cache=True) -> Tuple[int, object]:
+    """
+    Faire une requête à l'API
+
+    Les GET réussis sont servis depuis le cache ; toute écriture (POST, PUT,
+    DELETE) vide le cache pour ne pas réafficher des données périmées.
+    """
+    if method != "GET":
+        resultat = _requete(endpoint, method, headers, data, params)
+        invalider_cache()
+        return resultat
+
+    if not cache or endpoint.startswith(SANS_CACHE):
+        return _requete(endpoint, headers=headers, params=params)
+
+    # Paramètres en tuple trié : clé de cache stable et hachable
+    params_cle = tuple(sorted((params or {}).items()))
+    autorisation = (headers or {}).get("Authorization")
+    try:
+        return _CACHES_PAR_TTL[ttl_endpoint(endpoint)](endpoint, params_cle, autorisation)
+    except _ReponseNonCachee as e:
+        return e.status_code, e.contenu
+
+def requetes_paralleles(demandes: Dict[str, Dict]) -> Dict[str, Tuple[int, object]]:
+    """
+    Lancer plusieurs appels indépendants simultanément
+
+    Args:
+        demandes: nom -> arguments de appel_api (endpoint, headers, params, ...)
+
+    Returns:
+        nom -> (status_code, contenu)
+    """
+    contexte = get_script_run_ctx() if SCRIPT_RUN_CTX_AVAILABLE else None
+
+    def executer(arguments):
+        # Rattacher le thread au script Streamlit courant (accès au cache sans avertissement)
+        if contexte is not None:
+            add_script_run_ctx(threading.current_thread(), contexte)
+        return appel_api(**arguments)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(demandes)))) as executeur:
+        futures = {nom: executeur.submit(executer, arguments) for nom, arguments in demandes.items()}
+        return {nom: future.result() for nom, future in futures.items()}
+
+# Préchargement des pages suivantes, hors du thread du script Streamlit
+_executeur_prechargement = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prechargement")
+
+class PaginateurAPI:
+    """
+    Pages d'une liste paginée de l'API (limit + offset/skip), chargées à la demande
+
+    Conservé dans st.session_state : les pages déjà vues ne sont plus redemandées
+    et la page suivante est préchargée en arrière-plan pendant l'affichage.
+    """
+
+    def __init__(self, endpoint, params=None, headers=None, taille_page=50, param_decalage="offset",
+                 extraire=None, extraire_total=None, pages_max=20):
+        self.endpoint = endpoint
+        self.params = dict(params or {})
+        self.headers = headers
+        self.taille_page = taille_page
+        self.param_decalage = param_decalage
+        self.extraire = extraire or (lambda contenu: contenu.get("data", []) if isinstance(contenu, dict) else contenu)
+        self.extraire_total = extraire_total
+        self.pages_max = pages_max
+        self.pages: Dict[int, list] = {}
+        self.total: Optional[int] = None
+        self.derniere_page: Optional[int] = None
+        self._prechargements = {}
+        self.erreur = None
+
+    def meme_requete(self, endpoint, params, taille_page) -> bool:
+        return self.endpoint == endpoint and self.params == dict(params or {}) and self.taille_page == taille_page
+
+    def _charger(self, numero: int):
+        params = dict(self.params, limit=self.taille_page, **{self.param_decalage: numero * self.taille_page})
+        return _requete(self.endpoint, headers=self.headers, params=params)
+
+    def _enregistrer(self, numero: int, status_code, contenu) -> list:
+        if status_code != 200:
+            self.erreur = contenu
+            return []
+        self.erreur = None
+        lignes = self.extraire(contenu) or []
+        if self.extraire_total is not None:
+            self.total = self.extraire_total(contenu)
+        if len(lignes) < self.taille_page:
+            self.derniere_page = numero
+        self.pages[numero] = lignes
+        # Garder un nombre borné de pages, les plus éloignées de la page courante partent d'abord
+        while len(self.pages) > self.pages_max:
+            del self.pages[max(self.pages, key=lambda page: abs(page - numero))]
+        return lignes
+
+    def page(self, numero: int) -> list:
+        """Lignes d'une page (cache de session, préchargement ou appel API)"""
+        if numero in self.pages:
+            return self.pages[numero]
+        future = self._prechargements.pop(numero, None)
+        status_code, contenu = future.result() if future is not None else self._charger(numero)
+        return self._enregistrer(numero, status_code, contenu)
+
+    def precharger(self, numero: int):
+        """Lancer le chargement d'une page en arrière-plan (sans effet si déjà connue)"""
+        if numero < 0 or numero in self.pages or numero in self._prechargements:
+            return
+        if self.derniere_page is not None and numero > self.derniere_page:
+            return
+        self._prechargements[numero] = _executeur_prechargement.submit(self._charger, numero)
+
+    def nombre_pages(self) -> Optional[int]:
+        if self.total is not None:
+            return max(1, -(-self.total // self.taille_page))
+        if self.derniere_page is not None:
+            return self.derniere_page + 1
+        return None
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Déduplication en flux des livres collectés (Google Books, OpenLibrary, dumps)
+============================================================================
+
+Les ISBN-10 sont convertis en ISBN-13 puis recherchés dans un ensemble
+persistant sur disque (SQLite, clé entière = ISBN-13), éventuellement précédé
+d'un filtre de Bloom en mémoire. La mémoire reste bornée quel que soit le
+nombre d'identifiants (dizaines de millions) et l'ensemble survit entre deux
+exécutions, ce qui permet de dédupliquer entre catégories et entre sources.
+
+Utilisation :
+    python deduplication_isbn.py fichier1.json fichier2.csv ... [--sortie dossier]
+"""
+
+import csv
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import sys
+
+from redistribution_livres import iterer_livres_fichier, EcrivainJsonFlux
+
+VALEURS_VIDES = (None, "", "N/A", "non précisée", [], {})
+
+def _chiffre_controle_isbn13(douze_chiffres):
+    """Calculer le chiffre de contrôle d'un ISBN-13 à partir des 12 premiers chiffres"""
+    total = sum(int(c) * (1 if i % 2 == 0 else 3) for i, c in enumerate(douze_chiffres))
+    return str((10 - total % 10) % 10)
+
+def normaliser_isbn(valeur):
+    """
+    Normaliser un ISBN-10 ou ISBN-13 en ISBN-13 (chaîne de 13 chiffres).
+    Retourne None si la valeur n'est pas un ISBN valide.
+    """
+    if valeur is None:
+        return None
+    if isinstance(valeur, (list, tuple)):
+        for element in valeur:
+            isbn = normaliser_isbn(element)
+            if isbn:
+                return isbn
+        return None
+
+    brut = re.sub(r"[^0-9Xx]", "", str(valeur)).upper()
+
+    if len(brut) == 10:
+        if not brut[:9].isdigit() or not (brut[9].isdigit() or brut[9] == "X"):
+            return None
+        total = sum((10 - i) * int(c) for i, c in enumerate(brut[:9]))
+        total += 10 if brut[9] == "X" else int(brut[9])
+        if total % 11 != 0:
+            return None
+        base = "978" + brut[:9]
+        return base + _chiffre_controle_isbn13(base)
+
+    if len(brut) == 13 and brut.isdigit():
+        if brut[12] != _chiffre_controle_isbn13(brut[:12]):
+            return None
+        return brut
+
+    return None
+
+def cle_livre(livre):
+    """
+    Clé de déduplication d'un livre : ISBN-13 normalisé, sinon titre + premier auteur.
+    Retourne un couple (type, entier 64 bits).
+    """
+    isbn = normaliser_isbn(livre.get("isbn_13")) or normaliser_isbn(livre.get("isbn_10"))
+    if isbn is None:
+        isbn = normaliser_isbn(livre.get("isbn"))
+    if isbn is not None:
+        return ("isbn", int(isbn))
+
+    auteurs = livre.get("auteurs") or []
+    if isinstance(auteurs, str):
+        auteurs = [a.strip() for a in auteurs.split("|")]
+    premier_auteur = str(auteurs[0]).lower().strip() if auteurs else "unknown"
+    texte = f"{str(livre.get('titre', '')).lower().strip()}_{premier_auteur}"
+    empreinte = hashlib.blake2b(texte.encode("utf-8"), digest_size=8).digest()
+    return ("titre", int.from_bytes(empreinte, "big", signed=True))
+
+def fusionner_livres(principal, doublon):
+    """
+    Compléter `principal` avec les champs renseignés de `doublon`.
+    Les listes (genres, auteurs...) sont réunies sans doublons.
+    """
+    for champ, valeur in doublon.items():
+        actuelle = principal.get(champ)
+        if actuelle in VALEURS_VIDES:
+            if valeur not in VALEURS_VIDES:
+                principal[champ] = valeur
+        elif isinstance(actuelle, list) and isinstance(valeur, list):
+            deja_vus = {json.dumps(v, sort_keys=True, ensure_ascii=False) for v in actuelle}
+            for v in valeur:
+                signature = json.dumps(v, sort_keys=True, ensure_ascii=False)
+                if signature not in deja_vus:
+                    actuelle.append(v)
+                    deja_vus.add(signature)
+
+    sources = set(principal.get("sources", [principal.get("source_api")] if principal.get("source_api") else []))
+    if doublon.get("source_api"):
+        sources.add(doublon["source_api"])
+    if sources:
+        principal["sources"] = sorted(sources)
+    return principal
+
+class FiltreBloom:
+    """Filtre de Bloom simple (bytearray) pour éviter les accès disque des clés jamais vues"""
+
+    def __init__(self, capacite=10_000_000, taux_faux_positifs=0.01):
+        self.nb_bits = max(8, int(-capacite * math.log(taux_faux_positifs) / (math.log(2) ** 2)))
+        self.nb_hachages = max(1, round(self.nb_bits / capacite * math.log(2)))
+        self.bits = bytearray((self.nb_bits + 7) // 8)
+
+    def _positions(self, cle):
+        empreinte = hashlib.blake2b(cle.to_bytes(8, "big", signed=True), digest_size=16).digest()
+        h1 = int.from_bytes(empreinte[:8], "big")
+        h2 = int.from_bytes(empreinte[8:], "big") | 1
+        for i in range(self.nb_hachages):
+            yield (h1 + i * h2) % self.nb_bits
+
+    def ajouter(self, cle):
+        for position in self._positions(cle):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def contient(self, cle):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(cle))
+
+    def sauvegarder(self, chemin):
+        with open(chemin, "wb") as f:
+            f.write(self.nb_bits.to_bytes(8, "big"))
+            f.write(self.nb_hachages.to_bytes(2, "big"))
+            f.write(self.bits)
+
+    @classmethod
+    def charger(cls, chemin):
+        filtre = cls.__new__(cls)
+        with open(chemin, "rb") as f:
+            filtre.nb_bits = int.from_bytes(f.read(8), "big")
+            filtre.nb_hachages = int.from_bytes(f.read(2), "big")
+            filtre.bits = bytearray(f.read())
+        return filtre
+
+class EnsembleIdentifiantsDisque:
+    """
+    Ensemble exact et persistant d'identifiants 64 bits, stocké dans SQLite.
+    Le cache de pages est borné : la mémoire ne dépend pas du nombre de clés.
+    """
+
+    def __init__(self, chemin, cache_mo=64, utiliser_bloom=False, capacite_bloom=10_000_000):
+        self.chemin = chemin
+        self.connexion = sqlite3.connect(chemin)
+        self.connexion.execute("PRAGMA journal_mode=WAL")
+        self.connexion.execute("PRAGMA synchronous=NORMAL")
+        self.connexion.execute(f"PRAGMA cache_size=-{int(cache_mo * 1024)}")
+        for table in ("isbn", "titre"):
+            self.connexion.execute(f"CREATE TABLE IF NOT EXISTS cles_{table} (cle INTEGER PRIMARY KEY)")
+        self.connexion.commit()
+
+        self.bloom = None
+        self.chemin_bloom = chemin + ".bloom"
+        if utiliser_bloom:
+            if os.path.exists(self.chemin_bloom):
+                self.bloom = FiltreBloom.charger(self.chemin_bloom)
+                # Supprimé tant que l'ensemble est ouvert : après un arrêt brutal,
+                # le filtre est reconstruit depuis SQLite au lieu d'être périmé
+                os.remove(self.chemin_bloom)
+            else:
+                self.bloom = FiltreBloom(capacite=capacite_bloom)
+                for table in ("isbn", "titre"):
+                    for (cle,) in self.connexion.execute(f"SELECT cle FROM cles_{table}"):
+                        self.bloom.ajouter(cle)
+        elif os.path.exists(self.chemin_bloom):
+            # Les clés ajoutées sans filtre n'y figureraient pas : il serait périmé
+            os.remove(self.chemin_bloom)
+
+        self.en_attente = 0
+        self.insertions_differees = []
+        self.stats = {"nouveaux": 0, "doublons": 0, "evites_par_bloom": 0}
+
+    def ajouter_si_nouveau(self, type_cle, cle):
+        """Ajouter la clé ; retourne True si elle n'avait jamais été vue"""
+        if self.bloom is not None and not self.bloom.contient(cle):
+            # Absente à coup sûr : insertion différée, par lots, sans recherche
+            self.bloom.ajouter(cle)
+            self.insertions_differees.append((type_cle, cle))
+            self.stats["evites_par_bloom"] += 1
+            nouveau = True
+        else:
+            # Les insertions différées doivent être visibles avant toute recherche
+            self._vider_insertions_differees()
+            curseur = self.connexion.execute(
+                f"INSERT OR IGNORE INTO cles_{type_cle} (cle) VALUES (?)", (cle,)
+            )
+            nouveau = curseur.rowcount == 1
+            if nouveau and self.bloom is not None:
+                self.bloom.ajouter(cle)
+
+        self.stats["nouveaux" if nouveau else "doublons"] += 1
+        self.en_attente += 1
+        if self.en_attente >= 10_000:
+            self.valider()
+        return nouveau
+
+    def _vider_insertions_differees(self):
+        if not self.insertions_differees:
+            return
+        for type_cle in ("isbn", "titre"):
+            cles = [(cle,) for t, cle in self.insertions_differees if t == type_cle]
+            if cles:
+                self.connexion.executemany(f"INSERT OR IGNORE INTO cles_{type_cle} (cle) VALUES (?)", cles)
+        self.insertions_differees = []
+
+    def valider(self):
+        """Valider les insertions en attente"""
+        self._vider_insertions_differees()
+        self.connexion.commit()
+        self.en_attente = 0
+
+    def fermer(self):
+        self.valider()
+        if self.bloom is not None:
+            self.bloom.sauvegarder(self.chemin_bloom)
+        self.connexion.close()
+
+class DeduplicateurIsbn:
+    """
+    Étape de déduplication partagée entre catégories et sources.
+    N'émet que les livres jamais vus (fusionnés avec leurs doublons du même lot).
+    """
+
+    def __init__(self, chemin_index="isbn_vus.sqlite", utiliser_bloom=False, capacite_bloom=10_000_000):
+        self.ensemble = EnsembleIdentifiantsDisque(
+            chemin_index, utiliser_bloom=utiliser_bloom, capacite_bloom=capacite_bloom
+        )
+
+    @property
+    def stats(self):
+        return self.ensemble.stats
+
+    def est_nouveau(self, livre):
+        """Vrai si le livre n'a encore jamais été émis (et le marque comme vu)"""
+        type_cle, cle = cle_livre(livre)
+        return self.ensemble.ajouter_si_nouveau(type_cle, cle)
+
+    def filtrer(self, livres):
+        """Filtrer un flux de livres en ne laissant passer que les premiers vus"""
+        for livre in livres:
+            if self.est_nouveau(livre):
+                yield livre
+
+    def dedupliquer_lot(self, livres):
+        """
+        Fusionner les doublons d'un lot puis ne garder que les livres jamais vus
+        lors des lots précédents. L'ordre de première apparition est conservé.
+        """
+        fusionnes = {}
+        for livre in livres:
+            cle = cle_livre(livre)
+            if cle in fusionnes:
+                fusionner_livres(fusionnes[cle], livre)
+            else:
+                fusionnes[cle] = dict(livre)
+
+        resultat = [
+            livre for (type_cle, cle), livre in fusionnes.items()
+            if self.ensemble.ajouter_si_nouveau(type_cle, cle)
+        ]
+        self.ensemble.valider()
+        return resultat
+
+    def fermer(self):
+        self.ensemble.fermer()
+
+def dedupliquer_fichiers(chemins, dossier_sortie="livres_dedupliques", chemin_index=None, utiliser_bloom=True):
+    """
+    Dédupliquer en flux une liste de fichiers JSON (tableaux) ou CSV, dans l'ordre donné.
+    Chaque fichier est réécrit dans `dossier_sortie` sans les livres déjà vus.
+    """
+    os.makedirs(dossier_sortie, exist_ok=True)
+    deduplicateur = DeduplicateurIsbn(
+        chemin_index or os.path.join(dossier_sortie, "isbn_vus.sqlite"),
+        utiliser_bloom=utiliser_bloom
+    )
+    resume = {}
+
+    try:
+        for chemin in chemins:
+            nom = os.path.basename(chemin)
+            gardes = 0
+
+            if chemin.endswith(".csv"):
+                with open(chemin, "r", encoding="utf-8", newline="") as entree:
+                    lecteur = csv.DictReader(entree)
+                    with open(os.path.join(dossier_sortie, nom), "w", encoding="utf-8", newline="") as sortie:
+                        ecrivain = csv.DictWriter(sortie, fieldnames=lecteur.fieldnames or [])
+                        ecrivain.writeheader()
+                        for ligne in deduplicateur.filtrer(lecteur):
+                            ecrivain.writerow(ligne)
+                            gardes += 1
+            else:
+                ecrivain = EcrivainJsonFlux(dossier_sortie)
+                try:
+                    for livre in deduplicateur.filtrer(iterer_livres_fichier(chemin)):
+                        ecrivain.ecrire(nom[:-len(".json")] if nom.endswith(".json") else nom, livre)
+                        gardes += 1
+                finally:
+                    ecrivain.fermer()
+
+            resume[nom] = gardes
+            logging.info(f"✅ {nom} : {gardes} livres gardés")
+    finally:
+        deduplicateur.fermer()
+
+    logging.info(
+        f"📊 Nouveaux: {deduplicateur.stats['nouveaux']} | "
+        f"Doublons écartés: {deduplicateur.stats['doublons']}"
+    )
+    return resume
+
+def main():
+    """Fonction principale"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    arguments = sys.argv[1:]
+    dossier_sortie = "livres_dedupliques"
+    if "--sortie" in arguments:
+        position = arguments.index("--sortie")
+        dossier_sortie = arguments[position + 1]
+        del arguments[position:position + 2]
+
+    if not arguments:
+        print("Usage : python deduplication_isbn.py fichier1.json fichier2.csv ... [--sortie dossier]")
+        return
+
+    print("🧹 DÉDUPLICATION ISBN EN FLUX")
+    print("=" * 60)
+    dedupliquer_fichiers(arguments, dossier_sortie)
+
+if __name__ == "__main__":
+    main()
@@ -8,15 +8,26 @@ from tqdm import tqdm
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
 
+from deduplication_isbn import DeduplicateurIsbn
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# URLs de base surchargeables (ex : serveur de fixtures local pour les tests et benchmarks)
+GOOGLE_BOOKS_BASE_URL = os.getenv("GOOGLE_BOOKS_BASE_URL", "https://www.googleapis.com")
+OPENLIBRARY_BASE_URL = os.getenv("OPENLIBRARY_BASE_URL", "https://openlibrary.org")
+
 class RecuperateurLivresAmeliore:
-    def __init__(self):
+    def __init__(self, google_base_url=None, openlibrary_base_url=None,
+                 dossier_output="livres_json_ameliore", pauses=True):
         self.max_results_par_categorie = 1000  # Augmenté !
         self.max_api_results = 40
-        self.dossier_output = "livres_json_ameliore"
-        self.stats = {"total_recuperes": 0, "erreurs": 0}
+        self.dossier_output = dossier_output
+        self.stats = {"total_recuperes": 0, "erreurs": 0, "requetes": 0}
+        self.google_base_url = (google_base_url or GOOGLE_BOOKS_BASE_URL).rstrip("/")
+        self.openlibrary_base_url = (openlibrary_base_url or OPENLIBRARY_BASE_URL).rstrip("/")
+        # Les pauses anti-limitation n'ont pas de sens face à un serveur local
+        self.pauses = pauses
         
         # Catégories étendues avec plus de variations
         self.categories_etendues = [
@@ -84,6 +95,17 @@ class RecuperateurLivresAmeliore:
         ]
         
         os.makedirs(self.dossier_output, exist_ok=True)
+        
+        # Déduplication persistante (ISBN-13) partagée entre catégories et sources
+        self.deduplicateur = DeduplicateurIsbn(
+            os.path.join(self.dossier_output, "isbn_vus.sqlite"),
+            utiliser_bloom=True
+        )
+
+    def _pause(self, minimum, maximum):
+        """Pause aléatoire pour éviter les limites de taux (désactivable)"""
+        if self.pauses:
+            time.sleep(random.uniform(minimum, maximum))
 
     def recuperer_google_books(self, terme_recherche, max_results=1000):
         """Récupère des livres via Google Books API avec un terme de recherche"""
@@ -95,7 +117,7 @@ class RecuperateurLivresAmeliore:
                 break
                 
             url = (
-                f"https://www.googleapis.com/books/v1/volumes"
+                f"{self.google_base_url}/books/v1/volumes"
                 f"?q={quote_plus(terme_recherche)}"
                 f"&maxResults={min(self.max_api_results, max_results - total_recup)}"
                 f"&startIndex={start}"
@@ -104,6 +126,7 @@ class RecuperateurLivresAmeliore:
             )
             
             try:
+                self.stats["requetes"] += 1
                 response = requests.get(url, timeout=10)
                 if response.status_code == 200:
                     data = response.json()
@@ -130,7 +153,7 @@ class RecuperateurLivresAmeliore:
                 self.stats["erreurs"] += 1
             
             # Pause pour éviter les limites de taux
-            time.sleep(random.uniform(1, 3))
+            self._pause(1, 3)
         
         return livres
 
@@ -140,9 +163,10 @@ class RecuperateurLivresAmeliore:
         limite_par_page = 100
         
         for page in range(1, (max_results // limite_par_page) + 2):
-            url = f"https://openlibrary.org/search.json?q={quote_plus(terme_recherche)}&limit={limite_par_page}&page={page}"
+            url = f"{self.openlibrary_base_url}/search.json?q={quote_plus(terme_recherche)}&limit={limite_par_page}&page={page}"
             
             try:
+                self.stats["requetes"] += 1
                 response = requests.get(url, timeout=10)
                 if response.status_code == 200:
                     data = response.json()
@@ -170,7 +194,7 @@ class RecuperateurLivresAmeliore:
                 logging.error(f"Exception OpenLibrary: {e}")
                 self.stats["erreurs"] += 1
             
-            time.sleep(random.uniform(2, 4))
+            self._pause(2, 4)
         
         return livres[:max_results]
 
@@ -262,24 +286,24 @@ class RecuperateurLivresAmeliore:
             tous_livres.extend(livres_ol)
             
             # Pause entre les termes
-            time.sleep(random.uniform(3, 6))
-        
-        # Déduplication par titre + premier auteur
-        livres_uniques = {}
-        for livre in tous_livres:
-            cle = f"{livre['titre'].lower()}_{livre['auteurs'][0].lower() if livre['auteurs'] else 'unknown'}"
-            if cle not in livres_uniques:
-                livres_uniques[cle] = livre
+            self._pause(3, 6)
         
-        livres_finaux = list(livres_uniques.values())
+        # Déduplication par ISBN-13 (titre + premier auteur à défaut), y compris
+        # avec les livres déjà émis pour les catégories précédentes
+        livres_finaux = self.deduplicateur.dedupliquer_lot(tous_livres)
         
-        # Sauvegarder
+        # Sauvegarder : l'index des ISBN vus persiste d'une exécution à l'autre et
+        # ne laisse passer que les nouveaux livres, ajoutés à la collection existante
         nom_fichier = f"{self.dossier_output}/{nom_categorie}.json"
+        livres_existants = []
+        if os.path.exists(nom_fichier):
+            with open(nom_fichier, "r", encoding="utf-8") as f:
+                livres_existants = json.load(f)
         with open(nom_fichier, "w", encoding="utf-8") as f:
-            json.dump(livres_finaux, f, ensure_ascii=False, indent=2)
+            json.dump(livres_existants + livres_finaux, f, ensure_ascii=False, indent=2)
         
         self.stats["total_recuperes"] += len(livres_finaux)
-        logging.info(f"✅ Sauvegardé {len(livres_finaux)} livres uniques pour {categorie['fr']} dans {nom_fichier}")
+        logging.info(f"✅ Sauvegardé {len(livres_finaux)} nouveaux livres uniques pour {categorie['fr']} dans {nom_fichier} ({len(livres_existants) + len(livres_finaux)} au total)")
         
         return len(livres_finaux)
 
@@ -296,17 +320,21 @@ class RecuperateurLivresAmeliore:
                 
                 # Pause plus longue entre les catégories
                 if i < len(categories):
-                    pause = random.uniform(10, 20)
-                    logging.info(f"⏸️ Pause de {pause:.1f}s avant la prochaine catégorie...")
-                    time.sleep(pause)
+                    if self.pauses:
+                        pause = random.uniform(10, 20)
+                        logging.info(f"⏸️ Pause de {pause:.1f}s avant la prochaine catégorie...")
+                        time.sleep(pause)
                     
             except Exception as e:
                 logging.error(f"❌ Erreur pour la catégorie {categorie['fr']}: {e}")
                 self.stats["erreurs"] += 1
                 continue
         
+        self.deduplicateur.fermer()
+        
         # Statistiques finales
         logging.info(f"🎉 TERMINÉ ! Total récupéré: {self.stats['total_recuperes']} livres")
+        logging.info(f"🧹 Doublons écartés: {self.deduplicateur.stats['doublons']}")
         logging.info(f"⚠️ Erreurs rencontrées: {self.stats['erreurs']}")
 
 def main():
@@ -1,6 +1,7 @@
 import json
 import os
-from collections import defaultdict
+import sys
+from collections import defaultdict, deque
 
 def creer_mapping_categories():
     """
@@ -216,12 +217,10 @@ def analyser_categories_reelles():
     
     return toutes_categories, categories_par_fichier
 
-def creer_mapping_dynamique(toutes_categories):
+def creer_mapping_manuel():
     """
-    Crée un mapping basé sur les vraies catégories trouvées.
+    Mapping manuel amélioré basé sur les catégories réellement rencontrées.
     """
-    print("\n🎯 CRÉATION DU MAPPING DYNAMIQUE\n")
-    
     # Mapping manuel amélioré basé sur ce qu'on trouve vraiment
     mapping_manuel = {
         "fiction": [
@@ -323,22 +322,151 @@ def creer_mapping_dynamique(toutes_categories):
             "guide", "general"
         ]
     }
+    return mapping_manuel
+
+class RouteurCategories:
+    """
+    Automate Aho-Corasick compilé une seule fois à partir d'un mapping
+    fichier -> mots-clés.
+
+    Reproduit exactement le score de l'ancienne triple boucle
+    (exact : +10, mot-clé contenu dans la catégorie : +5, catégorie contenue
+    dans un mot-clé : +3) mais en un seul parcours de chaque catégorie :
+    - l'automate trouve tous les mots-clés contenus dans la catégorie ;
+    - un index des sous-chaînes des mots-clés donne ceux qui la contiennent.
+    """
+
+    def __init__(self, mapping):
+        self.fichiers = list(mapping.keys())
+        index_fichier = {fichier: i for i, fichier in enumerate(self.fichiers)}
+
+        # Mot-clé -> indices des fichiers (avec multiplicité, comme la boucle d'origine)
+        self.mots_cles = defaultdict(list)
+        for fichier, mots_cles in mapping.items():
+            for mot_cle in mots_cles:
+                self.mots_cles[mot_cle.lower()].append(index_fichier[fichier])
+
+        self._construire_automate()
+        self._construire_index_contenants()
+
+    def _construire_automate(self):
+        """Construire le trie, les liens d'échec et les sorties."""
+        self.transitions = [{}]
+        self.echecs = [0]
+        self.sorties = [[]]
+
+        for mot_cle in self.mots_cles:
+            etat = 0
+            for caractere in mot_cle:
+                suivant = self.transitions[etat].get(caractere)
+                if suivant is None:
+                    suivant = len(self.transitions)
+                    self.transitions[etat][caractere] = suivant
+                    self.transitions.append({})
+                    self.echecs.append(0)
+                    self.sorties.append([])
+                etat = suivant
+            self.sorties[etat].append(mot_cle)
+
+        # Parcours en largeur pour calculer les liens d'échec
+        file_attente = deque(self.transitions[0].values())
+        while file_attente:
+            etat = file_attente.popleft()
+            for caractere, suivant in self.transitions[etat].items():
+                file_attente.append(suivant)
+                repli = self.echecs[etat]
+                while repli and caractere not in self.transitions[repli]:
+                    repli = self.echecs[repli]
+                cible = self.transitions[repli].get(caractere, 0)
+                self.echecs[suivant] = cible if cible != suivant else 0
+                self.sorties[suivant] = self.sorties[suivant] + self.sorties[self.echecs[suivant]]
+
+    def _construire_index_contenants(self):
+        """Indexer chaque sous-chaîne stricte des mots-clés vers les fichiers concernés."""
+        self.contenants = defaultdict(list)
+        for mot_cle, indices in self.mots_cles.items():
+            sous_chaines = {
+                mot_cle[debut:fin]
+                for debut in range(len(mot_cle))
+                for fin in range(debut + 1, len(mot_cle) + 1)
+            }
+            sous_chaines.discard(mot_cle)
+            for sous_chaine in sous_chaines:
+                self.contenants[sous_chaine].extend(indices)
+
+    def mots_cles_contenus(self, texte):
+        """Retourner l'ensemble des mots-clés présents dans le texte (un seul parcours)."""
+        trouves = set()
+        etat = 0
+        for caractere in texte:
+            while etat and caractere not in self.transitions[etat]:
+                etat = self.echecs[etat]
+            etat = self.transitions[etat].get(caractere, 0)
+            if self.sorties[etat]:
+                trouves.update(self.sorties[etat])
+        return trouves
+
+    def scores(self, categories_normalisees):
+        """Calculer le score de chaque fichier pour des catégories déjà normalisées."""
+        scores = [0] * len(self.fichiers)
+        for categorie in categories_normalisees:
+            for mot_cle in self.mots_cles_contenus(categorie):
+                points = 10 if mot_cle == categorie else 5
+                for indice in self.mots_cles[mot_cle]:
+                    scores[indice] += points
+            for indice in self.contenants.get(categorie, ()):
+                scores[indice] += 3
+        return scores
+
+    def classer(self, categories_normalisees, defaut="reference"):
+        """Retourner le fichier au meilleur score (le premier du mapping en cas d'égalité)."""
+        scores = self.scores(categories_normalisees)
+        meilleur = max(range(len(scores)), key=scores.__getitem__, default=None)
+        if meilleur is None or scores[meilleur] == 0:
+            return defaut
+        return self.fichiers[meilleur]
+
+    def fichiers_correspondants(self, categorie):
+        """Retourner les indices des fichiers dont au moins un mot-clé correspond à la catégorie."""
+        categorie = categorie.lower()
+        indices = set(self.contenants.get(categorie, ()))
+        for mot_cle in self.mots_cles_contenus(categorie):
+            indices.update(self.mots_cles[mot_cle])
+        return indices
+
+_routeurs_compiles = {}
+
+def compiler_routeur(mapping):
+    """
+    Retourner le routeur compilé pour ce mapping (construit une seule fois par mapping).
+    """
+    if isinstance(mapping, RouteurCategories):
+        return mapping
+    entree = _routeurs_compiles.get(id(mapping))
+    if entree is None or entree[0] is not mapping:
+        entree = (mapping, RouteurCategories(mapping))
+        _routeurs_compiles[id(mapping)] = entree
+    return entree[1]
+
+def creer_mapping_dynamique(toutes_categories):
+    """
+    Crée un mapping basé sur les vraies catégories trouvées.
+    """
+    print("\n🎯 CRÉATION DU MAPPING DYNAMIQUE\n")
     
-    # Analyser quelles catégories réelles correspondent à quoi
-    correspondances = {}
+    mapping_manuel = creer_mapping_manuel()
+    
+    # Analyser quelles catégories réelles correspondent à quoi (un parcours par catégorie)
+    routeur = compiler_routeur(mapping_manuel)
+    correspondances = {fichier_cible: [] for fichier_cible in mapping_manuel}
     categories_non_mappees = set(toutes_categories)
     
-    for fichier_cible, mots_cles in mapping_manuel.items():
-        correspondances[fichier_cible] = []
-        
-        for categorie_reelle in toutes_categories:
-            cat_lower = categorie_reelle.lower()
-            
-            for mot_cle in mots_cles:
-                if mot_cle.lower() in cat_lower or cat_lower in mot_cle.lower():
-                    correspondances[fichier_cible].append(categorie_reelle)
-                    categories_non_mappees.discard(categorie_reelle)
-                    break
+    for categorie_reelle in toutes_categories:
+        indices = routeur.fichiers_correspondants(categorie_reelle)
+        for indice in sorted(indices):
+            correspondances[routeur.fichiers[indice]].append(categorie_reelle)
+        if indices:
+            categories_non_mappees.discard(categorie_reelle)
     
     # Afficher les correspondances trouvées
     for fichier, categories in correspondances.items():
@@ -363,6 +491,9 @@ def creer_mapping_dynamique(toutes_categories):
 def determiner_fichier_cible_ameliore(categories_livre, mapping_manuel):
     """
     Version améliorée pour déterminer le fichier cible.
+    
+    `mapping_manuel` peut être le dictionnaire du mapping ou un RouteurCategories
+    déjà compilé ; l'automate n'est construit qu'une fois par mapping.
     """
     if not categories_livre:
         return "reference"
@@ -370,38 +501,30 @@ def determiner_fichier_cible_ameliore(categories_livre, mapping_manuel):
     # Normaliser les catégories du livre
     categories_normalisees = [cat.lower().strip() for cat in categories_livre if cat and cat.strip()]
     
-    # Chercher la meilleure correspondance
-    scores = {}
-    
-    for fichier, mots_cles in mapping_manuel.items():
-        score = 0
-        correspondances_trouvees = []
-        
-        for categorie in categories_normalisees:
-            for mot_cle in mots_cles:
-                mot_cle_lower = mot_cle.lower()
-                
-                # Correspondance exacte
-                if categorie == mot_cle_lower:
-                    score += 10
-                    correspondances_trouvees.append(f"exact: {categorie}")
-                # Contenance
-                elif mot_cle_lower in categorie:
-                    score += 5
-                    correspondances_trouvees.append(f"contient: {mot_cle_lower} dans {categorie}")
-                elif categorie in mot_cle_lower:
-                    score += 3
-                    correspondances_trouvees.append(f"dans: {categorie} dans {mot_cle_lower}")
-        
-        if score > 0:
-            scores[fichier] = {"score": score, "correspondances": correspondances_trouvees}
-    
-    # Debug pour voir le processus de décision
-    if scores:
-        meilleur_fichier = max(scores.items(), key=lambda x: x[1]["score"])
-        return meilleur_fichier[0]
-    else:
-        return "reference"
+    return compiler_routeur(mapping_manuel).classer(categories_normalisees)
+
+def extraire_categories(livre):
+    """
+    Extrait les catégories d'un livre depuis ses champs genre/catégorie/sujet.
+    """
+    categories = []
+    for cle, valeur in livre.items():
+        if any(mot in cle.lower() for mot in ['genre', 'categ', 'subject']):
+            if isinstance(valeur, list):
+                categories.extend([str(v) for v in valeur if v])
+            elif isinstance(valeur, str) and valeur.strip():
+                categories.append(valeur)
+    
+    # Nettoyer
+    return list(set([cat.strip() for cat in categories if cat and cat.strip()]))
+
+def preparer_livre(livre, categories):
+    """
+    Retire les champs de travail et consolide les catégories dans `tous_les_genres`.
+    """
+    livre_clean = {k: v for k, v in livre.items() if k not in ['fichier_source', 'categories_trouvees', 'fichier_cible', 'genres_google']}
+    livre_clean['tous_les_genres'] = categories
+    return livre_clean
 
 def redistribuer_livres_ameliore():
     """
@@ -426,24 +549,16 @@ def redistribuer_livres_ameliore():
     
     livres_par_categorie = defaultdict(list)
     stats = {"total": len(tous_les_livres), "redistribues": 0, "debug_count": 0}
+    routeur = compiler_routeur(mapping_manuel)
     
     for livre in tous_les_livres:
         titre = livre.get('titre', 'Titre inconnu')[:40]
         
-        # Extraire les catégories
-        categories = []
-        for cle, valeur in livre.items():
-            if any(mot in cle.lower() for mot in ['genre', 'categ', 'subject']):
-                if isinstance(valeur, list):
-                    categories.extend([str(v) for v in valeur if v])
-                elif isinstance(valeur, str) and valeur.strip():
-                    categories.append(valeur)
-        
-        # Nettoyer
-        categories = list(set([cat.strip() for cat in categories if cat and cat.strip()]))
+        # Extraire et nettoyer les catégories
+        categories = extraire_categories(livre)
         
         # Déterminer le fichier cible
-        fichier_cible = determiner_fichier_cible_ameliore(categories, mapping_manuel)
+        fichier_cible = determiner_fichier_cible_ameliore(categories, routeur)
         
         # Debug pour les premiers livres
         if stats["debug_count"] < 5:
@@ -453,9 +568,7 @@ def redistribuer_livres_ameliore():
             stats["debug_count"] += 1
         
         # Préparer le livre
-        livre_clean = {k: v for k, v in livre.items() if k not in ['fichier_source', 'categories_trouvees', 'fichier_cible', 'genres_google']}
-        livre_clean['tous_les_genres'] = categories
-        livres_par_categorie[fichier_cible].append(livre_clean)
+        livres_par_categorie[fichier_cible].append(preparer_livre(livre, categories))
         stats["redistribues"] += 1
     
     # Sauvegarder
@@ -473,6 +586,133 @@ def redistribuer_livres_ameliore():
     
     return livres_par_categorie
 
+def iterer_livres_fichier(chemin, taille_bloc=1 << 20):
+    """
+    Itère sur les livres d'un fichier JSON (tableau) sans charger tout le fichier.
+    
+    Le tampon est parcouru par position : il n'est recopié qu'au rechargement d'un bloc.
+    """
+    decodeur = json.JSONDecoder()
+    blancs = " \t\n\r"
+    tampon = ""
+    position = 0
+    debut_trouve = False
+    fin_fichier = False
+    
+    with open(chemin, 'r', encoding='utf-8') as f:
+        def recharger():
+            nonlocal tampon, position, fin_fichier
+            bloc = f.read(taille_bloc)
+            fin_fichier = not bloc
+            tampon = tampon[position:] + bloc
+            position = 0
+        
+        while True:
+            while position < len(tampon) and tampon[position] in blancs:
+                position += 1
+            if position == len(tampon):
+                if fin_fichier:
+                    if not debut_trouve:
+                        return
+                    raise ValueError(f"{chemin} : tableau JSON non terminé")
+                recharger()
+                continue
+            
+            caractere = tampon[position]
+            if not debut_trouve:
+                if caractere != '[':
+                    raise ValueError(f"{chemin} n'est pas un tableau JSON")
+                position += 1
+                debut_trouve = True
+                continue
+            if caractere == ',':
+                position += 1
+                continue
+            if caractere == ']':
+                return
+            
+            try:
+                livre, fin_element = decodeur.raw_decode(tampon, position)
+            except json.JSONDecodeError:
+                if fin_fichier:
+                    raise
+                # Élément incomplet : lire le bloc suivant
+                recharger()
+                continue
+            
+            position = fin_element
+            yield livre
+
+class EcrivainJsonFlux:
+    """
+    Écrit un tableau JSON élément par élément (un fichier par catégorie, ouvert à la demande).
+    """
+
+    def __init__(self, dossier_sortie):
+        self.dossier_sortie = dossier_sortie
+        self.fichiers = {}
+        self.compteurs = defaultdict(int)
+        os.makedirs(dossier_sortie, exist_ok=True)
+
+    def ecrire(self, categorie, livre):
+        f = self.fichiers.get(categorie)
+        if f is None:
+            f = open(os.path.join(self.dossier_sortie, f"{categorie}.json"), 'w', encoding='utf-8')
+            f.write("[\n")
+            self.fichiers[categorie] = f
+        else:
+            f.write(",\n")
+        contenu = json.dumps(livre, ensure_ascii=False, indent=2)
+        f.write("\n".join("  " + ligne for ligne in contenu.split("\n")))
+        self.compteurs[categorie] += 1
+
+    def fermer(self):
+        for f in self.fichiers.values():
+            f.write("\n]")
+            f.close()
+        self.fichiers = {}
+
+def redistribuer_livres_streaming(dossier="livres_json", dossier_sortie="livres_json_redistribues"):
+    """
+    Redistribution en flux : chaque livre est lu, classé puis écrit immédiatement,
+    sans jamais garder l'ensemble des livres en mémoire.
+    """
+    print("🚀 REDISTRIBUTION EN FLUX DES LIVRES\n")
+    
+    if not os.path.exists(dossier):
+        print(f"❌ Le dossier {dossier} n'existe pas!")
+        return {}
+    
+    routeur = compiler_routeur(creer_mapping_manuel())
+    ecrivain = EcrivainJsonFlux(dossier_sortie)
+    total = 0
+    
+    try:
+        for fichier in sorted(os.listdir(dossier)):
+            if not fichier.endswith('.json'):
+                continue
+            
+            lus = 0
+            try:
+                for livre in iterer_livres_fichier(os.path.join(dossier, fichier)):
+                    categories = extraire_categories(livre)
+                    fichier_cible = determiner_fichier_cible_ameliore(categories, routeur)
+                    ecrivain.ecrire(fichier_cible, preparer_livre(livre, categories))
+                    lus += 1
+            except Exception as e:
+                print(f"❌ Erreur lors de la lecture de {fichier} : {e}")
+            
+            total += lus
+            print(f"📖 Lu {fichier} : {lus} livres")
+    finally:
+        ecrivain.fermer()
+    
+    print(f"\n💾 SAUVEGARDE ({total} livres) :")
+    for categorie, nombre in sorted(ecrivain.compteurs.items()):
+        print(f"✅ {categorie}.json : {nombre} livres")
+    
+    return dict(ecrivain.compteurs)
+
 def verifier_categories_dans_nouveaux_fichiers():
     """
     Vérifie que les catégories sont bien présentes dans les nouveaux fichiers.
@@ -586,7 +826,11 @@ def main():
     print("🎯 REDISTRIBUTION AMÉLIORÉE DES LIVRES POUR MONGODB")
     print("=" * 70)
     
-    redistribuer_livres_ameliore()
+    # --streaming : lecture/écriture livre par livre, mémoire constante
+    if len(sys.argv) > 1 and sys.argv[1] == "--streaming":
+        redistribuer_livres_streaming()
+    else:
+        redistribuer_livres_ameliore()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,2 @@
+# Outils de mesure des performances de l'API : jeux de données synthétiques,
+# plans d'exécution des requêtes des routes, benchmark HTTP de bout en bout
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Benchmark HTTP de bout en bout de l'API
+=======================================
+
+1. (option --charger) charge le catalogue synthétique à l'échelle demandée ;
+2. démarre l'API avec uvicorn sur les bases configurées (POSTGRES_* / MONGODB_*),
+   ou vise un serveur déjà lancé (--url) ;
+3. crée le compte de mesure et obtient son jeton ;
+4. rejoue le mélange pondéré des scénarios (scenarios.py : listes, détails,
+   recherches, analytics, connexion, ...) à chaque niveau de concurrence, pendant
+   une durée fixe après un échauffement non mesuré ;
+5. écrit le rapport JSON : débit (RPS), latences p50/p95/p99 et taux d'erreur,
+   au global et par endpoint ;
+6. compare à la référence enregistrée et échoue (code 1) si le débit baisse, si
+   une latence augmente au-delà de la tolérance ou si le taux d'erreur monte ;
+   échoue aussi, avec ou sans référence, si un endpoint renvoie un statut
+   inattendu (404, 422, ...) : il ne mesure alors pas la route visée.
+
+Utilisation (depuis la racine du dépôt, sur des bases dédiées aux mesures) :
+    POSTGRES_DB=databook_perf MONGODB_DATABASE=databook_perf \\
+    python scripts/perf/benchmark_http.py [--echelle 1x] [--charger] [--processus 4]
+        [--concurrences 1,8,32] [--duree 20] [--echauffement 3] [--workers 1]
+        [--bases postgres,mongo] [--url http://127.0.0.1:8000] [--graine 42]
+        [--reference fichier.json] [--enregistrer-reference] [--tolerance 0.10]
+        [--sortie benchmark_http.json]
+
+La référence par défaut est scripts/perf/references/benchmark_http_<echelle>.json.
+Les temps dépendent de la machine : ne comparer que des mesures prises au même
+endroit. Le client de charge tourne dans un seul processus ; si "cpu_client"
+approche 1, c'est lui qui limite le débit mesuré.
+"""
+
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from commun import lire_options, preparer_api, DOSSIER_API, DOSSIER_REFERENCES
+
+OPTIONS_DEFAUT = {
+    "--echelle": "1x",
+    "--graine": "42",
+    "--charger": "false",
+    "--processus": "4",
+    "--bases": "postgres,mongo",
+    "--concurrences": "1,8,32",
+    "--duree": "20",
+    "--echauffement": "3",
+    "--workers": "1",
+    "--port": "8765",
+    "--url": "",
+    "--reference": "",
+    "--enregistrer-reference": "false",
+    "--tolerance": "0.10",
+    "--sortie": "benchmark_http.json",
+}
+
+# En dessous, un centile n'est pas assez stable pour être comparé
+MINIMUM_REQUETES_CENTILE = {"p50": 20, "p95": 100, "p99": 300}
+
+def demarrer_api(port: int, workers: int) -> subprocess.Popen:
+    """Lancer uvicorn dans un processus séparé (l'environnement courant est transmis)"""
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--no-access-log", "--log-level", "warning"],
+        cwd=DOSSIER_API,
+    )
+
+def attendre_api(url: str, processus: Optional[subprocess.Popen], delai: float = 60) -> None:
+    import httpx
+    limite = time.monotonic() + delai
+    while time.monotonic() < limite:
+        if processus is not None and processus.poll() is not None:
+            raise SystemExit(f"❌ L'API s'est arrêtée au démarrage (code {processus.returncode})")
+        try:
+            if httpx.get(f"{url}/health", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"❌ L'API ne répond pas sur {url} après {delai:.0f} s")
+
+def obtenir_jeton(url: str, utilisateur: Dict[str, str]) -> str:
+    """Créer le compte de mesure s'il n'existe pas, puis se connecter"""
+    import httpx
+    with httpx.Client(base_url=url, timeout=30) as client:
+        client.post("/auth/register", json=dict(utilisateur, first_name="Perf", last_name="Benchmark"))
+        reponse = client.post("/auth/login", json=utilisateur)
+        if reponse.status_code != 200:
+            raise SystemExit(f"❌ Connexion du compte de mesure impossible : {reponse.status_code} {reponse.text[:200]}")
+        return reponse.json()["access_token"]
+
+def centile(valeurs_triees: List[float], p: float) -> Optional[float]:
+    """Centile par interpolation linéaire entre les rangs"""
+    if not valeurs_triees:
+        return None
+    rang = (len(valeurs_triees) - 1) * p / 100
+    bas = int(rang)
+    haut = min(bas + 1, len(valeurs_triees) - 1)
+    return valeurs_triees[bas] + (valeurs_triees[haut] - valeurs_triees[bas]) * (rang - bas)
+
+def resumer(latences: List[float], statuts: Counter, duree: float) -> Dict:
+    latences = sorted(latences)
+    requetes = sum(statuts.values())
+    erreurs = sum(nombre for statut, nombre in statuts.items() if not (isinstance(statut, int) and statut < 400))
+    return {
+        "requetes": requetes,
+        "rps": round(requetes / duree, 2) if duree else 0,
+        "erreurs": erreurs,
+        "taux_erreur": round(erreurs / requetes, 4) if requetes else 0,
+        "latence_ms": {
+            "p50": _arrondi(centile(latences, 50)),
+            "p95": _arrondi(centile(latences, 95)),
+            "p99": _arrondi(centile(latences, 99)),
+            "max": _arrondi(latences[-1] if latences else None),
+            "moyenne": _arrondi(sum(latences) / len(latences) if latences else None),
+        },
+        "statuts": {str(statut): nombre for statut, nombre in sorted(statuts.items(), key=lambda e: str(e[0]))},
+    }
+
+def _arrondi(valeur: Optional[float]) -> Optional[float]:
+    return round(valeur * 1000, 2) if valeur is not None else None
+
+async def executer_palier(url: str, scenarios: List[Dict], contexte: Dict, jeton: str,
+                          concurrence: int, duree: float, echauffement: float, graine: int) -> Dict:
+    """Rejouer le mélange pondéré avec `concurrence` utilisateurs en boucle fermée"""
+    import httpx
+    from scenarios import preparer_appel, statut_inattendu
+
+    poids = [scenario["poids"] for scenario in scenarios]
+    latences: Dict[str, List[float]] = defaultdict(list)
+    statuts: Dict[str, Counter] = defaultdict(Counter)
+    inattendus: Dict[str, Counter] = defaultdict(Counter)
+    debut_mesure = time.perf_counter() + echauffement
+    fin = debut_mesure + duree
+    derniere_reponse = [debut_mesure]
+
+    async def utilisateur(client, numero: int):
+        aleatoire = random.Random(graine * 10_000 + concurrence * 100 + numero)
+        while time.perf_counter() < fin:
+            scenario = aleatoire.choices(scenarios, weights=poids)[0]
+            # Les détails visent des livres différents d'un appel à l'autre
+            contexte_appel = dict(contexte)
+            if contexte.get("postgres_ids"):
+                contexte_appel["postgres_livre_id"] = aleatoire.choice(contexte["postgres_ids"])
+            if contexte.get("mongo_ids"):
+                contexte_appel["mongo_livre_id"] = aleatoire.choice(contexte["mongo_ids"])
+            appel = preparer_appel(scenario, contexte_appel)
+            debut = time.perf_counter()
+            try:
+                reponse = await client.request(**appel)
+                statut = reponse.status_code
+            except httpx.HTTPError as e:
+                statut = type(e).__name__
+            maintenant = time.perf_counter()
+            # Échauffement compris : une route mal servie l'est dès le premier appel
+            if statut_inattendu(scenario, statut):
+                inattendus[scenario["nom"]][statut] += 1
+            if debut >= debut_mesure:
+                latences[scenario["nom"]].append(maintenant - debut)
+                statuts[scenario["nom"]][statut] += 1
+                derniere_reponse[0] = max(derniere_reponse[0], maintenant)
+
+    limites = httpx.Limits(max_connections=concurrence, max_keepalive_connections=concurrence)
+    cpu_debut, mur_debut = time.process_time(), time.perf_counter()
+    async with httpx.AsyncClient(base_url=url, headers={"Authorization": f"Bearer {jeton}"},
+                                 timeout=60, limits=limites) as client:
+        await asyncio.gather(*(utilisateur(client, numero) for numero in range(concurrence)))
+    cpu_client = (time.process_time() - cpu_debut) / (time.perf_counter() - mur_debut)
+
+    duree_mesuree = max(derniere_reponse[0] - debut_mesure, duree)
+    toutes_latences = [latence for valeurs in latences.values() for latence in valeurs]
+    tous_statuts = sum(statuts.values(), Counter())
+    resultat = resumer(toutes_latences, tous_statuts, duree_mesuree)
+    resultat.update({
+        "concurrence": concurrence,
+        "duree_s": round(duree_mesuree, 2),
+        "cpu_client": round(cpu_client, 2),
+        "endpoints": {nom: resumer(latences[nom], statuts[nom], duree_mesuree) for nom in sorted(latences)},
+        "statuts_inattendus": {nom: {str(statut): nombre for statut, nombre in sorted(compteur.items())}
+                               for nom, compteur in sorted(inattendus.items())},
+    })
+    return resultat
+
+def comparer(paliers: Dict[str, Dict], reference: Dict[str, Dict], tolerance: float) -> Dict:
+    """Écarts relatifs à la référence, palier par palier et endpoint par endpoint"""
+    regressions, ecarts = [], []
+
+    def verifier(palier: str, nom: str, actuel: Dict, precedent: Dict):
+        ecart = {"palier": palier, "endpoint": nom}
+        if precedent.get("rps"):
+            ecart["rps"] = round(actuel["rps"] / precedent["rps"] - 1, 3)
+            if ecart["rps"] < -tolerance:
+                regressions.append(f"{palier}/{nom} : débit {precedent['rps']} -> {actuel['rps']} req/s")
+        for mesure, minimum in MINIMUM_REQUETES_CENTILE.items():
+            avant, apres = precedent["latence_ms"].get(mesure), actuel["latence_ms"].get(mesure)
+            if not avant or apres is None or min(actuel["requetes"], precedent["requetes"]) < minimum:
+                continue
+            ecart[mesure] = round(apres / avant - 1, 3)
+            if ecart[mesure] > tolerance:
+                regressions.append(f"{palier}/{nom} : {mesure} {avant} -> {apres} ms")
+        # Un point d'erreur de plus est une régression, quel que soit le volume
+        if actuel["taux_erreur"] > precedent["taux_erreur"] + 0.01:
+            regressions.append(f"{palier}/{nom} : taux d'erreur {precedent['taux_erreur']} -> {actuel['taux_erreur']}")
+        ecart["taux_erreur"] = round(actuel["taux_erreur"] - precedent["taux_erreur"], 4)
+        ecarts.append(ecart)
+
+    for palier, actuel in paliers.items():
+        precedent = reference.get(palier)
+        if precedent is None:
+            continue
+        verifier(palier, "global", actuel, precedent)
+        for nom, mesures in actuel["endpoints"].items():
+            if nom in precedent.get("endpoints", {}):
+                verifier(palier, nom, mesures, precedent["endpoints"][nom])
+    return {"tolerance": tolerance, "ecarts": ecarts, "regressions": regressions}
+
+def main():
+    options = lire_options(sys.argv[1:], OPTIONS_DEFAUT)
+    graine = int(options["--graine"])
+    bases = {base.strip() for base in options["--bases"].split(",") if base.strip()}
+    concurrences = [int(valeur) for valeur in options["--concurrences"].split(",") if valeur.strip()]
+    duree = float(options["--duree"])
+    echauffement = float(options["--echauffement"])
+    tolerance = float(options["--tolerance"])
+    chemin_reference = options["--reference"] or os.path.join(DOSSIER_REFERENCES, f"benchmark_http_{options['--echelle']}.json")
+
+    preparer_api()
+    from sqlalchemy import create_engine
+    from pymongo import MongoClient
+    from config.config import settings
+    from donnees_synthetiques import lire_echelle, charger_postgres, charger_mongo
+    from scenarios import SCENARIOS, UTILISATEUR_PERF, contexte_scenarios
+
+    print("🏁 BENCHMARK HTTP DE L'API")
+    print("=" * 60)
+
+    chargement = {}
+    if options["--charger"] == "true":
+        echelle, processus = lire_echelle(options["--echelle"]), int(options["--processus"])
+        print(f"📥 Chargement du catalogue synthétique : échelle {options['--echelle']} (graine {graine})")
+        if "postgres" in bases:
+            chargement["postgres"] = charger_postgres(settings.get_database_url(), echelle, graine, processus)
+        if "mongo" in bases:
+            chargement["mongo"] = charger_mongo(settings.get_mongodb_url(), settings.mongodb_database, echelle, graine, processus)
+
+    engine = create_engine(settings.get_database_url()) if "postgres" in bases else None
+    client_mongo = MongoClient(settings.get_mongodb_url(), serverSelectionTimeoutMS=settings.mongodb_server_selection_timeout_ms) if "mongo" in bases else None
+    contexte = contexte_scenarios(engine, client_mongo[settings.mongodb_database] if client_mongo else None)
+    if engine is not None:
+        engine.dispose()
+    if client_mongo is not None:
+        client_mongo.close()
+
+    scenarios = [scenario for scenario in SCENARIOS if scenario["base"] in bases and scenario.get("poids", 0) > 0]
+    total_poids = sum(scenario["poids"] for scenario in scenarios)
+    print(f"🎯 {len(scenarios)} endpoints pondérés, paliers de concurrence {concurrences}, {duree:.0f} s par palier")
+
+    processus_api = None
+    url = options["--url"].rstrip("/")
+    if not url:
+        url = f"http://127.0.0.1:{options['--port']}"
+        print(f"🚀 Démarrage de l'API ({options['--workers']} worker(s)) sur {url}")
+        processus_api = demarrer_api(int(options["--port"]), int(options["--workers"]))
+
+    paliers = {}
+    try:
+        attendre_api(url, processus_api)
+        jeton = obtenir_jeton(url, UTILISATEUR_PERF)
+        for concurrence in concurrences:
+            print(f"⏱️ Concurrence {concurrence}...")
+            resultat = asyncio.run(executer_palier(url, scenarios, contexte, jeton, concurrence, duree, echauffement, graine))
+            paliers[str(concurrence)] = resultat
+            latence = resultat["latence_ms"]
+            print(f"   {resultat['rps']:>9} req/s | p50 {latence['p50']} ms | p95 {latence['p95']} ms | "
+                  f"p99 {latence['p99']} ms | erreurs {resultat['taux_erreur']:.2%} | cpu client {resultat['cpu_client']}")
+            for nom, compteur in resultat["statuts_inattendus"].items():
+                print(f"   ❌ {nom} : statut(s) inattendu(s) {compteur}")
+            if resultat["cpu_client"] > 0.9:
+                print("   ⚠️ Client de charge saturé : le débit mesuré est une borne basse")
+    finally:
+        if processus_api is not None:
+            processus_api.terminate()
+            try:
+                processus_api.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                processus_api.kill()
+
+    reference = {}
+    if options["--enregistrer-reference"] != "true" and os.path.exists(chemin_reference):
+        with open(chemin_reference, encoding="utf-8") as f:
+            reference = json.load(f).get("paliers", {})
+    comparaison = comparer(paliers, reference, tolerance) if reference else None
+
+    rapport = {
+        "configuration": {
+            "echelle": options["--echelle"], "graine": graine, "bases": sorted(bases),
+            "concurrences": concurrences, "duree_s": duree, "echauffement_s": echauffement,
+            "workers": int(options["--workers"]), "url": url,
+            "melange": {scenario["nom"]: round(scenario["poids"] / total_poids, 4) for scenario in scenarios},
+            "reference": chemin_reference if reference else None,
+        },
+        "chargement": chargement,
+        "paliers": paliers,
+        "comparaison": comparaison,
+    }
+    with open(options["--sortie"], "w", encoding="utf-8") as f:
+        json.dump(rapport, f, ensure_ascii=False, indent=2)
+    print("=" * 60)
+    print(f"💾 Rapport sauvegardé : {options['--sortie']}")
+
+    endpoints_inattendus = sorted({nom for resultat in paliers.values() for nom in resultat["statuts_inattendus"]})
+    if endpoints_inattendus:
+        print(f"❌ Statuts inattendus pour : {', '.join(endpoints_inattendus)} (les mesures ne portent pas sur ces routes)")
+    if options["--enregistrer-reference"] == "true":
+        if endpoints_inattendus:
+            print("❌ Référence non enregistrée")
+            return 1
+        os.makedirs(os.path.dirname(chemin_reference), exist_ok=True)
+        with open(chemin_reference, "w", encoding="utf-8") as f:
+            json.dump({"configuration": rapport["configuration"], "paliers": paliers}, f, ensure_ascii=False, indent=2)
+        print(f"📌 Référence enregistrée : {chemin_reference}")
+        return 0
+
+    if comparaison is None:
+        print(f"ℹ️ Pas de référence ({chemin_reference}) : relancer avec --enregistrer-reference pour en créer une")
+        return 1 if endpoints_inattendus else 0
+
+    print(f"📊 Comparaison à la référence (tolérance {tolerance:.0%}) : {len(comparaison['regressions'])} régression(s)")
+    for regression in comparaison["regressions"]:
+        print(f"   ❌ {regression}")
+    return 1 if comparaison["regressions"] or endpoints_inattendus else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Outils communs aux scripts de performance
+=========================================
+
+Chemins du dépôt, lecture des options de la ligne de commande et préparation
+de l'environnement avant d'importer l'API (les réglages sont lus à l'import).
+"""
+
+import os
+import sys
+import tempfile
+
+DOSSIER_PERF = os.path.dirname(os.path.abspath(__file__))
+RACINE_DEPOT = os.path.dirname(os.path.dirname(DOSSIER_PERF))
+DOSSIER_API = os.path.join(RACINE_DEPOT, "api")
+FICHIER_SCHEMA_API = os.path.join(DOSSIER_PERF, "schema_api.sql")
+FICHIER_CONTRAINTES_API = os.path.join(DOSSIER_PERF, "contraintes_api.sql")
+DOSSIER_REFERENCES = os.path.join(DOSSIER_PERF, "references")
+
+def lire_options(arguments, defauts):
+    """
+    Analyse minimale des arguments "--nom valeur" (les drapeaux sans valeur valent "true")
+
+    Args:
+        arguments: sys.argv[1:]
+        defauts: nom d'option (avec --) -> valeur par défaut (chaîne)
+    """
+    options = dict(defauts)
+    i = 0
+    while i < len(arguments):
+        nom = arguments[i]
+        if nom not in defauts:
+            raise SystemExit(f"❌ Option inconnue: {nom} (options: {', '.join(sorted(defauts))})")
+        if i + 1 < len(arguments) and not arguments[i + 1].startswith("--"):
+            options[nom] = arguments[i + 1]
+            i += 2
+        else:
+            options[nom] = "true"
+            i += 1
+    return options
+
+def preparer_api(**reglages):
+    """
+    Rendre le dossier api/ importable et fixer les réglages propres aux mesures
+
+    À appeler avant tout import de l'API. Le journal des requêtes lentes reste
+    actif (il attribue chaque requête à sa route) mais sans seuil ni EXPLAIN, et
+    les snapshots du dashboard sont écrits dans un dossier temporaire.
+    """
+    if DOSSIER_API not in sys.path:
+        sys.path.insert(0, DOSSIER_API)
+    environnement = {
+        "SLOW_QUERY_ENABLED": "true",
+        "SLOW_QUERY_THRESHOLD_MS": "1000000",
+        "SLOW_QUERY_EXPLAIN_SAMPLE_RATE": "0",
+        "DASHBOARD_SNAPSHOT_DIR": os.path.join(tempfile.gettempdir(), "databook_perf_snapshots"),
+        "DEBUG": "false",
+    }
+    environnement.update(reglages)
+    for nom, valeur in environnement.items():
+        os.environ[nom] = str(valeur)
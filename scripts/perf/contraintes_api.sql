@@ -0,0 +1,32 @@
+-- =============================================
+-- DATABOOK - Contraintes du schéma "test" (voir schema_api.sql)
+-- Ajoutées après le chargement en masse : mêmes noms que les contraintes
+-- créées par bdd/livres/formatage_bdd_postgresql.py
+-- =============================================
+
+ALTER TABLE test.livre ADD PRIMARY KEY (id_livre);
+ALTER TABLE test.livre ADD UNIQUE (ol_id);
+
+ALTER TABLE test.auteur ADD PRIMARY KEY (id_auteur);
+ALTER TABLE test.auteur ADD UNIQUE (ol_id);
+
+ALTER TABLE test.editeur ADD PRIMARY KEY (id_editeur);
+ALTER TABLE test.editeur ADD UNIQUE (nom_editeur);
+
+ALTER TABLE test.langue ADD PRIMARY KEY (id_langue);
+ALTER TABLE test.langue ADD UNIQUE (code_langue);
+
+ALTER TABLE test.sujet ADD PRIMARY KEY (id_sujet);
+ALTER TABLE test.sujet ADD UNIQUE (nom_sujet);
+
+ALTER TABLE test.livre_auteur ADD FOREIGN KEY (id_livre) REFERENCES test.livre(id_livre);
+ALTER TABLE test.livre_auteur ADD FOREIGN KEY (id_auteur) REFERENCES test.auteur(id_auteur);
+
+ALTER TABLE test.livre_editeur ADD FOREIGN KEY (id_livre) REFERENCES test.livre(id_livre);
+ALTER TABLE test.livre_editeur ADD FOREIGN KEY (id_editeur) REFERENCES test.editeur(id_editeur);
+
+ALTER TABLE test.livre_langue ADD FOREIGN KEY (id_livre) REFERENCES test.livre(id_livre);
+ALTER TABLE test.livre_langue ADD FOREIGN KEY (id_langue) REFERENCES test.langue(id_langue);
+
+ALTER TABLE test.livre_sujet ADD FOREIGN KEY (id_livre) REFERENCES test.livre(id_livre);
+ALTER TABLE test.livre_sujet ADD FOREIGN KEY (id_sujet) REFERENCES test.sujet(id_sujet);
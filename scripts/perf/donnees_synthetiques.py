@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+Générateur de catalogue synthétique pour les tests de montée en charge
+=====================================================================
+
+Produit un catalogue fictif à l'échelle voulue des données du projet
+(1x = 41 100 livres PostgreSQL, 4 766 livres MongoDB et 85 critiques) :
+- PostgreSQL, schéma "test" de l'API : livre, auteur, editeur, langue, sujet et
+  les tables de liaison, chargés par COPY puis contraintes ajoutées ensuite ;
+- MongoDB : collections livres et critiques_livres, insertion par lots puis
+  index des scripts d'import.
+
+Les auteurs, éditeurs, genres et langues suivent une loi de Zipf : quelques
+valeurs très fréquentes et une longue traîne, comme dans les vraies données.
+Les noms sont déterministes ("Livre 42", "Auteur 7", "Éditions 3") : les
+scénarios de mesure les utilisent comme valeurs de recherche. La génération
+est découpée en lots dont chacun a sa propre graine : même graine, mêmes
+données, quel que soit le nombre de processus.
+
+⚠️ Le chargement supprime et recrée les tables et collections : à lancer sur
+une base dédiée aux mesures (POSTGRES_DB / MONGODB_DATABASE).
+
+Utilisation (depuis la racine du dépôt) :
+    POSTGRES_DB=databook_perf MONGODB_DATABASE=databook_perf \\
+    python scripts/perf/donnees_synthetiques.py [--echelle 1x|10x|100x|1000x|0.1x]
+        [--graine 42] [--bases postgres,mongo] [--processus 4]
+"""
+
+import io
+import os
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from commun import FICHIER_SCHEMA_API, FICHIER_CONTRAINTES_API
+
+# Volumes des données du projet (échelle 1x)
+VOLUMES_1X = {"livres": 41_100, "livres_mongo": 4_766, "critiques": 85}
+ECHELLES = {"1x": 1, "10x": 10, "100x": 100, "1000x": 1000}
+
+# Exposants de la loi de Zipf : plus l'exposant est grand, plus la tête concentre les livres
+EXPOSANTS_ZIPF = {"auteurs": 1.1, "editeurs": 1.05, "sujets": 1.0, "langues": 1.6}
+
+# Codes des données OpenLibrary (voir formatage_bdd_postgresql.py), du plus au moins fréquent
+LANGUES = [
+    ("eng", "English"), ("fre", "Français"), ("spa", "Español"), ("ger", "Deutsch"),
+    ("ita", "Italiano"), ("por", "Português"), ("rus", "Русский"), ("jpn", "日本語"),
+    ("chi", "中文"), ("ara", "العربية"), ("dut", "Nederlands"), ("pol", "Polski"),
+    ("swe", "Svenska"), ("lat", "Latina"), ("gre", "Ελληνικά"), ("heb", "עברית"),
+    ("kor", "한국어"), ("tur", "Türkçe"), ("dan", "Dansk"), ("nor", "Norsk"),
+]
+GENRES = [
+    "Roman", "Policier", "Science-fiction", "Fantasy", "Thriller", "Biographie",
+    "Histoire", "Poésie", "Jeunesse", "Bande dessinée", "Essai", "Philosophie",
+    "Romance", "Horreur", "Aventure", "Théâtre", "Cuisine", "Voyage", "Sciences", "Art",
+]
+FORMATS = ["Broché", "Poche", "Relié", "Numérique"]
+PAYS = ["France", "United States", "United Kingdom", "Belgique", "Suisse", "Canada", "Deutschland", "España"]
+
+TEXTE = (
+    "Une histoire de famille sur trois générations, entre secrets et réconciliations. "
+    "Au fil des chapitres, le narrateur revient sur les lieux de son enfance et découvre "
+    "ce que les adultes lui avaient caché. Un récit sensible sur la mémoire, la transmission "
+    "et le temps qui passe, salué par la critique et traduit dans de nombreuses langues. "
+) * 12
+
+DATE_REFERENCE = datetime(2025, 6, 12, 16, 29, 57)
+HORODATAGE = DATE_REFERENCE.strftime("%Y-%m-%d %H:%M:%S")
+TAILLE_LOT_POSTGRES = 100_000
+TAILLE_LOT_MONGO = 20_000
+
+def lire_echelle(valeur: str) -> float:
+    """"100x", "0.5x" ou "2.5" -> facteur multiplicatif des volumes 1x"""
+    if valeur in ECHELLES:
+        return float(ECHELLES[valeur])
+    facteur = float(valeur.rstrip("x"))
+    if facteur <= 0:
+        raise ValueError(f"Échelle invalide: {valeur}")
+    return facteur
+
+def tailles(echelle: float) -> Dict[str, int]:
+    """Nombre d'entités de chaque type à l'échelle demandée"""
+    livres = max(100, round(VOLUMES_1X["livres"] * echelle))
+    livres_mongo = max(50, round(VOLUMES_1X["livres_mongo"] * echelle))
+    return {
+        "livres": livres,
+        "auteurs": max(20, round(livres * 0.6)),
+        "editeurs": max(10, round(livres * 0.08)),
+        "sujets": max(len(GENRES), livres // 50),
+        "langues": len(LANGUES),
+        "livres_mongo": livres_mongo,
+        "auteurs_mongo": max(20, round(livres_mongo * 0.6)),
+        "editeurs_mongo": max(10, round(livres_mongo * 0.08)),
+        "genres_mongo": max(len(GENRES), livres_mongo // 20),
+        "critiques": max(10, round(VOLUMES_1X["critiques"] * echelle)),
+    }
+
+def _generateur(graine: int, table: str, index_lot: int) -> np.random.Generator:
+    """Générateur propre à un lot : les lots sont indépendants et reproductibles"""
+    return np.random.default_rng([graine, zlib.crc32(table.encode()), index_lot])
+
+def tirer_zipf(generateur: np.random.Generator, nombre: int, n: int, exposant: float) -> np.ndarray:
+    """
+    Rangs 1..n avec P(k) proportionnelle à k^-exposant
+
+    Inverse de la fonction de répartition de la loi continue sur [0.5, n + 0.5],
+    arrondie : mémoire constante, même pour des dizaines de millions de rangs.
+    """
+    a, b = 0.5, n + 0.5
+    u = generateur.random(nombre)
+    if abs(exposant - 1.0) < 1e-9:
+        x = a * (b / a) ** u
+    else:
+        e = 1.0 - exposant
+        x = (a ** e + u * (b ** e - a ** e)) ** (1.0 / e)
+    return np.clip(np.rint(x).astype(np.int64), 1, n)
+
+def _lots(total: int, taille_lot: int) -> List[Tuple[int, int, int]]:
+    """(index du lot, premier identifiant, identifiant de fin exclu)"""
+    return [(i, debut, min(debut + taille_lot, total + 1)) for i, debut in enumerate(range(1, total + 1, taille_lot))]
+
+def _optionnel(valeurs, generateur: np.random.Generator, proportion_manquante: float) -> pd.Series:
+    """Valeurs avec une part de manquants (NULL en base)"""
+    serie = pd.Series(valeurs)
+    if serie.dtype.kind in "iu":
+        serie = serie.astype("Int64")
+    else:
+        serie = serie.astype(object)
+    return serie.mask(generateur.random(len(serie)) < proportion_manquante)
+
+def _textes(generateur: np.random.Generator, nombre: int, longueur_mediane: int) -> List[str]:
+    longueurs = np.clip(generateur.lognormal(np.log(longueur_mediane), 0.6, nombre).astype(int), 20, len(TEXTE))
+    return [TEXTE[:longueur] for longueur in longueurs]
+
+def _ordre_dans_groupe(nombres: np.ndarray) -> np.ndarray:
+    """1, 2, ... à l'intérieur de chaque groupe répété (np.repeat(ids, nombres))"""
+    debuts = np.repeat(np.cumsum(nombres) - nombres, nombres)
+    return np.arange(int(nombres.sum())) - debuts + 1
+
+# PostgreSQL
+def _copier(curseur, table: str, cadre: pd.DataFrame):
+    tampon = io.StringIO()
+    cadre.to_csv(tampon, header=False, index=False)
+    tampon.seek(0)
+    curseur.copy_expert(f"COPY test.{table} ({', '.join(cadre.columns)}) FROM STDIN WITH (FORMAT csv)", tampon)
+
+def _lot_auteurs(graine: int, index_lot: int, debut: int, fin: int, nombres: Dict) -> Dict[str, pd.DataFrame]:
+    g = _generateur(graine, "auteur", index_lot)
+    ids = np.arange(debut, fin)
+    n, texte_ids = len(ids), pd.Series(ids).astype(str)
+    naissances = g.integers(1700, 2000, n)
+    return {"auteur": pd.DataFrame({
+        "id_auteur": ids,
+        "ol_id": "OL" + texte_ids + "A",
+        "nom": "Nom" + texte_ids,
+        "prenom": "Prénom" + texte_ids,
+        "nom_complet": "Auteur " + texte_ids,
+        "date_naissance": _optionnel(naissances.astype(str), g, 0.6),
+        "date_deces": _optionnel((naissances + g.integers(30, 95, n)).astype(str), g, 0.8),
+        "biographie": _optionnel(_textes(g, n, 300), g, 0.7),
+        "created_at": HORODATAGE,
+    })}
+
+def _lot_editeurs(graine: int, index_lot: int, debut: int, fin: int, nombres: Dict) -> Dict[str, pd.DataFrame]:
+    g = _generateur(graine, "editeur", index_lot)
+    ids = np.arange(debut, fin)
+    n = len(ids)
+    return {"editeur": pd.DataFrame({
+        "id_editeur": ids,
+        "nom_editeur": "Éditions " + pd.Series(ids).astype(str),
+        "pays": _optionnel(np.array(PAYS)[tirer_zipf(g, n, len(PAYS), 1.2) - 1], g, 0.3),
+        "annee_creation": _optionnel(g.integers(1800, 2024, n), g, 0.4),
+        "created_at": HORODATAGE,
+    })}
+
+def _lot_livres(graine: int, index_lot: int, debut: int, fin: int, nombres: Dict) -> Dict[str, pd.DataFrame]:
+    g = _generateur(graine, "livre", index_lot)
+    ids = np.arange(debut, fin)
+    n, texte_ids = len(ids), pd.Series(ids).astype(str)
+    # Plus de livres récents que de livres anciens
+    annees = np.clip(2025 - np.floor(g.exponential(22, n)).astype(int), 1800, 2025)
+    tomes = pd.Series(g.integers(1, 8, n)).astype(str)
+    livres = pd.DataFrame({
+        "id_livre": ids,
+        "ol_id": "OL" + texte_ids + "M",
+        "titre": "Livre " + texte_ids,
+        "sous_titre": _optionnel("Tome " + tomes, g, 0.8),
+        "isbn_10": _optionnel(texte_ids.str.zfill(10), g, 0.3),
+        "isbn_13": _optionnel("978" + texte_ids.str.zfill(10), g, 0.1),
+        "date_publication": _optionnel(annees.astype(str), g, 0.05),
+        "annee_publication": _optionnel(annees, g, 0.05),
+        "nombre_pages": _optionnel(np.clip(np.rint(g.lognormal(np.log(260), 0.55, n)), 24, 3000).astype(int), g, 0.1),
+        "format_physique": _optionnel(np.array(FORMATS)[tirer_zipf(g, n, len(FORMATS), 1.0) - 1], g, 0.15),
+        "description": _optionnel(_textes(g, n, 400), g, 0.25),
+        "couverture_url": None,
+        "created_at": HORODATAGE,
+        "updated_at": HORODATAGE,
+    })
+
+    # 1 à 3 auteurs par livre, le premier en auteur principal
+    nb_auteurs = np.searchsorted([0.8, 0.95], g.random(n), side="right") + 1
+    livre_auteur = pd.DataFrame({
+        "id_livre": np.repeat(ids, nb_auteurs),
+        "id_auteur": tirer_zipf(g, int(nb_auteurs.sum()), nombres["auteurs"], EXPOSANTS_ZIPF["auteurs"]),
+        "role": "author",
+        "ordre": _ordre_dans_groupe(nb_auteurs),
+    }).drop_duplicates(["id_livre", "id_auteur"])
+
+    livre_editeur = pd.DataFrame({
+        "id_livre": ids,
+        "id_editeur": tirer_zipf(g, n, nombres["editeurs"], EXPOSANTS_ZIPF["editeurs"]),
+        "ordre": 1,
+    })
+
+    # Une langue principale, parfois une seconde
+    nb_langues = (g.random(n) < 0.05).astype(int) + 1
+    livre_langue = pd.DataFrame({
+        "id_livre": np.repeat(ids, nb_langues),
+        "id_langue": tirer_zipf(g, int(nb_langues.sum()), nombres["langues"], EXPOSANTS_ZIPF["langues"]),
+        "langue_principale": _ordre_dans_groupe(nb_langues) == 1,
+    }).drop_duplicates(["id_livre", "id_langue"])
+
+    nb_sujets = g.integers(1, 5, n)
+    livre_sujet = pd.DataFrame({
+        "id_livre": np.repeat(ids, nb_sujets),
+        "id_sujet": tirer_zipf(g, int(nb_sujets.sum()), nombres["sujets"], EXPOSANTS_ZIPF["sujets"]),
+        "pertinence": np.round(g.random(int(nb_sujets.sum())), 2),
+    }).drop_duplicates(["id_livre", "id_sujet"])
+
+    return {"livre": livres, "livre_auteur": livre_auteur, "livre_editeur": livre_editeur,
+            "livre_langue": livre_langue, "livre_sujet": livre_sujet}
+
+GENERATEURS_POSTGRES = {"auteur": _lot_auteurs, "editeur": _lot_editeurs, "livre": _lot_livres}
+
+def _charger_lot_postgres(url: str, entite: str, graine: int, index_lot: int, debut: int, fin: int, nombres: Dict) -> Dict[str, int]:
+    """Générer un lot et le copier, dans une transaction (exécuté dans un processus de travail)"""
+    import psycopg2
+    cadres = GENERATEURS_POSTGRES[entite](graine, index_lot, debut, fin, nombres)
+    connexion = psycopg2.connect(url)
+    try:
+        with connexion, connexion.cursor() as curseur:
+            for table, cadre in cadres.items():
+                _copier(curseur, table, cadre)
+    finally:
+        connexion.close()
+    return {table: len(cadre) for table, cadre in cadres.items()}
+
+def _executer_lots(fonction, taches: List[Tuple], processus: int) -> List:
+    if processus <= 1:
+        return [fonction(*tache) for tache in taches]
+    with ProcessPoolExecutor(max_workers=processus) as executeur:
+        return list(executeur.map(fonction, *zip(*taches)))
+
+def _cumuler(totaux: Dict[str, int], comptes: List[Dict[str, int]]):
+    for compte in comptes:
+        for table, lignes in compte.items():
+            totaux[table] = totaux.get(table, 0) + lignes
+
+def charger_postgres(url: str, echelle: float = 1, graine: int = 42, processus: int = 1,
+                     fichier_schema: str = FICHIER_SCHEMA_API, fichier_contraintes: str = FICHIER_CONTRAINTES_API) -> Dict:
+    """
+    Recréer le schéma, copier le catalogue, puis ajouter contraintes et statistiques
+
+    Args:
+        url: URL libpq (postgresql://...), settings.get_database_url() pour l'API
+        echelle: facteur des volumes 1x (voir lire_echelle)
+        processus: lots générés et copiés en parallèle, chacun sur sa connexion
+    """
+    import psycopg2
+    nombres = tailles(echelle)
+    debut = time.perf_counter()
+    with open(fichier_schema, encoding="utf-8") as f:
+        ddl = f.read()
+    with open(fichier_contraintes, encoding="utf-8") as f:
+        contraintes = f.read()
+
+    connexion = psycopg2.connect(url)
+    connexion.autocommit = True
+    try:
+        with connexion.cursor() as curseur:
+            curseur.execute(ddl)
+            _copier(curseur, "langue", pd.DataFrame({
+                "id_langue": range(1, len(LANGUES) + 1),
+                "code_langue": [code for code, _ in LANGUES],
+                "nom_langue": [nom for _, nom in LANGUES],
+            }))
+            noms_sujets = GENRES + [f"Sujet {i}" for i in range(len(GENRES) + 1, nombres["sujets"] + 1)]
+            _copier(curseur, "sujet", pd.DataFrame({
+                "id_sujet": range(1, len(noms_sujets) + 1),
+                "nom_sujet": noms_sujets,
+                "categorie": ["Genre"] * len(GENRES) + ["Sujet"] * (len(noms_sujets) - len(GENRES)),
+            }))
+
+        totaux = {"langue": len(LANGUES), "sujet": nombres["sujets"]}
+        for entite, total in (("auteur", nombres["auteurs"]), ("editeur", nombres["editeurs"]), ("livre", nombres["livres"])):
+            debut_entite = time.perf_counter()
+            taches = [(url, entite, graine, index_lot, premier, fin, nombres)
+                      for index_lot, premier, fin in _lots(total, TAILLE_LOT_POSTGRES)]
+            _cumuler(totaux, _executer_lots(_charger_lot_postgres, taches, processus))
+            print(f"   📥 {entite}: {total:,} lignes en {time.perf_counter() - debut_entite:.1f} s")
+
+        debut_contraintes = time.perf_counter()
+        with connexion.cursor() as curseur:
+            curseur.execute(contraintes)
+            for table in ("livre", "auteur", "editeur", "langue", "sujet"):
+                curseur.execute(
+                    f"SELECT setval(pg_get_serial_sequence('test.{table}', 'id_{table}'), "
+                    f"(SELECT COALESCE(MAX(id_{table}), 1) FROM test.{table}))"
+                )
+            # Statistiques et carte de visibilité à jour : sans elles, les plans ne reflètent pas les volumes
+            curseur.execute("VACUUM ANALYZE")
+        print(f"   🔑 Contraintes et statistiques en {time.perf_counter() - debut_contraintes:.1f} s")
+    finally:
+        connexion.close()
+
+    duree = time.perf_counter() - debut
+    return {"lignes": totaux, "duree_s": round(duree, 2), "lignes_par_s": round(sum(totaux.values()) / duree)}
+
+# MongoDB
+def _object_id(n: int):
+    """ObjectId déterministe et croissant (horodatage de référence + numéro)"""
+    from bson import ObjectId
+    return ObjectId(int(DATE_REFERENCE.timestamp()).to_bytes(4, "big") + int(n).to_bytes(8, "big"))
+
+def _documents_livres(graine: int, index_lot: int, debut: int, fin: int, nombres: Dict) -> List[Dict]:
+    g = _generateur(graine, "livres", index_lot)
+    n = fin - debut
+    genres_noms = GENRES + [f"Genre {i}" for i in range(len(GENRES) + 1, nombres["genres_mongo"] + 1)]
+    nb_auteurs = np.searchsorted([0.85, 0.97], g.random(n), side="right") + 1
+    auteurs = iter(tirer_zipf(g, int(nb_auteurs.sum()), nombres["auteurs_mongo"], EXPOSANTS_ZIPF["auteurs"]))
+    nb_genres = g.integers(1, 6, n)
+    genres = iter(tirer_zipf(g, int(nb_genres.sum()), len(genres_noms), EXPOSANTS_ZIPF["sujets"]))
+    notes = np.round(np.clip(g.normal(3.8, 0.45, n), 1, 5), 2)
+    sans_note = g.random(n) < 0.15
+    langues = tirer_zipf(g, n, len(LANGUES), EXPOSANTS_ZIPF["langues"])
+    editeurs = tirer_zipf(g, n, nombres["editeurs_mongo"], EXPOSANTS_ZIPF["editeurs"])
+    annees = np.clip(2025 - np.floor(g.exponential(22, n)).astype(int), 1800, 2025)
+    pages = np.clip(np.rint(g.lognormal(np.log(260), 0.55, n)), 24, 3000).astype(int)
+    resumes = _textes(g, n, 400)
+
+    documents = []
+    for i, numero in enumerate(range(debut, fin)):
+        documents.append({
+            "_id": _object_id(numero),
+            "titre": f"Livre {numero}",
+            "auteurs": list(dict.fromkeys(f"Auteur {next(auteurs)}" for _ in range(nb_auteurs[i]))),
+            "note": None if sans_note[i] else float(notes[i]),
+            "tous_les_genres": list(dict.fromkeys(genres_noms[next(genres) - 1] for _ in range(nb_genres[i]))),
+            "langue": LANGUES[langues[i] - 1][0],
+            "resume": resumes[i],
+            "editeur": f"Éditions {editeurs[i]}",
+            "isbn": f"978{numero:010d}",
+            "isbn_10": f"{numero:010d}",
+            "isbn_13": f"978{numero:010d}",
+            "date_publication": str(annees[i]),
+            "nombre_pages": int(pages[i]),
+            "_source_file": "donnees_synthetiques",
+            "_import_date": DATE_REFERENCE + timedelta(seconds=numero),
+        })
+    return documents
+
+def _documents_critiques(graine: int, index_lot: int, debut: int, fin: int, nombres: Dict) -> List[Dict]:
+    g = _generateur(graine, "critiques", index_lot)
+    n = fin - debut
+    # Les livres populaires concentrent les critiques
+    livres = tirer_zipf(g, n, nombres["livres_mongo"], 1.0)
+    auteurs = tirer_zipf(g, n, nombres["auteurs_mongo"], EXPOSANTS_ZIPF["auteurs"])
+    notes = np.round(np.clip(g.normal(3.8, 0.4, n), 0.5, 5), 2)
+    votes = np.minimum(g.zipf(1.6, n) * 3, 200_000)
+    nb_avis = g.integers(0, 6, n)
+    resumes = _textes(g, n, 500)
+
+    documents = []
+    for i, numero in enumerate(range(debut, fin)):
+        repartition = g.multinomial(int(votes[i]), [0.38, 0.36, 0.18, 0.05, 0.03])
+        documents.append({
+            "_id": _object_id(numero),
+            "isbn": 9780000000000 + numero,
+            "titre": f"Livre {livres[i]}",
+            "auteur": f"Auteur {auteurs[i]}",
+            "resume_babelio": resumes[i],
+            "note_babelio": float(notes[i]),
+            "nombre_votes_babelio": int(votes[i]),
+            "repartition_notes_babelio": {f"{5 - j}_etoiles": int(repartition[j]) for j in range(5)},
+            "critiques_babelio": [
+                {"utilisateur": f"lecteur{int(g.integers(1, 50_000))}",
+                 "date": (DATE_REFERENCE - timedelta(days=int(g.integers(0, 3650)))).strftime("%d/%m/%Y"),
+                 "note_utilisateur": float(g.integers(1, 6)),
+                 "texte": TEXTE[:int(g.integers(80, 1200))]}
+                for _ in range(nb_avis[i])
+            ],
+            "url_babelio": f"https://www.babelio.com/livres/livre-{numero}",
+        })
+    return documents
+
+GENERATEURS_MONGO = {"livres": _documents_livres, "critiques_livres": _documents_critiques}
+
+def _charger_lot_mongo(url: str, base: str, collection: str, graine: int, index_lot: int, debut: int, fin: int, nombres: Dict) -> Dict[str, int]:
+    from pymongo import MongoClient
+    documents = GENERATEURS_MONGO[collection](graine, index_lot, debut, fin, nombres)
+    client = MongoClient(url)
+    try:
+        client[base][collection].insert_many(documents, ordered=False)
+    finally:
+        client.close()
+    return {collection: len(documents)}
+
+def charger_mongo(url: str, base: str, echelle: float = 1, graine: int = 42, processus: int = 1) -> Dict:
+    """Recréer les collections livres et critiques_livres, puis les index des scripts d'import"""
+    from pymongo import MongoClient
+    nombres = tailles(echelle)
+    debut = time.perf_counter()
+    client = MongoClient(url)
+    try:
+        db = client[base]
+        db.livres.drop()
+        db.critiques_livres.drop()
+
+        totaux: Dict[str, int] = {}
+        for collection, total in (("livres", nombres["livres_mongo"]), ("critiques_livres", nombres["critiques"])):
+            debut_collection = time.perf_counter()
+            taches = [(url, base, collection, graine, index_lot, premier, fin, nombres)
+                      for index_lot, premier, fin in _lots(total, TAILLE_LOT_MONGO)]
+            _cumuler(totaux, _executer_lots(_charger_lot_mongo, taches, processus))
+            print(f"   📥 {collection}: {total:,} documents en {time.perf_counter() - debut_collection:.1f} s")
+
+        # Index créés par bdd/nosql/import_mongodb.py et bdd/critque/import_mongodb.py
+        db.livres.create_index("titre")
+        db.livres.create_index("auteurs")
+        db.critiques_livres.create_index("isbn", unique=True)
+        db.critiques_livres.create_index("titre")
+        db.critiques_livres.create_index("auteur")
+        db.critiques_livres.create_index("note_babelio")
+    finally:
+        client.close()
+
+    duree = time.perf_counter() - debut
+    return {"documents": totaux, "duree_s": round(duree, 2), "documents_par_s": round(sum(totaux.values()) / duree)}
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    from commun import lire_options, preparer_api
+    options = lire_options(sys.argv[1:] if arguments is None else arguments, {
+        "--echelle": "1x", "--graine": "42", "--bases": "postgres,mongo", "--processus": str(min(4, os.cpu_count() or 1)),
+    })
+    echelle = lire_echelle(options["--echelle"])
+    graine = int(options["--graine"])
+    processus = int(options["--processus"])
+    bases = {base.strip() for base in options["--bases"].split(",") if base.strip()}
+
+    preparer_api()
+    from config.config import settings
+
+    print("🏭 GÉNÉRATION DU CATALOGUE SYNTHÉTIQUE")
+    print("=" * 60)
+    print(f"📏 Échelle {options['--echelle']} (graine {graine}, {processus} processus)")
+    for nom, nombre in tailles(echelle).items():
+        print(f"   {nom:<16} {nombre:>14,}")
+
+    if "postgres" in bases:
+        print(f"🐘 PostgreSQL : {settings.postgres_host}/{settings.postgres_db}")
+        resultat = charger_postgres(settings.get_database_url(), echelle, graine, processus)
+        print(f"✅ PostgreSQL chargé en {resultat['duree_s']} s ({resultat['lignes_par_s']:,} lignes/s)")
+    if "mongo" in bases:
+        print(f"🍃 MongoDB : {settings.get_mongodb_url()}/{settings.mongodb_database}")
+        resultat = charger_mongo(settings.get_mongodb_url(), settings.mongodb_database, echelle, graine, processus)
+        print(f"✅ MongoDB chargé en {resultat['duree_s']} s ({resultat['documents_par_s']:,} documents/s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
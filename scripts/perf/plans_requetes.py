@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Plans d'exécution des requêtes émises par les routes de l'API
+=============================================================
+
+1. (option --charger) charge le catalogue synthétique à l'échelle demandée
+   (donnees_synthetiques.py : 1x, 10x, 100x, 1000x) ;
+2. démarre l'API en mémoire et appelle chaque scénario (scenarios.py) ;
+3. capture les requêtes SQL et commandes MongoDB réellement émises par chaque
+   route (événements SQLAlchemy, écouteur de commandes pymongo) ;
+4. obtient le plan de chacune : EXPLAIN (FORMAT JSON) pour PostgreSQL,
+   explain() (plan gagnant) pour MongoDB ;
+5. signale les parcours séquentiels / COLLSCAN sur les grosses tables et les
+   estimations de lignes au-delà du seuil ;
+6. compare à la référence enregistrée et échoue (code 1) si un plan se dégrade
+   (nouvelle alerte, coût estimé multiplié au-delà de la tolérance, EXPLAIN en
+   échec), si une requête de la référence n'est plus émise, ou si un scénario
+   répond en erreur serveur (5xx) ou par un statut inattendu (404, 422, ...) :
+   une route cassée ou mal routée n'émet plus ses requêtes.
+
+Utilisation (depuis la racine du dépôt, sur des bases dédiées aux mesures) :
+    POSTGRES_DB=databook_perf MONGODB_DATABASE=databook_perf \\
+    python scripts/perf/plans_requetes.py [--echelle 1x] [--graine 42] [--charger] [--processus 4]
+        [--bases postgres,mongo]
+        [--seuil-lignes 10000] [--tolerance-cout 2.0] [--analyze]
+        [--reference fichier.json] [--enregistrer-reference] [--sortie plans_requetes.json]
+
+La référence par défaut est scripts/perf/references/plans_<echelle>.json : elle se
+crée avec --enregistrer-reference et se versionne avec le code.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+from commun import lire_options, preparer_api, DOSSIER_REFERENCES
+
+OPTIONS_DEFAUT = {
+    "--echelle": "1x",
+    "--graine": "42",
+    "--charger": "false",
+    "--processus": "4",
+    "--bases": "postgres,mongo",
+    "--seuil-lignes": "10000",
+    "--tolerance-cout": "2.0",
+    "--analyze": "false",
+    "--reference": "",
+    "--enregistrer-reference": "false",
+    "--sortie": "plans_requetes.json",
+}
+
+# Commandes MongoDB qui ont un plan d'exécution
+COMMANDES_MONGO_EXPLICABLES = ("find", "aggregate", "count", "distinct")
+
+class CaptureRequetes:
+    """Requêtes distinctes émises par les routes pendant les scénarios"""
+
+    def __init__(self, route_courante, hors_requete, empreinte, forme_commande_mongo, champs_protocole):
+        self._route_courante = route_courante
+        self._hors_requete = hors_requete
+        self._empreinte = empreinte
+        self._forme = forme_commande_mongo
+        self._champs_protocole = champs_protocole
+        self._verrou = threading.Lock()
+        self.scenario = None
+        self.requetes: Dict[str, Dict] = {}
+
+    def _ajouter(self, cle: str, base: str, route: str, contenu: Dict):
+        with self._verrou:
+            requete = self.requetes.get(cle)
+            if requete is None:
+                requete = self.requetes[cle] = dict(contenu, base=base, empreinte=cle[len(base) + 1:], routes=[], scenarios=[])
+            if route not in requete["routes"]:
+                requete["routes"].append(route)
+            if self.scenario and self.scenario not in requete["scenarios"]:
+                requete["scenarios"].append(self.scenario)
+
+    def ecouter_sqlalchemy(self, engine):
+        from sqlalchemy import event
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _capturer(conn, cursor, statement, parameters, context, executemany):
+            route = self._route_courante()
+            if route == self._hors_requete or executemany:
+                return
+            if statement.lstrip().split(None, 1)[0].upper() not in ("SELECT", "WITH"):
+                return
+            self._ajouter(f"postgres:{self._empreinte(statement)}", "postgres", route,
+                          {"requete": statement, "parametres": parameters})
+
+    def ecouteur_mongo(self):
+        from pymongo import monitoring
+
+        capture = self
+
+        class EcouteurCapture(monitoring.CommandListener):
+            def started(self, event):
+                if event.command_name not in COMMANDES_MONGO_EXPLICABLES:
+                    return
+                route = capture._route_courante()
+                if route == capture._hors_requete:
+                    return
+                commande = {cle: valeur for cle, valeur in event.command.items() if cle not in capture._champs_protocole}
+                forme = capture._forme(commande)
+                forme[event.command_name] = commande.get(event.command_name)
+                cle = "mongo:" + capture._empreinte(json.dumps(forme, sort_keys=True, default=str))
+                capture._ajouter(cle, "mongo", route, {
+                    "requete": forme, "commande": commande,
+                    "base_mongo": event.database_name, "collection": commande.get(event.command_name),
+                })
+
+            def succeeded(self, event):
+                pass
+
+            def failed(self, event):
+                pass
+
+        return EcouteurCapture()
+
+# PostgreSQL
+def tailles_tables_postgres(engine) -> Dict[str, float]:
+    from sqlalchemy import text
+    with engine.connect() as conn:
+        lignes = conn.execute(text("""
+            SELECT c.relname, c.reltuples FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relkind = 'r' AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+        """))
+        return {relation: max(float(reltuples), 0) for relation, reltuples in lignes}
+
+def expliquer_sql(engine, requete: Dict, analyze: bool) -> Dict:
+    """EXPLAIN de la requête telle qu'envoyée au pilote (mêmes paramètres), dans une transaction annulée"""
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    connexion = engine.raw_connection()
+    try:
+        curseur = connexion.cursor()
+        curseur.execute("SET statement_timeout = 60000")
+        curseur.execute(f"EXPLAIN ({options}) {requete['requete']}", requete["parametres"])
+        plan = curseur.fetchone()[0]
+        connexion.rollback()
+    finally:
+        connexion.close()
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    return plan[0]
+
+def analyser_plan_sql(explication: Dict, tailles_tables: Dict[str, float], seuil_lignes: int) -> Dict:
+    racine = explication["Plan"]
+    signature, alertes = [], []
+
+    def parcourir(noeud):
+        relation = noeud.get("Relation Name")
+        index = noeud.get("Index Name")
+        libelle = noeud["Node Type"]
+        if relation:
+            libelle += f" on {relation}"
+        if index:
+            libelle += f" using {index}"
+        signature.append(libelle)
+        if noeud["Node Type"] == "Seq Scan" and tailles_tables.get(relation, 0) >= seuil_lignes:
+            alertes.append(f"seq_scan:{relation}")
+        for enfant in noeud.get("Plans", []):
+            parcourir(enfant)
+
+    parcourir(racine)
+    if racine.get("Plan Rows", 0) >= seuil_lignes:
+        alertes.append("estimation_lignes")
+    resultat = {
+        "signature": signature,
+        "cout_total": racine.get("Total Cost"),
+        "lignes_estimees": racine.get("Plan Rows"),
+        "alertes": sorted(set(alertes)),
+    }
+    if "Execution Time" in explication:
+        resultat["duree_ms"] = explication["Execution Time"]
+    return resultat
+
+# MongoDB
+def expliquer_mongo(client, requete: Dict, analyze: bool) -> Dict:
+    return client[requete["base_mongo"]].command({
+        "explain": requete["commande"],
+        "verbosity": "executionStats" if analyze else "queryPlanner",
+    })
+
+def _plans_gagnants(explication: Dict):
+    """(plan gagnant, statistiques d'exécution) pour find/count/distinct et chaque $cursor d'un aggregate"""
+    if "queryPlanner" in explication:
+        yield explication["queryPlanner"].get("winningPlan", {}), explication.get("executionStats")
+    for etape in explication.get("stages", []):
+        curseur = etape.get("$cursor")
+        if curseur and "queryPlanner" in curseur:
+            yield curseur["queryPlanner"].get("winningPlan", {}), curseur.get("executionStats")
+
+def _etapes_plan(plan: Dict):
+    if not plan:
+        return
+    # Moteur SBE : le plan classique est dans "queryPlan"
+    if "queryPlan" in plan:
+        yield from _etapes_plan(plan["queryPlan"])
+        return
+    yield plan
+    if "inputStage" in plan:
+        yield from _etapes_plan(plan["inputStage"])
+    for sous_plan in plan.get("inputStages", []):
+        yield from _etapes_plan(sous_plan)
+
+def analyser_plan_mongo(explication: Dict, requete: Dict, tailles_collections: Dict[str, int], seuil_lignes: int) -> Dict:
+    signature, alertes = [], []
+    documents_examines = 0
+    for plan, statistiques in _plans_gagnants(explication):
+        for etape in _etapes_plan(plan):
+            libelle = etape.get("stage", "?")
+            if etape.get("indexName"):
+                libelle += f" using {etape['indexName']}"
+            signature.append(libelle)
+            if etape.get("stage") == "COLLSCAN" and tailles_collections.get(requete["collection"], 0) >= seuil_lignes:
+                alertes.append(f"collscan:{requete['collection']}")
+        if statistiques:
+            documents_examines += statistiques.get("totalDocsExamined", 0)
+    # Étapes du pipeline exécutées après le curseur ($group, $unwind, ...)
+    for etape in explication.get("stages", []):
+        nom = next(iter(etape), None)
+        if nom and nom != "$cursor":
+            signature.append(nom)
+    resultat = {"signature": signature, "alertes": sorted(set(alertes))}
+    if "executionStats" in explication or any(s for _, s in _plans_gagnants(explication)):
+        resultat["documents_examines"] = documents_examines
+        if documents_examines >= seuil_lignes:
+            resultat["alertes"] = sorted(set(resultat["alertes"]) | {"documents_examines"})
+    return resultat
+
+# Comparaison à la référence
+def scenarios_en_erreur(appels: Dict[str, Dict]) -> List[str]:
+    """Scénarios dont la route a répondu par une erreur serveur ou un statut inattendu"""
+    return sorted(nom for nom, appel in appels.items() if appel["statut"] >= 500 or appel.get("inattendu"))
+
+def comparer(actuelles: Dict[str, Dict], reference: Dict[str, Dict], tolerance_cout: float,
+             appels: Dict[str, Dict]) -> Dict[str, List]:
+    """
+    Bilan par requête ; sont des échecs : les requêtes dégradées (dont EXPLAIN
+    en échec), les requêtes disparues et les scénarios en erreur (5xx ou statut inattendu)
+    """
+    bilan = {
+        "degradees": [], "modifiees": [], "nouvelles": [],
+        "disparues": sorted(set(reference) - set(actuelles)),
+        "scenarios_en_erreur": scenarios_en_erreur(appels),
+    }
+    for cle, actuelle in actuelles.items():
+        precedente = reference.get(cle)
+        if actuelle.get("erreur"):
+            actuelle["statut"] = "degradee"
+            actuelle["raisons"] = [f"EXPLAIN en échec : {actuelle['erreur']}"]
+            bilan["degradees"].append(cle)
+            continue
+        if precedente is None:
+            actuelle["statut"] = "nouvelle"
+            bilan["nouvelles"].append(cle)
+            continue
+        raisons = [f"nouvelle alerte {alerte}" for alerte in sorted(set(actuelle.get("alertes", [])) - set(precedente.get("alertes", [])))]
+        for mesure in ("cout_total", "documents_examines"):
+            avant, apres = precedente.get(mesure), actuelle.get(mesure)
+            if avant and apres and apres > avant * tolerance_cout:
+                raisons.append(f"{mesure} {avant} -> {apres}")
+        if raisons:
+            actuelle["statut"] = "degradee"
+            actuelle["raisons"] = raisons
+            actuelle["signature_reference"] = precedente.get("signature")
+            bilan["degradees"].append(cle)
+        elif actuelle.get("signature") != precedente.get("signature"):
+            actuelle["statut"] = "modifiee"
+            actuelle["signature_reference"] = precedente.get("signature")
+            bilan["modifiees"].append(cle)
+        else:
+            actuelle["statut"] = "identique"
+    return bilan
+
+def main():
+    options = lire_options(sys.argv[1:], OPTIONS_DEFAUT)
+    from donnees_synthetiques import lire_echelle, charger_postgres, charger_mongo
+    echelle = lire_echelle(options["--echelle"])
+    graine = int(options["--graine"])
+    bases = {base.strip() for base in options["--bases"].split(",") if base.strip()}
+    seuil_lignes = int(options["--seuil-lignes"])
+    tolerance_cout = float(options["--tolerance-cout"])
+    analyze = options["--analyze"] == "true"
+    chemin_reference = options["--reference"] or os.path.join(DOSSIER_REFERENCES, f"plans_{options['--echelle']}.json")
+
+    preparer_api()
+    from pymongo import MongoClient, monitoring
+    from fastapi.testclient import TestClient
+    from config.config import settings
+    from database.requetes_lentes import (
+        route_courante, ROUTE_HORS_REQUETE, empreinte, forme_commande_mongo, CHAMPS_PROTOCOLE_MONGO
+    )
+    from scenarios import SCENARIOS, UTILISATEUR_PERF, contexte_scenarios, preparer_appel, statut_inattendu
+
+    capture = CaptureRequetes(route_courante, ROUTE_HORS_REQUETE, empreinte, forme_commande_mongo, CHAMPS_PROTOCOLE_MONGO)
+    # Avant la création des clients Motor de l'API : l'écouteur global s'applique à eux
+    monitoring.register(capture.ecouteur_mongo())
+
+    from database.database import engine
+    capture.ecouter_sqlalchemy(engine)
+    client_mongo = MongoClient(settings.get_mongodb_url(), serverSelectionTimeoutMS=settings.mongodb_server_selection_timeout_ms)
+    db_mongo = client_mongo[settings.mongodb_database]
+
+    print("🔬 PLANS D'EXÉCUTION DES REQUÊTES DE L'API")
+    print("=" * 60)
+    print(f"🗄️ PostgreSQL : {settings.postgres_host}/{settings.postgres_db} | 🍃 MongoDB : {settings.mongodb_database}")
+
+    chargement = {}
+    if options["--charger"] == "true":
+        print(f"📥 Chargement du catalogue synthétique : échelle {options['--echelle']} (graine {graine})")
+        processus = int(options["--processus"])
+        if "postgres" in bases:
+            chargement["postgres"] = charger_postgres(settings.get_database_url(), echelle, graine, processus)
+        if "mongo" in bases:
+            chargement["mongo"] = charger_mongo(settings.get_mongodb_url(), settings.mongodb_database, echelle, graine, processus)
+        print(f"✅ Chargé : {json.dumps(chargement, ensure_ascii=False)}")
+
+    contexte = contexte_scenarios(
+        engine if "postgres" in bases else None,
+        db_mongo if "mongo" in bases else None
+    )
+
+    import main as application
+    from auth.auth import require_jwt
+    application.app.dependency_overrides[require_jwt] = lambda: SimpleNamespace(id=0, email=UTILISATEUR_PERF["email"], is_active=True)
+
+    appels = {}
+    with TestClient(application.app) as client:
+        for scenario in SCENARIOS:
+            if scenario["base"] not in bases:
+                continue
+            capture.scenario = scenario["nom"]
+            debut = time.perf_counter()
+            reponse = client.request(**preparer_appel(scenario, contexte))
+            appels[scenario["nom"]] = {
+                "statut": reponse.status_code,
+                "inattendu": statut_inattendu(scenario, reponse.status_code),
+                "duree_ms": round((time.perf_counter() - debut) * 1000, 1),
+            }
+            symbole = "❌" if reponse.status_code >= 500 or appels[scenario["nom"]]["inattendu"] else "✅"
+            print(f"{symbole} {scenario['nom']:<28} {reponse.status_code}  {appels[scenario['nom']]['duree_ms']} ms")
+        capture.scenario = None
+
+    tailles_tables = tailles_tables_postgres(engine) if "postgres" in bases else {}
+    tailles_collections = {nom: db_mongo[nom].estimated_document_count() for nom in db_mongo.list_collection_names()} if "mongo" in bases else {}
+
+    resultats: Dict[str, Dict] = {}
+    for cle, requete in sorted(capture.requetes.items()):
+        entree = {
+            "base": requete["base"],
+            "routes": requete["routes"],
+            "scenarios": requete["scenarios"],
+            "requete": requete["requete"],
+        }
+        try:
+            if requete["base"] == "postgres":
+                entree.update(analyser_plan_sql(expliquer_sql(engine, requete, analyze), tailles_tables, seuil_lignes))
+            else:
+                entree["collection"] = requete["collection"]
+                entree.update(analyser_plan_mongo(expliquer_mongo(client_mongo, requete, analyze), requete, tailles_collections, seuil_lignes))
+        except Exception as e:
+            entree["erreur"] = str(e).splitlines()[0] if str(e) else type(e).__name__
+        resultats[cle] = entree
+
+    reference = {}
+    if options["--enregistrer-reference"] != "true" and os.path.exists(chemin_reference):
+        with open(chemin_reference, encoding="utf-8") as f:
+            reference = json.load(f).get("requetes", {})
+    bilan = comparer(resultats, reference, tolerance_cout, appels) if reference else None
+
+    rapport = {
+        "configuration": {
+            "echelle": options["--echelle"], "graine": graine, "bases": sorted(bases), "analyze": analyze,
+            "seuil_lignes": seuil_lignes, "tolerance_cout": tolerance_cout,
+            "reference": chemin_reference if reference else None,
+        },
+        "chargement": chargement,
+        "appels": appels,
+        "requetes": resultats,
+        "alertes": {cle: r["alertes"] for cle, r in resultats.items() if r.get("alertes")},
+        "bilan": bilan,
+    }
+
+    with open(options["--sortie"], "w", encoding="utf-8") as f:
+        json.dump(rapport, f, ensure_ascii=False, indent=2, default=str)
+
+    print("=" * 60)
+    print(f"🔎 {len(resultats)} requêtes distinctes, {len(rapport['alertes'])} avec alerte")
+    for cle, alertes in rapport["alertes"].items():
+        print(f"   ⚠️ {cle} ({', '.join(resultats[cle]['routes'])}) : {', '.join(alertes)}")
+    for cle, entree in resultats.items():
+        if entree.get("erreur"):
+            print(f"   ❌ {cle} : {entree['erreur']}")
+    print(f"💾 Rapport sauvegardé : {options['--sortie']}")
+
+    echecs_sans_reference = scenarios_en_erreur(appels) + [cle for cle, entree in resultats.items() if entree.get("erreur")]
+    if options["--enregistrer-reference"] == "true":
+        if echecs_sans_reference:
+            # Une référence sans les requêtes d'une route cassée ne détecterait plus rien
+            print(f"❌ Référence non enregistrée : scénarios en erreur ou EXPLAIN en échec ({', '.join(echecs_sans_reference)})")
+            return 1
+        os.makedirs(os.path.dirname(chemin_reference), exist_ok=True)
+        with open(chemin_reference, "w", encoding="utf-8") as f:
+            json.dump({"configuration": rapport["configuration"], "requetes": resultats}, f, ensure_ascii=False, indent=2, sort_keys=True, default=str)
+        print(f"📌 Référence enregistrée : {chemin_reference}")
+        return 0
+
+    if bilan is None:
+        print(f"ℹ️ Pas de référence ({chemin_reference}) : relancer avec --enregistrer-reference pour en créer une")
+        for nom in scenarios_en_erreur(appels):
+            print(f"   ❌ scénario {nom} : statut {appels[nom]['statut']}")
+        return 1 if echecs_sans_reference else 0
+
+    print(f"📊 Comparaison à la référence : {len(bilan['degradees'])} dégradée(s), {len(bilan['modifiees'])} modifiée(s), "
+          f"{len(bilan['nouvelles'])} nouvelle(s), {len(bilan['disparues'])} disparue(s), "
+          f"{len(bilan['scenarios_en_erreur'])} scénario(s) en erreur")
+    for cle in bilan["degradees"]:
+        print(f"   ❌ {cle} ({', '.join(resultats[cle]['routes'])}) : {'; '.join(resultats[cle]['raisons'])}")
+    for cle in bilan["disparues"]:
+        print(f"   ❌ {cle} ({', '.join(reference[cle].get('routes', []))}) : requête plus émise")
+    for nom in bilan["scenarios_en_erreur"]:
+        print(f"   ❌ scénario {nom} : statut {appels[nom]['statut']}")
+    return 1 if bilan["degradees"] or bilan["disparues"] or bilan["scenarios_en_erreur"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
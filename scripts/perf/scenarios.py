@@ -0,0 +1,140 @@
+"""
+Appels représentatifs des routes de l'API
+=========================================
+
+Chaque scénario décrit un appel HTTP (méthode, chemin, paramètres, corps) sur
+le jeu de données synthétique, avec son poids dans le mélange d'appels rejoué
+par le benchmark HTTP (fréquence relative : détails et listes dominent,
+analytics et connexion sont rares). Les valeurs entre accolades ({postgres_livre_id},
+{genre}, ...) et les fonctions sont résolues avec le contexte obtenu par
+contexte_scenarios (identifiants réellement présents en base).
+
+Un scénario attend 200 sauf mention contraire ("statuts_attendus") : un autre
+statut 3xx/4xx (404 d'une route mal déclarée, 422 d'un paramètre refusé) veut
+dire que l'appel ne mesure pas la route visée, et fait échouer les harnais.
+"""
+
+from typing import Any, Dict, List
+
+from donnees_synthetiques import GENRES
+
+# Compte créé par le benchmark HTTP pour les appels authentifiés
+UTILISATEUR_PERF = {"email": "perf@databook.fr", "password": "mot-de-passe-perf"}
+
+STATUTS_ATTENDUS = (200,)
+
+SCENARIOS: List[Dict[str, Any]] = [
+    # Authentification (requête sur la table des utilisateurs)
+    {"nom": "auth_login", "poids": 1, "base": "postgres", "methode": "POST", "chemin": "/auth/login",
+     # 401 admis : le harnais des plans ne crée pas le compte, seule la requête SQL compte
+     "json": UTILISATEUR_PERF, "statuts_attendus": (200, 401)},
+
+    # PostgreSQL - livres
+    {"nom": "pg_liste", "poids": 10, "base": "postgres", "methode": "GET", "chemin": "/postgres/livres", "params": {"limit": 20}},
+    {"nom": "pg_liste_page_lointaine", "poids": 2, "base": "postgres", "methode": "GET", "chemin": "/postgres/livres",
+     "params": {"limit": 20, "offset": "{offset_lointain}"}},
+    {"nom": "pg_liste_recherche", "poids": 6, "base": "postgres", "methode": "GET", "chemin": "/postgres/livres",
+     "params": {"search": "Livre 42", "limit": 20}},
+    {"nom": "pg_liste_auteur", "poids": 4, "base": "postgres", "methode": "GET", "chemin": "/postgres/livres",
+     "params": {"auteur": "Auteur 7", "limit": 20}},
+    {"nom": "pg_liste_editeur", "poids": 2, "base": "postgres", "methode": "GET", "chemin": "/postgres/livres",
+     "params": {"editeur": "Éditions 3", "limit": 20}},
+    {"nom": "pg_liste_langue", "poids": 3, "base": "postgres", "methode": "GET", "chemin": "/postgres/livres",
+     "params": {"langue": "fre", "limit": 20}},
+    {"nom": "pg_detail", "poids": 15, "base": "postgres", "methode": "GET", "chemin": "/postgres/livres/{postgres_livre_id}"},
+    {"nom": "pg_batch", "poids": 4, "base": "postgres", "methode": "POST", "chemin": "/postgres/livres/batch",
+     "json": lambda contexte: {"ids": contexte["postgres_ids"]}},
+    {"nom": "pg_export", "poids": 1, "base": "postgres", "methode": "GET", "chemin": "/postgres/livres/export",
+     "params": {"limit": 500, "langue": "fre"}},
+    {"nom": "pg_stats_generales", "poids": 2, "base": "postgres", "methode": "GET", "chemin": "/postgres/livres/stats/general"},
+
+    # PostgreSQL - analytics
+    {"nom": "pg_analytics", "poids": 1, "base": "postgres", "methode": "GET", "chemin": "/postgres-extras/analytics"},
+    {"nom": "pg_top_auteurs", "poids": 1, "base": "postgres", "methode": "GET", "chemin": "/postgres-extras/auteurs/top"},
+    {"nom": "pg_top_editeurs", "poids": 1, "base": "postgres", "methode": "GET", "chemin": "/postgres-extras/editeurs/top"},
+    {"nom": "pg_stats_annees", "poids": 1, "base": "postgres", "methode": "GET", "chemin": "/postgres-extras/livres/stats-annees"},
+    {"nom": "pg_stats_langues", "poids": 1, "base": "postgres", "methode": "GET", "chemin": "/postgres-extras/livres/stats-langues"},
+    {"nom": "pg_stats_pages", "poids": 1, "base": "postgres", "methode": "GET", "chemin": "/postgres-extras/livres/stats-pages"},
+    {"nom": "pg_stats_formats", "poids": 1, "base": "postgres", "methode": "GET", "chemin": "/postgres-extras/livres/stats-formats"},
+    {"nom": "pg_distribution", "poids": 1, "base": "postgres", "methode": "GET", "chemin": "/postgres-extras/livres/distribution",
+     "params": {"champ": "nombre_pages", "langue": "fre"}},
+
+    # MongoDB - livres et critiques
+    {"nom": "mongo_liste", "poids": 8, "base": "mongo", "methode": "GET", "chemin": "/mongo-livres/livres",
+     "params": {"limit": 20, "fields": "card"}},
+    {"nom": "mongo_liste_page_lointaine", "poids": 1, "base": "mongo", "methode": "GET", "chemin": "/mongo-livres/livres",
+     "params": {"limit": 20, "skip": "{offset_lointain}", "fields": "card"}},
+    {"nom": "mongo_liste_titre", "poids": 4, "base": "mongo", "methode": "GET", "chemin": "/mongo-livres/livres",
+     "params": {"titre": "Livre 42", "limit": 20}},
+    {"nom": "mongo_liste_auteur", "poids": 3, "base": "mongo", "methode": "GET", "chemin": "/mongo-livres/livres",
+     "params": {"auteur": "Auteur 7", "limit": 20}},
+    {"nom": "mongo_detail", "poids": 10, "base": "mongo", "methode": "GET", "chemin": "/mongo-livres/livres/{mongo_livre_id}"},
+    {"nom": "mongo_batch", "poids": 3, "base": "mongo", "methode": "POST", "chemin": "/mongo-livres/livres/batch",
+     "json": lambda contexte: {"ids": contexte["mongo_ids"], "inclure_critiques": True}},
+    {"nom": "mongo_recherche", "poids": 6, "base": "mongo", "methode": "GET", "chemin": "/mongo-livres/livres/search",
+     "params": {"q": "Livre 12", "limit": 20, "fields": "detail"}},
+    {"nom": "mongo_export", "poids": 1, "base": "mongo", "methode": "GET", "chemin": "/mongo-livres/livres/export",
+     "params": {"limit": 500, "note_min": 4}},
+    {"nom": "mongo_critiques", "poids": 3, "base": "mongo", "methode": "GET", "chemin": "/mongo-livres/critiques",
+     "params": {"note_min": 3, "limit": 20}},
+    {"nom": "mongo_critique_detail", "poids": 3, "base": "mongo", "methode": "GET", "chemin": "/mongo-livres/critiques/{critique_id}"},
+    {"nom": "mongo_statistiques", "poids": 1, "base": "mongo", "methode": "GET", "chemin": "/mongo-livres/statistiques"},
+
+    # MongoDB - analytics
+    {"nom": "mongo_genres", "poids": 1, "base": "mongo", "methode": "GET", "chemin": "/mongo-extras/genres"},
+    {"nom": "mongo_auteurs", "poids": 1, "base": "mongo", "methode": "GET", "chemin": "/mongo-extras/auteurs"},
+    {"nom": "mongo_par_genre", "poids": 2, "base": "mongo", "methode": "GET", "chemin": "/mongo-extras/livres/genre/{genre}",
+     "params": {"fields": "card"}},
+    {"nom": "mongo_par_auteur", "poids": 2, "base": "mongo", "methode": "GET", "chemin": "/mongo-extras/livres/auteur/{auteur}",
+     "params": {"fields": "card"}},
+    {"nom": "mongo_top_livres", "poids": 1, "base": "mongo", "methode": "GET", "chemin": "/mongo-extras/livres/top-notes"},
+    {"nom": "mongo_top_critiques", "poids": 1, "base": "mongo", "methode": "GET", "chemin": "/mongo-extras/critiques/top-notes"},
+    {"nom": "mongo_analytics", "poids": 1, "base": "mongo", "methode": "GET", "chemin": "/mongo-extras/analytics"},
+    {"nom": "mongo_recherche_avancee", "poids": 2, "base": "mongo", "methode": "GET", "chemin": "/mongo-extras/recherche-avancee",
+     "params": {"genre": "{genre}", "langue": "fre", "note_min": 3}},
+    {"nom": "mongo_distribution", "poids": 1, "base": "mongo", "methode": "GET", "chemin": "/mongo-extras/critiques/distribution"},
+]
+
+def contexte_scenarios(engine=None, mongo_db=None) -> Dict[str, Any]:
+    """Identifiants et valeurs présents en base, utilisés dans les chemins et paramètres"""
+    contexte: Dict[str, Any] = {"genre": GENRES[0], "auteur": "Auteur 1", "offset_lointain": 0}
+    if engine is not None:
+        from sqlalchemy import text
+        with engine.connect() as conn:
+            ids = [ligne[0] for ligne in conn.execute(text("SELECT id_livre FROM test.livre ORDER BY id_livre LIMIT 50"))]
+            total = conn.execute(text("SELECT COUNT(*) FROM test.livre")).scalar() or 0
+        contexte["postgres_ids"] = ids
+        contexte["postgres_livre_id"] = ids[len(ids) // 2] if ids else 1
+        contexte["offset_lointain"] = max(0, int(total * 0.9))
+    if mongo_db is not None:
+        ids = [str(doc["_id"]) for doc in mongo_db.livres.find({}, {"_id": 1}).sort("_id", 1).limit(50)]
+        critique = mongo_db.critiques_livres.find_one({}, {"_id": 1})
+        contexte["mongo_ids"] = ids
+        contexte["mongo_livre_id"] = ids[len(ids) // 2] if ids else "000000000000000000000000"
+        contexte["critique_id"] = str(critique["_id"]) if critique else "000000000000000000000000"
+    return contexte
+
+def _resoudre(valeur, contexte):
+    if callable(valeur):
+        return valeur(contexte)
+    if isinstance(valeur, str) and "{" in valeur:
+        # Valeur entière seule : garder son type (offset, identifiant)
+        if valeur.startswith("{") and valeur.endswith("}") and valeur.count("{") == 1:
+            return contexte[valeur[1:-1]]
+        return valeur.format(**contexte)
+    if isinstance(valeur, dict):
+        return {cle: _resoudre(v, contexte) for cle, v in valeur.items()}
+    return valeur
+
+def statut_inattendu(scenario: Dict[str, Any], statut) -> bool:
+    """Réponse hors erreur serveur (3xx/4xx) qui n'est pas celle attendue par le scénario"""
+    return isinstance(statut, int) and statut < 500 and statut not in scenario.get("statuts_attendus", STATUTS_ATTENDUS)
+
+def preparer_appel(scenario: Dict[str, Any], contexte: Dict[str, Any]) -> Dict[str, Any]:
+    """Arguments de requête (method, url, params, json) d'un scénario résolu"""
+    appel = {"method": scenario["methode"], "url": scenario["chemin"].format(**contexte)}
+    if scenario.get("params"):
+        appel["params"] = _resoudre(scenario["params"], contexte)
+    if scenario.get("json") is not None:
+        appel["json"] = _resoudre(scenario["json"], contexte)
+    return appel
@@ -0,0 +1,94 @@
+-- =============================================
+-- DATABOOK - Schéma "test" interrogé par l'API
+-- Reprend les tables créées par bdd/livres/formatage_bdd_postgresql.py
+-- (clés primaires et contraintes d'unicité seulement, sans index secondaire)
+-- Utilisé par scripts/perf pour charger les jeux de données synthétiques :
+-- les tables sont créées sans contraintes, contraintes_api.sql les ajoute
+-- après le chargement en masse (COPY), ce qui est bien plus rapide
+-- =============================================
+
+CREATE SCHEMA IF NOT EXISTS test;
+
+DROP TABLE IF EXISTS test.livre_sujet CASCADE;
+DROP TABLE IF EXISTS test.livre_langue CASCADE;
+DROP TABLE IF EXISTS test.livre_editeur CASCADE;
+DROP TABLE IF EXISTS test.livre_auteur CASCADE;
+DROP TABLE IF EXISTS test.sujet CASCADE;
+DROP TABLE IF EXISTS test.langue CASCADE;
+DROP TABLE IF EXISTS test.editeur CASCADE;
+DROP TABLE IF EXISTS test.auteur CASCADE;
+DROP TABLE IF EXISTS test.livre CASCADE;
+
+CREATE TABLE test.livre (
+    id_livre SERIAL,
+    ol_id VARCHAR(50) NOT NULL,
+    titre VARCHAR(1000) NOT NULL,
+    sous_titre VARCHAR(1000),
+    isbn_10 VARCHAR(20),
+    isbn_13 VARCHAR(20),
+    date_publication VARCHAR(100),
+    annee_publication INTEGER,
+    nombre_pages INTEGER,
+    format_physique VARCHAR(100),
+    description TEXT,
+    couverture_url VARCHAR(500),
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP
+);
+
+CREATE TABLE test.auteur (
+    id_auteur SERIAL,
+    ol_id VARCHAR(50),
+    nom VARCHAR(200),
+    prenom VARCHAR(200),
+    nom_complet VARCHAR(400),
+    date_naissance VARCHAR(50),
+    date_deces VARCHAR(50),
+    biographie TEXT,
+    created_at TIMESTAMP
+);
+
+CREATE TABLE test.editeur (
+    id_editeur SERIAL,
+    nom_editeur VARCHAR(300) NOT NULL,
+    pays VARCHAR(100),
+    annee_creation INTEGER,
+    created_at TIMESTAMP
+);
+
+CREATE TABLE test.langue (
+    id_langue SERIAL,
+    code_langue VARCHAR(10) NOT NULL,
+    nom_langue VARCHAR(100)
+);
+
+CREATE TABLE test.sujet (
+    id_sujet SERIAL,
+    nom_sujet VARCHAR(200) NOT NULL,
+    categorie VARCHAR(100)
+);
+
+CREATE TABLE test.livre_auteur (
+    id_livre INTEGER,
+    id_auteur INTEGER,
+    role VARCHAR(50) DEFAULT 'author',
+    ordre INTEGER DEFAULT 1
+);
+
+CREATE TABLE test.livre_editeur (
+    id_livre INTEGER,
+    id_editeur INTEGER,
+    ordre INTEGER DEFAULT 1
+);
+
+CREATE TABLE test.livre_langue (
+    id_livre INTEGER,
+    id_langue INTEGER,
+    langue_principale BOOLEAN DEFAULT FALSE
+);
+
+CREATE TABLE test.livre_sujet (
+    id_livre INTEGER,
+    id_sujet INTEGER,
+    pertinence FLOAT DEFAULT 1.0
+);
@@ -7,6 +7,9 @@ import re
 from datetime import datetime
 import os
 
+# URL de base surchargeable (ex : serveur de fixtures local pour les tests et benchmarks)
+BABELIO_BASE_URL = os.getenv("BABELIO_BASE_URL", "https://www.babelio.com").rstrip("/")
+
 headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"}
 
 def extraire_repartition_notes(soup):
@@ -174,11 +177,12 @@ def extraire_isbn_13_by_csv(fichier_csv):
     list_isbn = df['ISBN'].tolist()
     return list_isbn
 
-def chercher_babelio_par_isbn(isbn13):
+def chercher_babelio_par_isbn(isbn13, base_url=None):
     """
     Recherche un livre sur Babelio à partir de son ISBN
     """
-    url = "https://www.babelio.com/recherche.php"
+    base_url = (base_url or BABELIO_BASE_URL).rstrip("/")
+    url = f"{base_url}/recherche.php"
     
     # Données du formulaire POST (comme observé dans les DevTools)
     data = {
@@ -206,7 +210,7 @@ def chercher_babelio_par_isbn(isbn13):
         else:
             print("✅ Lien trouvé avec class='titre1'")
 
-        lien_fiche = "https://www.babelio.com" + lien["href"]
+        lien_fiche = base_url + lien["href"]
         return scraper_fiche_babelio(lien_fiche, isbn13)
         
     except Exception as e:
@@ -0,0 +1,2 @@
+# Serveur de fixtures local (Babelio, OpenLibrary, Google Books) pour tests et benchmarks
+from .serveur import ConfigurationFixtures, ServeurFixtures, demarrer_serveur, arreter_serveur
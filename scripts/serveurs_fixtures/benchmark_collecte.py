@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark hors-ligne de la chaîne de collecte
+=============================================
+
+Démarre le serveur de fixtures en arrière-plan, pointe les collecteurs
+(Google Books, OpenLibrary, Babelio) dessus via leurs URLs de base, puis
+mesure le débit de collecte à concurrence fixée. Le rapport est écrit en JSON.
+
+Utilisation (depuis la racine du dépôt) :
+    python scripts/serveurs_fixtures/benchmark_collecte.py [--threads 8] [--termes 20]
+        [--latence 20-80] [--erreurs 0.01] [--429 0.02] [--rps 0] [--sortie rapport.json]
+"""
+
+import contextlib
+import importlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DOSSIER_SCRIPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DOSSIER_SCRIPTS)
+sys.path.insert(0, os.path.join(DOSSIER_SCRIPTS, "api"))
+sys.path.insert(0, os.path.join(DOSSIER_SCRIPTS, "scrapping"))
+
+from serveurs_fixtures.serveur import demarrer_serveur, arreter_serveur, lire_arguments
+
+def _chronometrer(fonction, elements, nb_threads):
+    """Exécuter `fonction` sur chaque élément en parallèle ; retourne (résultats, durée)"""
+    debut = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=nb_threads) as executeur:
+        resultats = list(executeur.map(fonction, elements))
+    return resultats, time.perf_counter() - debut
+
+def benchmark_apis(urls, termes, nb_threads, dossier_travail):
+    """Débit Google Books + OpenLibrary via RecuperateurLivresAmeliore"""
+    module = importlib.import_module("recupération_api_livre_amelioree")
+    recuperateur = module.RecuperateurLivresAmeliore(
+        google_base_url=urls["googlebooks"],
+        openlibrary_base_url=urls["openlibrary"],
+        dossier_output=dossier_travail,
+        pauses=False
+    )
+
+    def collecter(terme):
+        livres = recuperateur.recuperer_google_books(f"subject:{terme}", max_results=120)
+        livres += recuperateur.recuperer_open_library(terme, max_results=100)
+        return livres
+
+    resultats, duree = _chronometrer(collecter, termes, nb_threads)
+    tous_livres = [livre for lot in resultats for livre in lot]
+    uniques = recuperateur.deduplicateur.dedupliquer_lot(tous_livres)
+    recuperateur.deduplicateur.fermer()
+
+    return {
+        "duree_s": round(duree, 3),
+        "requetes": recuperateur.stats["requetes"],
+        "erreurs": recuperateur.stats["erreurs"],
+        "livres_collectes": len(tous_livres),
+        "livres_uniques": len(uniques),
+        "requetes_par_seconde": round(recuperateur.stats["requetes"] / duree, 1) if duree else None,
+        "livres_par_seconde": round(len(tous_livres) / duree, 1) if duree else None,
+    }
+
+def benchmark_babelio(urls, nb_isbn, nb_threads):
+    """Débit recherche + scraping de fiches Babelio"""
+    scraper = importlib.import_module("babelio_scraper_final")
+    isbns = [f"978207036{n:04d}" for n in range(nb_isbn)]
+
+    def scraper_isbn(isbn):
+        # Le scraper est très bavard : on coupe sa sortie pendant la mesure
+        with contextlib.redirect_stdout(io.StringIO()):
+            return scraper.chercher_babelio_par_isbn(isbn, base_url=urls["babelio"])
+
+    resultats, duree = _chronometrer(scraper_isbn, isbns, nb_threads)
+    reussis = [r for r in resultats if r and r.get("titre")]
+
+    return {
+        "duree_s": round(duree, 3),
+        "isbn_traites": len(isbns),
+        "fiches_extraites": len(reussis),
+        "fiches_par_seconde": round(len(isbns) / duree, 1) if duree else None,
+    }
+
+def main():
+    arguments = sys.argv[1:]
+    options = {"--threads": "8", "--termes": "20", "--isbn": "50", "--sortie": "benchmark_collecte.json"}
+    arguments_serveur = []
+    i = 0
+    while i < len(arguments):
+        if arguments[i] in options:
+            options[arguments[i]] = arguments[i + 1]
+        else:
+            arguments_serveur += arguments[i:i + 2]
+        i += 2
+
+    config, _ = lire_arguments(arguments_serveur)
+    nb_threads = int(options["--threads"])
+    serveur = demarrer_serveur(config)
+    urls = serveur.urls_services()
+
+    print("⏱️ BENCHMARK HORS-LIGNE DE LA COLLECTE")
+    print("=" * 60)
+    print(f"🧪 Serveur de fixtures : {serveur.url_base} | threads : {nb_threads}")
+
+    try:
+        with tempfile.TemporaryDirectory() as dossier_travail:
+            termes = [f"terme_{n}" for n in range(int(options["--termes"]))]
+            rapport = {
+                "configuration": {
+                    "threads": nb_threads,
+                    "latence_ms": [config.latence_min_ms, config.latence_max_ms],
+                    "taux_erreur": config.taux_erreur,
+                    "taux_429": config.taux_429,
+                    "requetes_par_seconde_max": config.requetes_par_seconde,
+                },
+                "apis": benchmark_apis(urls, termes, nb_threads, dossier_travail),
+                "babelio": benchmark_babelio(urls, int(options["--isbn"]), nb_threads),
+                "serveur": serveur.stats.en_dict(),
+            }
+    finally:
+        arreter_serveur(serveur)
+
+    with open(options["--sortie"], "w", encoding="utf-8") as f:
+        json.dump(rapport, f, ensure_ascii=False, indent=2)
+
+    print(json.dumps(rapport, ensure_ascii=False, indent=2))
+    print(f"💾 Rapport sauvegardé : {options['--sortie']}")
+
+if __name__ == "__main__":
+    main()
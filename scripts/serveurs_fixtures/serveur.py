@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Serveur de fixtures local pour Babelio, OpenLibrary et Google Books
+==================================================================
+
+Sert des réponses enregistrées (corpus local) sous trois préfixes :
+
+    /babelio/recherche.php        (POST, champ "Recherche")  -> page de résultats
+    /babelio/livres/...           (GET)                      -> fiche livre
+    /openlibrary/search.json      (GET, q / limit / page)    -> JSON paginé
+    /googlebooks/books/v1/volumes (GET, q / startIndex / maxResults) -> JSON paginé
+    /_stats                       (GET)                      -> compteurs du serveur
+
+Latence, taux d'erreurs 500, réponses 429 aléatoires et limitation de débit
+(seau à jetons par service) sont configurables pour reproduire les conditions
+réelles sans solliciter les vrais sites.
+
+Utilisation :
+    python serveur.py [--port 8765] [--latence 20-80] [--erreurs 0.01] [--429 0.02] [--rps 50]
+
+Puis pointer les collecteurs vers le serveur :
+    BABELIO_BASE_URL=http://127.0.0.1:8765/babelio
+    OPENLIBRARY_BASE_URL=http://127.0.0.1:8765/openlibrary
+    GOOGLE_BOOKS_BASE_URL=http://127.0.0.1:8765/googlebooks
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+DOSSIER_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+SERVICES = ("babelio", "openlibrary", "googlebooks")
+
+@dataclass
+class ConfigurationFixtures:
+    """Paramètres d'injection de latence et de fautes"""
+    latence_min_ms: float = 0.0
+    latence_max_ms: float = 0.0
+    taux_erreur: float = 0.0          # Proportion de réponses 500
+    taux_429: float = 0.0             # Proportion de réponses 429 aléatoires
+    requetes_par_seconde: float = 0.0  # Débit max par service (0 = illimité)
+    rafale: int = 10                  # Taille du seau à jetons
+    retry_after_s: int = 1
+    graine: Optional[int] = None
+    dossier_corpus: str = DOSSIER_CORPUS
+
+@dataclass
+class StatistiquesServeur:
+    """Compteurs thread-safe du serveur de fixtures"""
+    requetes: Dict[str, int] = field(default_factory=lambda: {s: 0 for s in SERVICES})
+    erreurs_injectees: int = 0
+    reponses_429: int = 0
+    reponses_404: int = 0
+    verrou: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def incrementer(self, compteur, service=None):
+        with self.verrou:
+            if service is not None:
+                self.requetes[service] = self.requetes.get(service, 0) + 1
+            else:
+                setattr(self, compteur, getattr(self, compteur) + 1)
+
+    def en_dict(self):
+        with self.verrou:
+            return {
+                "requetes": dict(self.requetes),
+                "erreurs_injectees": self.erreurs_injectees,
+                "reponses_429": self.reponses_429,
+                "reponses_404": self.reponses_404,
+            }
+
+class SeauJetons:
+    """Limiteur de débit simple (un seau par service)"""
+
+    def __init__(self, debit, capacite):
+        self.debit = debit
+        self.capacite = max(1, capacite)
+        self.jetons = float(self.capacite)
+        self.derniere_maj = time.monotonic()
+        self.verrou = threading.Lock()
+
+    def consommer(self):
+        with self.verrou:
+            maintenant = time.monotonic()
+            self.jetons = min(self.capacite, self.jetons + (maintenant - self.derniere_maj) * self.debit)
+            self.derniere_maj = maintenant
+            if self.jetons >= 1:
+                self.jetons -= 1
+                return True
+            return False
+
+class CorpusFixtures:
+    """Accès au corpus enregistré, avec cache en mémoire des fichiers lus"""
+
+    def __init__(self, dossier):
+        self.dossier = dossier
+        self.cache = {}
+        self.verrou = threading.Lock()
+
+    @staticmethod
+    def slug(valeur):
+        return re.sub(r"[^a-z0-9]+", "_", valeur.lower()).strip("_")[:80] or "defaut"
+
+    def lire(self, *candidats) -> Optional[bytes]:
+        """Retourner le contenu du premier fichier existant parmi les candidats"""
+        for relatif in candidats:
+            if relatif is None:
+                continue
+            chemin = os.path.join(self.dossier, relatif)
+            with self.verrou:
+                if chemin in self.cache:
+                    return self.cache[chemin]
+            if os.path.isfile(chemin):
+                with open(chemin, "rb") as f:
+                    contenu = f.read()
+                with self.verrou:
+                    self.cache[chemin] = contenu
+                return contenu
+        return None
+
+    def lire_json(self, *candidats):
+        contenu = self.lire(*candidats)
+        return json.loads(contenu) if contenu is not None else None
+
+def _entier(params, nom, defaut):
+    try:
+        return int(params.get(nom, [defaut])[0])
+    except (TypeError, ValueError):
+        return defaut
+
+class GestionnaireFixtures(BaseHTTPRequestHandler):
+    """Routage des requêtes vers le corpus, avec injection de fautes"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # Silencieux : les benchmarks génèrent des milliers de requêtes
+        pass
+
+    # --- Réponses ---
+
+    def _repondre(self, statut, corps: bytes, type_contenu="application/json; charset=utf-8", entetes=None):
+        self.send_response(statut)
+        self.send_header("Content-Type", type_contenu)
+        self.send_header("Content-Length", str(len(corps)))
+        for nom, valeur in (entetes or {}).items():
+            self.send_header(nom, valeur)
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def _repondre_json(self, statut, donnees, entetes=None):
+        self._repondre(statut, json.dumps(donnees, ensure_ascii=False).encode("utf-8"), entetes=entetes)
+
+    def _introuvable(self):
+        self.server.stats.incrementer("reponses_404")
+        self._repondre_json(404, {"error": "not found in fixture corpus", "path": self.path})
+
+    # --- Injection de fautes ---
+
+    def _injecter_fautes(self, service) -> bool:
+        """Appliquer latence / 429 / 500 ; retourne True si une réponse a déjà été envoyée"""
+        config = self.server.config
+        alea = self.server.alea
+
+        if config.latence_max_ms > 0:
+            with self.server.verrou_alea:
+                latence = alea.uniform(config.latence_min_ms, config.latence_max_ms)
+            time.sleep(latence / 1000.0)
+
+        seau = self.server.seaux.get(service)
+        with self.server.verrou_alea:
+            tirage_429 = alea.random()
+            tirage_500 = alea.random()
+
+        if (seau is not None and not seau.consommer()) or tirage_429 < config.taux_429:
+            self.server.stats.incrementer("reponses_429")
+            self._repondre_json(
+                429, {"error": "Too Many Requests"},
+                entetes={"Retry-After": str(config.retry_after_s)}
+            )
+            return True
+
+        if tirage_500 < config.taux_erreur:
+            self.server.stats.incrementer("erreurs_injectees")
+            self._repondre_json(500, {"error": "Injected server error"})
+            return True
+
+        return False
+
+    # --- Routage ---
+
+    def _router(self, methode):
+        # Lire le corps avant toute réponse pour garder la connexion keep-alive saine
+        longueur = int(self.headers.get("Content-Length") or 0)
+        corps = self.rfile.read(longueur) if longueur else b""
+
+        url = urlparse(self.path)
+        segments = [s for s in url.path.split("/") if s]
+
+        if segments == ["_stats"]:
+            self._repondre_json(200, self.server.stats.en_dict())
+            return
+
+        if not segments or segments[0] not in SERVICES:
+            self._introuvable()
+            return
+
+        service = segments[0]
+        chemin = "/".join(segments[1:])
+        params = parse_qs(url.query)
+        if methode == "POST" and corps:
+            params.update(parse_qs(corps.decode("utf-8", errors="replace")))
+        self.server.stats.incrementer(None, service=service)
+
+        if self._injecter_fautes(service):
+            return
+
+        if service == "babelio":
+            self._servir_babelio(chemin, params)
+        elif service == "openlibrary" and chemin == "search.json":
+            self._servir_openlibrary(params)
+        elif service == "googlebooks" and chemin == "books/v1/volumes":
+            self._servir_google_books(params)
+        else:
+            self._introuvable()
+
+    def _servir_babelio(self, chemin, params):
+        corpus = self.server.corpus
+        if chemin == "recherche.php":
+            terme = params.get("Recherche", [""])[0]
+            contenu = corpus.lire(f"babelio/recherche/{corpus.slug(terme)}.html", "babelio/recherche.html")
+        elif chemin.startswith("livres/"):
+            identifiant = corpus.slug(chemin.rsplit("/", 1)[-1])
+            contenu = corpus.lire(f"babelio/livres/{identifiant}.html", "babelio/livre.html")
+        else:
+            contenu = None
+
+        if contenu is None:
+            self._introuvable()
+        else:
+            self._repondre(200, contenu, type_contenu="text/html; charset=utf-8")
+
+    def _servir_openlibrary(self, params):
+        corpus = self.server.corpus
+        q = params.get("q", [""])[0]
+        donnees = corpus.lire_json(f"openlibrary/search/{corpus.slug(q)}.json", "openlibrary/search.json")
+        if donnees is None:
+            self._introuvable()
+            return
+
+        limite = max(1, _entier(params, "limit", 100))
+        page = max(1, _entier(params, "page", 1))
+        debut = (page - 1) * limite
+        docs = donnees.get("docs", [])
+        self._repondre_json(200, {
+            **donnees,
+            "start": debut,
+            "numFound": len(docs),
+            "docs": docs[debut:debut + limite],
+        })
+
+    def _servir_google_books(self, params):
+        corpus = self.server.corpus
+        q = params.get("q", [""])[0]
+        donnees = corpus.lire_json(f"googlebooks/volumes/{corpus.slug(q)}.json", "googlebooks/volumes.json")
+        if donnees is None:
+            self._introuvable()
+            return
+
+        debut = max(0, _entier(params, "startIndex", 0))
+        nombre = min(40, max(1, _entier(params, "maxResults", 10)))
+        items = donnees.get("items", [])
+        reponse = {"kind": donnees.get("kind", "books#volumes"), "totalItems": len(items)}
+        if items[debut:debut + nombre]:
+            reponse["items"] = items[debut:debut + nombre]
+        self._repondre_json(200, reponse)
+
+    def do_GET(self):
+        self._router("GET")
+
+    def do_POST(self):
+        self._router("POST")
+
+class ServeurFixtures(ThreadingHTTPServer):
+    """Serveur HTTP multi-thread portant la configuration, le corpus et les compteurs"""
+
+    daemon_threads = True
+
+    def __init__(self, adresse: Tuple[str, int], config: ConfigurationFixtures):
+        super().__init__(adresse, GestionnaireFixtures)
+        self.config = config
+        self.corpus = CorpusFixtures(config.dossier_corpus)
+        self.stats = StatistiquesServeur()
+        self.alea = random.Random(config.graine)
+        self.verrou_alea = threading.Lock()
+        self.seaux = {}
+        if config.requetes_par_seconde > 0:
+            self.seaux = {s: SeauJetons(config.requetes_par_seconde, config.rafale) for s in SERVICES}
+
+    @property
+    def url_base(self):
+        hote, port = self.server_address[:2]
+        return f"http://{hote}:{port}"
+
+    def urls_services(self):
+        """URLs de base à passer aux collecteurs"""
+        return {service: f"{self.url_base}/{service}" for service in SERVICES}
+
+def demarrer_serveur(config: Optional[ConfigurationFixtures] = None, hote="127.0.0.1", port=0):
+    """
+    Démarrer le serveur dans un thread d'arrière-plan.
+    port=0 choisit un port libre ; l'URL est disponible via `serveur.url_base`.
+    """
+    serveur = ServeurFixtures((hote, port), config or ConfigurationFixtures())
+    thread = threading.Thread(target=serveur.serve_forever, daemon=True)
+    thread.start()
+    return serveur
+
+def arreter_serveur(serveur):
+    """Arrêter proprement un serveur démarré avec demarrer_serveur"""
+    serveur.shutdown()
+    serveur.server_close()
+
+def lire_arguments(arguments):
+    """Analyse minimale des arguments de la ligne de commande"""
+    config = ConfigurationFixtures()
+    port = 8765
+    i = 0
+    while i < len(arguments):
+        nom = arguments[i]
+        valeur = arguments[i + 1] if i + 1 < len(arguments) else ""
+        if nom == "--port":
+            port = int(valeur)
+        elif nom == "--latence":
+            mini, _, maxi = valeur.partition("-")
+            config.latence_min_ms = float(mini)
+            config.latence_max_ms = float(maxi or mini)
+        elif nom == "--erreurs":
+            config.taux_erreur = float(valeur)
+        elif nom == "--429":
+            config.taux_429 = float(valeur)
+        elif nom == "--rps":
+            config.requetes_par_seconde = float(valeur)
+        elif nom == "--corpus":
+            config.dossier_corpus = valeur
+        elif nom == "--graine":
+            config.graine = int(valeur)
+        else:
+            raise SystemExit(f"Argument inconnu : {nom}")
+        i += 2
+    return config, port
+
+def main():
+    config, port = lire_arguments(sys.argv[1:])
+    serveur = ServeurFixtures(("127.0.0.1", port), config)
+
+    print("🧪 SERVEUR DE FIXTURES BABELIO / OPENLIBRARY / GOOGLE BOOKS")
+    print("=" * 60)
+    for service, url in serveur.urls_services().items():
+        print(f"   {service:12s} → {url}")
+    print(f"⏱️ Latence : {config.latence_min_ms:.0f}-{config.latence_max_ms:.0f} ms | "
+          f"500 : {config.taux_erreur:.1%} | 429 : {config.taux_429:.1%} | "
+          f"débit max : {config.requetes_par_seconde or '∞'} req/s")
+
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Arrêt du serveur")
+    finally:
+        serveur.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,13 @@ Gestion complète des utilisateurs : inscription, connexion, profil
 """
 
 import streamlit as st
-import requests
 import pandas as pd
 import plotly.express as px
 from datetime import datetime
 import json
 
+from client_api import appel_api, invalider_cache, requetes_paralleles, PaginateurAPI
+
 # Configuration
 st.set_page_config(
     page_title="🔐 DataBook - Authentification",
@@ -18,8 +19,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-API_BASE_URL = "http://localhost:8000"
-
 # CSS personnalisé
 st.markdown("""
 <style>
@@ -65,29 +64,31 @@ st.markdown("""
 
 def check_api_status():
     """Vérifier l'état de l'API"""
-    try:
-        response = requests.get(f"{API_BASE_URL}/health", timeout=5)
-        return response.status_code == 200, response.json() if response.status_code == 200 else None
-    except:
-        return False, None
+    status_code, response = appel_api("/health")
+    return status_code == 200, response if status_code == 200 else None
 
 def make_api_request(endpoint, method="GET", headers=None, data=None, params=None):
-    """Faire une requête à l'API"""
-    try:
-        url = f"{API_BASE_URL}{endpoint}"
-        
-        if method == "GET":
-            response = requests.get(url, headers=headers, params=params, timeout=10)
-        elif method == "POST":
-            response = requests.post(url, headers=headers, json=data, timeout=10)
-        elif method == "PUT":
-            response = requests.put(url, headers=headers, json=data, timeout=10)
-        elif method == "DELETE":
-            response = requests.delete(url, headers=headers, timeout=10)
-        
-        return response.status_code, response.json() if response.headers.get('content-type', '').startswith('application/json') else response.text
-    except Exception as e:
-        return 500, f"Erreur: {str(e)}"
+    """Faire une requête à l'API (session poolée, GET mis en cache, voir client_api)"""
+    return appel_api(endpoint, method=method, headers=headers, data=data, params=params)
+
+def donnees_dashboard(section, endpoint, headers=None):
+    """
+    Section du snapshot précalculé du dashboard (/dashboard/snapshot)
+
+    Le snapshot regroupe en une seule réponse les analytics et statistiques
+    affichés par l'interface ; l'endpoint d'origine n'est appelé que si la
+    section est absente (snapshot pas encore généré, section en échec).
+    """
+    if st.session_state.get("token"):
+        status_code, snapshot = make_api_request(
+            "/dashboard/snapshot",
+            headers={"Authorization": f"Bearer {st.session_state.token}"}
+        )
+        if status_code == 200 and isinstance(snapshot, dict):
+            contenu = snapshot.get("sections", {}).get(section)
+            if contenu is not None:
+                return 200, contenu
+    return make_api_request(endpoint, headers=headers)
 
 def register_user(email, password, first_name, last_name):
     """Inscription d'un nouvel utilisateur"""
@@ -207,6 +208,12 @@ def show_login_page():
 def show_main_app():
     """Application principale (utilisateur connecté)"""
     
+    # Profil et état de l'API sont indépendants : récupérés en parallèle
+    panneaux = requetes_paralleles({
+        "profil": {"endpoint": "/auth/me", "headers": {"Authorization": f"Bearer {st.session_state.token}"}},
+        "sante": {"endpoint": "/health"},
+    })
+    
     # En-tête avec info utilisateur
     col1, col2 = st.columns([3, 1])
     
@@ -221,7 +228,7 @@ def show_main_app():
     with col2:
         # Profil utilisateur
         if st.session_state.get("token"):
-            status_code, user_data = get_user_profile(st.session_state.token)
+            status_code, user_data = panneaux["profil"]
             
             if status_code == 200:
                 st.markdown(f"""
@@ -247,8 +254,8 @@ def show_main_app():
     with st.sidebar:
         st.header("📊 État de l'API")
         
-        api_status, health_data = check_api_status()
-        if api_status and health_data:
+        status_sante, health_data = panneaux["sante"]
+        if status_sante == 200 and health_data:
             databases = health_data.get("databases", {})
             
             # PostgreSQL
@@ -268,6 +275,10 @@ def show_main_app():
         else:
             st.error("❌ API non accessible")
         
+        if st.button("🔄 Rafraîchir les données", use_container_width=True):
+            invalider_cache()
+            st.rerun()
+        
         st.divider()
         
         # Navigation
@@ -312,34 +323,25 @@ def show_home_dashboard():
     
     col1, col2, col3, col4 = st.columns(4)
     
-    # Test rapide des endpoints (sans headers d'abord)
-    status_summary, data_summary = make_api_request("/summary")
+    # Snapshot du dashboard d'abord, /summary (sans puis avec headers) en repli
+    status_summary, data_summary = donnees_dashboard("mongo_resume", "/summary")
+    if not (status_summary == 200 and isinstance(data_summary, dict)):
+        status_summary, data_summary = make_api_request("/summary", headers=headers)
+    summary_ok = status_summary == 200 and isinstance(data_summary, dict)
     
     with col1:
-        if status_summary == 200 and isinstance(data_summary, dict):
+        if summary_ok:
             livres_count = data_summary.get("data", {}).get("livres_mongodb", "N/A")
             st.metric("📚 Livres MongoDB", livres_count)
         else:
-            # Fallback : essayer avec headers
-            status_summary_auth, data_summary_auth = make_api_request("/summary", headers=headers)
-            if status_summary_auth == 200 and isinstance(data_summary_auth, dict):
-                livres_count = data_summary_auth.get("data", {}).get("livres_mongodb", "N/A")
-                st.metric("📚 Livres MongoDB", livres_count)
-            else:
-                st.metric("📚 Livres MongoDB", "🔍")
+            st.metric("📚 Livres MongoDB", "🔍")
     
     with col2:
-        if status_summary == 200 and isinstance(data_summary, dict):
+        if summary_ok:
             critiques_count = data_summary.get("data", {}).get("critiques_babelio", "N/A")
             st.metric("💬 Critiques", critiques_count)
         else:
-            # Fallback
-            status_summary_auth, data_summary_auth = make_api_request("/summary", headers=headers)
-            if status_summary_auth == 200 and isinstance(data_summary_auth, dict):
-                critiques_count = data_summary_auth.get("data", {}).get("critiques_babelio", "N/A")
-                st.metric("💬 Critiques", critiques_count)
-            else:
-                st.metric("💬 Critiques", "🔍")
+            st.metric("💬 Critiques", "🔍")
     
     with col3:
         st.metric("🔐 Authentification", "JWT")
@@ -399,7 +401,7 @@ def show_mongo_books():
         
         if search_query:
             # Recherche
-            params = {"q": search_query, "limit": limit}
+            params = {"q": search_query, "limit": limit, "fields": "detail"}
             status_code, response = make_api_request("/mongo-livres/livres/search", params=params)
             
             if status_code == 200:
@@ -427,36 +429,42 @@ def show_mongo_books():
             else:
                 st.error(f"❌ Erreur de recherche: {response}")
         else:
-            # Liste générale
-            params = {"limit": limit}
-            status_code, response = make_api_request("/mongo-livres/livres", params=params)
+            vue_livres = st.radio("Affichage", ["🗂️ Grille", "📖 Fiches"], horizontal=True, key="vue_livres_mongo")
+            if vue_livres == "🗂️ Grille":
+                afficher_grille_livres(
+                    "grille_mongo",
+                    "/mongo-livres/livres",
+                    params={"fields": "card"},
+                    colonnes=["titre", "auteurs", "note", "tous_les_genres", "langue"],
+                    param_decalage="skip",
+                    extraire_total=lambda reponse: reponse.get("pagination", {}).get("total")
+                )
+            else:
+                # Liste générale
+                params = {"limit": limit, "fields": "detail"}
+                status_code, response = make_api_request("/mongo-livres/livres", params=params)
             
-            if status_code == 200:
-                # L'API retourne les données dans response["data"] pour la liste
-                livres = response.get("data", [])
-                st.info(f"📚 Affichage de {len(livres)} livres")
+                if status_code == 200:
+                    # L'API retourne les données dans response["data"] pour la liste
+                    livres = response.get("data", [])
+                    st.info(f"📚 Affichage de {len(livres)} livres")
                 
-                # Affichage des livres en cards
-                if livres:
-                    for livre in livres:
-                        # Gérer les auteurs
-                        auteurs = livre.get('auteurs', ['N/A'])
-                        if isinstance(auteurs, list):
-                            auteurs_str = ', '.join(auteurs) if auteurs else 'N/A'
-                        else:
-                            auteurs_str = str(auteurs)
+                    # Affichage des livres en cards
+                    if livres:
+                        for livre in livres:
+                            # Gérer les auteurs
+                            auteurs = livre.get('auteurs', ['N/A'])
+                            if isinstance(auteurs, list):
+                                auteurs_str = ', '.join(auteurs) if auteurs else 'N/A'
+                            else:
+                                auteurs_str = str(auteurs)
                         
-                        with st.expander(f"📖 {livre.get('titre', 'Sans titre')} - {auteurs_str}"):
-                            display_livre_details(livre)
-                    
-                    # Option pour afficher en tableau aussi
-                    if st.checkbox("🗂️ Afficher en tableau"):
-                        df = pd.DataFrame(livres)
-                        st.dataframe(df, use_container_width=True)
+                            with st.expander(f"📖 {livre.get('titre', 'Sans titre')} - {auteurs_str}"):
+                                display_livre_details(livre)
+                    else:
+                        st.warning("Aucun livre trouvé dans la réponse")
                 else:
-                    st.warning("Aucun livre trouvé dans la réponse")
-            else:
-                st.error(f"❌ Impossible de charger les livres: {response}")
+                    st.error(f"❌ Impossible de charger les livres: {response}")
     
     with tab2:
         # === PAGE CRITIQUES ===
@@ -537,7 +545,7 @@ def show_mongo_books():
         st.info("🆕 **Analytics MongoDB** - Graphiques et statistiques des données")
         
         # Analytics complets
-        status_code, response = make_api_request("/mongo-extras/analytics")
+        status_code, response = donnees_dashboard("mongo_analytics", "/mongo-extras/analytics")
         
         if status_code == 200:
             analytics = response.get("analytics", {})
@@ -648,7 +656,7 @@ def show_mongo_books():
                 
                 with col2:
                     # Métriques générales
-                    status_summary, summary_data = make_api_request("/summary")
+                    status_summary, summary_data = donnees_dashboard("mongo_resume", "/summary")
                     if status_summary == 200:
                         data = summary_data.get("data", {})
                         st.metric("📚 Total Livres", data.get("livres_mongodb", 0))
@@ -665,6 +673,52 @@ def show_mongo_books():
         else:
             st.error(f"❌ Impossible de charger les analytics: {response}")
 
+def afficher_grille_livres(cle, endpoint, params=None, colonnes=None, headers=None, param_decalage="offset",
+                           extraire=None, extraire_total=None):
+    """Grille paginée côté serveur : seule la page courante est rendue, la suivante est préchargée"""
+    taille_page = st.selectbox("Lignes par page", [25, 50, 100], index=1, key=f"{cle}_taille_page")
+    
+    # Nouveau paginateur quand la requête change (filtres, taille de page)
+    paginateur = st.session_state.get(f"{cle}_paginateur")
+    if paginateur is None or not paginateur.meme_requete(endpoint, params, taille_page):
+        paginateur = PaginateurAPI(endpoint, params, headers, taille_page, param_decalage, extraire, extraire_total)
+        st.session_state[f"{cle}_paginateur"] = paginateur
+        st.session_state[f"{cle}_page"] = 0
+    
+    numero = st.session_state.get(f"{cle}_page", 0)
+    lignes = paginateur.page(numero)
+    if paginateur.erreur is not None:
+        st.error(f"❌ Impossible de charger les livres: {paginateur.erreur}")
+        return
+    nombre_pages = paginateur.nombre_pages()
+    
+    col_precedente, col_info, col_suivante = st.columns([1, 2, 1])
+    with col_precedente:
+        if st.button("◀ Précédente", disabled=numero == 0, key=f"{cle}_precedente", use_container_width=True):
+            st.session_state[f"{cle}_page"] = numero - 1
+            st.rerun()
+    with col_suivante:
+        derniere = nombre_pages is not None and numero >= nombre_pages - 1
+        if st.button("Suivante ▶", disabled=derniere, key=f"{cle}_suivante", use_container_width=True):
+            st.session_state[f"{cle}_page"] = numero + 1
+            st.rerun()
+    with col_info:
+        info = f"Page {numero + 1}" + (f" / {nombre_pages}" if nombre_pages else "")
+        if paginateur.total is not None:
+            info += f" — {paginateur.total} livres"
+        st.caption(info)
+    
+    if lignes:
+        df = pd.DataFrame(lignes)
+        if colonnes:
+            df = df[[colonne for colonne in colonnes if colonne in df.columns]]
+        # st.dataframe virtualise l'affichage : seules les lignes visibles sont dessinées
+        st.dataframe(df, use_container_width=True, hide_index=True, height=min(600, 35 * (len(df) + 1) + 3))
+    else:
+        st.info("Aucun livre sur cette page")
+    
+    paginateur.precharger(numero + 1)
+
 def display_livre_details(livre):
     """Afficher les détails complets d'un livre avec ses critiques"""
     
@@ -954,7 +1008,7 @@ def display_critiques_detailed(critiques):
 def show_critiques_stats():
     """Afficher les statistiques des critiques"""
     # Récupérer les analytics pour les stats
-    status_code, response = make_api_request("/mongo-extras/analytics")
+    status_code, response = donnees_dashboard("mongo_analytics", "/mongo-extras/analytics")
     
     if status_code == 200:
         analytics = response.get("analytics", {})
@@ -973,17 +1027,30 @@ def show_critiques_stats():
             with col4:
                 st.metric("🗳️ Total des votes", f"{stats.get('total_votes', 0):,}")
         
-        # Graphiques supplémentaires si on a des données de distribution
+        # Distribution réelle : histogramme et quantiles calculés côté serveur
         st.subheader("📈 Distribution des notes")
         
-        # Simuler une distribution des notes (à adapter selon l'API)
-        import numpy as np
-        notes_sample = np.random.normal(3.5, 1, 1000)  # Simulation temporaire
-        notes_sample = np.clip(notes_sample, 0, 5)
+        nb_classes = st.slider("Nombre de classes", 5, 50, 20, key="bins_distribution_notes")
+        status_distribution, distribution = make_api_request("/mongo-extras/critiques/distribution", params={"bins": nb_classes})
         
-        fig = px.histogram(x=notes_sample, nbins=20, title="Distribution des notes des critiques")
-        fig.update_layout(xaxis_title="Note", yaxis_title="Nombre de critiques")
-        st.plotly_chart(fig, use_container_width=True)
+        if status_distribution == 200 and distribution.get("classes"):
+            df_classes = pd.DataFrame(distribution["classes"])
+            df_classes["note"] = (df_classes["borne_inf"] + df_classes["borne_sup"]) / 2
+            largeur = float(df_classes["borne_sup"].iloc[0] - df_classes["borne_inf"].iloc[0])
+            
+            fig = px.bar(df_classes, x="note", y="nombre", title="Distribution des notes des critiques",
+                         hover_data=["borne_inf", "borne_sup"])
+            fig.update_traces(width=largeur)
+            fig.update_layout(xaxis_title="Note", yaxis_title="Nombre de critiques", bargap=0.05)
+            st.plotly_chart(fig, use_container_width=True)
+            
+            quantiles_notes = distribution.get("quantiles", {})
+            if quantiles_notes:
+                colonnes_quantiles = st.columns(len(quantiles_notes))
+                for colonne, (probabilite, valeur) in zip(colonnes_quantiles, quantiles_notes.items()):
+                    colonne.metric(f"P{round(float(probabilite) * 100)}", f"{valeur:.2f}" if valeur is not None else "N/A")
+        else:
+            st.info("Aucune note disponible pour la distribution")
     
     else:
         st.error("❌ Impossible de récupérer les statistiques")
@@ -1020,54 +1087,65 @@ def show_postgres_data():
         if search_query:
             params["search"] = search_query
         
-        # Appel API pour les livres
-        status_code, response = make_api_request("/postgres/livres", params=params)
+        vue_livres = st.radio("Affichage", ["🗂️ Grille", "📖 Fiches"], horizontal=True, key="vue_livres_postgres")
+        if vue_livres == "🗂️ Grille":
+            params.pop("limit")
+            afficher_grille_livres(
+                "grille_postgres",
+                "/postgres/livres",
+                params=params,
+                colonnes=["id_livre", "titre", "sous_titre", "annee_publication", "nombre_pages", "isbn_13", "format_physique"],
+                param_decalage="offset"
+            )
+        else:
+            # Appel API pour les livres
+            status_code, response = make_api_request("/postgres/livres", params=params)
         
-        if status_code == 200:
-            livres = response.get("data", response) if isinstance(response, dict) else response
-            if livres:
-                st.success(f"✅ {len(livres)} livre(s) trouvé(s)")
+            if status_code == 200:
+                livres = response.get("data", response) if isinstance(response, dict) else response
+                if livres:
+                    st.success(f"✅ {len(livres)} livre(s) trouvé(s)")
                 
-                # Affichage des livres
-                for livre in livres:
-                    with st.expander(f"📖 {livre.get('titre', 'Titre inconnu')} - {livre.get('auteur_nom', 'Auteur inconnu')}"):
-                        col1, col2 = st.columns([2, 1])
+                    # Affichage des livres
+                    for livre in livres:
+                        with st.expander(f"📖 {livre.get('titre', 'Titre inconnu')} - {livre.get('auteur_nom', 'Auteur inconnu')}"):
+                            col1, col2 = st.columns([2, 1])
                         
-                        with col1:
-                            st.write(f"**📖 Titre:** {livre.get('titre', 'N/A')}")
-                            st.write(f"**✍️ Auteur:** {livre.get('auteur_nom', 'N/A')} {livre.get('auteur_prenom', '')}")
-                            st.write(f"**📘 Sous-titre:** {livre.get('sous_titre', 'N/A')}")
-                            if livre.get('description'):
-                                description = livre['description'][:200] + "..." if len(livre.get('description', '')) > 200 else livre['description']
-                                st.write(f"**📝 Description:** {description}")
-                            st.write(f"**🏢 Éditeur:** {livre.get('editeur_nom', 'N/A')}")
-                            st.write(f"**🌍 Pays:** {livre.get('editeur_pays', 'N/A')}")
+                            with col1:
+                                st.write(f"**📖 Titre:** {livre.get('titre', 'N/A')}")
+                                st.write(f"**✍️ Auteur:** {livre.get('auteur_nom', 'N/A')} {livre.get('auteur_prenom', '')}")
+                                st.write(f"**📘 Sous-titre:** {livre.get('sous_titre', 'N/A')}")
+                                if livre.get('description'):
+                                    description = livre['description'][:200] + "..." if len(livre.get('description', '')) > 200 else livre['description']
+                                    st.write(f"**📝 Description:** {description}")
+                                st.write(f"**🏢 Éditeur:** {livre.get('editeur_nom', 'N/A')}")
+                                st.write(f"**🌍 Pays:** {livre.get('editeur_pays', 'N/A')}")
                         
-                        with col2:
-                            if livre.get('isbn_10'):
-                                st.write(f"**📚 ISBN-10:** {livre['isbn_10']}")
-                            if livre.get('isbn_13'):
-                                st.write(f"**📚 ISBN-13:** {livre['isbn_13']}")
-                            if livre.get('date_publication'):
-                                st.write(f"**📅 Publication:** {livre['date_publication']}")
-                            if livre.get('annee_publication'):
-                                st.write(f"**📅 Année:** {livre['annee_publication']}")
-                            if livre.get('nombre_pages'):
-                                st.write(f"**📄 Pages:** {livre['nombre_pages']}")
-                            if livre.get('format_physique'):
-                                st.write(f"**📏 Format:** {livre['format_physique']}")
-                            if livre.get('langue_nom'):
-                                st.write(f"**🌐 Langue:** {livre['langue_nom']}")
-                            if livre.get('sujet_nom'):
-                                st.write(f"**🏷️ Sujet:** {livre['sujet_nom']}")
+                            with col2:
+                                if livre.get('isbn_10'):
+                                    st.write(f"**📚 ISBN-10:** {livre['isbn_10']}")
+                                if livre.get('isbn_13'):
+                                    st.write(f"**📚 ISBN-13:** {livre['isbn_13']}")
+                                if livre.get('date_publication'):
+                                    st.write(f"**📅 Publication:** {livre['date_publication']}")
+                                if livre.get('annee_publication'):
+                                    st.write(f"**📅 Année:** {livre['annee_publication']}")
+                                if livre.get('nombre_pages'):
+                                    st.write(f"**📄 Pages:** {livre['nombre_pages']}")
+                                if livre.get('format_physique'):
+                                    st.write(f"**📏 Format:** {livre['format_physique']}")
+                                if livre.get('langue_nom'):
+                                    st.write(f"**🌐 Langue:** {livre['langue_nom']}")
+                                if livre.get('sujet_nom'):
+                                    st.write(f"**🏷️ Sujet:** {livre['sujet_nom']}")
+                else:
+                    st.info("Aucun livre PostgreSQL trouvé dans le schéma test")
             else:
-                st.info("Aucun livre PostgreSQL trouvé dans le schéma test")
-        else:
-            st.error(f"❌ Erreur lors de la récupération des livres: {response}")
+                st.error(f"❌ Erreur lors de la récupération des livres: {response}")
         
         # Statistiques PostgreSQL réelles (nécessite JWT)
         st.subheader("📊 Statistiques PostgreSQL - Vraies Données")
-        status_code, response = make_api_request("/postgres/livres/stats/general", headers=jwt_headers)
+        status_code, response = donnees_dashboard("postgres_stats_generales", "/postgres/livres/stats/general", headers=jwt_headers)
         
         if status_code == 200:
             stats = response
@@ -1091,7 +1169,7 @@ def show_postgres_data():
         st.info("🆕 **Nouveau !** Analytics PostgreSQL équivalents à MongoDB")
         
         # Récupérer les analytics PostgreSQL
-        status_analytics, analytics_response = make_api_request("/postgres-extras/analytics", headers=jwt_headers)
+        status_analytics, analytics_response = donnees_dashboard("postgres_analytics", "/postgres-extras/analytics", headers=jwt_headers)
         
         if status_analytics == 200 and analytics_response.get("success"):
             analytics = analytics_response.get("analytics", {})
@@ -1248,7 +1326,7 @@ def show_postgres_data():
                         st.metric("📈 Total avec pages", f"{stats_pages.get('total_avec_pages', 0):,}")
                     
                     # Récupérer la distribution des pages
-                    status_pages, pages_response = make_api_request("/postgres-extras/livres/stats-pages", headers=jwt_headers)
+                    status_pages, pages_response = donnees_dashboard("postgres_pages", "/postgres-extras/livres/stats-pages", headers=jwt_headers)
                     if status_pages == 200 and pages_response.get("success"):
                         distribution = pages_response.get("distribution", [])
                         if distribution:
@@ -1394,6 +1472,7 @@ def show_user_profile():
         
         with col1:
             if st.button("🔄 Rafraîchir le profil", use_container_width=True):
+                invalider_cache()
                 st.rerun()
         
         with col2: